@@ -0,0 +1,957 @@
+"""
+Benchmark suite for the hot paths of the inventory process, run on synthetic feature class records.
+
+The synthetic records are shaped like the DoIT geodatabase contents: wide tables dominated by string fields, many null
+and blank values, and occasional long text values. No arcpy or database access is required so the suite runs on any
+machine with python.
+Each benchmark is run several times and the fastest run is kept. Throughput is recorded as rows per second and fields
+per second, where fields per second is the number of field values handled per second. The benchmarks are:
+ null_inspection_reference, char_usage_reference: the row by row UtilityClass functions, on record dictionaries
+ columnar_profiling: the ColumnarProfilingEngine, checked against the reference results
+ columnar_profiling_statistics: the ColumnarProfilingEngine with field statistics, checked against the reference
+  results and against statistics computed exactly, with the distinct count estimates allowed a 5% error
+ columnar_profiling_domains: the ColumnarProfilingEngine validating the string fields against a coded value domain
+  and the numeric fields against a range domain, checked against the reference results and exact out of domain counts
+ field_profile_merge: serializing the FieldProfileAccumulators of the columnar profiling of parts of the synthetic
+  records, with field statistics and domain validation, deserializing them and merging them into one profile per
+  field, checked against the profile of a single pass over all the records, with the mean and standard deviation
+  within floating point error and the frequent value counts compared while under the summary capacity. The merge
+  property on random batches is tested in tests/test_ProfileAccumulator.py
+ make_dict_zipper: zipping headers with record values into dictionaries
+ fc_object_serialization, field_details_serialization: the list, string list and csv string methods of the
+  FeatureClassObject and FeatureClassFieldDetails
+ csv_write_original, csv_write_sink: the original csv write path, reopening the file per feature dataset, and the
+  CSVOutputSink
+ godi_rename_values, godi_rename_series: the RenameEngine of the GODI results cleaning, which replaced revise_names,
+  on single values and, when pandas is installed, on a pandas series
+ run_diff_classification: the InventoryDiffEngine classifying field rows against the snapshot of a previous run, with
+  rows changed, added and removed, checked against the changes made
+ geometry_profiling: the GeometryProfilingEngine on WKB points, lines, polygons and multipart lines, in both byte
+  orders and with Z values, including null, empty and invalid geometries, checked against the geometry values
+ metadata_serial, metadata_prefetch: gathering the feature class lists, existence, record counts and describes of a
+  SyntheticWorkspace whose calls wait a fixed latency, as round trips to a server do, one call at a time and by the
+  MetadataCatalog prefetch with its thread pool, the prefetch checked against the serial results
+ task_scheduling: the InventoryScheduler estimating the cost of feature classes of skewed record counts and ordering
+  them most costly first, checked to estimate a makespan no longer than that of name order
+ synthetic_inspection: inspection of a feature class of a SyntheticWorkspace, the whole per feature class pipeline
+ partitioned_inspection: the same inspection with field statistics and geometry profiling, scanned as object id
+  range partitions by a pool of threads. Checked against a single cursor scan on a stub workspace whose first cursor
+  of every partition fails part way, so that every partition is retried, for equal null counts, max lengths,
+  geometry profile, distinct counts, min and max, and mean and standard deviation within floating point error
+ sqlite_cursor_inspection, sqlite_pushdown_inspection: inspection of the synthetic records loaded into a SQLite table,
+  profiled through the cursor and by SQL pushdown, both checked against the reference results
+Baseline: results are compared with the stored baseline file and the process exits with status 1 when the throughput
+ of any benchmark drops by more than the threshold. A reference baseline, with its calibration figure, is kept with
+ the code. Save a baseline on the machine of interest with --save-baseline; a missing baseline file fails the run
+ otherwise, so that a regression cannot pass unnoticed. Use --scale to shrink the workload for a quick run; throughput
+ compares best at the scale of the baseline.
+Calibration: a fixed pure python workload is timed at the start and end of the run and stored with the baseline. The
+ baseline throughputs are scaled by the ratio of the calibration speeds before comparison, so that a machine running
+ uniformly slower or faster than when the baseline was saved, as shared hosts do, is not reported as a regression.
+ Turn off with --no-calibration when comparing across code changes on a quiet, dedicated machine.
+"""
+
+
+def main():
+
+    # IMPORTS
+    from collections import namedtuple
+    from UtilityClass import UtilityClassFunctionality as myutil
+    import argparse
+    import collections
+    import ColumnarProfiler_Class
+    import contextlib
+    import FeatureClassInspection_Class
+    import FeatureClassObjects_Class
+    import functools
+    import gc
+    import GeodatabaseDomain_Class
+    import GeometryProfiler_Class
+    import InventoryDiff_Class
+    import InventoryScheduler_Class
+    import itertools
+    import json
+    import math
+    import MetadataCatalog_Class
+    import os
+    import OutputSink_Class
+    import platform
+    import ProfileAccumulator_Class
+    import random
+    import sqlite3
+    import struct
+    import sys
+    import tempfile
+    import threading
+    import time
+    import Workspace_Class
+
+    # VARIABLES
+    CONSTANT = namedtuple("CONSTANT", "value")
+    BenchmarkResult = namedtuple("BenchmarkResult", "name rows fields seconds")
+    SyntheticField = namedtuple("SyntheticField", "name type")
+
+        # CONSTANTS
+    _ROOT_PATH_FOR_PROJECT = CONSTANT(value=os.path.dirname(os.path.abspath(__file__)))
+    BASELINE_FILE = CONSTANT(value=os.path.join(_ROOT_PATH_FOR_PROJECT.value,
+                                                "BenchmarkInventoryHotPaths_BASELINE.json"))
+    CALIBRATION_LOOP_COUNT = CONSTANT(value=1000000)
+    DATABASE_FLAG_NUMERIC = CONSTANT(value=-9999)
+    DOMAIN_CODED_VALUE_KEYS = CONSTANT(value=frozenset(("Baltimore", "Anne Arundel County")))
+    DOMAIN_RANGE = CONSTANT(value=(0.0, 900.0))
+    FIELD_RECORDS_PER_FEATURE_DATASET = CONSTANT(value=2000)
+    METADATA_LATENCY_SECONDS = CONSTANT(value=0.002)
+    METADATA_PREFETCH_THREAD_COUNT = CONSTANT(value=8)
+    NUMBER_OF_CATALOG_FEATURE_CLASSES = CONSTANT(value=50)
+    NUMBER_OF_CATALOG_FEATURE_DATASETS = CONSTANT(value=4)
+    NULL_RATE = CONSTANT(value=0.3)
+    NUMBER_OF_FC_RECORDS = CONSTANT(value=20000)
+    NUMBER_OF_FIELD_RECORDS = CONSTANT(value=500000)
+    NUMBER_OF_GEOMETRIES = CONSTANT(value=50000)
+    NUMBER_OF_MERGE_PARTS = CONSTANT(value=8)
+    NUMBER_OF_NUMERIC_FIELDS = CONSTANT(value=10)
+    NUMBER_OF_RENAME_VALUES = CONSTANT(value=500000)
+    NUMBER_OF_SCHEDULED_TASKS = CONSTANT(value=20000)
+    NUMBER_OF_ROWS = CONSTANT(value=100000)
+    NUMBER_OF_STRING_FIELDS = CONSTANT(value=30)
+    PARTITION_COUNT = CONSTANT(value=8)
+    PARTITION_THREAD_COUNT = CONSTANT(value=4)
+    RANDOM_SEED = CONSTANT(value=20180517)
+    RENAME_MAPPING_FILE = CONSTANT(value=os.path.join(_ROOT_PATH_FOR_PROJECT.value, "ResultsWranglingScripts",
+                                                      "RenameMappings_SportVenues.json"))
+    REPEAT_COUNT = CONSTANT(value=3)
+    REGRESSION_THRESHOLD = CONSTANT(value=0.20)
+    STATISTICS_DISTINCT_ERROR = CONSTANT(value=0.05)
+
+        # Command line arguments
+    parser = argparse.ArgumentParser(description="Benchmark the inventory hot paths against a stored baseline")
+    parser.add_argument("--baseline", default=BASELINE_FILE.value, help="Path to the baseline json file")
+    parser.add_argument("--no-calibration", action="store_true",
+                        help="Compare with the baseline throughputs as stored, not scaled by the calibration speed")
+    parser.add_argument("--repeat", type=int, default=REPEAT_COUNT.value,
+                        help="Number of runs of each benchmark, the fastest is kept")
+    parser.add_argument("--save-baseline", action="store_true", help="Save the results of this run as the baseline")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier of the synthetic record counts")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD.value,
+                        help="Fractional drop in throughput from the baseline that fails the suite")
+    args = parser.parse_args()
+
+    # FUNCTIONS
+    def scaled(count):
+        """Scale a synthetic record count by the --scale argument and return integer, at least 1"""
+        return max(1, int(count * args.scale))
+
+    def build_synthetic_fields():
+        """Build the field list with string fields first, then numeric fields, and return list"""
+        string_fields = [SyntheticField(name="TEXT_{}".format(i), type="String")
+                         for i in range(NUMBER_OF_STRING_FIELDS.value)]
+        numeric_fields = [SyntheticField(name="NUM_{}".format(i), type="Double")
+                          for i in range(NUMBER_OF_NUMERIC_FIELDS.value)]
+        return string_fields + numeric_fields
+
+    def build_synthetic_rows(fields, row_count, randomizer):
+        """Build record tuples with nulls, blanks, whitespace, short and long text values and return list"""
+        text_choices = ["", " ", "   ", "Baltimore", "Anne Arundel County", "x" * 255, "Lorem ipsum " * 40]
+        rows = []
+        for _ in range(row_count):
+            row = []
+            for field in fields:
+                if randomizer.random() < NULL_RATE.value:
+                    row.append(None)
+                elif field.type == "String":
+                    row.append(randomizer.choice(text_choices))
+                else:
+                    row.append(randomizer.random() * 1000.0)
+            rows.append(tuple(row))
+        return rows
+
+    def build_synthetic_fc_objects(count, randomizer):
+        """Build distinct feature class objects with stats populated and return list"""
+        fc_objects_list = []
+        for i in range(count):
+            fc_id = "Production.SDE.Synthetic_FD.Synthetic_FC_{}".format(i)
+            fc_object = FeatureClassObjects_Class.FeatureClassObject(
+                fc_ID=fc_id, feature_dataset_name="Synthetic_FD", feature_class_name="Synthetic_FC_{}".format(i),
+                date_export="2018-05-17", row_id=myutil.generate_id_from_args(fc_id, "2018-05-17"))
+            fc_object.data_type = "FeatureClass"
+            fc_object.shape_type = randomizer.choice(["Point", "Polyline", "Polygon"])
+            fc_object.spatial_ref_name = "NAD_1983_StatePlane_Maryland_FIPS_1900_Meters"
+            fc_object.total_field_count = 40
+            fc_object.total_record_count = randomizer.randrange(1000000)
+            fc_object.total_value_count = float(fc_object.total_record_count * 40)
+            fc_object.total_null_value_count = randomizer.randrange(int(fc_object.total_value_count) + 1)
+            fc_object.percent_null = myutil.calculate_percent(fc_object.total_null_value_count,
+                                                              fc_object.total_value_count)
+            fc_objects_list.append(fc_object)
+        return fc_objects_list
+
+    def build_synthetic_field_details(count, randomizer):
+        """Build distinct field details objects, with commas in a few aliases, and return list"""
+        field_details_list = []
+        for i in range(count):
+            field_type = randomizer.choice(["String", "Double", "Integer", "Date"])
+            field_description = Workspace_Class.FieldDescription(
+                name="FIELD_{}".format(i), baseName="FIELD_{}".format(i),
+                aliasName="City, State" if randomizer.random() < 0.05 else "Parcel ID", type=field_type,
+                defaultValue=None, domain=randomizer.choice(["", "YesNo"]), isNullable=True, length=255,
+                precision=0, scale=0, required=False)
+            fc_id = "Production.SDE.Synthetic_FD.Synthetic_FC_{}".format(i // 40)
+            field_id = myutil.generate_id_from_args(fc_id, field_description.name)
+            field_details = FeatureClassObjects_Class.FeatureClassFieldDetails(
+                field_id=field_id, fc_id=fc_id, field_object=field_description, total_record_count=125000,
+                total_null_value_count=randomizer.randrange(125000), percent_null=randomizer.random() * 100.0,
+                date_export="2018-05-17", row_id=myutil.generate_id_from_args(field_id, "2018-05-17"))
+            field_details.field_max_chars_used = randomizer.randrange(255)
+            field_details_list.append(field_details)
+        return field_details_list
+
+    def build_synthetic_godi_names(count, rename_keys, randomizer):
+        """Build GODI results names, a twentieth of them needing a rename, and return list"""
+        names = []
+        for i in range(count):
+            if randomizer.random() < 0.05:
+                names.append("Production.SDE.{}".format(randomizer.choice(rename_keys)))
+            else:
+                names.append("Production.SDE.THEME_Dataset{}_DOIT".format(i % 5000))
+        return names
+
+    def run_null_inspection_reference(fields, row_dictionaries):
+        """Count nulls with the row by row reference function and return dictionary"""
+        null_tracker_dict = {field.name: DATABASE_FLAG_NUMERIC.value for field in fields}
+        for row_dictionary in row_dictionaries:
+            myutil.inspect_record_for_null_values(field_null_count_dict=null_tracker_dict,
+                                                  record_dictionary=row_dictionary,
+                                                  database_flag=DATABASE_FLAG_NUMERIC.value)
+        return null_tracker_dict
+
+    def run_char_usage_reference(fields, row_dictionaries):
+        """Track max character lengths with the row by row reference function and return dictionary"""
+        field_name_to_obj_dict = {field.name: field for field in fields}
+        char_tracker_dict = {field.name: DATABASE_FLAG_NUMERIC.value for field in fields
+                             if field.type.lower() == "string"}
+        for row_dictionary in row_dictionaries:
+            myutil.inspect_string_fields_for_char_usage(field_char_count_dict=char_tracker_dict,
+                                                        record_dictionary=row_dictionary,
+                                                        field_name_to_field_object_dictionary=field_name_to_obj_dict)
+        return char_tracker_dict
+
+    def run_columnar_profiling(fields, rows):
+        """Profile with the columnar engine and return tuple of null and char dictionaries"""
+        engine = ColumnarProfiler_Class.ColumnarProfilingEngine(
+            field_names=[field.name for field in fields],
+            string_field_names=[field.name for field in fields if field.type.lower() == "string"],
+            database_flag=DATABASE_FLAG_NUMERIC.value)
+        engine.profile_cursor(cursor=rows)
+        return engine.null_counts, engine.max_char_lengths
+
+    def run_columnar_profiling_with_statistics(fields, rows):
+        """Profile with the columnar engine and field statistics and return tuple of null, char, stats dictionaries"""
+        engine = ColumnarProfiler_Class.ColumnarProfilingEngine(
+            field_names=[field.name for field in fields],
+            string_field_names=[field.name for field in fields if field.type.lower() == "string"],
+            database_flag=DATABASE_FLAG_NUMERIC.value,
+            field_types=[field.type for field in fields])
+        engine.profile_cursor(cursor=rows)
+        return engine.null_counts, engine.max_char_lengths, engine.get_field_statistics()
+
+    def build_synthetic_domain_index():
+        """Build a domain index of a coded value domain and a range domain for the synthetic fields and return it"""
+        return GeodatabaseDomain_Class.GeodatabaseDomainIndex(domain_objects=[
+            Workspace_Class.DomainDescription(name="SYNTHETIC_PLACES", description="", domainType="CodedValue",
+                                              type="Text", codedValues=dict.fromkeys(DOMAIN_CODED_VALUE_KEYS.value, ""),
+                                              owner="SDE", range=None),
+            Workspace_Class.DomainDescription(name="SYNTHETIC_RANGE", description="", domainType="Range",
+                                              type="Double", codedValues=None, owner="SDE", range=DOMAIN_RANGE.value)])
+
+    def run_columnar_profiling_with_domains(fields, rows, domain_index):
+        """Profile with the columnar engine validating domains and return tuple of null, char, out of domain dicts"""
+        engine = ColumnarProfiler_Class.ColumnarProfilingEngine(
+            field_names=[field.name for field in fields],
+            string_field_names=[field.name for field in fields if field.type.lower() == "string"],
+            database_flag=DATABASE_FLAG_NUMERIC.value,
+            field_domain_rules={field.name: domain_index.get_rule(
+                domain_name="SYNTHETIC_PLACES" if field.type == "String" else "SYNTHETIC_RANGE") for field in fields})
+        engine.profile_cursor(cursor=rows)
+        return engine.null_counts, engine.max_char_lengths, engine.out_of_domain_counts
+
+    def compare_field_profiles(accumulator, expected_accumulator):
+        """Compare the profile of an accumulator with the expected profile and return list of mismatch messages"""
+        record = accumulator.to_record(database_flag=DATABASE_FLAG_NUMERIC.value)
+        expected_record = expected_accumulator.to_record(database_flag=DATABASE_FLAG_NUMERIC.value)
+        if expected_record.field_statistics is None:
+            return [] if record == expected_record else ["{} {} of {}".format(record.field_name, record,
+                                                                              expected_record)]
+        mismatches = []
+        if (record[:-1] != expected_record[:-1]
+                or record.field_statistics[:3] != expected_record.field_statistics[:3]):
+            mismatches.append("{} {} of {}".format(record.field_name, record, expected_record))
+        for value, expected_value in zip(record.field_statistics[3:5], expected_record.field_statistics[3:5]):
+            if not math.isclose(value, expected_value, rel_tol=1e-9, abs_tol=1e-9):
+                mismatches.append("{} mean or standard deviation {} of {}".format(record.field_name, value,
+                                                                                 expected_value))
+        expected_counts = expected_accumulator.statistics.frequent_values_summary.counts
+        if (expected_accumulator.statistics.distinct_count_sketch.estimate()
+                <= expected_accumulator.statistics.frequent_values_summary.capacity
+                and accumulator.statistics.frequent_values_summary.counts != expected_counts):
+            mismatches.append("{} frequent value counts".format(record.field_name))
+        return mismatches
+
+    def run_field_profile_merge(serialized_parts, create_engine):
+        """Deserialize the accumulators of the profiled parts, merge them into a new engine and return the engine"""
+        engine = create_engine()
+        for serialized_accumulators in serialized_parts:
+            for accumulator, serialized in zip(engine.field_accumulators, serialized_accumulators):
+                accumulator.merge(other=ProfileAccumulator_Class.FieldProfileAccumulator.deserialize(
+                    serialized=serialized, domain_rule=accumulator.domain_rule))
+        return engine
+
+    def check_out_of_domain_counts(fields, rows, out_of_domain_counts):
+        """Compare out of domain counts with those counted value by value and return list of mismatch messages"""
+        mismatches = []
+        range_min, range_max = DOMAIN_RANGE.value
+        for index, field in enumerate(fields):
+            values = [row[index] for row in rows if row[index] is not None]
+            if field.type == "String":
+                exact_count = sum(1 for value in values
+                                  if value.strip() and value not in DOMAIN_CODED_VALUE_KEYS.value)
+            else:
+                exact_count = sum(1 for value in values if not range_min <= value <= range_max)
+            if out_of_domain_counts[field.name] != exact_count:
+                mismatches.append("{} out of domain count {} of {}".format(field.name, out_of_domain_counts[field.name],
+                                                                           exact_count))
+        return mismatches
+
+    def check_field_statistics(fields, rows, field_statistics):
+        """Compare field statistics with those computed exactly from all values and return list of mismatch messages"""
+        mismatches = []
+        for index, field in enumerate(fields):
+            values = [row[index] for row in rows if row[index] is not None]
+            if field.type == "String":
+                values = [value for value in values if value.strip()]
+            (distinct_count, min_value, max_value, mean, standard_deviation,
+             top_values) = field_statistics[field.name]
+            exact_distinct_count = len(set(values))
+            if abs(distinct_count - exact_distinct_count) > STATISTICS_DISTINCT_ERROR.value * exact_distinct_count:
+                mismatches.append("{} distinct count {} of {}".format(field.name, distinct_count,
+                                                                      exact_distinct_count))
+            if (min_value, max_value) != (str(min(values)), str(max(values))):
+                mismatches.append("{} min and max {} {}".format(field.name, min_value, max_value))
+            if field.type != "String":
+                exact_mean = math.fsum(values) / len(values)
+                exact_standard_deviation = math.sqrt(math.fsum((value - exact_mean) ** 2 for value in values)
+                                                     / len(values))
+                if not (math.isclose(mean, exact_mean, rel_tol=1e-9)
+                        and math.isclose(standard_deviation, exact_standard_deviation, rel_tol=1e-9)):
+                    mismatches.append("{} mean and standard deviation {} {}".format(field.name, mean,
+                                                                                   standard_deviation))
+            elif int(top_values.split("; ")[0].rsplit(" (", 1)[1].rstrip(")")) != max(
+                    collections.Counter(values).values()):
+                mismatches.append("{} top values {}".format(field.name, top_values))
+        return mismatches
+
+    def build_synthetic_geometries(count, randomizer):
+        """
+        Build WKB geometries of mixed types, with the vertices of each valid geometry, and return list of tuples of
+        (WKB or None, validity, list of (x, y) vertices)
+        """
+        def pack_points(points, dimension=2):
+            coordinates = [coordinate for point in points for coordinate in point]
+            coordinates_z = coordinates if dimension == 2 else [value for point in points
+                                                                for value in (point[0], point[1], 10.0)]
+            return struct.pack("<I{}d".format(len(coordinates_z)), len(points), *coordinates_z)
+
+        def random_points(vertex_count):
+            return [(randomizer.uniform(185000.0, 570000.0), randomizer.uniform(25000.0, 230000.0))
+                    for _ in range(vertex_count)]
+
+        geometries = []
+        for _ in range(count):
+            kind = randomizer.random()
+            if kind < NULL_RATE.value / 3:
+                geometries.append((None, True, None))
+            elif kind < 0.15:
+                point = random_points(1)
+                geometries.append((struct.pack(">BIdd", 0, 1, point[0][0], point[0][1]), True, point))
+            elif kind < 0.2:
+                geometries.append((struct.pack("<BII", 1, 2, 0), True, []))
+            elif kind < 0.4:
+                points = random_points(randomizer.randint(2, 200))
+                geometries.append((struct.pack("<BI", 1, 1002) + pack_points(points, dimension=3), True, points))
+            elif kind < 0.7:
+                ring = random_points(randomizer.randint(3, 200))
+                ring.append(ring[0])
+                geometries.append((struct.pack("<BII", 1, 3, 1) + pack_points(ring), True, ring))
+            elif kind < 0.75:
+                ring = random_points(randomizer.randint(3, 20))
+                geometries.append((struct.pack("<BII", 1, 3, 1) + pack_points(ring), False, None))
+            else:
+                parts = [random_points(randomizer.randint(2, 100)) for _ in range(randomizer.randint(1, 4))]
+                wkb = struct.pack("<BII", 1, 5, len(parts)) + b"".join(
+                    struct.pack("<BI", 1, 2) + pack_points(part) for part in parts)
+                geometries.append((wkb, True, [point for part in parts for point in part]))
+        return geometries
+
+    def run_geometry_profiling(geometries):
+        """Profile the WKB geometries and return the geometry profile list"""
+        engine = GeometryProfiler_Class.GeometryProfilingEngine(database_flag=DATABASE_FLAG_NUMERIC.value)
+        engine.profile_cursor(cursor=((wkb,) for wkb, is_valid, points in geometries))
+        return engine.create_geometry_profile_list()
+
+    def check_geometry_profile(geometries, geometry_profile):
+        """Compare a geometry profile with that computed from the geometry values and return list of mismatches"""
+        measured_vertex_counts = [len(points) for wkb, is_valid, points in geometries if wkb is not None and is_valid]
+        all_points = [point for wkb, is_valid, points in geometries if wkb is not None and is_valid
+                      for point in points]
+        x_values, y_values = zip(*all_points)
+        expected_profile = [min(x_values), min(y_values), max(x_values), max(y_values),
+                            sum(1 for wkb, is_valid, points in geometries if wkb is None),
+                            measured_vertex_counts.count(0),
+                            sum(1 for wkb, is_valid, points in geometries if not is_valid),
+                            sum(measured_vertex_counts), min(measured_vertex_counts), max(measured_vertex_counts),
+                            sum(measured_vertex_counts) / len(measured_vertex_counts)]
+        return ["{} {} of {}".format(header, value, expected_value) for header, value, expected_value in zip(
+            FeatureClassObjects_Class.FeatureClassObject.FC_GEOMETRY_HEADERS_LIST.value, geometry_profile,
+            expected_profile) if not math.isclose(value, expected_value, rel_tol=1e-12)]
+
+    def run_diff_classification(diff_engine, table_name, rows):
+        """Classify rows against the snapshot, as one run without completing it, and return the change counts"""
+        diff_engine.change_counts.clear()
+        diff_engine.start_run(run_date="2018-05-18", resume=False)
+        for values_list in rows:
+            diff_engine.classify_row(table_name=table_name, values_list=values_list)
+        diff_engine.find_removed_rows()
+        return diff_engine.get_change_counts()
+
+    def run_make_dict_zipper(field_names, rows):
+        """Zip field names with each record and return list of dictionaries"""
+        return [myutil.make_dict_zipper(first_list=field_names, second_list=row) for row in rows]
+
+    def run_fc_object_serialization(fc_objects_list):
+        """Serialize feature class objects to value lists, string lists and csv strings and return None"""
+        for fc_object in fc_objects_list:
+            object_features_list = fc_object.create_object_feature_list()
+            object_features_list_str = fc_object.create_object_feature_list_str(
+                object_features_list=object_features_list)
+            fc_object.create_CSV_feature_class_properties_string(object_features_list_str=object_features_list_str)
+        return None
+
+    def run_field_details_serialization(field_details_list):
+        """Serialize field details objects to value lists, string lists and csv strings and return None"""
+        for field_details in field_details_list:
+            object_field_feature_list = field_details.create_object_field_feature_list()
+            object_field_feature_list_str = field_details.create_object_field_feature_list_str(
+                object_field_feature_list=object_field_feature_list)
+            field_details.create_CSV_feature_class_field_properties_string(
+                object_field_features_list_str=object_field_feature_list_str)
+        return None
+
+    def write_csv_original_path(file_path, field_details_list, row_count):
+        """Write rows as the original process did, reopening the file per feature dataset, and return None"""
+        with open(file_path, "w") as fhand_file:
+            fhand_file.write("{}\n".format(",".join(
+                FeatureClassObjects_Class.FeatureClassFieldDetails.FIELD_HEADERS_LIST.value)))
+        fhand_fields_file_handler = None
+        for row_index in range(row_count):
+            if row_index % FIELD_RECORDS_PER_FEATURE_DATASET.value == 0:
+                if fhand_fields_file_handler is not None:
+                    fhand_fields_file_handler.close()
+                fhand_fields_file_handler = myutil.create_output_results_file_handler(output_filename=file_path)
+            field_details = field_details_list[row_index % len(field_details_list)]
+            field_object_feature_list = field_details.create_object_field_feature_list()
+            field_object_feature_list_str = field_details.create_object_field_feature_list_str(
+                object_field_feature_list=field_object_feature_list)
+            fhand_fields_file_handler.write("{}\n".format(
+                field_details.create_CSV_feature_class_field_properties_string(
+                    object_field_features_list_str=field_object_feature_list_str)))
+        fhand_fields_file_handler.close()
+        return None
+
+    def write_csv_output_sink(file_path, field_details_list, row_count):
+        """Write rows through the csv output sink and return None"""
+        fields_table = OutputSink_Class.OutputSink.FIELDS_TABLE.value
+        output_sink = OutputSink_Class.CSVOutputSink(
+            file_paths_by_table={fields_table: file_path},
+            headers_by_table={fields_table: FeatureClassObjects_Class.FeatureClassFieldDetails.FIELD_HEADERS_LIST.value})
+        for row_index in range(row_count):
+            field_details = field_details_list[row_index % len(field_details_list)]
+            output_sink.write_row(table_name=fields_table,
+                                  values_list=field_details.create_object_field_feature_list())
+        output_sink.close()
+        return None
+
+    def run_synthetic_inspection(workspace):
+        """Inspect the first feature class of the synthetic workspace and return FeatureClassInspectionResult"""
+        feature_dataset = workspace.list_feature_datasets()[0]
+        feature_class = workspace.list_feature_classes(feature_dataset)[0]
+        inspection = FeatureClassInspection_Class.FeatureClassInspection(workspace=workspace,
+                                                                         date_string="2018-05-17",
+                                                                         database_flag=DATABASE_FLAG_NUMERIC.value,
+                                                                         chunk_size=10000)
+        return inspection.inspect(task=FeatureClassInspection_Class.FeatureClassTask(
+            feature_dataset=feature_dataset, feature_class=feature_class))
+
+    def run_partitioned_inspection(workspace, partition_threshold):
+        """
+        Inspect the first feature class of the synthetic workspace, with field statistics and geometry profiling, in
+        partitions when above the threshold, or None for a single cursor, and return FeatureClassInspectionResult
+        """
+        feature_dataset = workspace.list_feature_datasets()[0]
+        feature_class = workspace.list_feature_classes(feature_dataset)[0]
+        inspection = FeatureClassInspection_Class.FeatureClassInspection(
+            workspace=workspace, date_string="2018-05-17", database_flag=DATABASE_FLAG_NUMERIC.value,
+            chunk_size=10000, compute_field_statistics=True, compute_geometry_profile=True,
+            partition_threshold=partition_threshold,
+            partition_record_count=max(1, workspace.record_count // PARTITION_COUNT.value),
+            partition_thread_count=PARTITION_THREAD_COUNT.value, partition_backoff_seconds=0.0)
+        return inspection.inspect(task=FeatureClassInspection_Class.FeatureClassTask(
+            feature_dataset=feature_dataset, feature_class=feature_class))
+
+    def check_partitioned_inspection(single_result, partitioned_result):
+        """Compare a partitioned inspection with a single cursor inspection and return list of mismatches"""
+        mismatches = []
+        for name in ("null_counts", "max_char_lengths", "geometry_profile"):
+            if getattr(single_result, name) != getattr(partitioned_result, name):
+                mismatches.append(name)
+        for field_name, single_statistics in single_result.field_statistics.items():
+            partitioned_statistics = partitioned_result.field_statistics[field_name]
+            if single_statistics[:3] != partitioned_statistics[:3]:
+                mismatches.append("{} distinct count, min or max".format(field_name))
+            for single_value, partitioned_value in zip(single_statistics[3:5], partitioned_statistics[3:5]):
+                if not math.isclose(single_value, partitioned_value, rel_tol=1e-9, abs_tol=1e-9):
+                    mismatches.append("{} mean or standard deviation".format(field_name))
+        return mismatches
+
+    class FailingCursorWorkspace(Workspace_Class.SyntheticWorkspace):
+        """SyntheticWorkspace whose first cursor of each object id range, and kind, fails after half its records"""
+
+        def __init__(self, **synthetic_arguments):
+            super().__init__(**synthetic_arguments)
+            self.failed_cursor_keys = set()
+            self.lock = threading.Lock()
+
+        def fail_first_cursor(self, cursor_key, cursor):
+            """Return the cursor, or for the first cursor of the key a cursor raising after half its records"""
+            with self.lock:
+                if cursor_key in self.failed_cursor_keys or cursor_key[1] is None:
+                    return cursor
+                self.failed_cursor_keys.add(cursor_key)
+            low, high = cursor_key[1]
+
+            def generate_failing_rows():
+                with cursor as rows:
+                    for row in itertools.islice(rows, (high - low) // 2):
+                        yield row
+                raise IOError("Synthetic server timeout in range {}".format(cursor_key[1]))
+            return contextlib.closing(generate_failing_rows())
+
+        def search_cursor(self, feature_dataset, feature_class, field_names, oid_field_name=None, oid_range=None):
+            return self.fail_first_cursor(cursor_key=("records", oid_range), cursor=super().search_cursor(
+                feature_dataset, feature_class, field_names, oid_field_name=oid_field_name, oid_range=oid_range))
+
+        def search_geometry_cursor(self, feature_dataset, feature_class, oid_field_name=None, oid_range=None):
+            return self.fail_first_cursor(cursor_key=("geometries", oid_range), cursor=super().search_geometry_cursor(
+                feature_dataset, feature_class, oid_field_name=oid_field_name, oid_range=oid_range))
+
+    class LatencyWorkspace(Workspace_Class.SyntheticWorkspace):
+        """SyntheticWorkspace whose listing, existence, count and describe calls wait a fixed latency"""
+
+        def __init__(self, latency_seconds, **synthetic_arguments):
+            super().__init__(**synthetic_arguments)
+            self.latency_seconds = latency_seconds
+
+        def describe(self, feature_dataset, feature_class):
+            time.sleep(self.latency_seconds)
+            return super().describe(feature_dataset, feature_class)
+
+        def exists(self, feature_dataset, feature_class):
+            time.sleep(self.latency_seconds)
+            return super().exists(feature_dataset, feature_class)
+
+        def get_count(self, feature_dataset, feature_class):
+            time.sleep(self.latency_seconds)
+            return super().get_count(feature_dataset, feature_class)
+
+        def list_feature_classes(self, feature_dataset):
+            time.sleep(self.latency_seconds)
+            return super().list_feature_classes(feature_dataset)
+
+    def run_metadata_serial(workspace, feature_datasets):
+        """Gather the metadata of all feature classes one call at a time, as the scan does, and return dictionary"""
+        metadata_by_feature_class = {}
+        for feature_dataset in feature_datasets:
+            for feature_class in workspace.list_feature_classes(feature_dataset):
+                metadata_by_feature_class[(feature_dataset, feature_class)] = (
+                    MetadataCatalog_Class.FeatureClassMetadata(
+                        exists=workspace.exists(feature_dataset, feature_class),
+                        record_count=workspace.get_count(feature_dataset, feature_class),
+                        description=workspace.describe(feature_dataset, feature_class)))
+        return metadata_by_feature_class
+
+    def build_sqlite_workspace(database_path, fields, rows):
+        """Load the synthetic records into a SQLite table and return a GeoPackageWorkspace of the database"""
+        with sqlite3.connect(database_path) as connection:
+            connection.execute("CREATE TABLE SYNTHETIC ({})".format(", ".join(
+                "{} {}".format(field.name, "TEXT" if field.type == "String" else "REAL") for field in fields)))
+            connection.executemany("INSERT INTO SYNTHETIC VALUES ({})".format(", ".join("?" * len(fields))), rows)
+        connection.close()
+        return Workspace_Class.GeoPackageWorkspace(database_path=database_path)
+
+    def run_sqlite_inspection(workspace, use_sql_pushdown):
+        """Inspect the SQLite table, by cursor or SQL pushdown, and return FeatureClassInspectionResult"""
+        feature_dataset = workspace.list_feature_datasets()[0]
+        feature_class = workspace.list_feature_classes(feature_dataset)[0]
+        inspection = FeatureClassInspection_Class.FeatureClassInspection(workspace=workspace,
+                                                                         date_string="2018-05-17",
+                                                                         database_flag=DATABASE_FLAG_NUMERIC.value,
+                                                                         chunk_size=10000,
+                                                                         use_sql_pushdown=use_sql_pushdown)
+        return inspection.inspect(task=FeatureClassInspection_Class.FeatureClassTask(
+            feature_dataset=feature_dataset, feature_class=feature_class))
+
+    def time_function(func, *function_args):
+        """
+        Run the function --repeat times and return tuple of the fewest elapsed seconds and the last result.
+        Garbage collection is off while timing, as with timeit, so that collections do not add noise.
+        """
+        best_seconds = None
+        result = None
+        for _ in range(max(1, args.repeat)):
+            result = None
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                result = func(*function_args)
+                elapsed_seconds = time.perf_counter() - start
+            finally:
+                gc.enable()
+            best_seconds = elapsed_seconds if best_seconds is None else min(best_seconds, elapsed_seconds)
+        return best_seconds, result
+
+    def run_calibration():
+        """Run the fixed pure python calibration workload and return integer"""
+        return sum(len(str(value)) for value in range(CALIBRATION_LOOP_COUNT.value))
+
+    def calculate_rates(benchmark_result):
+        """Calculate rows per second and fields per second of a benchmark result and return tuple"""
+        seconds = max(benchmark_result.seconds, 1e-9)
+        return benchmark_result.rows / seconds, benchmark_result.rows * benchmark_result.fields / seconds
+
+    # FUNCTIONALITY
+    randomizer = random.Random(RANDOM_SEED.value)
+    results = []
+    calibration_seconds_start, _ = time_function(run_calibration)
+
+    # Profiling
+    synthetic_fields = build_synthetic_fields()
+    synthetic_field_names = [field.name for field in synthetic_fields]
+    synthetic_rows = build_synthetic_rows(fields=synthetic_fields, row_count=scaled(NUMBER_OF_ROWS.value),
+                                          randomizer=randomizer)
+    field_count = len(synthetic_fields)
+    row_count = len(synthetic_rows)
+    print("Synthetic records: {:,} rows x {} fields".format(row_count, field_count))
+
+    seconds, row_dictionaries = time_function(run_make_dict_zipper, synthetic_field_names, synthetic_rows)
+    results.append(BenchmarkResult(name="make_dict_zipper", rows=row_count, fields=field_count, seconds=seconds))
+    seconds, reference_null_counts = time_function(run_null_inspection_reference, synthetic_fields, row_dictionaries)
+    results.append(BenchmarkResult(name="null_inspection_reference", rows=row_count, fields=field_count,
+                                   seconds=seconds))
+    seconds, reference_char_lengths = time_function(run_char_usage_reference, synthetic_fields, row_dictionaries)
+    results.append(BenchmarkResult(name="char_usage_reference", rows=row_count, fields=field_count, seconds=seconds))
+    seconds, columnar_result = time_function(run_columnar_profiling, synthetic_fields, synthetic_rows)
+    results.append(BenchmarkResult(name="columnar_profiling", rows=row_count, fields=field_count, seconds=seconds))
+    if columnar_result != (reference_null_counts, reference_char_lengths):
+        print("ERROR: Columnar profiling results do not match the reference implementation")
+        sys.exit(1)
+    seconds, statistics_result = time_function(run_columnar_profiling_with_statistics, synthetic_fields,
+                                               synthetic_rows)
+    results.append(BenchmarkResult(name="columnar_profiling_statistics", rows=row_count, fields=field_count,
+                                   seconds=seconds))
+    statistics_mismatches = check_field_statistics(fields=synthetic_fields, rows=synthetic_rows,
+                                                   field_statistics=statistics_result[2])
+    if statistics_result[:2] != (reference_null_counts, reference_char_lengths) or statistics_mismatches:
+        print("ERROR: Columnar profiling with field statistics results do not match. {}".format(
+            "; ".join(statistics_mismatches)))
+        sys.exit(1)
+    print("Field statistics overhead on columnar profiling: {:.0%}".format(
+        seconds / results[-2].seconds - 1.0))
+    synthetic_domain_index = build_synthetic_domain_index()
+    seconds, domains_result = time_function(run_columnar_profiling_with_domains, synthetic_fields, synthetic_rows,
+                                            synthetic_domain_index)
+    results.append(BenchmarkResult(name="columnar_profiling_domains", rows=row_count, fields=field_count,
+                                   seconds=seconds))
+    domain_mismatches = check_out_of_domain_counts(fields=synthetic_fields, rows=synthetic_rows,
+                                                   out_of_domain_counts=domains_result[2])
+    if domains_result[:2] != (reference_null_counts, reference_char_lengths) or domain_mismatches:
+        print("ERROR: Columnar profiling with domain validation results do not match. {}".format(
+            "; ".join(domain_mismatches)))
+        sys.exit(1)
+    print("Domain validation overhead on columnar profiling: {:.0%}".format(
+        seconds / results[-3].seconds - 1.0))
+    del row_dictionaries
+    create_merge_engine = functools.partial(
+        ColumnarProfiler_Class.ColumnarProfilingEngine,
+        field_names=synthetic_field_names,
+        string_field_names=[field.name for field in synthetic_fields if field.type.lower() == "string"],
+        database_flag=DATABASE_FLAG_NUMERIC.value,
+        field_types=[field.type for field in synthetic_fields],
+        field_domain_rules={field.name: synthetic_domain_index.get_rule(
+            domain_name="SYNTHETIC_PLACES" if field.type == "String" else "SYNTHETIC_RANGE")
+            for field in synthetic_fields})
+    whole_engine = create_merge_engine()
+    whole_engine.profile_cursor(cursor=synthetic_rows)
+    part_size = -(-row_count // NUMBER_OF_MERGE_PARTS.value)
+    serialized_parts = []
+    for part_start in range(0, row_count, part_size):
+        part_engine = create_merge_engine()
+        part_engine.profile_cursor(cursor=synthetic_rows[part_start:part_start + part_size])
+        serialized_parts.append([accumulator.serialize() for accumulator in part_engine.field_accumulators])
+    seconds, merged_engine = time_function(run_field_profile_merge, serialized_parts, create_merge_engine)
+    results.append(BenchmarkResult(name="field_profile_merge", rows=len(serialized_parts), fields=field_count,
+                                   seconds=seconds))
+    merge_mismatches = []
+    for accumulator, whole_accumulator in zip(merged_engine.field_accumulators, whole_engine.field_accumulators):
+        merge_mismatches += compare_field_profiles(accumulator=accumulator, expected_accumulator=whole_accumulator)
+    if merge_mismatches:
+        print("ERROR: Merged field profiles do not match the profiles of a single pass. {}".format(
+            "; ".join(merge_mismatches[:10])))
+        sys.exit(1)
+
+    # SQLite table profiled through the cursor and by SQL pushdown
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        sqlite_workspace = build_sqlite_workspace(database_path=os.path.join(temporary_directory, "Synthetic.sqlite"),
+                                                  fields=synthetic_fields,
+                                                  rows=synthetic_rows)
+        for name, use_sql_pushdown in (("sqlite_cursor_inspection", False), ("sqlite_pushdown_inspection", True)):
+            seconds, inspection_result = time_function(run_sqlite_inspection, sqlite_workspace, use_sql_pushdown)
+            results.append(BenchmarkResult(name=name, rows=row_count, fields=field_count, seconds=seconds))
+            if (inspection_result.null_counts, inspection_result.max_char_lengths) != (reference_null_counts,
+                                                                                       reference_char_lengths):
+                print("ERROR: {} results do not match the reference implementation".format(name))
+                sys.exit(1)
+
+    # Serialization and csv output
+    synthetic_fc_objects = build_synthetic_fc_objects(count=scaled(NUMBER_OF_FC_RECORDS.value), randomizer=randomizer)
+    seconds, _ = time_function(run_fc_object_serialization, synthetic_fc_objects)
+    results.append(BenchmarkResult(name="fc_object_serialization", rows=len(synthetic_fc_objects),
+                                   fields=len(FeatureClassObjects_Class.FeatureClassObject.FC_HEADERS_LIST.value),
+                                   seconds=seconds))
+    synthetic_field_details = build_synthetic_field_details(count=10000, randomizer=randomizer)
+    field_header_count = len(FeatureClassObjects_Class.FeatureClassFieldDetails.FIELD_HEADERS_LIST.value)
+    seconds, _ = time_function(run_field_details_serialization, synthetic_field_details)
+    results.append(BenchmarkResult(name="field_details_serialization", rows=len(synthetic_field_details),
+                                   fields=field_header_count, seconds=seconds))
+    field_record_count = scaled(NUMBER_OF_FIELD_RECORDS.value)
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        seconds, _ = time_function(write_csv_original_path, os.path.join(temporary_directory, "original.csv"),
+                                   synthetic_field_details, field_record_count)
+        results.append(BenchmarkResult(name="csv_write_original", rows=field_record_count, fields=field_header_count,
+                                       seconds=seconds))
+        seconds, _ = time_function(write_csv_output_sink, os.path.join(temporary_directory, "sink.csv"),
+                                   synthetic_field_details, field_record_count)
+        results.append(BenchmarkResult(name="csv_write_sink", rows=field_record_count, fields=field_header_count,
+                                       seconds=seconds))
+
+    # Run to run diff of field rows: a tenth of the rows changed, a twentieth removed and as many added
+    fields_table = OutputSink_Class.OutputSink.FIELDS_TABLE.value
+    field_headers = FeatureClassObjects_Class.FeatureClassFieldDetails.FIELD_HEADERS_LIST.value
+    field_id_index = field_headers.index("FLD_ID")
+    previous_rows = list({field_details.field_id: field_details.create_object_field_feature_list()
+                          for field_details in synthetic_field_details}.values())
+    removed_row_count = len(previous_rows) // 20
+    current_rows = [list(values_list) for values_list in previous_rows[removed_row_count:]]
+    for values_list in current_rows[::10]:
+        values_list[0] = "{}_changed".format(values_list[0])
+    for index, values_list in enumerate(previous_rows[:removed_row_count]):
+        added_row = list(values_list)
+        added_row[field_id_index] = "{}_added_{}".format(values_list[field_id_index], index)
+        current_rows.append(added_row)
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        diff_engine = InventoryDiff_Class.InventoryDiffEngine(
+            database_path=os.path.join(temporary_directory, "snapshot.sqlite"),
+            headers_by_table={fields_table: field_headers},
+            key_headers_by_table={fields_table: "FLD_ID"})
+        diff_engine.start_run(run_date="2018-05-17", resume=False)
+        for values_list in previous_rows:
+            diff_engine.classify_row(table_name=fields_table, values_list=values_list)
+        diff_engine.complete_run()
+        seconds, change_counts = time_function(run_diff_classification, diff_engine, fields_table, current_rows)
+        diff_engine.close()
+    results.append(BenchmarkResult(name="run_diff_classification", rows=len(current_rows), fields=len(field_headers),
+                                   seconds=seconds))
+    changed_row_count = len(current_rows[:len(previous_rows) - removed_row_count:10])
+    expected_change_counts = {"{} added".format(fields_table): removed_row_count,
+                              "{} changed".format(fields_table): changed_row_count,
+                              "{} removed".format(fields_table): removed_row_count,
+                              "{} unchanged".format(fields_table): (len(previous_rows) - removed_row_count
+                                                                    - changed_row_count)}
+    if change_counts != {key: value for key, value in expected_change_counts.items() if value}:
+        print("ERROR: Run to run diff counts {} do not match the changes made {}".format(change_counts,
+                                                                                         expected_change_counts))
+        sys.exit(1)
+
+    # GODI results rename. pandas is optional; the series benchmark is skipped without it.
+    sys.path.append(os.path.join(_ROOT_PATH_FOR_PROJECT.value, "ResultsWranglingScripts"))
+    import RenameEngine_Class
+    rename_engine = RenameEngine_Class.RenameEngine.from_mapping_files(file_paths=(RENAME_MAPPING_FILE.value,))
+    godi_names = build_synthetic_godi_names(count=scaled(NUMBER_OF_RENAME_VALUES.value),
+                                            rename_keys=list(rename_engine.mappings), randomizer=randomizer)
+    seconds, _ = time_function(lambda names: [rename_engine.rename_value(value=name) for name in names], godi_names)
+    results.append(BenchmarkResult(name="godi_rename_values", rows=len(godi_names), fields=1, seconds=seconds))
+    try:
+        import pandas as pd
+    except ImportError:
+        print("pandas is not installed. godi_rename_series skipped.")
+    else:
+        godi_series = pd.Series(godi_names)
+        seconds, _ = time_function(rename_engine.rename_series, godi_series)
+        results.append(BenchmarkResult(name="godi_rename_series", rows=len(godi_names), fields=1, seconds=seconds))
+
+    # Geometry profiling
+    synthetic_geometries = build_synthetic_geometries(count=scaled(NUMBER_OF_GEOMETRIES.value),
+                                                      randomizer=randomizer)
+    seconds, geometry_profile = time_function(run_geometry_profiling, synthetic_geometries)
+    results.append(BenchmarkResult(name="geometry_profiling", rows=len(synthetic_geometries), fields=1,
+                                   seconds=seconds))
+    geometry_mismatches = check_geometry_profile(geometries=synthetic_geometries, geometry_profile=geometry_profile)
+    if geometry_mismatches:
+        print("ERROR: Geometry profiling results do not match. {}".format("; ".join(geometry_mismatches)))
+        sys.exit(1)
+    print("Geometry profiling vertices per second: {:,.0f}".format(geometry_profile[7] / seconds))
+
+    # Metadata gathering, one call at a time and prefetched by a pool of threads
+    latency_workspace = LatencyWorkspace(latency_seconds=METADATA_LATENCY_SECONDS.value,
+                                         feature_dataset_count=NUMBER_OF_CATALOG_FEATURE_DATASETS.value,
+                                         feature_class_count=max(1, scaled(NUMBER_OF_CATALOG_FEATURE_CLASSES.value)),
+                                         string_field_count=NUMBER_OF_STRING_FIELDS.value,
+                                         numeric_field_count=NUMBER_OF_NUMERIC_FIELDS.value)
+    catalog_feature_datasets = latency_workspace.list_feature_datasets()
+    seconds, serial_metadata = time_function(run_metadata_serial, latency_workspace, catalog_feature_datasets)
+    results.append(BenchmarkResult(name="metadata_serial", rows=len(serial_metadata), fields=1, seconds=seconds))
+    seconds, metadata_catalog = time_function(MetadataCatalog_Class.MetadataCatalog.prefetch, latency_workspace,
+                                              catalog_feature_datasets, METADATA_PREFETCH_THREAD_COUNT.value)
+    results.append(BenchmarkResult(name="metadata_prefetch", rows=len(serial_metadata), fields=1, seconds=seconds))
+    if metadata_catalog.metadata_by_feature_class != serial_metadata:
+        print("ERROR: Metadata prefetch results do not match the serial results")
+        sys.exit(1)
+
+    # Task scheduling of feature classes with record counts skewed as in the geodatabase, a few very large
+    scheduled_tasks = [FeatureClassInspection_Class.FeatureClassTask(
+        feature_dataset="Production.SDE.Synthetic_FD_{}".format(index % 50),
+        feature_class="Production.SDE.Synthetic_FC_{}".format(index),
+        metadata=MetadataCatalog_Class.FeatureClassMetadata(
+            exists=True, record_count=int(randomizer.paretovariate(1.2) * 1000),
+            description=Workspace_Class.FeatureClassDescription(dataType="FeatureClass", shapeType="Polygon",
+                                                                spatialReference=None, OIDFieldName="OBJECTID",
+                                                                fields=[None] * randomizer.randint(5, 60))))
+        for index in range(scaled(NUMBER_OF_SCHEDULED_TASKS.value))]
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        scheduler = InventoryScheduler_Class.InventoryScheduler(
+            database_path=os.path.join(temporary_directory, "schedule.sqlite"),
+            worker_count=METADATA_PREFETCH_THREAD_COUNT.value)
+        seconds, ordered_tasks = time_function(scheduler.order_tasks, scheduled_tasks)
+        scheduler.close()
+    results.append(BenchmarkResult(name="task_scheduling", rows=len(scheduled_tasks), fields=1, seconds=seconds))
+    largest_first_makespan = scheduler.estimate_makespan(
+        costs=[scheduler.estimates_by_task[(task.feature_dataset, task.feature_class)].seconds
+               for task in ordered_tasks])
+    name_order_makespan = scheduler.estimate_makespan(
+        costs=[scheduler.estimates_by_task[(task.feature_dataset, task.feature_class)].seconds
+               for task in sorted(scheduled_tasks, key=lambda task: (task.feature_dataset, task.feature_class))])
+    if largest_first_makespan > name_order_makespan:
+        print("ERROR: Largest first makespan {:.1f} exceeds the name order makespan {:.1f}".format(
+            largest_first_makespan, name_order_makespan))
+        sys.exit(1)
+    print("Estimated makespan, largest first: {:.1f} seconds, name order: {:.1f} seconds".format(
+        largest_first_makespan, name_order_makespan))
+
+    # Whole pipeline for one feature class
+    synthetic_workspace = Workspace_Class.SyntheticWorkspace(record_count=scaled(NUMBER_OF_ROWS.value),
+                                                             string_field_count=NUMBER_OF_STRING_FIELDS.value,
+                                                             numeric_field_count=NUMBER_OF_NUMERIC_FIELDS.value,
+                                                             null_rate=NULL_RATE.value)
+    seconds, inspection_result = time_function(run_synthetic_inspection, synthetic_workspace)
+    results.append(BenchmarkResult(name="synthetic_inspection", rows=synthetic_workspace.record_count,
+                                   fields=len(inspection_result.field_details_list), seconds=seconds))
+
+    # Partitioned scan of one feature class, merged exactly, checked against a single cursor with failing partitions
+    seconds, inspection_result = time_function(run_partitioned_inspection, synthetic_workspace, 0)
+    results.append(BenchmarkResult(name="partitioned_inspection", rows=synthetic_workspace.record_count,
+                                   fields=len(inspection_result.field_details_list), seconds=seconds))
+    failing_workspace = FailingCursorWorkspace(record_count=synthetic_workspace.record_count,
+                                               string_field_count=NUMBER_OF_STRING_FIELDS.value,
+                                               numeric_field_count=NUMBER_OF_NUMERIC_FIELDS.value,
+                                               null_rate=NULL_RATE.value)
+    partitioned_result = run_partitioned_inspection(failing_workspace, 0)
+    partition_mismatches = check_partitioned_inspection(
+        single_result=run_partitioned_inspection(synthetic_workspace, None), partitioned_result=partitioned_result)
+    cursor_scan_span = [span for span in partitioned_result.timing_spans if span["stage"] == "cursor_scan"][0]
+    if cursor_scan_span.get("partition_retries") != cursor_scan_span.get("partitions"):
+        partition_mismatches.append("partition retries {} of {} partitions".format(
+            cursor_scan_span.get("partition_retries"), cursor_scan_span.get("partitions")))
+    if partition_mismatches:
+        print("ERROR: Partitioned inspection results do not match the single cursor results. {}".format(
+            "; ".join(partition_mismatches)))
+        sys.exit(1)
+
+    calibration_seconds_end, _ = time_function(run_calibration)
+    calibration_rate = CALIBRATION_LOOP_COUNT.value * 2 / (calibration_seconds_start + calibration_seconds_end)
+
+    # Compare with the baseline, scaled by the calibration speed of this machine relative to the baseline run
+    baseline = None
+    machine_speed_factor = 1.0
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as baseline_handler:
+            baseline = json.load(baseline_handler)
+        if baseline.get("scale") != args.scale:
+            print("WARNING: baseline scale {} differs from this run scale {}".format(baseline.get("scale"), args.scale))
+        if not args.no_calibration and baseline.get("calibration_rate"):
+            machine_speed_factor = calibration_rate / baseline["calibration_rate"]
+        print("Machine speed relative to the baseline run: {:.2f}".format(machine_speed_factor))
+    regressions = []
+    print("\n{:<30}{:>16}{:>18}{:>18}{:>10}".format("Benchmark", "rows/sec", "fields/sec", "expected rows/sec",
+                                                    "change"))
+    for benchmark_result in results:
+        rows_per_second, fields_per_second = calculate_rates(benchmark_result)
+        baseline_rows_per_second = None
+        if baseline is not None and benchmark_result.name in baseline["benchmarks"]:
+            baseline_rows_per_second = (baseline["benchmarks"][benchmark_result.name]["rows_per_second"]
+                                        * machine_speed_factor)
+        if baseline_rows_per_second:
+            change = rows_per_second / baseline_rows_per_second - 1.0
+            if change < -args.threshold:
+                regressions.append(benchmark_result.name)
+            print("{:<30}{:>16,.0f}{:>18,.0f}{:>18,.0f}{:>+10.1%}".format(
+                benchmark_result.name, rows_per_second, fields_per_second, baseline_rows_per_second, change))
+        else:
+            print("{:<30}{:>16,.0f}{:>18,.0f}{:>18}{:>10}".format(benchmark_result.name, rows_per_second,
+                                                                  fields_per_second, "-", "-"))
+
+    if args.save_baseline:
+        baseline_output = {"calibration_rate": calibration_rate,
+                           "date": myutil.build_today_date_string(),
+                           "machine": platform.platform(),
+                           "python": platform.python_version(),
+                           "scale": args.scale,
+                           "benchmarks": {}}
+        for benchmark_result in results:
+            rows_per_second, fields_per_second = calculate_rates(benchmark_result)
+            baseline_output["benchmarks"][benchmark_result.name] = {"rows_per_second": rows_per_second,
+                                                                    "fields_per_second": fields_per_second}
+        with open(args.baseline, "w") as baseline_handler:
+            json.dump(baseline_output, baseline_handler, indent=4, sort_keys=True)
+        print("\nBaseline saved: {}".format(args.baseline))
+    elif baseline is None:
+        print("\nFAILED: no baseline file to compare with: {}. Save one with --save-baseline".format(args.baseline))
+        sys.exit(1)
+
+    if regressions:
+        print("\nFAILED: throughput dropped more than {:.0%} from the baseline: {}".format(
+            args.threshold, ", ".join(regressions)))
+        sys.exit(1)
+    print("\nPASSED")
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Benchmark the memory retained per inventory result record, for the slotted record types and the dict backed layout
+they replaced.
+
+The FeatureClassObject, FeatureClassFieldDetails and GeodatabaseDomains records are built from synthetic workspace
+descriptions, as the inspection builds them from the arcpy descriptions, and retained in a list, as a run does when
+results are held for batching, merging or diffing. The dict backed layout is rebuilt from the slotted records, with
+the same attribute values in an instance dictionary, and for domains with the reference to the domain object that
+the records used to keep. Memory is measured with tracemalloc as the bytes still allocated once the descriptions are
+released, divided by the number of records. The attribute values themselves are counted in both layouts. The
+synthetic domain descriptions are small named tuples, so the saving from releasing a real arcpy domain is larger
+than reported here. No arcpy or database access is required.
+Run: python BenchmarkInventoryRecordMemory.py --fields 40000
+"""
+
+
+def main():
+
+    # IMPORTS
+    from collections import namedtuple
+    from UtilityClass import UtilityClassFunctionality as myutil
+    import argparse
+    import FeatureClassObjects_Class
+    import GeodatabaseDomain_Class
+    import gc
+    import tracemalloc
+    import Workspace_Class
+
+    # VARIABLES
+    CONSTANT = namedtuple("CONSTANT", "value")
+    MemoryResult = namedtuple("MemoryResult", "record_type count dict_backed_bytes slotted_bytes")
+
+        # CONSTANTS
+    CODED_VALUE_COUNT = CONSTANT(value=20)
+    DATE_STRING = CONSTANT(value="2018-05-17")
+    ENVIRONMENT_NAME = CONSTANT(value="Production")
+    FIELDS_PER_FEATURE_CLASS = CONSTANT(value=40)
+
+        # Command line arguments
+    parser = argparse.ArgumentParser(description="Benchmark the memory retained per inventory result record.")
+    parser.add_argument("--domains", type=int, default=500, help="number of domain records")
+    parser.add_argument("--feature-classes", type=int, default=2000, help="number of feature class records")
+    parser.add_argument("--fields", type=int, default=40000, help="number of field records")
+    args = parser.parse_args()
+
+    # FUNCTIONS
+    class DictBackedRecord:
+        """Record holding its attributes in an instance dictionary, the layout of the records before slots"""
+
+    def convert_to_dict_backed(record, **original_attributes):
+        """Copy the slotted attributes of a record to a dict backed record, plus any attributes given, and return it"""
+        dict_backed_record = DictBackedRecord()
+        for slot_name in type(record).__slots__:
+            if slot_name.startswith("__"):
+                slot_name = "_{}{}".format(type(record).__name__, slot_name)
+            setattr(dict_backed_record, slot_name, getattr(record, slot_name))
+        for attribute_name, value in original_attributes.items():
+            setattr(dict_backed_record, attribute_name, value)
+        return dict_backed_record
+
+    def build_domain_records(count, dict_backed):
+        """Build domain records from synthetic domain descriptions and return list"""
+        records = []
+        for number in range(count):
+            domain_description = Workspace_Class.DomainDescription(
+                name="Domain_{}".format(number), description="Synthetic coded value domain {}".format(number),
+                domainType="CodedValue", type="Short",
+                codedValues={code: "Value {} of {}".format(code, number) for code in range(CODED_VALUE_COUNT.value)},
+                owner="SDE", range=[])
+            record = GeodatabaseDomain_Class.GeodatabaseDomains(environment_name=ENVIRONMENT_NAME.value,
+                                                                domain_object=domain_description,
+                                                                date=DATE_STRING.value)
+            if dict_backed:
+                record = convert_to_dict_backed(record, coded_values=domain_description.codedValues,
+                                                domain_object=domain_description)
+            records.append(record)
+        return records
+
+    def build_feature_class_records(count, dict_backed):
+        """Build feature class records with stats populated and return list"""
+        records = []
+        for number in range(count):
+            fc_id = "{}.SDE.Synthetic_FD.Synthetic_FC_{}".format(ENVIRONMENT_NAME.value, number)
+            record = FeatureClassObjects_Class.FeatureClassObject(
+                fc_ID=fc_id, feature_dataset_name="Synthetic_FD", feature_class_name="Synthetic_FC_{}".format(number),
+                date_export=DATE_STRING.value, row_id=myutil.generate_id_from_args(fc_id, DATE_STRING.value))
+            record.data_type = "FeatureClass"
+            record.shape_type = "Polygon"
+            record.spatial_ref_name = "NAD_1983_StatePlane_Maryland_FIPS_1900_Meters"
+            record.total_field_count = FIELDS_PER_FEATURE_CLASS.value
+            record.total_record_count = number * 1000
+            record.total_value_count = float(record.total_record_count * FIELDS_PER_FEATURE_CLASS.value)
+            record.total_null_value_count = number * 10
+            record.percent_null = myutil.calculate_percent(record.total_null_value_count, record.total_value_count)
+            if dict_backed:
+                record = convert_to_dict_backed(record)
+            records.append(record)
+        return records
+
+    def build_field_records(count, dict_backed):
+        """Build field records from synthetic field descriptions and return list"""
+        records = []
+        for number in range(count):
+            field_description = Workspace_Class.FieldDescription(
+                name="FIELD_{}".format(number), baseName="FIELD_{}".format(number),
+                aliasName="Field {}".format(number), type="String", defaultValue=None, domain="YesNo",
+                isNullable=True, length=255, precision=0, scale=0, required=False)
+            fc_id = "{}.SDE.Synthetic_FD.Synthetic_FC_{}".format(ENVIRONMENT_NAME.value,
+                                                                 number // FIELDS_PER_FEATURE_CLASS.value)
+            field_id = myutil.generate_id_from_args(fc_id, field_description.name)
+            record = FeatureClassObjects_Class.FeatureClassFieldDetails(
+                field_id=field_id, fc_id=fc_id, field_object=field_description, total_record_count=125000,
+                total_null_value_count=number, percent_null=number / 1250.0, date_export=DATE_STRING.value,
+                row_id=myutil.generate_id_from_args(field_id, DATE_STRING.value))
+            if dict_backed:
+                record = convert_to_dict_backed(record)
+            records.append(record)
+        return records
+
+    def measure_retained_bytes(build_function, count, dict_backed):
+        """Build and retain the records, measuring the memory still allocated, and return bytes per record"""
+        gc.collect()
+        tracemalloc.start()
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        records = build_function(count=count, dict_backed=dict_backed)
+        gc.collect()
+        retained_bytes = tracemalloc.get_traced_memory()[0] - start_bytes
+        tracemalloc.stop()
+        del records
+        return retained_bytes / float(count)
+
+    # FUNCTIONALITY
+    benchmarks = (("GeodatabaseDomains", build_domain_records, args.domains),
+                  ("FeatureClassObject", build_feature_class_records, args.feature_classes),
+                  ("FeatureClassFieldDetails", build_field_records, args.fields))
+    results = [MemoryResult(record_type=record_type,
+                            count=count,
+                            dict_backed_bytes=measure_retained_bytes(build_function=build_function, count=count,
+                                                                     dict_backed=True),
+                            slotted_bytes=measure_retained_bytes(build_function=build_function, count=count,
+                                                                 dict_backed=False))
+               for record_type, build_function, count in benchmarks]
+
+    print("Bytes retained per record, attribute values included\n")
+    print("{:<26}{:>10}{:>14}{:>12}{:>12}".format("record type", "records", "dict backed", "slotted", "saved"))
+    for result in results:
+        print("{:<26}{:>10,}{:>14,.0f}{:>12,.0f}{:>12.0%}".format(
+            result.record_type, result.count, result.dict_backed_bytes, result.slotted_bytes,
+            1.0 - result.slotted_bytes / result.dict_backed_bytes))
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark the Socrata publishing of the inventory results against a local stand in for Socrata.
+
+A simulated run scans feature classes, each scan taking a fixed time as the database reads would, and publishes one
+feature class record and its field records per feature class, as the main script does. The run is made with the
+synchronous SocrataUpsertBatcher, where each upsert blocks the scan, and with the BackgroundSocrataUpsertBatcher, where
+upserts proceed in background threads fed by a bounded queue. Clients come from a SocrataClientPool, which shares
+keep-alive connections and retries failed requests with backoff, and the connections opened are reported. The
+SocrataStandInServer injects latency, transient server errors and row errors, and records the ROW_ID values received,
+so each mode is checked to have either delivered or reported as failed every record. Requires sodapy, which the main script also requires. No data leaves the machine.
+Run: python BenchmarkSocrataPublishing.py --feature-classes 200 --latency 0.1 --error-rate 0.05
+"""
+
+
+def main():
+
+    # IMPORTS
+    from collections import namedtuple
+    import argparse
+    import SocrataPublishing_Class
+    import SocrataStandIn_Class
+    import sys
+    import time
+
+    # VARIABLES
+    CONSTANT = namedtuple("CONSTANT", "value")
+    PublishingResult = namedtuple("PublishingResult", "mode seconds requests connections delivered failed missing")
+
+        # CONSTANTS
+    FC_DATASET_IDENTIFIER = CONSTANT(value="fcfc-fcfc")
+    FIELD_DATASET_IDENTIFIER = CONSTANT(value="fdfd-fdfd")
+    FIELD_VALUE_COUNT = CONSTANT(value=20)
+
+        # Command line arguments
+    parser = argparse.ArgumentParser(description="Benchmark Socrata publishing against a local stand in server.")
+    parser.add_argument("--concurrency", type=int, default=4, help="background upsert threads per dataset")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="share of payloads failed once with http 500")
+    parser.add_argument("--backoff", type=float, default=0.05, help="seconds before the first retry of a request")
+    parser.add_argument("--feature-classes", type=int, default=200, help="number of simulated feature classes")
+    parser.add_argument("--fields", type=int, default=25, help="fields per simulated feature class")
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds of latency per upsert request")
+    parser.add_argument("--max-records", type=int, default=50, help="records per upsert batch")
+    parser.add_argument("--pool-size", type=int, default=8, help="keep-alive connections held by the client pool")
+    parser.add_argument("--queue-size", type=int, default=8, help="batches held in the background queue")
+    parser.add_argument("--retry-count", type=int, default=3, help="retries of a failed request")
+    parser.add_argument("--row-error-rate", type=float, default=0.05, help="share of requests reporting a row error")
+    parser.add_argument("--scan-seconds", type=float, default=0.02, help="simulated scan seconds per feature class")
+    args = parser.parse_args()
+
+    # FUNCTIONS
+    def build_record(row_id):
+        """Build a results record dictionary shaped like a field level record and return it"""
+        record = {"ROW_ID": row_id}
+        for number in range(FIELD_VALUE_COUNT.value):
+            record["VALUE_{}".format(number)] = "{}_{}".format(row_id, number)
+        return record
+
+    def run_simulated_inventory(stand_in, fc_batcher, field_batcher):
+        """Scan and publish the simulated feature classes and return the set of ROW_ID values published"""
+        row_ids = set()
+        for fc_number in range(args.feature_classes):
+            time.sleep(args.scan_seconds)
+            fc_row_id = "FC_{}".format(fc_number)
+            fc_batcher.add(record=build_record(row_id=fc_row_id))
+            row_ids.add(fc_row_id)
+            for field_number in range(args.fields):
+                field_row_id = "{}_FIELD_{}".format(fc_row_id, field_number)
+                field_batcher.add(record=build_record(row_id=field_row_id))
+                row_ids.add(field_row_id)
+        return row_ids
+
+    def measure_mode(stand_in, mode):
+        """Run the simulated inventory with the named publishing mode and return PublishingResult"""
+        stand_in.reset()
+        client_pool = SocrataPublishing_Class.SocrataClientPool(maryland_domain=stand_in.domain,
+                                                                username="stand-in",
+                                                                password="stand-in",
+                                                                pool_size=args.pool_size,
+                                                                retry_count=args.retry_count,
+                                                                backoff_seconds=args.backoff,
+                                                                uri_prefix="http://")
+        start = time.perf_counter()
+        if mode == "synchronous":
+            fc_client = client_pool.create_client(app_token="stand-in-token")
+            field_client = client_pool.create_client(app_token="stand-in-token")
+            batchers = [SocrataPublishing_Class.SocrataUpsertBatcher(client=fc_client,
+                                                                     dataset_identifier=FC_DATASET_IDENTIFIER.value,
+                                                                     max_records=args.max_records),
+                        SocrataPublishing_Class.SocrataUpsertBatcher(client=field_client,
+                                                                     dataset_identifier=FIELD_DATASET_IDENTIFIER.value,
+                                                                     max_records=args.max_records)]
+        else:
+            batchers = [SocrataPublishing_Class.BackgroundSocrataUpsertBatcher(
+                            client_factory=lambda: client_pool.create_client(app_token="stand-in-token"),
+                            dataset_identifier=dataset_identifier,
+                            concurrency=args.concurrency,
+                            queue_size=args.queue_size,
+                            max_records=args.max_records)
+                        for dataset_identifier in (FC_DATASET_IDENTIFIER.value, FIELD_DATASET_IDENTIFIER.value)]
+        row_ids = run_simulated_inventory(stand_in=stand_in, fc_batcher=batchers[0], field_batcher=batchers[1])
+        for batcher in batchers:
+            batcher.close()
+        seconds = time.perf_counter() - start
+        connection_statistics = client_pool.get_connection_statistics()
+        client_pool.close()
+
+        delivered_row_ids = set()
+        for dataset_row_ids in stand_in.row_ids_by_dataset.values():
+            delivered_row_ids.update(dataset_row_ids)
+        failed_row_ids = set(failed_record.record["ROW_ID"] for batcher in batchers
+                             for failed_record in batcher.failed_records)
+        return PublishingResult(mode=mode,
+                                seconds=seconds,
+                                requests=stand_in.request_count,
+                                connections=connection_statistics["connections_opened"],
+                                delivered=len(delivered_row_ids & row_ids),
+                                failed=len(failed_row_ids),
+                                missing=len(row_ids - delivered_row_ids - failed_row_ids))
+
+    # FUNCTIONALITY
+    stand_in = SocrataStandIn_Class.SocrataStandInServer(latency_seconds=args.latency,
+                                                         latency_jitter_seconds=args.latency / 2.0,
+                                                         error_rate=args.error_rate,
+                                                         row_error_rate=args.row_error_rate).start()
+    print("Socrata stand in at {}: {:.2f} s latency, {:.0%} transient server errors, {:.0%} row errors".format(
+        stand_in.domain, args.latency, args.error_rate, args.row_error_rate))
+    print("Simulated run: {} feature classes, {} fields each, {:.3f} s scan per feature class\n".format(
+        args.feature_classes, args.fields, args.scan_seconds))
+    try:
+        results = [measure_mode(stand_in=stand_in, mode=mode) for mode in ("synchronous", "background")]
+    finally:
+        stand_in.stop()
+
+    print("{:<14}{:>10}{:>10}{:>13}{:>12}{:>10}{:>10}".format("mode", "seconds", "requests", "connections",
+                                                                 "delivered", "failed", "missing"))
+    for result in results:
+        print("{:<14}{:>10.2f}{:>10,}{:>13,}{:>12,}{:>10,}{:>10,}".format(
+            result.mode, result.seconds, result.requests, result.connections, result.delivered, result.failed,
+            result.missing))
+    print("\nSpeedup: {:.1f}x".format(results[0].seconds / results[1].seconds))
+    if any(result.missing > 0 for result in results):
+        print("FAILED: records neither delivered nor reported as failed")
+        sys.exit(1)
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+from collections import namedtuple
+from itertools import islice
+import ProfileAccumulator_Class
+
+
+class ColumnarProfilingEngine:
+    """
+    Profile feature class records in chunks, column by column, for null/empty value counts and max character length.
+
+    The row by row approach builds a dictionary for every record and then evaluates every value in python, converting
+    each value to a string twice and looking up the field type on every value. This engine accepts chunks of cursor
+    tuples, transposes each chunk into per column tuples, and hands each column to the FieldProfileAccumulator of its
+    field, which does the counting with built in operations that run in C rather than in the python loop. Results
+    match UtilityClassFunctionality.inspect_record_for_null_values and
+    UtilityClassFunctionality.inspect_string_fields_for_char_usage, which remain as the reference implementation,
+    including the database flag value for counts that were never evaluated.
+    Only string fields can hold empty or whitespace values, so non string columns are evaluated for None only.
+    Field statistics: when field types are provided, the distinct count, min, max, mean, standard deviation and top
+    values of each field of a supported type are accumulated from the same transposed columns, without nulls and
+    blank values, by a FieldStatisticsAccumulator per field, so no second pass over the records is made.
+    Domain validation: when domain rules are provided, the values of each field with a rule that are out of its domain
+    are counted from the same columns, with the rule resolved once per field rather than looked up per value.
+    Partitions: engines of the same fields that profiled disjoint parts of a table, such as object id ranges scanned
+    concurrently, are merged into one by merging the accumulators of each field.
+    NOTE: numpy was evaluated for the transposed columns but values are python objects (str, datetime, etc.) and
+     object arrays provide no speed up over built in tuple operations, so numpy is not a dependency.
+    """
+    Variable = namedtuple("Variable", "value")
+    DEFAULT_CHUNK_SIZE = Variable(value=10000)
+
+    def __init__(self, field_names, string_field_names, database_flag, field_types=None, field_domain_rules=None):
+        string_field_names = set(string_field_names)
+        field_domain_rules = field_domain_rules or {}
+        field_types = field_types or [None] * len(field_names)
+        self.database_flag = database_flag
+        self.field_accumulators = tuple(
+            ProfileAccumulator_Class.FieldProfileAccumulator(field_name=name,
+                                                             is_string=name in string_field_names,
+                                                             statistics_field_type=field_type,
+                                                             domain_rule=field_domain_rules.get(name))
+            for name, field_type in zip(field_names, field_types))
+        self.field_names = tuple(field_names)
+        self.records_processed = 0
+
+    @property
+    def max_char_lengths(self):
+        """Dictionary of string field name to max character length, or the database flag value"""
+        return {accumulator.field_name: accumulator.get_max_char_length(database_flag=self.database_flag)
+                for accumulator in self.field_accumulators if accumulator.is_string}
+
+    @property
+    def null_counts(self):
+        """Dictionary of field name to null/empty value count, or the database flag value"""
+        return {accumulator.field_name: accumulator.get_null_count(database_flag=self.database_flag)
+                for accumulator in self.field_accumulators}
+
+    @property
+    def out_of_domain_counts(self):
+        """Dictionary of the name of each field with a domain rule to out of domain count, or the database flag value"""
+        return {accumulator.field_name: accumulator.get_out_of_domain_count(database_flag=self.database_flag)
+                for accumulator in self.field_accumulators if accumulator.out_of_domain_count is not None}
+
+    def get_field_profile_records(self):
+        """
+        Get the profile of each field for output and return dictionary of field name to FieldProfileRecord.
+
+        :return: dictionary of field name to FieldProfileRecord, in field order
+        """
+        return {accumulator.field_name: accumulator.to_record(database_flag=self.database_flag)
+                for accumulator in self.field_accumulators}
+
+    def get_field_statistics(self):
+        """
+        Get the statistics of each field accumulated and return dictionary of field name to statistics list.
+
+        :return: dictionary of field name to list in FIELD_STATISTICS_HEADERS_LIST order
+        """
+        return {accumulator.field_name: accumulator.statistics.create_statistics_list(database_flag=self.database_flag)
+                for accumulator in self.field_accumulators if accumulator.statistics is not None}
+
+    def merge(self, other):
+        """
+        Merge the profiles of an engine of the same fields, that profiled other records, into this engine but return
+        nothing.
+
+        :param other: ColumnarProfilingEngine
+        :return: None
+        """
+        for accumulator, other_accumulator in zip(self.field_accumulators, other.field_accumulators):
+            accumulator.merge(other=other_accumulator)
+        self.records_processed += other.records_processed
+        return
+
+    def profile_cursor(self, cursor, chunk_size=DEFAULT_CHUNK_SIZE.value):
+        """
+        Consume all records from a cursor, or any iterable of record tuples, in chunks but return nothing.
+
+        :param cursor: iterable of record tuples with values in the same order as the field names
+        :param chunk_size: number of records evaluated together
+        :return: None
+        """
+        cursor_iterator = iter(cursor)
+        for chunk in iter(lambda: list(islice(cursor_iterator, chunk_size)), []):
+            self.update(rows=chunk)
+        return
+
+    def update(self, rows):
+        """
+        Evaluate a chunk of record tuples and accumulate the profile of each field but return nothing.
+
+        :param rows: list of record tuples with values in the same order as the field names
+        :return: None
+        """
+        if len(rows) == 0:
+            return
+        self.records_processed += len(rows)
+        for accumulator, column in zip(self.field_accumulators, zip(*rows)):
+            accumulator.update(batch=column)
+        return
@@ -0,0 +1,749 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from functools import partial
+from itertools import islice
+from UtilityClass import UtilityClassFunctionality as myutil
+import ColumnarProfiler_Class
+import FeatureClassObjects_Class
+import GeometryProfiler_Class
+import hashlib
+import InventoryStateStore_Class
+import json
+import math
+import random
+import RunMetrics_Class
+import SQLPushdownProfiler_Class
+import time
+
+FeatureClassInspectionResult = namedtuple("FeatureClassInspectionResult",
+                                          "feature_dataset feature_class fc_object field_details_list fingerprint "
+                                          "null_counts max_char_lengths field_statistics out_of_domain_counts "
+                                          "domain_signature geometry_profile used_cached_profile timing_spans")
+FeatureClassTask = namedtuple("FeatureClassTask", "feature_dataset feature_class metadata")
+FeatureClassTask.__new__.__defaults__ = (None,)
+PartitionPlan = namedtuple("PartitionPlan", "oid_field_name oid_ranges")
+PartitionScan = namedtuple("PartitionScan", "oid_range engine attempt_count error")
+SamplingPlan = namedtuple("SamplingPlan", "oid_field_name oid_ranges stride offset")
+
+
+def initialize_worker_logging(log_file):
+    """
+    Configure logging in a worker process to append to the run log file but return nothing.
+
+    Worker processes do not inherit the logging configuration of the parent on Windows.
+    :param log_file: path to the log file of the run
+    :return: None
+    """
+    import logging
+    logging.basicConfig(filename=log_file, level=logging.INFO)
+    return
+
+
+class FeatureClassInspection:
+    """
+    Inspect feature classes through a workspace and return the populated feature class and field detail objects.
+
+    Each feature class is inspected independently: existence, record count, describe, and a cursor scan of all values
+    for null/empty counts and max character length. The inspection does no writing. Results are returned to the caller,
+    a single writer, so that output stays in order and free of duplicates when feature classes are inspected in a pool
+    of worker processes. The object is sent to the workers so the workspace must be picklable.
+    Incremental inventory: when a state store path is provided, a change fingerprint is built for each feature class
+    from the record count, the field schema, and the max value of the first change tracking field present (an edit
+    date). If the fingerprint matches the one stored at the last scan the stored stats are re-emitted, with the dates
+    and row ids of this run, and no cursor is opened. The caller saves the results to the store. A feature class
+    without a change tracking field gets no fingerprint and is always scanned, as an update in place changes neither
+    its count, its schema nor its max OBJECTID. A full scan can be forced. Edits that do not set the edit date are not
+    detected, so a periodic full scan is advised.
+    Sampling mode: when a sampling threshold is provided, feature classes with more records than the threshold are
+    profiled from a sample. The sample is a set of evenly spaced object id ranges, read with where clauses so that the
+    unsampled records never leave the database, or every nth record of the cursor when there is no object id field.
+    Null counts and percents are estimates scaled to the record count, with confidence bounds calculated as for a
+    simple random sample. Max character length is the max found in the sample and is flagged as estimated. Sampled
+    stats are not stored for incremental reuse.
+    SQL pushdown: when turned on and the workspace can run SQL, the null counts and max character lengths are computed
+    in the database by one aggregate query per feature class, and no cursor is opened. The stats are exact, so no
+    sample is taken. If the query fails, for example on a column type the database cannot trim, the cursor scan is
+    used.
+    Field statistics: when turned on, the distinct count, min, max, mean, standard deviation and top values of each
+    field are accumulated in the same cursor scan as the null counts, in bounded memory per field. The statistics are
+    stored with the profile for incremental reuse; a stored profile without statistics is not reused. SQL pushdown is
+    not used, as the aggregate query computes no statistics. When sampled, the statistics describe the sample.
+    Domain validation: when a domain index is provided, the values of fields with a coded value or range domain are
+    validated against it in the same cursor scan, and the values out of the domain are counted per field. The rules
+    of the fields are resolved from the index once per feature class. Counts are stored for reuse with the signature
+    of the rules, and are not reused once a domain changes. SQL pushdown is not used. Sampled counts are scaled as the
+    null counts are.
+    Geometry profiling: when turned on, the geometries of each feature class are read as WKB by a second cursor, of
+    the geometry column only, over the same records as the stats, and profiled for the extent, null, empty and invalid
+    geometry counts and vertex count statistics. The geometry column is never read when turned off. The profile is
+    stored for reuse with the stats. Sampled counts are scaled as the null counts are; the extent is that of the sample.
+    Partitioned scan: when a partition threshold is provided, feature classes with more records than the threshold,
+    and not sampled, are scanned as partitions of object id ranges, read with where clauses, by a bounded pool of
+    threads. Each partition is profiled into engines of its own, which are merged exactly into those of the feature
+    class in range order, so the stats match those of a single cursor. No cursor stays open longer than the scan of
+    one partition, and a partition that fails, as on a server timeout, is scanned again, into new engines, after a
+    backoff doubled on each retry. A partition that still fails after its retries is treated as a failed cursor: the
+    other partitions are merged and the stats are not stored for reuse. The ranges cover the object ids from 1 to the
+    max object id. The partitions of a workspace that does not declare concurrent cursors safe are scanned one at a
+    time, in this thread, with the same retries and merge.
+    Metadata prefetch: a task may carry the existence, record count and describe of its feature class, as gathered
+    by a MetadataCatalog, in which case the workspace is not called for them. Values missing from the metadata are
+    requested from the workspace.
+    Timing: each inspection times its stages, the existence check, count, describe, fingerprint, cursor scan and field
+    details, as spans returned in the result for the caller to record.
+    """
+    Variable = namedtuple("Variable", "value")
+    DEFAULT_CHANGE_TRACKING_FIELD_NAMES = Variable(value=("last_edited_date",))
+    DEFAULT_PARTITION_BACKOFF_SECONDS = Variable(value=2.0)
+    DEFAULT_PARTITION_RECORD_COUNT = Variable(value=1000000)
+    DEFAULT_PARTITION_RETRY_COUNT = Variable(value=2)
+    DEFAULT_PARTITION_THREAD_COUNT = Variable(value=4)
+    DEFAULT_SAMPLE_BLOCK_COUNT = Variable(value=500)
+    DEFAULT_SAMPLE_SIZE = Variable(value=200000)
+    DEFAULT_WORKER_COUNT = Variable(value=1)
+    DEFAULT_Z_SCORE = Variable(value=1.96)
+
+    def __init__(self, workspace, date_string, database_flag, chunk_size, state_store_path=None,
+                 force_full_scan=False, change_tracking_field_names=DEFAULT_CHANGE_TRACKING_FIELD_NAMES.value,
+                 sampling_threshold=None, sample_size=DEFAULT_SAMPLE_SIZE.value,
+                 sample_block_count=DEFAULT_SAMPLE_BLOCK_COUNT.value, z_score=DEFAULT_Z_SCORE.value,
+                 use_sql_pushdown=False, compute_field_statistics=False, domain_index=None,
+                 compute_geometry_profile=False, partition_threshold=None,
+                 partition_record_count=DEFAULT_PARTITION_RECORD_COUNT.value,
+                 partition_thread_count=DEFAULT_PARTITION_THREAD_COUNT.value,
+                 partition_retry_count=DEFAULT_PARTITION_RETRY_COUNT.value,
+                 partition_backoff_seconds=DEFAULT_PARTITION_BACKOFF_SECONDS.value):
+        self.change_tracking_field_names = tuple(name.lower() for name in change_tracking_field_names)
+        self.chunk_size = chunk_size
+        self.compute_field_statistics = compute_field_statistics
+        self.compute_geometry_profile = compute_geometry_profile
+        self.database_flag = database_flag
+        self.date_string = date_string
+        self.domain_index = domain_index
+        self.force_full_scan = force_full_scan
+        self.partition_backoff_seconds = partition_backoff_seconds
+        self.partition_record_count = max(1, partition_record_count)
+        self.partition_retry_count = max(0, partition_retry_count)
+        self.partition_thread_count = max(1, partition_thread_count)
+        self.partition_threshold = partition_threshold
+        self.sample_block_count = sample_block_count
+        self.sample_size = sample_size
+        self.sampling_threshold = sampling_threshold
+        self.state_store_path = state_store_path
+        self.use_sql_pushdown = use_sql_pushdown
+        self.workspace = workspace
+        self.z_score = z_score
+
+    def build_fingerprint(self, feature_dataset, feature_class, record_count, field_objects_list):
+        """
+        Build a change fingerprint from record count, field schema and change tracking field max and return string, or
+        None if the feature class has no change tracking field.
+
+        :param feature_dataset: feature dataset name
+        :param feature_class: feature class name
+        :param record_count: number of records in the feature class
+        :param field_objects_list: field objects, after removal of problematic fields
+        :return: hex digest string or None
+        """
+        schema_signature = [(field_obj.name, field_obj.type, field_obj.length) for field_obj in field_objects_list]
+        tracking_field_max_value = None
+        field_names_lower = {field_obj.name.lower(): field_obj.name for field_obj in field_objects_list}
+        for tracking_field_name in self.change_tracking_field_names:
+            if tracking_field_name in field_names_lower:
+                tracking_field_max_value = self.workspace.get_max_value(feature_dataset, feature_class,
+                                                                        field_names_lower[tracking_field_name])
+                break
+        else:
+            return None
+        fingerprint_source = json.dumps([record_count, schema_signature, str(tracking_field_max_value)])
+        return hashlib.sha1(fingerprint_source.encode("utf-8")).hexdigest()
+
+    def build_partition_plan(self, feature_dataset, feature_class, record_count, oid_field_name):
+        """
+        Plan the object id ranges for scanning a feature class in partitions and return PartitionPlan, or None if the
+        feature class has no object id field or no records.
+
+        The object ids from 1 to the max object id are split into ranges of equal width, one per partition record count
+        of records, and at least two. The last range ends after the max object id.
+        :param feature_dataset: feature dataset name
+        :param feature_class: feature class name
+        :param record_count: number of records in the feature class
+        :param oid_field_name: name of the object id field, or None
+        :return: PartitionPlan or None
+        """
+        if not oid_field_name:
+            return None
+        max_oid = self.workspace.get_max_value(feature_dataset, feature_class, oid_field_name)
+        if max_oid is None:
+            return None
+        max_oid = int(max_oid)
+        partition_count = max(2, int(math.ceil(record_count / self.partition_record_count)))
+        partition_count = min(partition_count, max(1, max_oid))
+        partition_span = max_oid / partition_count
+        oid_bounds = [1 + int(partition_index * partition_span) for partition_index in range(partition_count)]
+        oid_bounds.append(max_oid + 1)
+        return PartitionPlan(oid_field_name=oid_field_name, oid_ranges=list(zip(oid_bounds[:-1], oid_bounds[1:])))
+
+    def build_sampling_plan(self, feature_dataset, feature_class, record_count, oid_field_name):
+        """
+        Plan the object id ranges, or the cursor stride, for sampling a feature class and return SamplingPlan.
+
+        The ranges are spread over the object ids from 1 to the max object id, with a random offset seeded by the
+        feature class name so that repeated runs read the same sample of an unchanged feature class.
+        :param feature_dataset: feature dataset name
+        :param feature_class: feature class name
+        :param record_count: number of records in the feature class
+        :param oid_field_name: name of the object id field, or None
+        :return: SamplingPlan
+        """
+        randomizer = random.Random(feature_class)
+        sampling_fraction = min(1.0, self.sample_size / record_count)
+        max_oid = None
+        if oid_field_name:
+            max_oid = self.workspace.get_max_value(feature_dataset, feature_class, oid_field_name)
+        if max_oid is not None:
+            block_span = max_oid / self.sample_block_count
+            block_width = min(int(math.ceil(block_span)), max(1, int(round(block_span * sampling_fraction))))
+            offset = randomizer.uniform(0.0, max(0.0, block_span - block_width))
+            oid_ranges = []
+            for block_index in range(self.sample_block_count):
+                low = 1 + int(block_index * block_span + offset)
+                oid_ranges.append((low, low + block_width))
+            return SamplingPlan(oid_field_name=oid_field_name, oid_ranges=oid_ranges, stride=None, offset=None)
+        stride = max(1, int(round(1.0 / sampling_fraction)))
+        return SamplingPlan(oid_field_name=None, oid_ranges=None, stride=stride, offset=randomizer.randrange(stride))
+
+    def get_cached_profile(self, fc_id, fingerprint, domain_signature=None, geometry_profile_expected=False):
+        """
+        Get the stored profile for a feature class if the fingerprint matches, it holds field statistics when they are
+        computed, out of domain counts of the same domain rules when validated, and a geometry profile when expected,
+        and return CachedProfile, or None.
+
+        :param fc_id: feature class id
+        :param fingerprint: change fingerprint built for this run
+        :param domain_signature: signature of the domain rules of the fields, when validating domains
+        :param geometry_profile_expected: whether the geometries of the feature class are profiled
+        :return: CachedProfile or None
+        """
+        with closing(InventoryStateStore_Class.InventoryStateStore(database_path=self.state_store_path)) as store:
+            cached_profile = store.get_feature_class_profile(fc_id=fc_id)
+        if cached_profile is None or cached_profile.fingerprint != fingerprint:
+            return None
+        if self.compute_field_statistics and cached_profile.field_statistics is None:
+            return None
+        if self.domain_index is not None and (cached_profile.out_of_domain_counts is None
+                                              or cached_profile.domain_signature != domain_signature):
+            return None
+        if geometry_profile_expected and cached_profile.geometry_profile is None:
+            return None
+        return cached_profile
+
+    def inspect(self, task):
+        """
+        Inspect one feature class, timing the whole inspection as a span, and return FeatureClassInspectionResult, or
+        None if the feature class does not exist.
+
+        :param task: FeatureClassTask of feature dataset name, feature class name and optional prefetched metadata
+        :return: FeatureClassInspectionResult or None
+        """
+        stage_timer = RunMetrics_Class.StageTimer(feature_dataset=task.feature_dataset,
+                                                  feature_class=task.feature_class)
+        with stage_timer.span(stage=RunMetrics_Class.RunMetricsRecorder.FEATURE_CLASS_STAGE.value) as span_attributes:
+            inspection_result = self.inspect_feature_class(task=task, stage_timer=stage_timer)
+            span_attributes["rows_scanned"] = sum(span.get("rows_scanned", 0) for span in stage_timer.spans)
+        return inspection_result
+
+    def inspect_feature_class(self, task, stage_timer):
+        """
+        Inspect one feature class and return FeatureClassInspectionResult, or None if the feature class does not exist.
+
+        If the describe object is unavailable the feature class object is returned with default values and no field
+        details, as nothing more can be done.
+        :param task: FeatureClassTask of feature dataset name, feature class name and optional prefetched metadata
+        :param stage_timer: StageTimer for the spans of the inspection stages
+        :return: FeatureClassInspectionResult or None
+        """
+        fd, fc, metadata = task
+        production_fd, sde_fd_ID, feature_dataset_name = fd.split(".")  # first two vars are not used
+
+        # Encountering issue with feature class that "did not exist" despite being in the list. Added check.
+        with stage_timer.span(stage="exists"):
+            fc_exists = metadata.exists if metadata is not None else self.workspace.exists(fd, fc)
+        myutil.print_and_log(message="\tExamining FC: {fc}. FC Exists = {exists}".format(fc=fc, exists=fc_exists),
+                             log_level=myutil.INFO_LEVEL)
+        if not fc_exists:
+            myutil.print_and_log(message="ERROR: ArcPy says FC DNE. {fd}  {fc}. Must skip FC.".format(fd=fd, fc=fc),
+                                 log_level=myutil.ERROR_LEVEL)
+            return None
+
+        production_fc, sde_fc_ID, feature_class_name = fc.split(".")  # first two vars are not used
+        fc_id = myutil.generate_id_from_args(fd, feature_class_name)
+        fc_row_id = myutil.generate_id_from_args(fc_id, self.date_string)
+        number_of_fc_features = self.database_flag
+
+        # Instantiate object. Set the other, finicky parameters as they become available.
+        fc_obj = FeatureClassObjects_Class.FeatureClassObject(fc_ID=fc_id,
+                                                              feature_dataset_name=feature_dataset_name,
+                                                              feature_class_name=feature_class_name,
+                                                              date_export=self.date_string,
+                                                              row_id=fc_row_id)
+
+        # Get the feature count
+        try:
+            with stage_timer.span(stage="get_count"):
+                if metadata is not None and metadata.record_count is not None:
+                    number_of_fc_features = metadata.record_count
+                else:
+                    number_of_fc_features = self.workspace.get_count(fd, fc)
+        except Exception as e:
+            myutil.print_and_log(message="Error getting FC feature count: {}. {}".format(fc, e),
+                                 log_level=myutil.WARNING_LEVEL)
+        else:
+            fc_obj.total_record_count = number_of_fc_features
+
+        # Get the Describe object for each FC. Many elements are dependent on the Describe object
+        try:
+            with stage_timer.span(stage="describe"):
+                if metadata is not None and metadata.description is not None:
+                    fc_desc = metadata.description
+                else:
+                    fc_desc = self.workspace.describe(fd, fc)
+        except Exception as e:
+            myutil.print_and_log(
+                message="{}. {}".format(
+                    "Error generating Describe Object. Basic FC object record written. Fields object skipped.", e),
+                log_level=myutil.ERROR_LEVEL)
+            return FeatureClassInspectionResult(feature_dataset=fd, feature_class=fc, fc_object=fc_obj,
+                                                field_details_list=[], fingerprint=None, null_counts=None,
+                                                max_char_lengths=None, field_statistics=None,
+                                                out_of_domain_counts=None, domain_signature=None,
+                                                geometry_profile=None, used_cached_profile=False,
+                                                timing_spans=stage_timer.spans)
+
+        fc_field_objects_list = list(fc_desc.fields)
+        fc_field_names_list = [field_obj.baseName for field_obj in fc_field_objects_list]
+        fc_obj.data_type = fc_desc.dataType
+        fc_obj.shape_type = fc_desc.shapeType
+        fc_obj.spatial_ref_name = fc_desc.spatialReference.name
+        geometry_profile_expected = self.compute_geometry_profile and fc_desc.dataType == "FeatureClass"
+
+        #NOTE: Due to a SQL error, needed to create prevent_SQL_error() function
+        #ERROR: "Attribute column not found [42S22:[Microsoft][ODBC Driver 13 for SQL Server][SQL Server]Invalid column name 'AREA'.]"
+        fc_field_names_list, fc_field_objects_list = myutil.prevent_SQL_error(fc_field_names_list, fc_field_objects_list)
+        total_field_count = len(fc_field_objects_list)
+        fc_obj.total_field_count = total_field_count
+        total_value_count = myutil.calculate_total_number_of_values_in_dataset(
+            total_records_processed=number_of_fc_features,
+            number_of_fields_in_dataset=total_field_count,
+            database_flag=self.database_flag)
+        fc_obj.total_value_count = total_value_count
+        field_domain_rules, domain_signature = self.resolve_domain_rules(field_objects_list=fc_field_objects_list)
+
+        # Incremental inventory: reuse the stats of the last scan when the feature class is unchanged
+        fingerprint = None
+        cached_profile = None
+        if self.state_store_path is not None and number_of_fc_features != self.database_flag:
+            try:
+                with stage_timer.span(stage="fingerprint") as span_attributes:
+                    fingerprint = self.build_fingerprint(fd, fc, number_of_fc_features, fc_field_objects_list)
+                    if fingerprint is not None and not self.force_full_scan:
+                        cached_profile = self.get_cached_profile(
+                            fc_id=fc_id, fingerprint=fingerprint, domain_signature=domain_signature,
+                            geometry_profile_expected=geometry_profile_expected)
+                    span_attributes["cached_profile_used"] = cached_profile is not None
+            except Exception as e:
+                myutil.print_and_log(message="Error building change fingerprint for FC, full scan used: {}. {}".format(
+                    fc, e), log_level=myutil.WARNING_LEVEL)
+                fingerprint = None
+
+        # SQL pushdown: profile in the database when the workspace can run SQL, else fall back to the cursor scan
+        pushdown_engine = None
+        if (cached_profile is None and self.use_sql_pushdown and not self.compute_field_statistics
+                and self.domain_index is None and self.workspace.sql_dialect is not None):
+            with stage_timer.span(stage="sql_pushdown") as span_attributes:
+                pushdown_engine = self.profile_with_sql_pushdown(feature_dataset=fd,
+                                                                 feature_class=fc,
+                                                                 field_names_list=fc_field_names_list,
+                                                                 field_objects_list=fc_field_objects_list)
+                span_attributes["rows_aggregated"] = (pushdown_engine.records_processed
+                                                      if pushdown_engine is not None else 0)
+
+        field_statistics = None
+        out_of_domain_counts = None
+        sampled_record_count = number_of_fc_features
+        partition_plan = None
+        sampled_null_counts = None
+        sampling_plan = None
+        if cached_profile is not None:
+            myutil.print_and_log(message="\t\tFC unchanged since {}, stored stats used: {}".format(
+                cached_profile.run_date, fc_obj.fc_name), log_level=myutil.INFO_LEVEL)
+            fc_fields_null_value_tracker_dict = cached_profile.null_counts
+            string_fields_character_tracker_dict = cached_profile.max_char_lengths
+            if self.compute_field_statistics:
+                field_statistics = cached_profile.field_statistics
+            if self.domain_index is not None:
+                out_of_domain_counts = cached_profile.out_of_domain_counts
+        elif pushdown_engine is not None:
+            fc_fields_null_value_tracker_dict = pushdown_engine.null_counts
+            string_fields_character_tracker_dict = pushdown_engine.max_char_lengths
+        else:
+            if (self.sampling_threshold is not None and number_of_fc_features != self.database_flag
+                    and number_of_fc_features > self.sampling_threshold):
+                try:
+                    sampling_plan = self.build_sampling_plan(feature_dataset=fd,
+                                                             feature_class=fc,
+                                                             record_count=number_of_fc_features,
+                                                             oid_field_name=getattr(fc_desc, "OIDFieldName", None))
+                except Exception as e:
+                    myutil.print_and_log(message="Error planning sample for FC, full scan used: {}. {}".format(fc, e),
+                                         log_level=myutil.WARNING_LEVEL)
+            if (sampling_plan is None and self.partition_threshold is not None
+                    and number_of_fc_features != self.database_flag
+                    and number_of_fc_features > self.partition_threshold):
+                try:
+                    partition_plan = self.build_partition_plan(feature_dataset=fd,
+                                                               feature_class=fc,
+                                                               record_count=number_of_fc_features,
+                                                               oid_field_name=getattr(fc_desc, "OIDFieldName", None))
+                except Exception as e:
+                    myutil.print_and_log(message="Error planning partitions for FC, single cursor used: {}. {}".format(
+                        fc, e), log_level=myutil.WARNING_LEVEL)
+
+            # Counts of fields never evaluated are output as -9999, rather than zero. Avoid false zero.
+            # Cursor values are in field list order so the engine is keyed on the field object names.
+            create_profiling_engine = partial(
+                ColumnarProfiler_Class.ColumnarProfilingEngine,
+                field_names=[field_obj.name for field_obj in fc_field_objects_list],
+                string_field_names=[field_obj.name for field_obj in fc_field_objects_list
+                                    if field_obj.type.lower() == "string"],
+                database_flag=self.database_flag,
+                field_types=([field_obj.type for field_obj in fc_field_objects_list]
+                             if self.compute_field_statistics else None),
+                field_domain_rules=field_domain_rules)
+            profiling_engine = create_profiling_engine()
+
+            # Access data values and analyze. Stats from a failed scan are not stored for reuse.
+            with stage_timer.span(stage="cursor_scan", sampled=sampling_plan is not None) as span_attributes:
+                try:
+                    if partition_plan is None:
+                        self.scan_records(open_cursor=partial(self.workspace.search_cursor, fd, fc,
+                                                              fc_field_names_list),
+                                          sampling_plan=sampling_plan,
+                                          profile_cursor=partial(profiling_engine.profile_cursor,
+                                                                 chunk_size=self.chunk_size))
+                    else:
+                        self.scan_partitions(open_cursor=partial(self.workspace.search_cursor, fd, fc,
+                                                                 fc_field_names_list),
+                                             partition_plan=partition_plan,
+                                             profiling_engine=profiling_engine,
+                                             create_engine=create_profiling_engine,
+                                             profile_cursor=partial(
+                                                 ColumnarProfiler_Class.ColumnarProfilingEngine.profile_cursor,
+                                                 chunk_size=self.chunk_size),
+                                             span_attributes=span_attributes)
+                except Exception as e:
+                    myutil.print_and_log(message="Error in cursor for FC: {}.\n\t{}".format(fc, e),
+                                         log_level=myutil.WARNING_LEVEL)
+                    fingerprint = None
+                span_attributes["rows_scanned"] = profiling_engine.records_processed
+            fc_fields_null_value_tracker_dict = profiling_engine.null_counts
+            string_fields_character_tracker_dict = profiling_engine.max_char_lengths
+            if self.compute_field_statistics:
+                field_statistics = profiling_engine.get_field_statistics()
+            if self.domain_index is not None:
+                out_of_domain_counts = profiling_engine.out_of_domain_counts
+            # Stats from a sample, even an empty one, are not stored for reuse
+            if sampling_plan is not None:
+                fingerprint = None
+            # Scale sampled null counts to estimates for the whole feature class
+            if sampling_plan is not None and 0 < profiling_engine.records_processed < number_of_fc_features:
+                fc_obj.stats_sampled = True
+                sampled_record_count = profiling_engine.records_processed
+                sampled_null_counts = dict(fc_fields_null_value_tracker_dict)
+                fc_fields_null_value_tracker_dict = {
+                    name: int(round(count * number_of_fc_features / sampled_record_count))
+                    for name, count in sampled_null_counts.items()}
+                if out_of_domain_counts is not None:
+                    out_of_domain_counts = {
+                        name: int(round(count * number_of_fc_features / sampled_record_count))
+                        for name, count in out_of_domain_counts.items()}
+                myutil.print_and_log(message="\t\tFC stats estimated from sample of {} records: {}".format(
+                    sampled_record_count, fc_obj.fc_name), log_level=myutil.INFO_LEVEL)
+        fc_obj.sampled_record_count = sampled_record_count
+
+        # Geometry profiling: a geometry only cursor over the records profiled above, or the stored profile
+        geometry_profile = None
+        if geometry_profile_expected and cached_profile is not None:
+            geometry_profile = cached_profile.geometry_profile
+        elif geometry_profile_expected:
+            geometry_engine = GeometryProfiler_Class.GeometryProfilingEngine(database_flag=self.database_flag)
+            with stage_timer.span(stage="geometry_scan", sampled=sampling_plan is not None) as span_attributes:
+                try:
+                    if partition_plan is None:
+                        self.scan_records(open_cursor=partial(self.workspace.search_geometry_cursor, fd, fc),
+                                          sampling_plan=sampling_plan,
+                                          profile_cursor=geometry_engine.profile_cursor)
+                    else:
+                        self.scan_partitions(open_cursor=partial(self.workspace.search_geometry_cursor, fd, fc),
+                                             partition_plan=partition_plan,
+                                             profiling_engine=geometry_engine,
+                                             create_engine=partial(GeometryProfiler_Class.GeometryProfilingEngine,
+                                                                   database_flag=self.database_flag),
+                                             profile_cursor=(
+                                                 GeometryProfiler_Class.GeometryProfilingEngine.profile_cursor),
+                                             span_attributes=span_attributes)
+                except Exception as e:
+                    myutil.print_and_log(message="Error in geometry cursor for FC: {}.\n\t{}".format(fc, e),
+                                         log_level=myutil.WARNING_LEVEL)
+                    fingerprint = None
+                span_attributes["geometries_scanned"] = geometry_engine.records_processed
+            geometry_profile = geometry_engine.create_geometry_profile_list(
+                record_count=(number_of_fc_features
+                              if sampling_plan is not None
+                              and 0 < geometry_engine.records_processed < number_of_fc_features else None))
+        if geometry_profile is not None:
+            fc_obj.set_geometry_profile(geometry_profile_list=geometry_profile)
+
+        # Calculate stats
+        fc_total_null_value_count = myutil.calculate_total_number_of_null_values_per_dataset(
+            null_counts_list=fc_fields_null_value_tracker_dict.values())
+        fc_obj.total_null_value_count = fc_total_null_value_count
+        fc_obj.percent_null = myutil.calculate_percent(numerator=fc_total_null_value_count,
+                                                       denominator=total_value_count)
+
+        # FC's Fields Metadata Inspection
+        myutil.print_and_log("\t\tProcessing Fields - FC: {}".format(fc_obj.fc_name), myutil.INFO_LEVEL)
+        field_details_list = []
+        with stage_timer.span(stage="field_details", field_count=len(fc_field_objects_list)):
+            for field_object in fc_field_objects_list:
+                field_id = myutil.generate_id_from_args(fc_id, field_object.name)
+                field_row_id = myutil.generate_id_from_args(field_id, self.date_string)
+                field_total_null_value_count = fc_fields_null_value_tracker_dict[field_object.name]
+                field_percent_null = myutil.calculate_percent(field_total_null_value_count, number_of_fc_features)
+                fc_field_details_obj = FeatureClassObjects_Class.FeatureClassFieldDetails(
+                    field_id=field_id,
+                    fc_id=fc_id,
+                    field_object=field_object,
+                    total_record_count=number_of_fc_features,
+                    total_null_value_count=field_total_null_value_count,
+                    percent_null=field_percent_null,
+                    date_export=self.date_string,
+                    row_id=field_row_id)
+                if field_object.name in string_fields_character_tracker_dict.keys():
+                    fc_field_details_obj.field_max_chars_used = string_fields_character_tracker_dict[
+                        fc_field_details_obj.field_name]
+                if field_statistics is not None and field_object.name in field_statistics:
+                    fc_field_details_obj.set_field_statistics(field_statistics_list=field_statistics[field_object.name])
+                if out_of_domain_counts is not None and field_object.name in out_of_domain_counts:
+                    fc_field_details_obj.out_of_domain_value_count = out_of_domain_counts[field_object.name]
+                    fc_field_details_obj.percent_out_of_domain = myutil.calculate_percent(
+                        out_of_domain_counts[field_object.name], number_of_fc_features)
+                if sampled_null_counts is not None:
+                    (null_count_lower_bound,
+                     null_count_upper_bound) = myutil.calculate_population_count_confidence_interval(
+                        sample_count=sampled_null_counts[field_object.name],
+                        sample_size=sampled_record_count,
+                        population_size=number_of_fc_features,
+                        z_score=self.z_score)
+                    fc_field_details_obj.stats_sampled = True
+                    fc_field_details_obj.sampled_record_count = sampled_record_count
+                    fc_field_details_obj.null_count_lower_bound = null_count_lower_bound
+                    fc_field_details_obj.null_count_upper_bound = null_count_upper_bound
+                    fc_field_details_obj.percent_null_lower_bound = myutil.calculate_percent(null_count_lower_bound,
+                                                                                             number_of_fc_features)
+                    fc_field_details_obj.percent_null_upper_bound = myutil.calculate_percent(null_count_upper_bound,
+                                                                                             number_of_fc_features)
+                    fc_field_details_obj.field_max_chars_estimated = (field_object.name in
+                                                                      string_fields_character_tracker_dict)
+                field_details_list.append(fc_field_details_obj)
+
+        return FeatureClassInspectionResult(feature_dataset=fd, feature_class=fc, fc_object=fc_obj,
+                                            field_details_list=field_details_list, fingerprint=fingerprint,
+                                            null_counts=fc_fields_null_value_tracker_dict,
+                                            max_char_lengths=string_fields_character_tracker_dict,
+                                            field_statistics=field_statistics,
+                                            out_of_domain_counts=out_of_domain_counts,
+                                            domain_signature=domain_signature,
+                                            geometry_profile=geometry_profile,
+                                            used_cached_profile=cached_profile is not None,
+                                            timing_spans=stage_timer.spans)
+
+    def scan_records(self, open_cursor, sampling_plan, profile_cursor):
+        """
+        Open cursors over all records, or over the records of the sample, and pass each to the profiling but return
+        nothing.
+
+        :param open_cursor: callable returning a cursor context manager, given an oid field name and an oid range
+        :param sampling_plan: SamplingPlan, or None for all records
+        :param profile_cursor: callable consuming a cursor
+        :return: None
+        """
+        if sampling_plan is None:
+            with open_cursor() as cursor:
+                profile_cursor(cursor)
+        elif sampling_plan.oid_ranges is not None:
+            for oid_range in sampling_plan.oid_ranges:
+                with open_cursor(oid_field_name=sampling_plan.oid_field_name, oid_range=oid_range) as cursor:
+                    profile_cursor(cursor)
+        else:
+            with open_cursor() as cursor:
+                profile_cursor(islice(cursor, sampling_plan.offset, None, sampling_plan.stride))
+        return
+
+    def scan_partition(self, open_cursor, oid_field_name, oid_range, create_engine, profile_cursor):
+        """
+        Scan the records of one object id range into a new engine, retrying with backoff on failure, and return
+        PartitionScan.
+
+        Each attempt profiles into a new engine so that the records read by a failed attempt are not counted.
+        :param open_cursor: callable returning a cursor context manager, given an oid field name and an oid range
+        :param oid_field_name: name of the object id field
+        :param oid_range: tuple of (low, high) object ids
+        :param create_engine: callable returning a new engine
+        :param profile_cursor: callable consuming a cursor into an engine, given the engine and the cursor
+        :return: PartitionScan, with the error of the last attempt if all failed
+        """
+        error = None
+        for attempt_index in range(self.partition_retry_count + 1):
+            if attempt_index > 0:
+                time.sleep(self.partition_backoff_seconds * 2 ** (attempt_index - 1))
+            engine = create_engine()
+            try:
+                with open_cursor(oid_field_name=oid_field_name, oid_range=oid_range) as cursor:
+                    profile_cursor(engine, cursor)
+            except Exception as e:
+                myutil.print_and_log(message="Error in cursor for partition {} of FC, attempt {} of {}. {}".format(
+                    oid_range, attempt_index + 1, self.partition_retry_count + 1, e), log_level=myutil.WARNING_LEVEL)
+                error = e
+                continue
+            return PartitionScan(oid_range=oid_range, engine=engine, attempt_count=attempt_index + 1, error=None)
+        return PartitionScan(oid_range=oid_range, engine=None, attempt_count=self.partition_retry_count + 1,
+                             error=error)
+
+    def scan_partitions(self, open_cursor, partition_plan, profiling_engine, create_engine, profile_cursor,
+                        span_attributes):
+        """
+        Scan the object id ranges of a partition plan concurrently, each into an engine of its own, and merge the
+        engines into the profiling engine provided, in range order, but return nothing.
+
+        The ranges are scanned one at a time, in this thread, when the workspace does not declare concurrent cursors
+        safe. The partition and retry counts are recorded in the span attributes. The partitions that failed all their
+        attempts are left out of the merge, and the error of the first is raised once the others are merged.
+        :param open_cursor: callable returning a cursor context manager, given an oid field name and an oid range
+        :param partition_plan: PartitionPlan
+        :param profiling_engine: engine with a merge method, into which the partitions are merged
+        :param create_engine: callable returning a new engine of the same kind
+        :param profile_cursor: callable consuming a cursor into an engine, given the engine and the cursor
+        :param span_attributes: dictionary of attributes of the scan span
+        :return: None
+        """
+        scan_partition = partial(self.scan_partition, open_cursor, partition_plan.oid_field_name,
+                                 create_engine=create_engine, profile_cursor=profile_cursor)
+        failed_scans = []
+        retry_count = 0
+        thread_count = min(self.partition_thread_count if self.workspace.concurrent_cursors else 1,
+                           len(partition_plan.oid_ranges))
+        with ThreadPoolExecutor(max_workers=thread_count) as executor:
+            partition_scans = (executor.map(scan_partition, partition_plan.oid_ranges) if thread_count > 1
+                               else map(scan_partition, partition_plan.oid_ranges))
+            for partition_scan in partition_scans:
+                retry_count += partition_scan.attempt_count - 1
+                if partition_scan.error is not None:
+                    failed_scans.append(partition_scan)
+                    continue
+                profiling_engine.merge(other=partition_scan.engine)
+        span_attributes["partitions"] = len(partition_plan.oid_ranges)
+        span_attributes["partition_retries"] = retry_count
+        span_attributes["partitions_failed"] = len(failed_scans)
+        if failed_scans:
+            raise failed_scans[0].error
+        return
+
+    def resolve_domain_rules(self, field_objects_list):
+        """
+        Resolve the domain rules of the fields with an indexed domain and return tuple of the dictionary of field name
+        to DomainRule and the signature of the rules, or an empty dictionary and None when not validating domains.
+
+        :param field_objects_list: field objects, after removal of problematic fields
+        :return: tuple of (dictionary, signature string or None)
+        """
+        if self.domain_index is None:
+            return {}, None
+        field_domain_names = {field_obj.name: field_obj.domain for field_obj in field_objects_list
+                              if self.domain_index.get_rule(domain_name=field_obj.domain) is not None}
+        field_domain_rules = {field_name: self.domain_index.get_rule(domain_name=domain_name)
+                              for field_name, domain_name in field_domain_names.items()}
+        return field_domain_rules, self.domain_index.build_signature(field_domain_names=field_domain_names)
+
+    def profile_with_sql_pushdown(self, feature_dataset, feature_class, field_names_list, field_objects_list):
+        """
+        Profile a feature class with one aggregate query in the database and return SQLPushdownProfilingEngine, or
+        None if the query could not be run.
+
+        :param feature_dataset: feature dataset name
+        :param feature_class: feature class name
+        :param field_names_list: column names queried, after removal of problematic fields
+        :param field_objects_list: field objects, in the order of the column names
+        :return: SQLPushdownProfilingEngine or None
+        """
+        pushdown_engine = SQLPushdownProfiler_Class.SQLPushdownProfilingEngine(
+            dialect_name=self.workspace.sql_dialect,
+            field_names=[field_obj.name for field_obj in field_objects_list],
+            string_field_names=[field_obj.name for field_obj in field_objects_list
+                                if field_obj.type.lower() == "string"],
+            database_flag=self.database_flag,
+            column_names=field_names_list)
+        try:
+            with closing(self.workspace.connect_sql()) as connection:
+                pushdown_engine.profile_table(
+                    connection=connection,
+                    table_name_parts=self.workspace.get_sql_table_name_parts(feature_dataset, feature_class))
+        except Exception as e:
+            myutil.print_and_log(message="Error in SQL pushdown for FC, cursor scan used: {}. {}".format(
+                feature_class, e), log_level=myutil.WARNING_LEVEL)
+            return None
+        return pushdown_engine
+
+    def inspect_each(self, tasks, pool=None):
+        """
+        Inspect feature classes, in a worker pool if provided, and yield a tuple of task, result and exception for each
+        task, in task order.
+
+        An exception raised inspecting a feature class is yielded with its task, rather than raised, so that the
+        inspection of the other feature classes continues. The result is None for a feature class that does not exist
+        or whose inspection raised.
+        :param tasks: iterable of FeatureClassTask
+        :param pool: multiprocessing.Pool, or None to inspect in this process
+        :return: generator of (FeatureClassTask, FeatureClassInspectionResult or None, Exception or None)
+        """
+        tasks = list(tasks)
+        if pool is None:
+            for task in tasks:
+                try:
+                    yield task, self.inspect(task), None
+                except Exception as e:
+                    yield task, None, e
+            return
+        results = pool.imap(self.inspect, tasks)
+        for task in tasks:
+            try:
+                yield task, next(results), None
+            except Exception as e:
+                yield task, None, e
+
+    @staticmethod
+    def create_worker_pool(worker_count, log_file):
+        """
+        Create a pool of worker processes for feature class inspection and return it, or None for a single worker.
+
+        :param worker_count: number of worker processes
+        :param log_file: path to the log file of the run, for worker logging
+        :return: multiprocessing.Pool or None
+        """
+        if worker_count <= 1:
+            return None
+        import multiprocessing
+        return multiprocessing.Pool(processes=worker_count,
+                                    initializer=initialize_worker_logging,
+                                    initargs=(log_file,))
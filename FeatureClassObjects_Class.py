@@ -11,27 +11,54 @@ class FeatureClassObject:
     values are established on instantiation. Those objects that fail to be calculated in main script thereby have
     values that can be written to output rather than failing due to non existence. The value of -9999 is a database
     flag value. Error value self explanatory.
+    The sampling headers are optional columns, appended to the output only when sampling mode is turned on.
+    The geometry headers are optional columns, appended to the output only when geometry profiling is turned on, with
+    the extent of the geometries, the null, empty and invalid geometry counts and the vertex count statistics.
+    Instances are slotted, without an instance dictionary, so that the results of a run can be retained compactly.
     """
+    __slots__ = ("data_type", "date_export", "empty_geometry_count", "extent_x_max", "extent_x_min", "extent_y_max",
+                 "extent_y_min", "fc_ID", "fc_name", "fd_name", "invalid_geometry_count", "max_vertex_count",
+                 "mean_vertex_count", "min_vertex_count", "null_geometry_count", "percent_null", "row_id",
+                 "sampled_record_count", "shape_type", "spatial_ref_name", "stats_sampled", "total_field_count",
+                 "total_null_value_count", "total_record_count", "total_value_count", "total_vertex_count")
     Variable = namedtuple("Variable", "value")
     FC_HEADERS_LIST = Variable(value=("Name", "Data Type", "Shape Type", "Total Column Count",
                                              "Total Record Count", "Total Value Count", "Total Null Value Count",
                                              "Percent Null", "Spatial Reference Name", "FD_NAME", "FC_ID",
                                              "DATE", "ROW_ID"))
+    FC_GEOMETRY_HEADERS_LIST = Variable(value=("Extent X Min", "Extent Y Min", "Extent X Max", "Extent Y Max",
+                                               "Null Geometry Count", "Empty Geometry Count",
+                                               "Invalid Geometry Count", "Total Vertex Count", "Min Vertex Count",
+                                               "Max Vertex Count", "Mean Vertex Count"))
+    FC_SAMPLING_HEADERS_LIST = Variable(value=("Stats Sampled", "Sampled Record Count"))
 
     def __init__(self, fc_ID, feature_dataset_name, feature_class_name, date_export, row_id):
         self.date_export = date_export
         self.data_type = "ERROR"
+        self.empty_geometry_count = -9999
+        self.extent_x_max = -9999
+        self.extent_x_min = -9999
+        self.extent_y_max = -9999
+        self.extent_y_min = -9999
         self.fc_ID = fc_ID
         self.fc_name = feature_class_name
         self.fd_name = feature_dataset_name
+        self.invalid_geometry_count = -9999
+        self.max_vertex_count = -9999
+        self.mean_vertex_count = -9999
+        self.min_vertex_count = -9999
+        self.null_geometry_count = -9999
         self.percent_null = -9999
         self.row_id = row_id
+        self.sampled_record_count = -9999
         self.shape_type = "ERROR"
         self.spatial_ref_name = "ERROR"
+        self.stats_sampled = False
         self.total_field_count = -9999
         self.total_null_value_count = -9999
         self.total_record_count = -9999
         self.total_value_count = -9999
+        self.total_vertex_count = -9999
 
     def create_CSV_feature_class_properties_string(self, object_features_list_str):
         """
@@ -60,6 +87,34 @@ class FeatureClassObject:
         """
         return list(map(str, object_features_list))
 
+    def create_object_geometry_list(self):
+        """
+        Create a list of the geometry attributes, in FC_GEOMETRY_HEADERS_LIST order, and return list
+        :return: list of attributes, not formatted to string
+        """
+        return [self.extent_x_min, self.extent_y_min, self.extent_x_max, self.extent_y_max, self.null_geometry_count,
+                self.empty_geometry_count, self.invalid_geometry_count, self.total_vertex_count,
+                self.min_vertex_count, self.max_vertex_count, self.mean_vertex_count]
+
+    def create_object_sampling_list(self):
+        """
+        Create a list of the sampling attributes, in FC_SAMPLING_HEADERS_LIST order, and return list
+        :return: list of attributes, not formatted to string
+        """
+        return [self.stats_sampled, self.sampled_record_count]
+
+    def set_geometry_profile(self, geometry_profile_list):
+        """
+        Set the geometry attributes from a list in FC_GEOMETRY_HEADERS_LIST order but return nothing.
+
+        :param geometry_profile_list: list of geometry profile values
+        :return: None
+        """
+        (self.extent_x_min, self.extent_y_min, self.extent_x_max, self.extent_y_max, self.null_geometry_count,
+         self.empty_geometry_count, self.invalid_geometry_count, self.total_vertex_count, self.min_vertex_count,
+         self.max_vertex_count, self.mean_vertex_count) = geometry_profile_list
+        return
+
 
 class FeatureClassFieldDetails:
     """
@@ -68,16 +123,41 @@ class FeatureClassFieldDetails:
 
     The instance variables are all items to be upserted to Socrata for the Domains dataset. The row_id is generated
     from other attributes and values and serves as the unique ID. The value of -9999 is a database flag value.
+    The sampling headers are optional columns, appended to the output only when sampling mode is turned on. When the
+    stats are not sampled the bounds equal the exact values.
+    The field statistics headers are optional columns, appended to the output only when field statistics are turned
+    on. The distinct count is estimated for fields of many distinct values, and the top values are listed with their
+    counts, which are lower bounds. Statistics not computed for the field type keep the default values.
+    The domain validation headers are optional columns, appended to the output only when domain validation is turned
+    on, with the count and percent of records whose value is out of the domain of the field. Fields without a domain
+    keep the default values.
+    Instances are slotted, without an instance dictionary, and copy the scalar attributes of the field object rather
+    than keep a reference to it, so that the 40k+ field records of a run can be retained compactly.
     """
+    __slots__ = ("__field_domain", "date_export", "distinct_count_estimate", "fc_ID", "field_alias",
+                 "field_def_value", "field_id", "field_is_nullable", "field_length", "field_max_chars_estimated",
+                 "field_max_chars_used", "field_name", "field_precision", "field_required", "field_scale",
+                 "field_type", "max_value", "mean_value", "min_value", "null_count_lower_bound",
+                 "null_count_upper_bound", "out_of_domain_value_count", "percent_field_null",
+                 "percent_null_lower_bound", "percent_null_upper_bound", "percent_out_of_domain", "row_id",
+                 "sampled_record_count", "standard_deviation", "stats_sampled", "top_values",
+                 "total_null_value_count", "total_record_count")
     Variable = namedtuple("Variable", "value")
+    FIELD_DOMAIN_VALIDATION_HEADERS_LIST = Variable(value=("Out Of Domain Value Count", "Percent Out Of Domain"))
     FIELD_HEADERS_LIST = Variable(value=("Alias", "Name", "Total Null Value Count", "Total Value Count",
                                          "Percent Null", "Type", "Default Value", "Domain", "Is Nullable",
                                          "Length", "Max Character Length Found", "Precision", "Scale", "Required",
                                          "FLD_ID", "FC_ID", "DATE", "ROW_ID"))
+    FIELD_SAMPLING_HEADERS_LIST = Variable(value=("Stats Sampled", "Sampled Record Count", "Null Count Lower Bound",
+                                                  "Null Count Upper Bound", "Percent Null Lower Bound",
+                                                  "Percent Null Upper Bound", "Max Character Length Estimated"))
+    FIELD_STATISTICS_HEADERS_LIST = Variable(value=("Distinct Count Estimate", "Min Value", "Max Value", "Mean",
+                                                    "Standard Deviation", "Top Values"))
 
     def __init__(self, field_id, fc_id, field_object, total_record_count, total_null_value_count, percent_null,
                  date_export, row_id):
         self.date_export = date_export
+        self.distinct_count_estimate = -9999
         self.fc_ID = fc_id
         self.field_alias = field_object.aliasName.strip()
         self.field_def_value = field_object.defaultValue
@@ -85,14 +165,28 @@ class FeatureClassFieldDetails:
         self.field_id = field_id
         self.field_is_nullable = field_object.isNullable
         self.field_length = field_object.length
+        self.field_max_chars_estimated = False
         self.field_max_chars_used = -9999
         self.field_name = field_object.name.strip()
         self.field_precision = field_object.precision
         self.field_required = field_object.required
         self.field_scale = field_object.scale
         self.field_type = field_object.type
+        self.max_value = "None"
+        self.mean_value = -9999
+        self.min_value = "None"
+        self.null_count_lower_bound = total_null_value_count
+        self.null_count_upper_bound = total_null_value_count
+        self.out_of_domain_value_count = -9999
         self.percent_field_null = percent_null
+        self.percent_null_lower_bound = percent_null
+        self.percent_null_upper_bound = percent_null
+        self.percent_out_of_domain = -9999
         self.row_id = row_id
+        self.sampled_record_count = total_record_count
+        self.standard_deviation = -9999
+        self.stats_sampled = False
+        self.top_values = "None"
         self.total_null_value_count = total_null_value_count
         self.total_record_count = total_record_count
 
@@ -120,15 +214,26 @@ class FeatureClassFieldDetails:
         """
         return ",".join(object_field_features_list_str)
 
+    def create_object_field_domain_validation_list(self):
+        """
+        Create a list of the domain validation attributes, in FIELD_DOMAIN_VALIDATION_HEADERS_LIST order, and return
+        list
+        :return: list of attributes, not formatted to string
+        """
+        return [self.out_of_domain_value_count, self.percent_out_of_domain]
+
     def create_object_field_feature_list(self):
         """
         Create a list of attributes from instance of class, unformatted to string, and return list
+
+        A field without a default value has the value None, which is listed as the string None, as output has always
+        shown it.
         :return: list of attributes, not formatted to string
-        :return:
         """
         return [self.field_alias, self.field_name, self.total_null_value_count, self.total_record_count,
                                 self.percent_field_null,
-                                self.field_type, self.field_def_value, self.field_domain, self.field_is_nullable,
+                                self.field_type, "None" if self.field_def_value is None else self.field_def_value,
+                                self.field_domain, self.field_is_nullable,
                                 self.field_length, self.field_max_chars_used, self.field_precision, self.field_scale,
                                 self.field_required, self.field_id, self.fc_ID, self.date_export, self.row_id]
 
@@ -138,4 +243,36 @@ class FeatureClassFieldDetails:
         :param object_field_feature_list: list of attributes from instance
         :return: list of string values
         """
-        return list(map(str, object_field_feature_list))
\ No newline at end of file
+        return list(map(str, object_field_feature_list))
+
+    def create_object_field_sampling_list(self):
+        """
+        Create a list of the sampling attributes, in FIELD_SAMPLING_HEADERS_LIST order, and return list
+        :return: list of attributes, not formatted to string
+        """
+        return [self.stats_sampled, self.sampled_record_count, self.null_count_lower_bound,
+                self.null_count_upper_bound, self.percent_null_lower_bound, self.percent_null_upper_bound,
+                self.field_max_chars_estimated]
+
+    def create_object_field_statistics_list(self):
+        """
+        Create a list of the field statistics attributes, in FIELD_STATISTICS_HEADERS_LIST order, and return list
+        :return: list of attributes, not formatted to string
+        """
+        return [self.distinct_count_estimate, self.min_value, self.max_value, self.mean_value,
+                self.standard_deviation, self.top_values]
+
+    def set_field_statistics(self, field_statistics_list):
+        """
+        Set the field statistics attributes from a list in FIELD_STATISTICS_HEADERS_LIST order but return nothing.
+
+        Values of None, for statistics without a value, keep the default values.
+        :param field_statistics_list: list of statistics values
+        :return: None
+        """
+        attribute_names = ("distinct_count_estimate", "min_value", "max_value", "mean_value", "standard_deviation",
+                           "top_values")
+        for attribute_name, value in zip(attribute_names, field_statistics_list):
+            if value is not None:
+                setattr(self, attribute_name, value)
+        return
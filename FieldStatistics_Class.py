@@ -0,0 +1,422 @@
+from collections import Counter, namedtuple
+from itertools import compress, repeat
+from operator import and_, mul, sub
+import math
+import zlib
+
+
+class DistinctCountSketch:
+    """
+    Count the distinct values of a field in bounded memory, exactly up to a limit and estimated beyond it.
+
+    Values are kept in a set until the set holds more than sketch_size values. The count is then estimated by a k
+    minimum values sketch: every value is hashed to 64 bits and only the sketch_size smallest hashes are kept. For n
+    distinct values the hashes are spread evenly, so the largest hash kept, as a fraction of the hash range, is about
+    sketch_size / n. The standard error of the estimate is about 1 / sqrt(sketch_size - 2), 1.6% at the default size.
+    The k minimum values sketch was chosen over HyperLogLog, whose registers must be updated one value at a time in
+    python, because hashing, mixing and comparing a chunk against the largest hash kept are all done by map and
+    filter in C, and after the first chunks few hashes are smaller than the largest kept.
+    Hashes are the built in hash of numbers, which unlike that of strings is not salted per process, and the crc32 of
+    the utf-8 encoding of strings and of the string form of other values, multiplied by a 64 bit odd constant to spread
+    them over the hash range. The hashes are the same in every process, so that sketches of parts of a table counted in
+    different processes can be merged, by keeping the smallest hashes of both, and stored to be merged in a later run.
+    """
+    Variable = namedtuple("Variable", "value")
+    DEFAULT_SKETCH_SIZE = Variable(value=4096)
+    HASH_MASK = Variable(value=0xFFFFFFFFFFFFFFFF)
+    HASH_MULTIPLIER = Variable(value=0x9E3779B97F4A7C15)
+    HASH_RANGE = Variable(value=2 ** 64)
+
+    def __init__(self, sketch_size=DEFAULT_SKETCH_SIZE.value):
+        self.exact_values = set()
+        self.hashes = None
+        self.max_hash = None
+        self.sketch_size = sketch_size
+
+    def add_hashes(self, hashes):
+        """
+        Add hashes to the sketch, keeping the smallest, but return nothing.
+
+        :param hashes: list of hashes
+        :return: None
+        """
+        if len(hashes) == 0:
+            return
+        self.hashes = sorted(set(self.hashes).union(hashes))[:self.sketch_size]
+        if len(self.hashes) == self.sketch_size:
+            self.max_hash = self.hashes[-1]
+        return
+
+    def estimate(self):
+        """
+        Estimate the number of distinct values added and return integer.
+
+        :return: integer
+        """
+        if self.hashes is None:
+            return len(self.exact_values)
+        if self.max_hash is None:
+            return len(self.hashes)
+        return int(round((self.sketch_size - 1) * DistinctCountSketch.HASH_RANGE.value / (self.max_hash + 1.0)))
+
+    def hash_values(self, values):
+        """
+        Hash values to 64 bit integers and return list, of only the hashes smaller than the largest kept if the sketch
+        is full.
+
+        :param values: list of distinct non null values, of one type
+        :return: list of integers
+        """
+        if len(values) == 0:
+            return []
+        first_value = values[0]
+        if isinstance(first_value, str):
+            base_hashes = map(zlib.crc32, map(str.encode, values))
+        elif isinstance(first_value, (int, float)):
+            base_hashes = map(hash, values)
+        else:
+            base_hashes = map(zlib.crc32, map(str.encode, map(str, values)))
+        hashes = map(and_, map(mul, base_hashes, repeat(DistinctCountSketch.HASH_MULTIPLIER.value)),
+                     repeat(DistinctCountSketch.HASH_MASK.value))
+        if self.max_hash is not None:
+            hashes = filter(self.max_hash.__gt__, hashes)
+        return list(hashes)
+
+    def merge(self, other):
+        """
+        Merge the values counted by another sketch of the same size into this sketch but return nothing.
+
+        :param other: DistinctCountSketch
+        :return: None
+        """
+        if other.hashes is None:
+            self.update(values=other.exact_values)
+            return
+        self.switch_to_sketch()
+        self.add_hashes(hashes=other.hashes)
+        return
+
+    def switch_to_sketch(self):
+        """
+        Move the exact values into the sketch, if not already done, but return nothing.
+
+        :return: None
+        """
+        if self.hashes is not None:
+            return
+        self.hashes = []
+        self.add_hashes(hashes=self.hash_values(values=list(self.exact_values)))
+        self.exact_values = set()
+        return
+
+    def to_dict(self):
+        """
+        Copy the state of the sketch to a dictionary, of values that json can encode but for the exact values, and
+        return dictionary.
+
+        :return: dictionary of attribute name to value
+        """
+        return {"exact_values": list(self.exact_values),
+                "hashes": None if self.hashes is None else list(self.hashes),
+                "max_hash": self.max_hash,
+                "sketch_size": self.sketch_size}
+
+    def update(self, values):
+        """
+        Add values to the count but return nothing.
+
+        :param values: iterable of distinct non null values
+        :return: None
+        """
+        if self.hashes is None:
+            self.exact_values.update(values)
+            if len(self.exact_values) > self.sketch_size:
+                self.switch_to_sketch()
+            return
+        self.add_hashes(hashes=self.hash_values(values=list(values)))
+        return
+
+    @staticmethod
+    def from_dict(dictionary):
+        """
+        Create a sketch from the state copied by to_dict and return DistinctCountSketch.
+
+        :param dictionary: dictionary from to_dict
+        :return: DistinctCountSketch
+        """
+        sketch = DistinctCountSketch(sketch_size=dictionary["sketch_size"])
+        sketch.exact_values = set(dictionary["exact_values"])
+        sketch.hashes = None if dictionary["hashes"] is None else list(dictionary["hashes"])
+        sketch.max_hash = dictionary["max_hash"]
+        return sketch
+
+
+class FrequentValuesSummary:
+    """
+    Track the most frequent values of a field in bounded memory with the Misra-Gries summary.
+
+    At most capacity values are counted. When counts are added beyond capacity, the count of the value just beyond
+    capacity is subtracted from every count and values left at zero are dropped. Counts of a chunk are reduced the
+    same way before they are added, which is the merge of two summaries, so the values of a chunk that all appear
+    once, as in a field of unique values, are dropped without being added. A value more frequent than
+    1 / (capacity + 1) of all values is always kept, and each count is low by at most the values seen divided by
+    (capacity + 1).
+    """
+    Variable = namedtuple("Variable", "value")
+    DEFAULT_CAPACITY = Variable(value=64)
+
+    def __init__(self, capacity=DEFAULT_CAPACITY.value):
+        self.capacity = capacity
+        self.counts = Counter()
+
+    def get_top_values(self, count):
+        """
+        Get the most frequent values and their counts, most frequent first, and return list of tuples.
+
+        :param count: number of values to return
+        :return: list of (value, count) tuples
+        """
+        return self.counts.most_common(count)
+
+    def merge(self, other):
+        """
+        Merge the counts of another summary into this summary but return nothing.
+
+        :param other: FrequentValuesSummary
+        :return: None
+        """
+        self.update_counts(value_counts=other.counts)
+        return
+
+    def reduce_counts(self, value_counts):
+        """
+        Reduce counts of values to at most capacity values and return Counter.
+
+        The count subtracted is found from the frequencies of the counts, and the values kept are selected with
+        compress, so only the values kept are handled in python.
+        :param value_counts: Counter of value to count
+        :return: Counter
+        """
+        if len(value_counts) <= self.capacity:
+            return value_counts
+        values_at_or_above = 0
+        decrement = 0
+        for value_count, frequency in sorted(Counter(value_counts.values()).items(), reverse=True):
+            values_at_or_above += frequency
+            if values_at_or_above > self.capacity:
+                decrement = value_count
+                break
+        kept_counts = compress(value_counts.items(), map(decrement.__lt__, value_counts.values()))
+        return Counter({value: value_count - decrement for value, value_count in kept_counts})
+
+    def to_dict(self):
+        """
+        Copy the state of the summary to a dictionary, with the counts as a list of value and count pairs, and return
+        dictionary.
+
+        :return: dictionary of attribute name to value
+        """
+        return {"capacity": self.capacity,
+                "counts": [[value, value_count] for value, value_count in self.counts.items()]}
+
+    def update_counts(self, value_counts):
+        """
+        Add counts of values, reducing to capacity, but return nothing.
+
+        :param value_counts: Counter of value to count
+        :return: None
+        """
+        self.counts.update(self.reduce_counts(value_counts=value_counts))
+        self.counts = self.reduce_counts(value_counts=self.counts)
+        return
+
+    @staticmethod
+    def from_dict(dictionary):
+        """
+        Create a summary from the state copied by to_dict and return FrequentValuesSummary.
+
+        :param dictionary: dictionary from to_dict
+        :return: FrequentValuesSummary
+        """
+        summary = FrequentValuesSummary(capacity=dictionary["capacity"])
+        summary.counts = Counter({value: value_count for value, value_count in dictionary["counts"]})
+        return summary
+
+
+class FieldStatisticsAccumulator:
+    """
+    Accumulate the statistics of one field from chunks of its values in a single pass.
+
+    The statistics are the distinct count, estimated beyond the sketch size of the DistinctCountSketch, the min and
+    max of fields with ordered values, the mean and population standard deviation of numeric fields, and the most
+    frequent values. Chunks are column tuples as transposed by the ColumnarProfilingEngine, without nulls and, for
+    string fields, without blank values. Each chunk is counted once into a Counter, in C, which gives the distinct
+    values for the sketch and the counts for the summary. The mean and variance of a chunk are computed about the
+    chunk mean and combined with the running values by the parallel algorithm of Chan et al., which avoids the loss of
+    precision of a running sum of squares, so accumulators of parts of a table can be merged. Memory is bounded by the
+    sketch and summary sizes whatever the number of records. Statistics not computed for the field type are output as
+    the database flag value, or None for the value columns. The state can be copied to a dictionary and back, so that
+    accumulators can be stored and merged later.
+    """
+    Variable = namedtuple("Variable", "value")
+    DEFAULT_TOP_VALUE_COUNT = Variable(value=5)
+    NUMERIC_FIELD_TYPES = Variable(value=("biginteger", "double", "integer", "single", "smallinteger"))
+    ORDERED_FIELD_TYPES = Variable(value=("biginteger", "date", "double", "integer", "oid", "single", "smallinteger",
+                                          "string"))
+    STATISTICS_FIELD_TYPES = Variable(value=("biginteger", "date", "double", "globalid", "guid", "integer", "oid",
+                                             "single", "smallinteger", "string"))
+    TOP_VALUE_MAX_LENGTH = Variable(value=50)
+
+    def __init__(self, field_type, top_value_count=DEFAULT_TOP_VALUE_COUNT.value):
+        field_type = field_type.lower()
+        self.distinct_count_sketch = DistinctCountSketch()
+        self.field_type = field_type
+        self.frequent_values_summary = FrequentValuesSummary()
+        self.is_numeric = field_type in FieldStatisticsAccumulator.NUMERIC_FIELD_TYPES.value
+        self.is_ordered = field_type in FieldStatisticsAccumulator.ORDERED_FIELD_TYPES.value
+        self.max_value = None
+        self.mean = 0.0
+        self.min_value = None
+        self.sum_of_squared_deviations = 0.0
+        self.top_value_count = top_value_count
+        self.value_count = 0
+
+    def create_statistics_list(self, database_flag):
+        """
+        Create the list of statistics, in FIELD_STATISTICS_HEADERS_LIST order, and return list.
+
+        Top values are listed as value (count), most frequent first, with long values shortened.
+        :param database_flag: value output for statistics not computed
+        :return: list of distinct count, min, max, mean, standard deviation and top values
+        """
+        if self.value_count == 0:
+            return [0, None, None, database_flag, database_flag, None]
+        mean = database_flag
+        standard_deviation = database_flag
+        if self.is_numeric:
+            mean = self.mean
+            standard_deviation = math.sqrt(self.sum_of_squared_deviations / self.value_count)
+        top_values = "; ".join("{} ({})".format(str(value)[:FieldStatisticsAccumulator.TOP_VALUE_MAX_LENGTH.value],
+                                                value_count)
+                               for value, value_count in self.frequent_values_summary.get_top_values(
+                                   count=self.top_value_count))
+        return [self.distinct_count_sketch.estimate(),
+                None if self.min_value is None else str(self.min_value),
+                None if self.max_value is None else str(self.max_value),
+                mean,
+                standard_deviation,
+                top_values or None]
+
+    def merge(self, other):
+        """
+        Merge the statistics accumulated by another accumulator of the same field into this one but return nothing.
+
+        :param other: FieldStatisticsAccumulator
+        :return: None
+        """
+        self.distinct_count_sketch.merge(other=other.distinct_count_sketch)
+        self.frequent_values_summary.merge(other=other.frequent_values_summary)
+        if other.value_count == 0:
+            return
+        self.update_range(chunk_min=other.min_value, chunk_max=other.max_value)
+        if self.is_numeric:
+            self.update_moments(chunk_count=other.value_count, chunk_mean=other.mean,
+                                chunk_sum_of_squared_deviations=other.sum_of_squared_deviations)
+        else:
+            self.value_count += other.value_count
+        return
+
+    def to_dict(self):
+        """
+        Copy the state of the accumulator to a dictionary, of values that json can encode but for the field values,
+        and return dictionary.
+
+        :return: dictionary of attribute name to value
+        """
+        return {"distinct_count_sketch": self.distinct_count_sketch.to_dict(),
+                "field_type": self.field_type,
+                "frequent_values_summary": self.frequent_values_summary.to_dict(),
+                "max_value": self.max_value,
+                "mean": self.mean,
+                "min_value": self.min_value,
+                "sum_of_squared_deviations": self.sum_of_squared_deviations,
+                "top_value_count": self.top_value_count,
+                "value_count": self.value_count}
+
+    def update(self, values):
+        """
+        Accumulate a chunk of values but return nothing.
+
+        :param values: list of the non null, non blank values of the field in the chunk
+        :return: None
+        """
+        if len(values) == 0:
+            return
+        value_counts = Counter(values)
+        self.distinct_count_sketch.update(values=value_counts.keys())
+        self.frequent_values_summary.update_counts(value_counts=value_counts)
+        if self.is_ordered:
+            self.update_range(chunk_min=min(value_counts), chunk_max=max(value_counts))
+        if self.is_numeric:
+            chunk_mean = math.fsum(values) / len(values)
+            deviations = list(map(sub, values, repeat(chunk_mean)))
+            self.update_moments(chunk_count=len(values),
+                                chunk_mean=chunk_mean,
+                                chunk_sum_of_squared_deviations=math.fsum(map(mul, deviations, deviations)))
+        else:
+            self.value_count += len(values)
+        return
+
+    def update_moments(self, chunk_count, chunk_mean, chunk_sum_of_squared_deviations):
+        """
+        Combine the count, mean and sum of squared deviations of a chunk with the running values but return nothing.
+
+        :param chunk_count: number of values in the chunk
+        :param chunk_mean: mean of the chunk
+        :param chunk_sum_of_squared_deviations: sum of squared deviations from the chunk mean
+        :return: None
+        """
+        total_count = self.value_count + chunk_count
+        delta = chunk_mean - self.mean
+        self.mean += delta * chunk_count / total_count
+        self.sum_of_squared_deviations += (chunk_sum_of_squared_deviations
+                                           + delta * delta * self.value_count * chunk_count / total_count)
+        self.value_count = total_count
+        return
+
+    def update_range(self, chunk_min, chunk_max):
+        """
+        Widen the min and max with those of a chunk but return nothing.
+
+        :param chunk_min: min of the chunk, or None
+        :param chunk_max: max of the chunk, or None
+        :return: None
+        """
+        if chunk_min is None:
+            return
+        if self.min_value is None or chunk_min < self.min_value:
+            self.min_value = chunk_min
+        if self.max_value is None or chunk_max > self.max_value:
+            self.max_value = chunk_max
+        return
+
+    @staticmethod
+    def from_dict(dictionary):
+        """
+        Create an accumulator from the state copied by to_dict and return FieldStatisticsAccumulator.
+
+        :param dictionary: dictionary from to_dict
+        :return: FieldStatisticsAccumulator
+        """
+        accumulator = FieldStatisticsAccumulator(field_type=dictionary["field_type"],
+                                                 top_value_count=dictionary["top_value_count"])
+        accumulator.distinct_count_sketch = DistinctCountSketch.from_dict(
+            dictionary=dictionary["distinct_count_sketch"])
+        accumulator.frequent_values_summary = FrequentValuesSummary.from_dict(
+            dictionary=dictionary["frequent_values_summary"])
+        accumulator.max_value = dictionary["max_value"]
+        accumulator.mean = dictionary["mean"]
+        accumulator.min_value = dictionary["min_value"]
+        accumulator.sum_of_squared_deviations = dictionary["sum_of_squared_deviations"]
+        accumulator.value_count = dictionary["value_count"]
+        return accumulator
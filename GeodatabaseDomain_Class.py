@@ -1,23 +1,31 @@
 from collections import namedtuple
+from itertools import repeat
+from operator import gt, lt
 from UtilityClass import UtilityClassFunctionality as myutil
+import hashlib
+import json
+
+DomainRule = namedtuple("DomainRule", "coded_value_keys range_min range_max signature")
 
 class GeodatabaseDomains():
     """
     Create an object for ESRI geodatabase domain values and make available in csv string form for socrata upsert.
 
     The instance variables are all items to be upserted to Socrata for the Domains dataset. The row_id is generated
-    from other attributes and values and serves as the unique ID.
+    from other attributes and values and serves as the unique ID. Instances are slotted and copy the values of the
+    domain object, rather than keep a reference to the arcpy domain, so that retained results stay small.
     """
+    __slots__ = ("__row_id", "coded_values", "data_type", "date", "description", "domain_type", "environment_name",
+                 "name", "owner", "range")
     Variable = namedtuple("Variable", "value")  # named tuple definition
     DOMAIN_HEADERS_LIST = Variable(value=("Name", "Description", "Domain Type", "Data Type", "Coded Value Keys",
                                           "Coded Value Values", "Range", "DOM_ID", "DATE", "ROW_ID"))
 
     def __init__(self, environment_name, domain_object, date):
-        self.coded_values = domain_object.codedValues
+        self.coded_values = dict(domain_object.codedValues)
         self.date = date
         self.data_type = domain_object.type
         self.description = domain_object.description
-        self.domain_object = domain_object
         self.domain_type = domain_object.domainType
         self.environment_name = environment_name
         self.name = domain_object.name
@@ -44,12 +52,14 @@ class GeodatabaseDomains():
     def create_object_feature_list(self):
         """
         Create a list of attributes from instance of class, unformatted to string, and return list
+
+        A description or range of None is listed as the string None, as output has always shown it.
         :return: list of attributes, not formatted to string
         """
         domain_ID = myutil.generate_id_from_args(self.environment_name, self.name)
-        return [self.name, self.description, self.domain_type, self.data_type,
-                              self.domain_object.codedValues.keys(), self.domain_object.codedValues.values(),
-                              self.range, domain_ID, self.date, self.row_id]
+        return [self.name, "None" if self.description is None else self.description, self.domain_type,
+                              self.data_type, self.coded_values.keys(), self.coded_values.values(),
+                              "None" if self.range is None else self.range, domain_ID, self.date, self.row_id]
 
     def create_object_feature_list_str(self, domain_object_feature_list):
         """
@@ -62,3 +72,83 @@ class GeodatabaseDomains():
         return myutil.replace_character_in_list_of_strings(values_list=domain_object_feature_list)
 
 
+class GeodatabaseDomainIndex:
+    """
+    Index the geodatabase domains by name, once per run, for validating field values against the domain of the field.
+
+    Each domain is reduced to a DomainRule: a frozenset of the coded value keys of a coded value domain, or the min and
+    max of a range domain, so that a chunk of values is validated with set membership or comparisons run by map in C,
+    with no lookup of the domain per value. Values out of a domain are those not among the coded value keys, or below
+    the min or above the max of the range. The rule signature is a digest of the domain definition, so that counts
+    stored for reuse can be tied to the domains they were counted against. The index is plain python data and is sent
+    to the worker processes with the inspection.
+    """
+    Variable = namedtuple("Variable", "value")
+    CODED_VALUE_DOMAIN_TYPE = Variable(value="codedvalue")
+    RANGE_DOMAIN_TYPE = Variable(value="range")
+
+    def __init__(self, domain_objects):
+        self.rules = {}
+        for domain_object in domain_objects:
+            rule = GeodatabaseDomainIndex.build_rule(domain_object=domain_object)
+            if rule is not None:
+                self.rules[domain_object.name] = rule
+
+    def build_signature(self, field_domain_names):
+        """
+        Build a digest of the rules of the domains used by fields and return string.
+
+        :param field_domain_names: dictionary of field name to domain name, of the fields validated
+        :return: hex digest string
+        """
+        signature_source = json.dumps(sorted((field_name, self.rules[domain_name].signature)
+                                             for field_name, domain_name in field_domain_names.items()))
+        return hashlib.sha1(signature_source.encode("utf-8")).hexdigest()
+
+    def get_rule(self, domain_name):
+        """
+        Get the rule of a domain and return DomainRule, or None if the field has no domain or it is not indexed.
+
+        :param domain_name: domain name of the field, possibly empty
+        :return: DomainRule or None
+        """
+        if not domain_name:
+            return None
+        return self.rules.get(domain_name)
+
+    @staticmethod
+    def build_rule(domain_object):
+        """
+        Build the rule of a coded value or range domain and return DomainRule, or None for a domain without values.
+
+        :param domain_object: arcpy domain object, or a description with the same attributes
+        :return: DomainRule or None
+        """
+        domain_type = str(domain_object.domainType).lower()
+        coded_value_keys = None
+        range_min = None
+        range_max = None
+        if domain_type == GeodatabaseDomainIndex.CODED_VALUE_DOMAIN_TYPE.value and domain_object.codedValues:
+            coded_value_keys = frozenset(dict(domain_object.codedValues))
+            definition = [domain_type, sorted(map(str, coded_value_keys))]
+        elif domain_type == GeodatabaseDomainIndex.RANGE_DOMAIN_TYPE.value and domain_object.range:
+            range_min, range_max = domain_object.range
+            definition = [domain_type, str(range_min), str(range_max)]
+        else:
+            return None
+        signature = hashlib.sha1(json.dumps(definition).encode("utf-8")).hexdigest()
+        return DomainRule(coded_value_keys=coded_value_keys, range_min=range_min, range_max=range_max,
+                          signature=signature)
+
+    @staticmethod
+    def count_out_of_domain(rule, values):
+        """
+        Count the values not allowed by a domain rule and return integer.
+
+        :param rule: DomainRule
+        :param values: list of non null values of a field
+        :return: integer
+        """
+        if rule.coded_value_keys is not None:
+            return len(values) - sum(map(rule.coded_value_keys.__contains__, values))
+        return sum(map(lt, values, repeat(rule.range_min))) + sum(map(gt, values, repeat(rule.range_max)))
@@ -0,0 +1,234 @@
+from array import array
+from collections import namedtuple
+import FeatureClassObjects_Class
+import math
+import struct
+import sys
+
+
+class GeometryProfilingEngine:
+    """
+    Profile the geometries of a feature class, streamed as well known binary (WKB), for the extent, the null and empty
+    geometry counts, vertex count statistics and a count of invalid geometries.
+
+    Geometries are read one at a time and only running totals are kept, so memory is bounded by the largest geometry.
+    The coordinates of each point sequence are copied from the WKB buffer into one array of doubles, and the extent
+    and checks are taken from the x and y slices of the array by built in operations running in C, with no tuple or
+    point object built per vertex. OGC WKB, ISO WKB and PostGIS EWKB with Z and M values are read.
+    A geometry is empty when it has no vertices, including the WKB empty point of NaN coordinates. A geometry is
+    invalid when its WKB cannot be read, a coordinate is not finite, a line has a single vertex, or a polygon ring has
+    fewer than four vertices or is not closed. These are structural checks; self intersection and ring orientation
+    are not checked, as they need a geometry engine. Invalid geometries are counted but left out of the extent and the
+    vertex statistics. Values never evaluated keep the database flag value. Engines that profiled disjoint parts of a
+    feature class are merged exactly, as counts are summed and the extent and vertex counts widened.
+    """
+    Variable = namedtuple("Variable", "value")
+    COLLECTION_TYPES = Variable(value=(4, 5, 6, 7))
+    EWKB_M_FLAG = Variable(value=0x40000000)
+    EWKB_SRID_FLAG = Variable(value=0x20000000)
+    EWKB_TYPE_MASK = Variable(value=0x0FFFFFFF)
+    EWKB_Z_FLAG = Variable(value=0x80000000)
+    ISO_DIMENSION_OFFSETS = Variable(value=(0, 1, 1, 2))
+    LINE_STRING_TYPE = Variable(value=2)
+    NATIVE_BYTE_ORDER = Variable(value=1 if sys.byteorder == "little" else 0)
+    POINT_TYPE = Variable(value=1)
+    POLYGON_TYPE = Variable(value=3)
+
+    def __init__(self, database_flag):
+        self.database_flag = database_flag
+        self.empty_geometry_count = 0
+        self.extent = None
+        self.invalid_geometry_count = 0
+        self.max_vertex_count = None
+        self.measured_geometry_count = 0
+        self.min_vertex_count = None
+        self.null_geometry_count = 0
+        self.records_processed = 0
+        self.total_vertex_count = 0
+
+    def create_geometry_profile_list(self, record_count=None):
+        """
+        Create a list of the geometry profile, in FC_GEOMETRY_HEADERS_LIST order, and return list.
+
+        When a record count is provided the counts are scaled from the records processed to it, as for a sample.
+        :param record_count: number of records in the feature class, or None for the counts found
+        :return: list of extent, counts and vertex statistics, with the database flag for those never evaluated
+        """
+        if self.records_processed == 0:
+            return [self.database_flag] * len(
+                FeatureClassObjects_Class.FeatureClassObject.FC_GEOMETRY_HEADERS_LIST.value)
+        scale = 1.0 if record_count is None else record_count / self.records_processed
+        extent = self.extent or [self.database_flag] * 4
+        mean_vertex_count = (self.total_vertex_count / self.measured_geometry_count if self.measured_geometry_count
+                             else self.database_flag)
+        scaled_counts = [int(round(count * scale)) for count in (self.null_geometry_count, self.empty_geometry_count,
+                                                                  self.invalid_geometry_count, self.total_vertex_count)]
+        return extent + scaled_counts + [
+            self.database_flag if self.min_vertex_count is None else self.min_vertex_count,
+            self.database_flag if self.max_vertex_count is None else self.max_vertex_count,
+            mean_vertex_count]
+
+    def merge(self, other):
+        """
+        Merge the counts, extent and vertex statistics of an engine that profiled other records into this engine but
+        return nothing.
+
+        :param other: GeometryProfilingEngine
+        :return: None
+        """
+        self.empty_geometry_count += other.empty_geometry_count
+        self.invalid_geometry_count += other.invalid_geometry_count
+        self.measured_geometry_count += other.measured_geometry_count
+        self.null_geometry_count += other.null_geometry_count
+        self.records_processed += other.records_processed
+        self.total_vertex_count += other.total_vertex_count
+        if other.min_vertex_count is not None:
+            self.min_vertex_count = (other.min_vertex_count if self.min_vertex_count is None
+                                     else min(self.min_vertex_count, other.min_vertex_count))
+            self.max_vertex_count = (other.max_vertex_count if self.max_vertex_count is None
+                                     else max(self.max_vertex_count, other.max_vertex_count))
+        if other.extent is not None:
+            self.extent = (list(other.extent) if self.extent is None
+                           else [min(self.extent[0], other.extent[0]), min(self.extent[1], other.extent[1]),
+                                 max(self.extent[2], other.extent[2]), max(self.extent[3], other.extent[3])])
+        return
+
+    def profile_cursor(self, cursor):
+        """
+        Consume all records from a cursor of geometry tuples but return nothing.
+
+        :param cursor: iterable of one value tuples of WKB bytes, or None for a null geometry
+        :return: None
+        """
+        update = self.update
+        for row in cursor:
+            update(geometry=row[0])
+        return
+
+    def update(self, geometry):
+        """
+        Evaluate one geometry and accumulate the counts, extent and vertex statistics but return nothing.
+
+        :param geometry: WKB bytes, bytearray or memoryview, or None
+        :return: None
+        """
+        self.records_processed += 1
+        if geometry is None:
+            self.null_geometry_count += 1
+            return
+        coordinate_arrays = []
+        try:
+            is_valid = GeometryProfilingEngine.read_geometry(buffer=memoryview(geometry), offset=0,
+                                                             coordinate_arrays=coordinate_arrays)[1]
+        except (IndexError, struct.error, ValueError):
+            is_valid = False
+        vertex_count = 0
+        bounds_list = []
+        for coordinates, dimension in (coordinate_arrays if is_valid else ()):
+            x_values = coordinates[0::dimension]
+            y_values = coordinates[1::dimension]
+            if not math.isfinite(sum(x_values) + sum(y_values)):
+                is_valid = False
+                break
+            vertex_count += len(x_values)
+            bounds_list.append((min(x_values), min(y_values), max(x_values), max(y_values)))
+        if not is_valid:
+            self.invalid_geometry_count += 1
+            return
+        self.measured_geometry_count += 1
+        self.total_vertex_count += vertex_count
+        self.min_vertex_count = vertex_count if self.min_vertex_count is None else min(self.min_vertex_count,
+                                                                                       vertex_count)
+        self.max_vertex_count = vertex_count if self.max_vertex_count is None else max(self.max_vertex_count,
+                                                                                       vertex_count)
+        if vertex_count == 0:
+            self.empty_geometry_count += 1
+            return
+        x_mins, y_mins, x_maxes, y_maxes = zip(*bounds_list)
+        if self.extent is None:
+            self.extent = [min(x_mins), min(y_mins), max(x_maxes), max(y_maxes)]
+        else:
+            self.extent = [min(self.extent[0], min(x_mins)), min(self.extent[1], min(y_mins)),
+                           max(self.extent[2], max(x_maxes)), max(self.extent[3], max(y_maxes))]
+        return
+
+    @staticmethod
+    def read_coordinates(buffer, offset, point_count, dimension, swap_bytes):
+        """
+        Read a sequence of points from a WKB buffer into an array of doubles and return tuple of array and end offset.
+
+        :param buffer: memoryview of the WKB
+        :param offset: offset of the first coordinate
+        :param point_count: number of points in the sequence
+        :param dimension: number of coordinates per point, 2 to 4
+        :param swap_bytes: whether the WKB byte order differs from that of this machine
+        :return: tuple of (array of coordinates, offset after the sequence)
+        """
+        end = offset + 8 * point_count * dimension
+        if end > len(buffer):
+            raise ValueError("WKB is truncated")
+        coordinates = array("d")
+        coordinates.frombytes(buffer[offset:end])
+        if swap_bytes:
+            coordinates.byteswap()
+        return coordinates, end
+
+    @staticmethod
+    def read_geometry(buffer, offset, coordinate_arrays):
+        """
+        Read one geometry from a WKB buffer, appending the coordinates of each non empty point sequence to a list,
+        and return tuple of end offset and the structural validity of the geometry.
+
+        :param buffer: memoryview of the WKB
+        :param offset: offset of the geometry byte order marker
+        :param coordinate_arrays: list to append tuples of (array of coordinates, dimension) to
+        :return: tuple of (offset after the geometry, boolean)
+        """
+        byte_order = buffer[offset]
+        if byte_order not in (0, 1):
+            raise ValueError("Unknown WKB byte order {}".format(byte_order))
+        unsigned_integer_format = "<I" if byte_order == 1 else ">I"
+        swap_bytes = byte_order != GeometryProfilingEngine.NATIVE_BYTE_ORDER.value
+        (geometry_type,) = struct.unpack_from(unsigned_integer_format, buffer, offset + 1)
+        offset += 5
+        dimension = (2 + bool(geometry_type & GeometryProfilingEngine.EWKB_Z_FLAG.value)
+                     + bool(geometry_type & GeometryProfilingEngine.EWKB_M_FLAG.value))
+        if geometry_type & GeometryProfilingEngine.EWKB_SRID_FLAG.value:
+            offset += 4
+        iso_dimension, base_type = divmod(geometry_type & GeometryProfilingEngine.EWKB_TYPE_MASK.value, 1000)
+        if iso_dimension >= len(GeometryProfilingEngine.ISO_DIMENSION_OFFSETS.value):
+            raise ValueError("Unknown WKB geometry type {}".format(geometry_type))
+        dimension += GeometryProfilingEngine.ISO_DIMENSION_OFFSETS.value[iso_dimension]
+
+        if base_type == GeometryProfilingEngine.POINT_TYPE.value:
+            coordinates, offset = GeometryProfilingEngine.read_coordinates(buffer, offset, 1, dimension, swap_bytes)
+            if not (math.isnan(coordinates[0]) and math.isnan(coordinates[1])):
+                coordinate_arrays.append((coordinates, dimension))
+            return offset, True
+        (item_count,) = struct.unpack_from(unsigned_integer_format, buffer, offset)
+        offset += 4
+        if base_type == GeometryProfilingEngine.LINE_STRING_TYPE.value:
+            coordinates, offset = GeometryProfilingEngine.read_coordinates(buffer, offset, item_count, dimension,
+                                                                           swap_bytes)
+            if item_count:
+                coordinate_arrays.append((coordinates, dimension))
+            return offset, item_count != 1
+        if base_type == GeometryProfilingEngine.POLYGON_TYPE.value:
+            is_valid = True
+            for _ in range(item_count):
+                (point_count,) = struct.unpack_from(unsigned_integer_format, buffer, offset)
+                coordinates, offset = GeometryProfilingEngine.read_coordinates(buffer, offset + 4, point_count,
+                                                                               dimension, swap_bytes)
+                if point_count:
+                    coordinate_arrays.append((coordinates, dimension))
+                    last_point_index = len(coordinates) - dimension
+                    is_valid = is_valid and point_count >= 4 and (
+                        coordinates[0:2] == coordinates[last_point_index:last_point_index + 2])
+            return offset, is_valid
+        if base_type in GeometryProfilingEngine.COLLECTION_TYPES.value:
+            is_valid = True
+            for _ in range(item_count):
+                offset, part_is_valid = GeometryProfilingEngine.read_geometry(buffer, offset, coordinate_arrays)
+                is_valid = is_valid and part_is_valid
+            return offset, is_valid
+        raise ValueError("Unsupported WKB geometry type {}".format(geometry_type))
@@ -0,0 +1,202 @@
+from collections import namedtuple
+import json
+import sqlite3
+import threading
+
+
+class InventoryCheckpointJournal:
+    """
+    Journal the progress of an inventory run in a local SQLite database so that an interrupted run can be resumed.
+
+    A run is identified by its run date, the date written to every output row. At each checkpoint the journal records,
+    in one transaction, the work items completed since the last checkpoint (the domains, feature datasets and feature
+    classes), the size of each output file once flushed, and the Socrata records handed to the publishers but not yet
+    published. Published rows are recorded, by dataset and ROW_ID, as each upsert succeeds. A resumed run reuses the
+    run date of the interrupted run, skips the completed work items, truncates the output files to their checkpointed
+    sizes before appending, so that rows written after the last checkpoint are not duplicated, re-publishes the
+    unpublished records and skips rows already published. Starting a new run clears the journal of the previous run.
+    Tracking and publishing calls may come from the Socrata publishing threads, so the connection is shared under a
+    lock.
+    """
+    Variable = namedtuple("Variable", "value")
+    CREATE_TABLE_STATEMENTS = Variable(value=(
+        """CREATE TABLE IF NOT EXISTS run (
+            run_date TEXT NOT NULL,
+            completed INTEGER NOT NULL)""",
+        """CREATE TABLE IF NOT EXISTS completed_item (
+            item_type TEXT NOT NULL,
+            item_name TEXT NOT NULL,
+            PRIMARY KEY (item_type, item_name))""",
+        """CREATE TABLE IF NOT EXISTS output_file (
+            file_path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL)""",
+        """CREATE TABLE IF NOT EXISTS pending_record (
+            dataset_identifier TEXT NOT NULL,
+            row_id TEXT NOT NULL,
+            record TEXT NOT NULL,
+            PRIMARY KEY (dataset_identifier, row_id))""",
+        """CREATE TABLE IF NOT EXISTS published_row (
+            dataset_identifier TEXT NOT NULL,
+            row_id TEXT NOT NULL,
+            PRIMARY KEY (dataset_identifier, row_id))""",
+    ))
+    DOMAINS_ITEM = Variable(value="domains")
+    FEATURE_CLASS_ITEM = Variable(value="feature_class")
+    FEATURE_DATASET_ITEM = Variable(value="feature_dataset")
+    ROW_ID_KEY = Variable(value="ROW_ID")
+    TABLE_NAMES = Variable(value=("run", "completed_item", "output_file", "pending_record", "published_row"))
+
+    def __init__(self, database_path):
+        self.completed_items = set()
+        self.connection = sqlite3.connect(database_path, check_same_thread=False)
+        self.database_path = database_path
+        self.lock = threading.Lock()
+        self.published_rows = set()
+        self.resumed = False
+        self.run_date = None
+        self.unpublished_records = {}
+        for statement in InventoryCheckpointJournal.CREATE_TABLE_STATEMENTS.value:
+            self.connection.execute(statement)
+        self.connection.commit()
+
+    def close(self):
+        """
+        Close the database connection but return nothing.
+
+        :return: None
+        """
+        with self.lock:
+            self.connection.close()
+        return
+
+    def complete_run(self):
+        """
+        Mark the run completed, so that it is not resumed, but return nothing.
+
+        :return: None
+        """
+        with self.lock:
+            self.connection.execute("UPDATE run SET completed = 1")
+            self.connection.commit()
+        return
+
+    def get_output_file_sizes(self):
+        """
+        Get the checkpointed size of each output file of the run and return dictionary of file path to size.
+
+        :return: dictionary
+        """
+        with self.lock:
+            return dict(self.connection.execute("SELECT file_path, size FROM output_file").fetchall())
+
+    def get_pending_records(self):
+        """
+        Get the records handed to the publishers but not published by the last checkpoint and return list of tuples.
+
+        :return: list of (dataset identifier, record dictionary)
+        """
+        with self.lock:
+            rows = self.connection.execute("SELECT dataset_identifier, row_id, record FROM pending_record").fetchall()
+        return [(dataset_identifier, json.loads(record)) for dataset_identifier, row_id, record in rows
+                if not self.is_published(dataset_identifier=dataset_identifier, row_id=row_id)]
+
+    def is_completed(self, item_type, item_name):
+        """
+        Check whether a work item was completed by the run and return boolean.
+
+        :param item_type: one of the item type constants
+        :param item_name: name of the feature dataset or feature class, or the domains item constant
+        :return: boolean
+        """
+        return (item_type, item_name) in self.completed_items
+
+    def is_published(self, dataset_identifier, row_id):
+        """
+        Check whether a row was published to the Socrata dataset by the run and return boolean.
+
+        :param dataset_identifier: Socrata dataset identifier
+        :param row_id: ROW_ID of the record
+        :return: boolean
+        """
+        return (dataset_identifier, row_id) in self.published_rows
+
+    def record_published(self, dataset_identifier, records):
+        """
+        Record rows published to a Socrata dataset and stop tracking them as unpublished but return nothing.
+
+        :param dataset_identifier: Socrata dataset identifier
+        :param records: list of record dictionaries published
+        :return: None
+        """
+        row_ids = [record.get(InventoryCheckpointJournal.ROW_ID_KEY.value) for record in records]
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO published_row (dataset_identifier, row_id) VALUES (?, ?)",
+                [(dataset_identifier, row_id) for row_id in row_ids])
+            self.connection.commit()
+            for row_id in row_ids:
+                self.published_rows.add((dataset_identifier, row_id))
+                self.unpublished_records.pop((dataset_identifier, row_id), None)
+        return
+
+    def save_checkpoint(self, completed_items, output_file_sizes):
+        """
+        Record completed items, output file sizes and unpublished records in one transaction but return nothing.
+
+        :param completed_items: iterable of (item type, item name) tuples completed since the last checkpoint
+        :param output_file_sizes: dictionary of output file path to size in bytes, after flushing
+        :return: None
+        """
+        completed_items = list(completed_items)
+        with self.lock:
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO completed_item (item_type, item_name) VALUES (?, ?)", completed_items)
+                self.connection.executemany("INSERT OR REPLACE INTO output_file (file_path, size) VALUES (?, ?)",
+                                            list(output_file_sizes.items()))
+                self.connection.execute("DELETE FROM pending_record")
+                self.connection.executemany(
+                    "INSERT INTO pending_record (dataset_identifier, row_id, record) VALUES (?, ?, ?)",
+                    [(dataset_identifier, row_id, json.dumps(record))
+                     for (dataset_identifier, row_id), record in self.unpublished_records.items()])
+            self.completed_items.update(completed_items)
+        return
+
+    def start_run(self, today_date_string, resume):
+        """
+        Resume the interrupted run if requested and one exists, or else start a new run, and return the run date.
+
+        :param today_date_string: date string of today, the run date of a new run
+        :param resume: boolean, resume the interrupted run if one exists
+        :return: run date string
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT run_date FROM run WHERE completed = 0").fetchone()
+            if resume and row is not None:
+                self.resumed = True
+                self.run_date = row[0]
+                self.completed_items = set(self.connection.execute(
+                    "SELECT item_type, item_name FROM completed_item").fetchall())
+                self.published_rows = set(self.connection.execute(
+                    "SELECT dataset_identifier, row_id FROM published_row").fetchall())
+            else:
+                with self.connection:
+                    for table_name in InventoryCheckpointJournal.TABLE_NAMES.value:
+                        self.connection.execute("DELETE FROM {}".format(table_name))
+                    self.connection.execute("INSERT INTO run (run_date, completed) VALUES (?, 0)",
+                                            (today_date_string,))
+                self.run_date = today_date_string
+        return self.run_date
+
+    def track_unpublished(self, dataset_identifier, record):
+        """
+        Track a record handed to a publisher until it is published but return nothing.
+
+        :param dataset_identifier: Socrata dataset identifier
+        :param record: record dictionary
+        :return: None
+        """
+        with self.lock:
+            self.unpublished_records[(dataset_identifier,
+                                      record.get(InventoryCheckpointJournal.ROW_ID_KEY.value))] = record
+        return
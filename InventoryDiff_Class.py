@@ -0,0 +1,204 @@
+from collections import Counter, namedtuple
+from operator import itemgetter
+from UtilityClass import UtilityClassFunctionality as myutil
+import hashlib
+import sqlite3
+
+
+class InventoryDiffEngine:
+    """
+    Compare the rows of an inventory run with the snapshot of the previous completed run in a local SQLite database,
+    classifying each row as added, changed or unchanged, and each row of the snapshot not seen in the run as removed.
+
+    Rows are keyed on the id column of their table, DOM_ID, FC_ID or FLD_ID. Each row is reduced to a fingerprint, the
+    sha1 digest of its values other than the DATE and ROW_ID of the run, so that the snapshot holds one id and one 20
+    byte digest per row and a row is compared by one dictionary lookup rather than value by value. The snapshot is
+    loaded once, at the start of the run. The fingerprints of the run are staged in the database at each checkpoint,
+    so that a resumed run knows the rows classified before the interruption, and replace the snapshot when the run
+    completes. Rows of the snapshot under a record id prefix marked incomplete, such as a feature dataset that could
+    not be listed, are staged as they were, so that they are carried forward into the new snapshot, also by a resumed
+    run, rather than reported removed. A change in the optional columns turned on changes the fingerprint of every row
+    of the table.
+    """
+    Variable = namedtuple("Variable", "value")
+    ADDED = Variable(value="added")
+    CHANGE_LOG_HEADERS_LIST = Variable(value=("Table", "Record ID", "Change Type", "DATE", "ROW_ID"))
+    CHANGED = Variable(value="changed")
+    CREATE_TABLE_STATEMENTS = Variable(value=(
+        """CREATE TABLE IF NOT EXISTS snapshot_row (
+            table_name TEXT NOT NULL,
+            record_id TEXT NOT NULL,
+            fingerprint BLOB NOT NULL,
+            PRIMARY KEY (table_name, record_id))""",
+        """CREATE TABLE IF NOT EXISTS staged_row (
+            table_name TEXT NOT NULL,
+            record_id TEXT NOT NULL,
+            fingerprint BLOB NOT NULL,
+            PRIMARY KEY (table_name, record_id))""",
+    ))
+    EXCLUDED_HEADERS = Variable(value=("DATE", "ROW_ID"))
+    REMOVED = Variable(value="removed")
+    UNCHANGED = Variable(value="unchanged")
+
+    def __init__(self, database_path, headers_by_table, key_headers_by_table):
+        self.change_counts = Counter()
+        self.connection = sqlite3.connect(database_path)
+        self.database_path = database_path
+        self.fingerprint_getters_by_table = {
+            table_name: itemgetter(*[index for index, header in enumerate(headers)
+                                     if header not in InventoryDiffEngine.EXCLUDED_HEADERS.value])
+            for table_name, headers in headers_by_table.items() if table_name in key_headers_by_table}
+        self.carried_rows = []
+        self.key_indexes_by_table = {table_name: list(headers_by_table[table_name]).index(key_header)
+                                     for table_name, key_header in key_headers_by_table.items()}
+        self.previous_fingerprints = {}
+        self.run_date = None
+        self.staged_rows = []
+        for statement in InventoryDiffEngine.CREATE_TABLE_STATEMENTS.value:
+            self.connection.execute(statement)
+        self.connection.commit()
+
+    def build_fingerprint(self, table_name, values_list):
+        """
+        Build the fingerprint of a row from its values, other than the date and row id, and return bytes.
+
+        :param table_name: results table name
+        :param values_list: row values in header order, not formatted to string
+        :return: sha1 digest bytes
+        """
+        fingerprint_values = self.fingerprint_getters_by_table[table_name](values_list)
+        return hashlib.sha1("\x1f".join(map(str, fingerprint_values)).encode("utf-8")).digest()
+
+    def checkpoint(self):
+        """
+        Stage the fingerprints of the rows classified since the last checkpoint in the database but return nothing.
+
+        :return: None
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO staged_row (table_name, record_id, fingerprint) VALUES (?, ?, ?)",
+                self.staged_rows)
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO staged_row (table_name, record_id, fingerprint) VALUES (?, ?, ?)",
+                self.carried_rows)
+        self.carried_rows = []
+        self.staged_rows = []
+        return
+
+    def classify_row(self, table_name, values_list):
+        """
+        Classify a row of the run against the snapshot and return tuple of record id and change type.
+
+        :param table_name: results table name
+        :param values_list: row values in header order, not formatted to string
+        :return: tuple of (record id string, ADDED, CHANGED or UNCHANGED value)
+        """
+        record_id = str(values_list[self.key_indexes_by_table[table_name]])
+        fingerprint = self.build_fingerprint(table_name=table_name, values_list=values_list)
+        self.staged_rows.append((table_name, record_id, fingerprint))
+        previous_fingerprint = self.previous_fingerprints.get(table_name, {}).get(record_id)
+        if previous_fingerprint is None:
+            change_type = InventoryDiffEngine.ADDED.value
+        elif previous_fingerprint == fingerprint:
+            change_type = InventoryDiffEngine.UNCHANGED.value
+        else:
+            change_type = InventoryDiffEngine.CHANGED.value
+        self.change_counts["{} {}".format(table_name, change_type)] += 1
+        return record_id, change_type
+
+    def close(self):
+        """
+        Close the database connection but return nothing.
+
+        :return: None
+        """
+        self.connection.close()
+        return
+
+    def complete_run(self):
+        """
+        Replace the snapshot with the rows of the run, and the rows carried forward, but return nothing.
+
+        :return: None
+        """
+        self.checkpoint()
+        with self.connection:
+            self.connection.execute("DELETE FROM snapshot_row")
+            self.connection.execute("INSERT INTO snapshot_row (table_name, record_id, fingerprint) "
+                                    "SELECT table_name, record_id, fingerprint FROM staged_row")
+            self.connection.execute("DELETE FROM staged_row")
+        return
+
+    def create_change_log_values_list(self, table_name, record_id, change_type):
+        """
+        Create the change log row of a row change, in CHANGE_LOG_HEADERS_LIST order, and return list.
+
+        :param table_name: results table name
+        :param record_id: record id of the row
+        :param change_type: ADDED, CHANGED or REMOVED value
+        :return: list of values
+        """
+        return [table_name, record_id, change_type, self.run_date,
+                myutil.generate_id_from_args(table_name, record_id, change_type, self.run_date)]
+
+    def find_removed_rows(self):
+        """
+        Find the rows of the snapshot neither seen in the run nor carried forward and return list of tuples of table
+        name and record id.
+
+        :return: list of (table name, record id)
+        """
+        self.checkpoint()
+        staged_keys = set(self.connection.execute("SELECT table_name, record_id FROM staged_row").fetchall())
+        removed_rows = []
+        for table_name, fingerprints in self.previous_fingerprints.items():
+            for record_id in fingerprints:
+                if (table_name, record_id) not in staged_keys:
+                    removed_rows.append((table_name, record_id))
+                    self.change_counts["{} {}".format(table_name, InventoryDiffEngine.REMOVED.value)] += 1
+        return removed_rows
+
+    def get_change_counts(self):
+        """
+        Get the number of rows of each table and change type classified by this process and return dictionary.
+
+        :return: dictionary of "<table> <change type>" to count
+        """
+        return dict(sorted(self.change_counts.items()))
+
+    def mark_incomplete(self, record_id_prefix):
+        """
+        Mark the rows under a record id prefix as not inventoried by the run, carrying the rows of the snapshot under
+        it forward at the next checkpoint, unless seen in the run, so that they are not reported removed, but return
+        nothing.
+
+        :param record_id_prefix: record id prefix, for example the feature dataset name and a separator
+        :return: None
+        """
+        for table_name, fingerprints in self.previous_fingerprints.items():
+            self.carried_rows.extend((table_name, record_id, fingerprint)
+                                     for record_id, fingerprint in fingerprints.items()
+                                     if record_id.startswith(record_id_prefix))
+        return
+
+    def start_run(self, run_date, resume):
+        """
+        Load the snapshot of the previous run and, unless resuming, clear the rows staged by an interrupted run, but
+        return nothing.
+
+        :param run_date: date string of the run
+        :param resume: boolean, the interrupted run is resumed
+        :return: None
+        """
+        self.carried_rows = []
+        self.run_date = run_date
+        self.staged_rows = []
+        if not resume:
+            with self.connection:
+                self.connection.execute("DELETE FROM staged_row")
+        self.previous_fingerprints = {}
+        for table_name, record_id, fingerprint in self.connection.execute(
+                "SELECT table_name, record_id, fingerprint FROM snapshot_row"):
+            self.previous_fingerprints.setdefault(table_name, {})[record_id] = fingerprint
+        return
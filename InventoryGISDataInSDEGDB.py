@@ -14,15 +14,86 @@ The essential pieces for the script to run are a config file containing the cred
  datasets to which results are written. If csv files of the results are being written then the output file names must be
  provided. A log file name must be provided as the process logs its progress and issues to a log file. An output folder
  name must be provided for the csv output, if written.
-There are two optional boolean parameters the user can alter. They control whether the results are written to csv files
- and if the results are upserted to Socrata.
+Workspace backends: the geodatabase is accessed through arcpy by default. With the --backend command line argument, or
+ the WORKSPACE_BACKEND option, the same inventory and profiling runs on a GeoPackage or SQLite file, or on generated
+ synthetic data, without arcpy. These make the process testable and measurable on machines without ArcGIS.
+There are three optional boolean parameters the user can alter. They control whether the results are written to csv
+ files, written to parquet files, and if the results are upserted to Socrata.
+Socrata connections: the Socrata clients of a run share one pool of keep-alive connections. Requests that time out
+ or meet a throttling or server error are retried with backoff. Connections opened and reused are in the run summary.
+Background Socrata publishing: when turned on, the batches of results are upserted to Socrata by background threads,
+ per results dataset, fed by bounded queues, so the scan continues while uploads are in flight. The number of threads
+ is set per dataset. At the end of the run the queues are drained and the failed records are listed in the log.
+Checkpoint and resume: a local SQLite checkpoint journal records the domains, feature datasets and feature classes
+ completed, every CHECKPOINT_FEATURE_CLASS_INTERVAL feature classes and at the end of each feature dataset, with the
+ size of each output file once flushed and the Socrata rows published. Run with the --resume command line argument
+ after an interrupted run to continue it on its run date: completed work is skipped, the csv files are truncated to
+ their checkpointed sizes and appended to, and rows already published to Socrata are not upserted again.
+Parquet output: when turned on, each results table is written as a parquet dataset with typed columns, partitioned by
+ run date (OUTPUT_PARQUET/<table>/DATE=YYYY-MM-DD), so the inventory history can be read by column and date. Requires
+ pyarrow.
+Incremental inventory: when turned on, a local SQLite state file records a change fingerprint and the stats of each
+ feature class. Unchanged feature classes are not scanned; their stored stats are re-emitted with the date and row id
+ of the run. Only feature classes with an edit date field are reused; the others are always scanned. Run with the
+ --full command line argument to force a scan of every feature class.
+Metadata prefetch: when turned on, the feature classes of every feature dataset, and the existence, record count and
+ describe of every feature class, are gathered before the scan by a bounded pool of threads, rather than one round
+ trip at a time during it. The catalog is saved to a local SQLite file, and a rerun on the same day loads it rather
+ than gathering it again, unless run with --full. Calls that fail during the prefetch are made again during the scan.
+ A backend that does not declare concurrent metadata calls safe, as arcpy does not, is prefetched with one thread.
+Largest first scheduling: when turned on, the feature classes of all feature datasets are inspected most costly
+ first, so that the workers are not left waiting on one large feature class at the end of the run. The cost of a
+ feature class is the time its last scan took, kept in a local SQLite file, or else its record count times its field
+ count, from the metadata prefetch, times the seconds per value fitted to the times of the earlier scans. The rows of
+ the output are written in the order inspected, which changes from run to run as the costs do, so leave it off when
+ the csv files of runs are compared line by line. The run summary compares the estimated and actual seconds, and each
+ feature class span of the metrics file carries its estimate, for tuning the cost model.
+Run to run diff: when turned on, every domain, feature class and field row is compared with the snapshot of the
+ previous completed run, kept in a local SQLite file, by a fingerprint of its values other than the date and row id.
+ Rows are classified as added, changed, unchanged or removed, and all but the unchanged are written to a change log
+ table, published to Socrata when a changelog dataset is configured. Removed feature classes are listed in the log.
+ The rows of feature datasets that could not be inventoried are carried forward, not reported removed. With publish
+ changes only turned on, unchanged rows are written to file but not upserted to Socrata.
+Run metrics: each run appends timing spans, one json line each, to a metrics file. Spans cover listing the domains,
+ feature datasets and feature classes, each stage of every feature class inspection, the writing of output rows with
+ the bytes written, and each Socrata upsert with its latency. The end of the log summarizes the time per stage and the
+ slowest feature classes.
+SQL pushdown profiling: when turned on, the null and blank counts and max character lengths are computed in the
+ database by one aggregate query per feature class, rather than by reading every record through a cursor. Runs on
+ the geodatabase through an ODBC connection string (requires pyodbc) and on GeoPackage or SQLite files. Feature
+ classes the query fails on, and workspaces without SQL, fall back to the cursor scan.
+Sampling mode: when turned on, feature classes with more records than the threshold are profiled from a sample of
+ object id ranges. Null counts are estimated with confidence bounds and sampling columns are added to the output.
+Partitioned scan: when turned on, feature classes with more records than the threshold are scanned as partitions
+ of object id ranges, read with where clauses, by a bounded pool of threads per feature class, and the counts of the
+ partitions are merged exactly. Cursors stay open only for one partition, and a partition that fails, as on a server
+ timeout, is retried on its own. Sampled feature classes are not partitioned. The partitions are read concurrently
+ only on backends that declare concurrent cursors safe: the geopackage and synthetic backends. Concurrent arcpy cursors
+ in one process are not known to be safe, so the arcpy backend reads the partitions one at a time.
+Field statistics: when turned on, columns are added to the field output for the distinct count, min, max, mean and
+ standard deviation, and the most frequent values of each field, computed in the same cursor scan as the null counts.
+ Distinct counts beyond 4096 values are estimated, within about 2%. SQL pushdown is not used.
+Domain validation: when turned on, the values of fields with a coded value or range domain are checked against the
+ domain in the same cursor scan, and columns are added to the field output for the count and percent of values out
+ of the domain. The domain index is built once per run from the listed domains and shared by all feature classes.
+ Null and blank values are not counted as out of the domain. SQL pushdown is not used.
+Geometry profiling: when turned on, columns are added to the feature class output for the extent, the null, empty and
+ invalid geometry counts and the vertex count statistics, from a second cursor reading only the geometries as WKB.
+ Invalid geometries are those failing structural checks: unreadable, non finite coordinates, one vertex lines, and
+ polygon rings that are not closed or have fewer than four vertices.
 There are four python files necessary for the process to run. These are this file, a UtilityClass.py module, a
  GeodatabaseDomain_Class.py module, and a FeatureClassObjects_Class.py module. This file is the main script to perform
  the process. The Utility Class contains static methods for use anywhere within the process parts. The Geodatabase
  Domain Class contains the structure for the domains objects. The Feature Class Objects Class contains the structure
  for two objects. These objects are a Feature Class and a Feature Class Field. These items were grouped into one file
  since a feature class and its fields are connected. Domains apply to the entire geodatabase so they were viewed to be
- separate.
+ separate. Supporting modules: FeatureClassInspection_Class.py inspects each feature class, optionally in a pool of
+ worker processes, through a workspace defined in Workspace_Class.py; ColumnarProfiler_Class.py profiles the cursor
+ records; ProfileAccumulator_Class.py accumulates, merges and serializes the profile of each field;
+ FieldStatistics_Class.py accumulates the field statistics; GeometryProfiler_Class.py profiles the geometries;
+ SQLPushdownProfiler_Class.py profiles in the database; MetadataCatalog_Class.py prefetches the metadata of the
+ feature classes; InventoryScheduler_Class.py orders the inspections; InventoryDiff_Class.py compares the rows with
+ the previous run; SocrataPublishing_Class.py batches the Socrata upserts.
 COMPATIBILITY: Revised on 20180118 for Python 3.6 (ESRI ArcPro python version)
 REVISED:  Forked from CJuice's EnterpriseGDBIntentory project, originally designed for another employer environment.
  It has been tailored to Maryland DoIT needs for GIS data inspection.
@@ -47,52 +118,142 @@ def main():
     from collections import namedtuple
     from datetime import date
     from UtilityClass import UtilityClassFunctionality as myutil
+    import argparse
     import configparser
+    import FeatureClassInspection_Class
     import FeatureClassObjects_Class
     import GeodatabaseDomain_Class
+    import InventoryCheckpoint_Class
+    import InventoryDiff_Class
+    import InventoryScheduler_Class
+    import InventoryStateStore_Class
     import logging
+    import MetadataCatalog_Class
     import os
+    import OutputSink_Class
+    import RunMetrics_Class
+    import SocrataPublishing_Class
     import time
+    import Workspace_Class
 
     # VARIABLES
     CONSTANT = namedtuple("CONSTANT", "value")
 
         # CONSTANTS
     _ROOT_PATH_FOR_PROJECT = CONSTANT(value=os.path.dirname(__file__))
+    CATALOG_DATABASE_FILE = CONSTANT(value=os.path.join(_ROOT_PATH_FOR_PROJECT.value,
+                                                        "EnterpriseGDBInventory_CATALOG.sqlite"))
+    CHECKPOINT_DATABASE_FILE = CONSTANT(value=os.path.join(_ROOT_PATH_FOR_PROJECT.value,
+                                                           "EnterpriseGDBInventory_CHECKPOINT.sqlite"))
+    CHECKPOINT_FEATURE_CLASS_INTERVAL = CONSTANT(value=50)                                          # OPTION
     CREDENTIALS_PATH = CONSTANT(r"Docs\credentials.cfg")
     DATABASE_FLAG_NUMERIC = CONSTANT(value=-9999)
     DOMAINS_INVENTORY_FILE_NAME = CONSTANT(value="GeodatabaseDomainsInventory")
+    FILE_NAME_CHANGE_LOG = CONSTANT(value="InventoryChangeLog")
     FILE_NAME_FC_INVENTORY = CONSTANT(value="FeatureClassInventory")
     FILE_NAME_FIELD_INVENTORY = CONSTANT(value="FeatureClassFIELDSInventory")
+    GEOPACKAGE_FILE_PATH = CONSTANT(value=os.path.join(_ROOT_PATH_FOR_PROJECT.value, "Inventory.gpkg"))    # OPTION
+    INSPECTION_WORKER_COUNT = CONSTANT(value=1)                                                     # OPTION
     LOG_FILE = CONSTANT(value=os.path.join(_ROOT_PATH_FOR_PROJECT.value, "EnterpriseGDBInventory_LOG.log"))
+    METADATA_PREFETCH_THREAD_COUNT = CONSTANT(value=8)                                              # OPTION
+    METRICS_FILE = CONSTANT(value=os.path.join(_ROOT_PATH_FOR_PROJECT.value, "EnterpriseGDBInventory_METRICS.jsonl"))
+    METRICS_SLOWEST_FEATURE_CLASS_COUNT = CONSTANT(value=10)                                        # OPTION
+    OUTPUT_CSV_BUFFER_SIZE = CONSTANT(value=1048576)                                                # OPTION
+    OUTPUT_CSV_FLUSH_ROW_COUNT = CONSTANT(value=10000)                                              # OPTION
+    PARTITION_RECORD_COUNT = CONSTANT(value=1000000)                                                # OPTION
+    PARTITION_RECORD_COUNT_THRESHOLD = CONSTANT(value=5000000)                                      # OPTION
+    PARTITION_RETRY_COUNT = CONSTANT(value=2)                                                       # OPTION
+    PARTITION_THREAD_COUNT = CONSTANT(value=4)                                                      # OPTION
     PATH_FOR_CSV_OUTPUT = CONSTANT(value=os.path.join(_ROOT_PATH_FOR_PROJECT.value, "OUTPUT_CSVs"))
+    PATH_FOR_PARQUET_OUTPUT = CONSTANT(value=os.path.join(_ROOT_PATH_FOR_PROJECT.value, "OUTPUT_PARQUET"))
+    PROFILING_CHUNK_SIZE = CONSTANT(value=10000)                                                    # OPTION
+    SAMPLING_RECORD_COUNT_THRESHOLD = CONSTANT(value=5000000)                                       # OPTION
+    SAMPLING_SAMPLE_SIZE = CONSTANT(value=200000)                                                   # OPTION
+    SCHEDULE_DATABASE_FILE = CONSTANT(value=os.path.join(_ROOT_PATH_FOR_PROJECT.value,
+                                                         "EnterpriseGDBInventory_SCHEDULE.sqlite"))
+    SNAPSHOT_DATABASE_FILE = CONSTANT(value=os.path.join(_ROOT_PATH_FOR_PROJECT.value,
+                                                         "EnterpriseGDBInventory_SNAPSHOT.sqlite"))
+    SOCRATA_CONNECTION_POOL_SIZE = CONSTANT(value=8)                                                # OPTION
+    SOCRATA_RETRY_BACKOFF_SECONDS = CONSTANT(value=2.0)                                             # OPTION
+    SOCRATA_RETRY_COUNT = CONSTANT(value=3)                                                         # OPTION
+    SOCRATA_TIMEOUT_SECONDS = CONSTANT(value=10)                                                    # OPTION
+    SOCRATA_UPSERT_BATCH_MAX_BYTES = CONSTANT(value=5000000)                                        # OPTION
+    SOCRATA_UPSERT_BATCH_MAX_RECORDS = CONSTANT(value=1000)                                         # OPTION
+    SOCRATA_UPSERT_CONCURRENCY = CONSTANT(value={OutputSink_Class.OutputSink.DOMAINS_TABLE.value: 1,    # OPTION
+                                                 OutputSink_Class.OutputSink.FEATURE_CLASSES_TABLE.value: 2,
+                                                 OutputSink_Class.OutputSink.CHANGE_LOG_TABLE.value: 1,
+                                                 OutputSink_Class.OutputSink.FIELDS_TABLE.value: 4})
+    SOCRATA_UPSERT_QUEUE_SIZE = CONSTANT(value=8)                                                   # OPTION
+    SQL_PUSHDOWN_CONNECTION_STRING = CONSTANT(value=None)    # OPTION: ODBC connection string of the geodatabase
+    SQL_PUSHDOWN_DIALECT = CONSTANT(value="sqlserver")                      # OPTION: sqlserver, oracle, postgresql
+    STATE_DATABASE_FILE = CONSTANT(value=os.path.join(_ROOT_PATH_FOR_PROJECT.value, "EnterpriseGDBInventory_STATE.sqlite"))
+    TURN_ON_BACKGROUND_SOCRATA_PUBLISHING = CONSTANT(value=True)                                    # OPTION
+    TURN_ON_DOMAIN_VALIDATION = CONSTANT(value=False)                                               # OPTION
+    TURN_ON_FIELD_STATISTICS = CONSTANT(value=False)                                                # OPTION
+    TURN_ON_GEOMETRY_PROFILING = CONSTANT(value=False)                                              # OPTION
+    TURN_ON_INCREMENTAL_INVENTORY = CONSTANT(value=False)                                           # OPTION
+    TURN_ON_LARGEST_FIRST_SCHEDULING = CONSTANT(value=False)                                        # OPTION
+    TURN_ON_METADATA_PREFETCH = CONSTANT(value=True)                                                # OPTION
+    TURN_ON_PARTITIONED_SCAN_OF_LARGE_FEATURE_CLASSES = CONSTANT(value=False)                       # OPTION
+    TURN_ON_PUBLISH_CHANGES_ONLY = CONSTANT(value=False)                                            # OPTION
+    TURN_ON_RUN_TO_RUN_DIFF = CONSTANT(value=False)                                                 # OPTION
+    TURN_ON_SAMPLING_OF_LARGE_FEATURE_CLASSES = CONSTANT(value=False)                               # OPTION
+    TURN_ON_SQL_PUSHDOWN_PROFILING = CONSTANT(value=False)                                          # OPTION
     TURN_ON_UPSERT_OUTPUT_TO_SOCRATA = CONSTANT(value=True)                                         # OPTION
     TURN_ON_WRITE_OUTPUT_TO_CSV = CONSTANT(value=True)                                              # OPTION
+    TURN_ON_WRITE_OUTPUT_TO_PARQUET = CONSTANT(value=False)                                         # OPTION
+    WORKSPACE_BACKEND = CONSTANT(value="arcpy")                                 # OPTION: arcpy, geopackage, synthetic
 
         # OTHER
     domain_objects_list = None
     feature_datasets_list = None
-    output_file_names_tuple = (myutil.build_csv_file_name_with_date( myutil.build_today_date_string(),
-                                                                     FILE_NAME_FC_INVENTORY.value),
-                               myutil.build_csv_file_name_with_date(myutil.build_today_date_string(),
-                                                                    FILE_NAME_FIELD_INVENTORY.value),
-                               myutil.build_csv_file_name_with_date(myutil.build_today_date_string(),
-                                                                    DOMAINS_INVENTORY_FILE_NAME.value))
+    fc_headers_list = FeatureClassObjects_Class.FeatureClassObject.FC_HEADERS_LIST.value
+    field_headers_list = FeatureClassObjects_Class.FeatureClassFieldDetails.FIELD_HEADERS_LIST.value
+    if TURN_ON_SAMPLING_OF_LARGE_FEATURE_CLASSES.value:
+        fc_headers_list += FeatureClassObjects_Class.FeatureClassObject.FC_SAMPLING_HEADERS_LIST.value
+        field_headers_list += FeatureClassObjects_Class.FeatureClassFieldDetails.FIELD_SAMPLING_HEADERS_LIST.value
+    if TURN_ON_GEOMETRY_PROFILING.value:
+        fc_headers_list += FeatureClassObjects_Class.FeatureClassObject.FC_GEOMETRY_HEADERS_LIST.value
+    if TURN_ON_FIELD_STATISTICS.value:
+        field_headers_list += FeatureClassObjects_Class.FeatureClassFieldDetails.FIELD_STATISTICS_HEADERS_LIST.value
+    if TURN_ON_DOMAIN_VALIDATION.value:
+        field_headers_list += (
+            FeatureClassObjects_Class.FeatureClassFieldDetails.FIELD_DOMAIN_VALIDATION_HEADERS_LIST.value)
     SDE_file_path = os.path.join(_ROOT_PATH_FOR_PROJECT.value,
                                  r"SDE_CONNECTION_FILE\Production on gis-db-imap01p.sde")
 
-        # Credentials: need from config file
-    config = configparser.ConfigParser()
-    config.read(filenames=CREDENTIALS_PATH.value)
-    domainlevel_app_id = config['domainlevel']["app_id"]
-    domainlevel_app_token = config['domainlevel']["app_token"]
-    featureclasslevel_app_id = config['featureclasslevel']["app_id"]
-    featureclasslevel_app_token = config['featureclasslevel']["app_token"]
-    fieldlevel_app_id = config['fieldlevel']["app_id"]
-    fieldlevel_app_token = config['fieldlevel']["app_token"]
-    socrata_maryland_domain = config['DEFAULT']["maryland_domain"]
-    socrata_password = config['DEFAULT']["password"]
-    socrata_username = config['DEFAULT']["username"]
+        # Command line arguments
+    parser = argparse.ArgumentParser(description="Inventory the domains, feature classes and fields of an SDE geodatabase")
+    parser.add_argument("--full", action="store_true",
+                        help="Scan every feature class, ignoring the stored stats of unchanged feature classes and "
+                             "the metadata catalog gathered earlier in the day")
+    parser.add_argument("--backend", choices=("arcpy", "geopackage", "synthetic"), default=WORKSPACE_BACKEND.value,
+                        help="Workspace to inventory: the SDE geodatabase through arcpy, a GeoPackage or SQLite file, "
+                             "or generated synthetic data")
+    parser.add_argument("--source", default=None,
+                        help="Path to the SDE connection file or the GeoPackage, if not the configured path")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume the interrupted run, skipping the work completed and the rows already published")
+    args = parser.parse_args()
+
+        # Credentials: need from config file, when upserting to Socrata
+    if TURN_ON_UPSERT_OUTPUT_TO_SOCRATA.value:
+        config = configparser.ConfigParser()
+        config.read(filenames=CREDENTIALS_PATH.value)
+        domainlevel_app_id = config['domainlevel']["app_id"]
+        domainlevel_app_token = config['domainlevel']["app_token"]
+        featureclasslevel_app_id = config['featureclasslevel']["app_id"]
+        featureclasslevel_app_token = config['featureclasslevel']["app_token"]
+        fieldlevel_app_id = config['fieldlevel']["app_id"]
+        fieldlevel_app_token = config['fieldlevel']["app_token"]
+        changelog_app_id = None
+        changelog_app_token = None
+        if config.has_section(OutputSink_Class.OutputSink.CHANGE_LOG_TABLE.value):
+            changelog_app_id = config[OutputSink_Class.OutputSink.CHANGE_LOG_TABLE.value]["app_id"]
+            changelog_app_token = config[OutputSink_Class.OutputSink.CHANGE_LOG_TABLE.value]["app_token"]
+        socrata_maryland_domain = config['DEFAULT']["maryland_domain"]
+        socrata_password = config['DEFAULT']["password"]
+        socrata_username = config['DEFAULT']["username"]
 
 
     # LOGGING
@@ -100,6 +261,8 @@ def main():
     myutil.print_and_log(
         message=" {} - {} Initiated".format(myutil.get_date_time_for_logging_and_printing(), os.path.basename(__file__)),
         log_level=myutil.INFO_LEVEL)
+    run_metrics = RunMetrics_Class.RunMetricsRecorder(metrics_file_path=METRICS_FILE.value,
+                                                      run_id=myutil.get_date_time_for_logging_and_printing())
 
 
     # FUNCTIONS
@@ -108,112 +271,484 @@ def main():
         """Pass ESRI geoprocessing function and arguments through Decorator containing error handling functionality"""
         return func(*args, **kwargs)
 
-    # FUNCTIONALITY
-    import arcpy  # delayed arcpy import for performance
+    def create_fc_values_list(fc_object):
+        """Create the list of feature class values, including optional columns turned on, and return list"""
+        values_list = fc_object.create_object_feature_list()
+        if TURN_ON_SAMPLING_OF_LARGE_FEATURE_CLASSES.value:
+            values_list += fc_object.create_object_sampling_list()
+        if TURN_ON_GEOMETRY_PROFILING.value:
+            values_list += fc_object.create_object_geometry_list()
+        return values_list
+
+    def create_field_values_list(field_details_object):
+        """Create the list of field values, including optional columns turned on, and return list"""
+        values_list = field_details_object.create_object_field_feature_list()
+        if TURN_ON_SAMPLING_OF_LARGE_FEATURE_CLASSES.value:
+            values_list += field_details_object.create_object_field_sampling_list()
+        if TURN_ON_FIELD_STATISTICS.value:
+            values_list += field_details_object.create_object_field_statistics_list()
+        if TURN_ON_DOMAIN_VALIDATION.value:
+            values_list += field_details_object.create_object_field_domain_validation_list()
+        return values_list
+
+    def create_socrata_batcher(app_token, dataset_identifier, table_name):
+        """Create the Socrata upsert batcher of a results table, publishing in the background if on, and return it"""
+        def create_client():
+            return socrata_client_pool.create_client(app_token=app_token)
+        if TURN_ON_BACKGROUND_SOCRATA_PUBLISHING.value:
+            return SocrataPublishing_Class.BackgroundSocrataUpsertBatcher(
+                client_factory=create_client,
+                dataset_identifier=dataset_identifier,
+                concurrency=SOCRATA_UPSERT_CONCURRENCY.value[table_name],
+                queue_size=SOCRATA_UPSERT_QUEUE_SIZE.value,
+                max_records=SOCRATA_UPSERT_BATCH_MAX_RECORDS.value,
+                max_bytes=SOCRATA_UPSERT_BATCH_MAX_BYTES.value,
+                stage_timer=run_metrics,
+                published_callback=checkpoint_journal.record_published)
+        return SocrataPublishing_Class.SocrataUpsertBatcher(client=create_client(),
+                                                            dataset_identifier=dataset_identifier,
+                                                            max_records=SOCRATA_UPSERT_BATCH_MAX_RECORDS.value,
+                                                            max_bytes=SOCRATA_UPSERT_BATCH_MAX_BYTES.value,
+                                                            stage_timer=run_metrics,
+                                                            published_callback=checkpoint_journal.record_published)
+
+    def get_output_bytes_written():
+        """Total the bytes written by all output sinks and return integer"""
+        return sum(output_sink.get_bytes_written() for output_sink in output_sinks)
+
+    def publish_record(socrata_batcher, record):
+        """Hand a record to a Socrata batcher, unless published before the run was resumed, but return nothing"""
+        row_id = record.get(InventoryCheckpoint_Class.InventoryCheckpointJournal.ROW_ID_KEY.value)
+        if checkpoint_journal.is_published(dataset_identifier=socrata_batcher.dataset_identifier, row_id=row_id):
+            return
+        checkpoint_journal.track_unpublished(dataset_identifier=socrata_batcher.dataset_identifier, record=record)
+        socrata_batcher.add(record=record)
+        return
+
+    def save_checkpoint(completed_items):
+        """Flush the output sinks and journal the completed work items and output file sizes but return nothing"""
+        with run_metrics.span(stage="checkpoint", completed_items=len(completed_items)):
+            output_file_sizes = {}
+            for output_sink in output_sinks:
+                output_file_sizes.update(output_sink.checkpoint())
+            if diff_engine is not None:
+                diff_engine.checkpoint()
+            checkpoint_journal.save_checkpoint(completed_items=completed_items, output_file_sizes=output_file_sizes)
+        return
+
+    def track_row_change(table_name, values_list):
+        """Classify a row against the previous run, logging a change, and return whether the row is to be published"""
+        if diff_engine is None:
+            return True
+        record_id, change_type = diff_engine.classify_row(table_name=table_name, values_list=values_list)
+        if change_type == InventoryDiff_Class.InventoryDiffEngine.UNCHANGED.value:
+            return not TURN_ON_PUBLISH_CHANGES_ONLY.value
+        write_change_log_row(table_name=table_name, record_id=record_id, change_type=change_type)
+        return True
+
+    def write_change_log_row(table_name, record_id, change_type):
+        """Write a row change to the change log of each output sink, and publish it if configured, but return nothing"""
+        change_log_values_list = diff_engine.create_change_log_values_list(table_name=table_name, record_id=record_id,
+                                                                           change_type=change_type)
+        for output_sink in output_sinks:
+            try:
+                output_sink.write_row(table_name=OutputSink_Class.OutputSink.CHANGE_LOG_TABLE.value,
+                                      values_list=change_log_values_list)
+            except Exception as e:
+                myutil.print_and_log(message="Did not write change to change log: {}. {}".format(record_id, e),
+                                     log_level=myutil.WARNING_LEVEL)
+        if socrata_change_log_batcher is not None:
+            publish_record(socrata_batcher=socrata_change_log_batcher, record=myutil.make_dict_zipper(
+                first_list=InventoryDiff_Class.InventoryDiffEngine.CHANGE_LOG_HEADERS_LIST.value,
+                second_list=[str(value) for value in change_log_values_list]))
+        return
+
+    def write_inspection_result(inspection_result):
+        """Save the profile of an inspected FC, write its rows to the output sinks, publish them and return nothing"""
+        fc_obj = inspection_result.fc_object
+        if state_store is not None and inspection_result.fingerprint is not None:
+            state_store.save_feature_class_profile(fc_id=fc_obj.fc_ID,
+                                                   fingerprint=inspection_result.fingerprint,
+                                                   run_date=fc_obj.date_export,
+                                                   null_counts=inspection_result.null_counts,
+                                                   max_char_lengths=inspection_result.max_char_lengths,
+                                                   field_statistics=inspection_result.field_statistics,
+                                                   out_of_domain_counts=inspection_result.out_of_domain_counts,
+                                                   domain_signature=inspection_result.domain_signature,
+                                                   geometry_profile=inspection_result.geometry_profile)
+
+        run_metrics.add_spans(spans=inspection_result.timing_spans)
+
+        # Write the feature class data to file before the field level data.
+        fc_object_features_list = create_fc_values_list(fc_object=fc_obj)
+        field_object_feature_lists = [create_field_values_list(field_details_object=fc_field_details_obj)
+                                      for fc_field_details_obj in inspection_result.field_details_list]
+        bytes_written_start = get_output_bytes_written()
+        with run_metrics.span(stage="write_output", feature_dataset=inspection_result.feature_dataset,
+                              feature_class=inspection_result.feature_class,
+                              rows_written=1 + len(field_object_feature_lists)) as span_attributes:
+            for output_sink in output_sinks:
+                try:
+                    output_sink.write_row(table_name=OutputSink_Class.OutputSink.FEATURE_CLASSES_TABLE.value,
+                                          values_list=fc_object_features_list)
+                except Exception as e:
+                    myutil.print_and_log(message="Did not write FC properties to file: {}. {}".format(
+                        inspection_result.feature_class, e), log_level=myutil.WARNING_LEVEL)
+            for fc_field_details_obj, field_object_feature_list in zip(inspection_result.field_details_list,
+                                                                       field_object_feature_lists):
+
+                # Write the field details object to file
+                for output_sink in output_sinks:
+                    try:
+                        output_sink.write_row(table_name=OutputSink_Class.OutputSink.FIELDS_TABLE.value,
+                                              values_list=field_object_feature_list)
+                    except Exception as e:
+
+                        # For fc field details that don't process this records their presence so not undocumented.
+                        myutil.print_and_log(message="Did not write FC field details to file: {}{}".format(
+                            fc_field_details_obj.row_id, e),
+                            log_level=myutil.WARNING_LEVEL)
+            span_attributes["bytes_written"] = get_output_bytes_written() - bytes_written_start
+
+        # Classify the rows against the previous run, then upsert to Socrata after the file output so that
+        #   upsert latency is timed separately. With publish changes only, unchanged rows are not upserted.
+        publish_fc = track_row_change(table_name=OutputSink_Class.OutputSink.FEATURE_CLASSES_TABLE.value,
+                                      values_list=fc_object_features_list)
+        publish_fields = [track_row_change(table_name=OutputSink_Class.OutputSink.FIELDS_TABLE.value,
+                                           values_list=field_object_feature_list)
+                          for field_object_feature_list in field_object_feature_lists]
+        if TURN_ON_UPSERT_OUTPUT_TO_SOCRATA.value:
+            if publish_fc:
+                publish_record(socrata_batcher=socrata_featureclass_batcher, record=myutil.make_dict_zipper(
+                    first_list=fc_headers_list,
+                    second_list=fc_obj.create_object_feature_list_str(
+                        object_features_list=fc_object_features_list)))
+            for fc_field_details_obj, field_object_feature_list, publish_field in zip(
+                    inspection_result.field_details_list, field_object_feature_lists, publish_fields):
+                if not publish_field:
+                    continue
+                publish_record(socrata_batcher=socrata_featureclass_fields_batcher,
+                               record=myutil.make_dict_zipper(
+                                   first_list=field_headers_list,
+                                   second_list=fc_field_details_obj.create_object_field_feature_list_str(
+                                                      object_field_feature_list=field_object_feature_list)))
+        return
 
+    # FUNCTIONALITY
     if TURN_ON_WRITE_OUTPUT_TO_CSV.value:
         myutil.print_and_log(message="Writing to csv (TURN_ON_WRITE_OUTPUT_TO_CSV.value = True)",
                              log_level=myutil.INFO_LEVEL)
+    if TURN_ON_WRITE_OUTPUT_TO_PARQUET.value:
+        myutil.print_and_log(message="Writing to parquet (TURN_ON_WRITE_OUTPUT_TO_PARQUET.value = True)",
+                             log_level=myutil.INFO_LEVEL)
     if TURN_ON_UPSERT_OUTPUT_TO_SOCRATA.value:
         myutil.print_and_log(message="Upserting to Socrata (TURN_ON_UPSERT_OUTPUT_TO_SOCRATA.value = True)",
                              log_level=myutil.INFO_LEVEL)
+    if TURN_ON_SQL_PUSHDOWN_PROFILING.value:
+        myutil.print_and_log(message="SQL pushdown profiling (TURN_ON_SQL_PUSHDOWN_PROFILING.value = True)",
+                             log_level=myutil.INFO_LEVEL)
+    if TURN_ON_FIELD_STATISTICS.value:
+        myutil.print_and_log(message="Field statistics (TURN_ON_FIELD_STATISTICS.value = True)",
+                             log_level=myutil.INFO_LEVEL)
+    if TURN_ON_DOMAIN_VALIDATION.value:
+        myutil.print_and_log(message="Domain validation (TURN_ON_DOMAIN_VALIDATION.value = True)",
+                             log_level=myutil.INFO_LEVEL)
+    if TURN_ON_GEOMETRY_PROFILING.value:
+        myutil.print_and_log(message="Geometry profiling (TURN_ON_GEOMETRY_PROFILING.value = True)",
+                             log_level=myutil.INFO_LEVEL)
+    if TURN_ON_METADATA_PREFETCH.value:
+        myutil.print_and_log(message="Metadata prefetch (TURN_ON_METADATA_PREFETCH.value = True, threads = {})".format(
+            METADATA_PREFETCH_THREAD_COUNT.value), log_level=myutil.INFO_LEVEL)
+    if TURN_ON_PARTITIONED_SCAN_OF_LARGE_FEATURE_CLASSES.value:
+        myutil.print_and_log(message="Partitioned scan (TURN_ON_PARTITIONED_SCAN_OF_LARGE_FEATURE_CLASSES.value = "
+                                     "True, threads = {})".format(PARTITION_THREAD_COUNT.value),
+                             log_level=myutil.INFO_LEVEL)
+    if TURN_ON_LARGEST_FIRST_SCHEDULING.value:
+        myutil.print_and_log(message="Largest first scheduling (TURN_ON_LARGEST_FIRST_SCHEDULING.value = True)",
+                             log_level=myutil.INFO_LEVEL)
+    if TURN_ON_RUN_TO_RUN_DIFF.value or TURN_ON_PUBLISH_CHANGES_ONLY.value:
+        myutil.print_and_log(message="Run to run diff (TURN_ON_RUN_TO_RUN_DIFF.value = {}, "
+                                     "TURN_ON_PUBLISH_CHANGES_ONLY.value = {})".format(
+            TURN_ON_RUN_TO_RUN_DIFF.value, TURN_ON_PUBLISH_CHANGES_ONLY.value), log_level=myutil.INFO_LEVEL)
+    if TURN_ON_INCREMENTAL_INVENTORY.value:
+        myutil.print_and_log(message="Incremental inventory (TURN_ON_INCREMENTAL_INVENTORY.value = True, --full = {})".format(
+            args.full), log_level=myutil.INFO_LEVEL)
+
+    # CHECKPOINT JOURNAL: start a new run, or with --resume continue the interrupted run on its run date, so that the
+    #   output file names, dates and row ids match the rows written before the interruption.
+    checkpoint_journal = InventoryCheckpoint_Class.InventoryCheckpointJournal(
+        database_path=CHECKPOINT_DATABASE_FILE.value)
+    run_date_string = checkpoint_journal.start_run(today_date_string=myutil.build_today_date_string(),
+                                                   resume=args.resume)
+    if checkpoint_journal.resumed:
+        myutil.print_and_log(message="Resuming the interrupted run of {} (--resume = True)".format(run_date_string),
+                             log_level=myutil.INFO_LEVEL)
+    output_file_names_tuple = (myutil.build_csv_file_name_with_date(run_date_string, FILE_NAME_FC_INVENTORY.value),
+                               myutil.build_csv_file_name_with_date(run_date_string, FILE_NAME_FIELD_INVENTORY.value),
+                               myutil.build_csv_file_name_with_date(run_date_string, DOMAINS_INVENTORY_FILE_NAME.value))
+    turn_on_run_to_run_diff = TURN_ON_RUN_TO_RUN_DIFF.value or TURN_ON_PUBLISH_CHANGES_ONLY.value
 
-    # OUTPUT FILES: Create the new output files, for the feature class inventory, with headers. Streamline and loop.
+    # OUTPUT FILES: Create the new output files, with headers. Each file is opened once and held open for the run.
+    #   Every row is written to each output sink turned on.
     output_feature_class_file, output_fields_file, output_domains_file = [os.path.join(PATH_FOR_CSV_OUTPUT.value, item) for
                                                                           item in output_file_names_tuple]
-
-        # need pairing of path and headers
-    file_and_headers_pairing = [(output_feature_class_file, FeatureClassObjects_Class.FeatureClassObject.FC_HEADERS_LIST.value),
-                                (output_fields_file, FeatureClassObjects_Class.FeatureClassFieldDetails.FIELD_HEADERS_LIST.value),
-                                (output_domains_file, GeodatabaseDomain_Class.GeodatabaseDomains.DOMAIN_HEADERS_LIST.value)]
-    for pairing in file_and_headers_pairing:
-        file_element, header_element = pairing
+    headers_by_table = {OutputSink_Class.OutputSink.FEATURE_CLASSES_TABLE.value: fc_headers_list,
+                        OutputSink_Class.OutputSink.FIELDS_TABLE.value: field_headers_list,
+                        OutputSink_Class.OutputSink.DOMAINS_TABLE.value: GeodatabaseDomain_Class.GeodatabaseDomains.DOMAIN_HEADERS_LIST.value}
+    if turn_on_run_to_run_diff:
+        headers_by_table[OutputSink_Class.OutputSink.CHANGE_LOG_TABLE.value] = (
+            InventoryDiff_Class.InventoryDiffEngine.CHANGE_LOG_HEADERS_LIST.value)
+    output_sinks = []
+    if TURN_ON_WRITE_OUTPUT_TO_CSV.value:
+        file_paths_by_table = {OutputSink_Class.OutputSink.FEATURE_CLASSES_TABLE.value: output_feature_class_file,
+                               OutputSink_Class.OutputSink.FIELDS_TABLE.value: output_fields_file,
+                               OutputSink_Class.OutputSink.DOMAINS_TABLE.value: output_domains_file}
+        if turn_on_run_to_run_diff:
+            file_paths_by_table[OutputSink_Class.OutputSink.CHANGE_LOG_TABLE.value] = os.path.join(
+                PATH_FOR_CSV_OUTPUT.value,
+                myutil.build_csv_file_name_with_date(run_date_string, FILE_NAME_CHANGE_LOG.value))
         try:
-            with open(file_element, "w") as fhand_file:
-                fhand_file.write("{}\n".format(",".join(header_element)))
+            output_sinks.append(OutputSink_Class.CSVOutputSink(
+                file_paths_by_table=file_paths_by_table,
+                headers_by_table=headers_by_table,
+                append=checkpoint_journal.resumed,
+                buffer_size=OUTPUT_CSV_BUFFER_SIZE.value,
+                flush_row_count=OUTPUT_CSV_FLUSH_ROW_COUNT.value,
+                resume_file_sizes=checkpoint_journal.get_output_file_sizes()))
         except Exception as e:
-            myutil.print_and_log(message="Problem creating or checking existence of {} file. {}".format(file_element, e),
+            myutil.print_and_log(message="Problem creating output files in {}. {}".format(PATH_FOR_CSV_OUTPUT.value, e),
                 log_level=myutil.ERROR_LEVEL)
             exit()
+    if TURN_ON_WRITE_OUTPUT_TO_PARQUET.value:
+        try:
+            output_sinks.append(OutputSink_Class.ParquetOutputSink(root_path=PATH_FOR_PARQUET_OUTPUT.value,
+                                                                   headers_by_table=headers_by_table,
+                                                                   append=checkpoint_journal.resumed))
+        except Exception as e:
+            myutil.print_and_log(message="Problem creating parquet output in {}. {}".format(
+                PATH_FOR_PARQUET_OUTPUT.value, e), log_level=myutil.ERROR_LEVEL)
+            exit()
 
-    # ESTABLISH SDE CONNECTION
-    try:
-        arcpy.env.workspace = SDE_file_path
-    except Exception as e:
-        myutil.print_and_log(message="Problem establishing workspace: {}. {}".format(SDE_file_path, e),
-            log_level=myutil.ERROR_LEVEL)
-        exit()
+    # RUN TO RUN DIFF: compare each row with the snapshot of the previous completed run, keyed on the row id column.
+    #   A resumed run keeps the rows classified before the interruption.
+    diff_engine = None
+    if turn_on_run_to_run_diff:
+        diff_engine = InventoryDiff_Class.InventoryDiffEngine(
+            database_path=SNAPSHOT_DATABASE_FILE.value,
+            headers_by_table=headers_by_table,
+            key_headers_by_table={OutputSink_Class.OutputSink.DOMAINS_TABLE.value: "DOM_ID",
+                                  OutputSink_Class.OutputSink.FEATURE_CLASSES_TABLE.value: "FC_ID",
+                                  OutputSink_Class.OutputSink.FIELDS_TABLE.value: "FLD_ID"})
+        diff_engine.start_run(run_date=run_date_string, resume=checkpoint_journal.resumed)
+
+    # ESTABLISH WORKSPACE CONNECTION: the SDE geodatabase through arcpy, or a backend that does not need arcpy.
+    if args.backend == "arcpy":
+        SDE_file_path = args.source or SDE_file_path
+        try:
+            import arcpy  # delayed arcpy import for performance
+            arcpy.env.workspace = SDE_file_path
+        except Exception as e:
+            myutil.print_and_log(message="Problem establishing workspace: {}. {}".format(SDE_file_path, e),
+                log_level=myutil.ERROR_LEVEL)
+            exit()
+        else:
+            myutil.print_and_log(message="Accessing {}\n".format(arcpy.env.workspace), log_level=myutil.INFO_LEVEL)
+        workspace = Workspace_Class.ArcpyWorkspace(sde_file_path=SDE_file_path,
+                                                   sql_connection_string=SQL_PUSHDOWN_CONNECTION_STRING.value,
+                                                   sql_dialect=SQL_PUSHDOWN_DIALECT.value)
+    elif args.backend == "geopackage":
+        geopackage_file_path = args.source or GEOPACKAGE_FILE_PATH.value
+        if not myutil.check_path_exists(path=geopackage_file_path):
+            myutil.print_and_log(message="Problem establishing workspace: {} does not exist.".format(
+                geopackage_file_path), log_level=myutil.ERROR_LEVEL)
+            exit()
+        workspace = Workspace_Class.GeoPackageWorkspace(database_path=geopackage_file_path)
+        myutil.print_and_log(message="Accessing {}\n".format(geopackage_file_path), log_level=myutil.INFO_LEVEL)
     else:
-        myutil.print_and_log(message="Accessing {}\n".format(arcpy.env.workspace), log_level=myutil.INFO_LEVEL)
+        workspace = Workspace_Class.SyntheticWorkspace()
+        myutil.print_and_log(message="Accessing synthetic workspace\n", log_level=myutil.INFO_LEVEL)
+    if TURN_ON_PARTITIONED_SCAN_OF_LARGE_FEATURE_CLASSES.value and not workspace.concurrent_cursors:
+        myutil.print_and_log(message="Partitioned scan reads partitions one at a time: the {} backend does not support "
+                                     "concurrent cursors".format(args.backend), log_level=myutil.INFO_LEVEL)
+    if TURN_ON_METADATA_PREFETCH.value and not workspace.concurrent_metadata_calls:
+        myutil.print_and_log(message="Metadata prefetch uses one thread: the {} backend does not support concurrent "
+                                     "metadata calls".format(args.backend), log_level=myutil.INFO_LEVEL)
 
     # Domains are processed first as they are at the highest level and apply to the entire geodatabase.
     # The next level is to inventory all feature datasets and step into each feature dataset to inventory the
     # feature classes within. After the feature classes have been processed at the dataset level each feature
     # class is analyzed at the field level.
 
-    # DOMAINS: make a list of domains for the geodatabase workspace environment.
-    if TURN_ON_WRITE_OUTPUT_TO_CSV.value:
-        fhand_domains_file_handler = myutil.create_output_results_file_handler(output_filename=output_domains_file)
+    # SOCRATA PUBLISHERS: one batcher per results dataset, held for the run and closed at the end of the run.
+    #   All clients share the keep-alive connections of one client pool, which retries failed requests with backoff.
+    socrata_batchers = []
+    socrata_change_log_batcher = None
+    socrata_client_pool = None
     if TURN_ON_UPSERT_OUTPUT_TO_SOCRATA.value:
-        socrata_domains_client = myutil.create_socrata_client(username=socrata_username,
-                                                              password=socrata_password,
-                                                              app_token=domainlevel_app_token,
-                                                              maryland_domain=socrata_maryland_domain)
-    try:
-        domain_objects_list = run_ESRI_GP_tool(arcpy.da.ListDomains)
-    except Exception as e:
-        myutil.print_and_log(message="arcpy.da.ListDomains() failed. {}".format(e),log_level=myutil.ERROR_LEVEL)
-        exit()
+        socrata_client_pool = SocrataPublishing_Class.SocrataClientPool(
+            maryland_domain=socrata_maryland_domain,
+            username=socrata_username,
+            password=socrata_password,
+            pool_size=SOCRATA_CONNECTION_POOL_SIZE.value,
+            retry_count=SOCRATA_RETRY_COUNT.value,
+            backoff_seconds=SOCRATA_RETRY_BACKOFF_SECONDS.value,
+            timeout=SOCRATA_TIMEOUT_SECONDS.value)
+        socrata_domains_batcher = create_socrata_batcher(app_token=domainlevel_app_token,
+                                                         dataset_identifier=domainlevel_app_id,
+                                                         table_name=OutputSink_Class.OutputSink.DOMAINS_TABLE.value)
+        socrata_featureclass_batcher = create_socrata_batcher(
+            app_token=featureclasslevel_app_token,
+            dataset_identifier=featureclasslevel_app_id,
+            table_name=OutputSink_Class.OutputSink.FEATURE_CLASSES_TABLE.value)
+        socrata_featureclass_fields_batcher = create_socrata_batcher(
+            app_token=fieldlevel_app_token,
+            dataset_identifier=fieldlevel_app_id,
+            table_name=OutputSink_Class.OutputSink.FIELDS_TABLE.value)
+        socrata_batchers = [socrata_domains_batcher, socrata_featureclass_batcher, socrata_featureclass_fields_batcher]
+        if diff_engine is not None and changelog_app_id is not None:
+            socrata_change_log_batcher = create_socrata_batcher(
+                app_token=changelog_app_token,
+                dataset_identifier=changelog_app_id,
+                table_name=OutputSink_Class.OutputSink.CHANGE_LOG_TABLE.value)
+            socrata_batchers.append(socrata_change_log_batcher)
+
+        # Records handed to the publishers but not published before the interruption are published again.
+        socrata_batchers_by_dataset = {socrata_batcher.dataset_identifier: socrata_batcher
+                                       for socrata_batcher in socrata_batchers}
+        for dataset_identifier, record in checkpoint_journal.get_pending_records():
+            if dataset_identifier in socrata_batchers_by_dataset:
+                publish_record(socrata_batcher=socrata_batchers_by_dataset[dataset_identifier], record=record)
+
+    # DOMAINS: make a list of domains for the geodatabase workspace environment.
+    #   A resumed run skips the domains if they were written before the interruption.
+    domains_item = (InventoryCheckpoint_Class.InventoryCheckpointJournal.DOMAINS_ITEM.value,
+                    InventoryCheckpoint_Class.InventoryCheckpointJournal.DOMAINS_ITEM.value)
+    if checkpoint_journal.is_completed(*domains_item):
+        myutil.print_and_log(message="Domains were inventoried before the interruption. Skipped.",
+                             log_level=myutil.INFO_LEVEL)
     else:
-        sde_environment_filename = os.path.basename(SDE_file_path)
-
-        for domain_object in domain_objects_list:
-            gdb_domain_obj = GeodatabaseDomain_Class.GeodatabaseDomains(environment_name=sde_environment_filename,
-                                                                        domain_object=domain_object,
-                                                                        date=myutil.build_today_date_string())
-            domain_object_feature_list = gdb_domain_obj.create_object_feature_list()
-            domain_object_feature_list_str = gdb_domain_obj.create_object_feature_list_str(
-                domain_object_feature_list=domain_object_feature_list)
-            if TURN_ON_WRITE_OUTPUT_TO_CSV.value:
-                try:
-                    fhand_domains_file_handler.write("{}\n".format(gdb_domain_obj.create_CSV_domain_properties_string(
-                        object_feature_list_str=domain_object_feature_list_str)))
-                except Exception as e:
-                    myutil.print_and_log(message="Did not write domains properties to file: {}. {}".format(domain_object.name, e),
-                        log_level=myutil.WARNING_LEVEL)
-            if TURN_ON_UPSERT_OUTPUT_TO_SOCRATA.value:
-                try:
-                    myutil.upsert_to_socrata(client=socrata_domains_client,
-                                             dataset_identifier=domainlevel_app_id,
-                                             zipper=myutil.make_dict_zipper(
-                                                 first_list=GeodatabaseDomain_Class.GeodatabaseDomains.DOMAIN_HEADERS_LIST.value,
-                                                 second_list=domain_object_feature_list_str))
-                    myutil.print_and_log("Upserted: {}".format(gdb_domain_obj.name), myutil.INFO_LEVEL)
-                except Exception as e:
-                    myutil.print_and_log(
-                        message="Error upserting to Socrata: {}. {}".format(gdb_domain_obj.name, e),
-                        log_level=myutil.WARNING_LEVEL)
-    finally:
-        if TURN_ON_WRITE_OUTPUT_TO_CSV.value:
-            fhand_domains_file_handler.close()
-        if TURN_ON_UPSERT_OUTPUT_TO_SOCRATA.value:
-            socrata_domains_client.close()
+        try:
+            with run_metrics.span(stage="list_domains") as span_attributes:
+                domain_objects_list = run_ESRI_GP_tool(workspace.list_domains)
+                span_attributes["domain_count"] = len(domain_objects_list)
+        except Exception as e:
+            myutil.print_and_log(message="arcpy.da.ListDomains() failed. {}".format(e),log_level=myutil.ERROR_LEVEL)
+            exit()
+        else:
+            bytes_written_start = get_output_bytes_written()
+            with run_metrics.span(stage="write_domains", rows_written=len(domain_objects_list)) as span_attributes:
+                for domain_object in domain_objects_list:
+                    gdb_domain_obj = GeodatabaseDomain_Class.GeodatabaseDomains(
+                        environment_name=workspace.environment_name,
+                        domain_object=domain_object,
+                        date=run_date_string)
+                    domain_object_feature_list = gdb_domain_obj.create_object_feature_list()
+                    for output_sink in output_sinks:
+                        try:
+                            output_sink.write_row(table_name=OutputSink_Class.OutputSink.DOMAINS_TABLE.value,
+                                                  values_list=domain_object_feature_list)
+                        except Exception as e:
+                            myutil.print_and_log(message="Did not write domains properties to file: {}. {}".format(domain_object.name, e),
+                                log_level=myutil.WARNING_LEVEL)
+                    publish_domain = track_row_change(table_name=OutputSink_Class.OutputSink.DOMAINS_TABLE.value,
+                                                      values_list=domain_object_feature_list)
+                    if TURN_ON_UPSERT_OUTPUT_TO_SOCRATA.value and publish_domain:
+                        domain_object_feature_list_str = gdb_domain_obj.create_object_feature_list_str(
+                            domain_object_feature_list=domain_object_feature_list)
+                        publish_record(socrata_batcher=socrata_domains_batcher, record=myutil.make_dict_zipper(
+                            first_list=GeodatabaseDomain_Class.GeodatabaseDomains.DOMAIN_HEADERS_LIST.value,
+                            second_list=domain_object_feature_list_str))
+                span_attributes["bytes_written"] = get_output_bytes_written() - bytes_written_start
+        save_checkpoint(completed_items=[domains_item])
+
+    # DOMAIN INDEX: build the lookup of domain rules once per run, shared by the inspection of all feature classes.
+    #   A resumed run that skipped the domains lists them again for the index.
+    domain_index = None
+    if TURN_ON_DOMAIN_VALIDATION.value:
+        try:
+            with run_metrics.span(stage="build_domain_index") as span_attributes:
+                if domain_objects_list is None:
+                    domain_objects_list = run_ESRI_GP_tool(workspace.list_domains)
+                domain_index = GeodatabaseDomain_Class.GeodatabaseDomainIndex(domain_objects=domain_objects_list)
+                span_attributes["domain_count"] = len(domain_index.rules)
+        except Exception as e:
+            myutil.print_and_log(message="Domain index was not built. {}".format(e), log_level=myutil.ERROR_LEVEL)
+            exit()
 
     # FEATURE DATASETS: make a list of FD's present. Limited to feature_type "Feature" to avoid raster catalogs etc.
     try:
-        feature_datasets_list = run_ESRI_GP_tool(arcpy.ListDatasets, feature_type="Feature")
+        with run_metrics.span(stage="list_feature_datasets"):
+            feature_datasets_list = run_ESRI_GP_tool(workspace.list_feature_datasets)
     except Exception as e:
         myutil.print_and_log(message="arcpy.ListDatasets did not run properly. {}".format(e), log_level=myutil.ERROR_LEVEL)
         exit()
 
+    # METADATA CATALOG: gather the feature class lists, counts and describes concurrently before the scan, or load the
+    #   catalog gathered earlier in the day. Feature datasets and feature classes missing from it are handled live.
+    metadata_catalog = None
+    if TURN_ON_METADATA_PREFETCH.value:
+        catalog_store = MetadataCatalog_Class.MetadataCatalogStore(database_path=CATALOG_DATABASE_FILE.value)
+        if not args.full:
+            metadata_catalog = catalog_store.load_catalog(environment_name=workspace.environment_name,
+                                                          catalog_date=run_date_string)
+        if metadata_catalog is None:
+            with run_metrics.span(stage="prefetch_metadata") as span_attributes:
+                metadata_catalog = MetadataCatalog_Class.MetadataCatalog.prefetch(
+                    workspace=workspace,
+                    feature_datasets=feature_datasets_list,
+                    thread_count=METADATA_PREFETCH_THREAD_COUNT.value)
+                span_attributes["feature_class_count"] = len(metadata_catalog.metadata_by_feature_class)
+            catalog_store.save_catalog(environment_name=workspace.environment_name, catalog_date=run_date_string,
+                                       metadata_catalog=metadata_catalog)
+        else:
+            myutil.print_and_log(message="Metadata catalog of {} loaded: {} feature classes".format(
+                run_date_string, len(metadata_catalog.metadata_by_feature_class)), log_level=myutil.INFO_LEVEL)
+        catalog_store.close()
+
+    # Feature classes are inspected by the inspection object, in a pool of worker processes when more than one
+    #   worker is configured. Results come back in order to this process, the single writer of all output.
+    #   With incremental inventory the workers read the state store and this process saves the results to it.
+    state_store = None
+    state_store_path = None
+    if TURN_ON_INCREMENTAL_INVENTORY.value:
+        state_store_path = STATE_DATABASE_FILE.value
+        state_store = InventoryStateStore_Class.InventoryStateStore(database_path=state_store_path)
+    feature_class_inspection = FeatureClassInspection_Class.FeatureClassInspection(
+        workspace=workspace,
+        date_string=run_date_string,
+        database_flag=DATABASE_FLAG_NUMERIC.value,
+        chunk_size=PROFILING_CHUNK_SIZE.value,
+        state_store_path=state_store_path,
+        force_full_scan=args.full,
+        sampling_threshold=(SAMPLING_RECORD_COUNT_THRESHOLD.value if TURN_ON_SAMPLING_OF_LARGE_FEATURE_CLASSES.value
+                            else None),
+        sample_size=SAMPLING_SAMPLE_SIZE.value,
+        use_sql_pushdown=TURN_ON_SQL_PUSHDOWN_PROFILING.value,
+        compute_field_statistics=TURN_ON_FIELD_STATISTICS.value,
+        domain_index=domain_index,
+        compute_geometry_profile=TURN_ON_GEOMETRY_PROFILING.value,
+        partition_threshold=(PARTITION_RECORD_COUNT_THRESHOLD.value
+                             if TURN_ON_PARTITIONED_SCAN_OF_LARGE_FEATURE_CLASSES.value else None),
+        partition_record_count=PARTITION_RECORD_COUNT.value,
+        partition_thread_count=PARTITION_THREAD_COUNT.value,
+        partition_retry_count=PARTITION_RETRY_COUNT.value)
+    inspection_pool = FeatureClassInspection_Class.FeatureClassInspection.create_worker_pool(
+        worker_count=INSPECTION_WORKER_COUNT.value,
+        log_file=LOG_FILE.value)
+
     """Inspect each FD, then all FC's within, then fields of each FC. Assumption: DoIT naming is a three part 
     convention. Environment_Name.SDE.Entity_Data_Name for example Production.SDE.Transportation_Mile_Markers_etc;
     Coded is designed to this."""
     feature_datasets_list.sort()
+    feature_class_tasks_by_dataset = {}
     for fd in feature_datasets_list:
         print()
+        fd_item = (InventoryCheckpoint_Class.InventoryCheckpointJournal.FEATURE_DATASET_ITEM.value, fd)
+        if checkpoint_journal.is_completed(*fd_item):
+            myutil.print_and_log(message="FD was inventoried before the interruption. Skipped: {}".format(fd),
+                                 log_level=myutil.INFO_LEVEL)
+            continue
         myutil.print_and_log(message="Examining FD: {}".format(fd), log_level=myutil.INFO_LEVEL)
-        production_fd, sde_fd_ID, feature_dataset_name = fd.split(".") # first two vars are not used
 
         # __________________________________
         # FEATURE DATASET ISOLATION - TESTING
@@ -224,30 +759,21 @@ def main():
         #     continue
         # __________________________________
 
-        # Step into each feature dataset by altering the workspace
-        arcpy.env.workspace = os.path.join(SDE_file_path, fd)
+        # Step into each feature dataset
         feature_classes_list = None
         try:
-            feature_classes_list = run_ESRI_GP_tool(arcpy.ListFeatureClasses)
+            with run_metrics.span(stage="list_feature_classes", feature_dataset=fd):
+                if metadata_catalog is not None:
+                    feature_classes_list = metadata_catalog.get_feature_classes(feature_dataset=fd)
+                if feature_classes_list is None:
+                    feature_classes_list = run_ESRI_GP_tool(workspace.list_feature_classes, fd)
         except Exception as e:
             myutil.print_and_log(message="Error creating list of FC's inside FD. FD contents not processed: {fd}. {ex}".format(fd=fd, ex=e),
                                  log_level=myutil.ERROR_LEVEL)
+            if diff_engine is not None:
+                diff_engine.mark_incomplete(record_id_prefix=myutil.generate_id_from_args(fd, ""))
             continue
 
-        if TURN_ON_WRITE_OUTPUT_TO_CSV.value:
-            fhand_featureclass_file_handler = myutil.create_output_results_file_handler(output_filename=output_feature_class_file)
-            fhand_fields_file_handler = myutil.create_output_results_file_handler(output_filename=output_fields_file)
-
-        if TURN_ON_UPSERT_OUTPUT_TO_SOCRATA.value:
-            socrata_featureclass_client = myutil.create_socrata_client(username=socrata_username,
-                                                                       password=socrata_password,
-                                                                       app_token=featureclasslevel_app_token,
-                                                                       maryland_domain=socrata_maryland_domain)
-            socrata_featureclass_fields_client = myutil.create_socrata_client(username=socrata_username,
-                                                                              password=socrata_password,
-                                                                              app_token=fieldlevel_app_token,
-                                                                              maryland_domain=socrata_maryland_domain)
-
         # Feature Classes Inspection
         if feature_classes_list is not None:
             print("\tFC List (len={length}): {fc_list}".format(length=len(feature_classes_list), fc_list=feature_classes_list))
@@ -255,214 +781,107 @@ def main():
             myutil.print_and_log(
                 message="Error: arcpy.ListFeatureClasses returned {fc_list}. Expected list. Feature Dataset not processed: {fd}".format(fc_list=feature_classes_list, fd=fd),
                 log_level=myutil.ERROR_LEVEL)
+            if diff_engine is not None:
+                diff_engine.mark_incomplete(record_id_prefix=myutil.generate_id_from_args(fd, ""))
             continue
 
-        try:
-            for fc in feature_classes_list:
-
-                # Encountering issue with feature class that "did not exist" despite being in the list. Added check.
-                fc_exists = arcpy.Exists(fc)
-                myutil.print_and_log(message="\tExamining FC: {fc}. FC Exists = {exists}".format(fc=fc, exists=fc_exists), log_level=myutil.INFO_LEVEL)
-                if not fc_exists:
-                    myutil.print_and_log(message="ERROR: ArcPy says FC DNE. {fd}  {fc}. Must skip FC.".format(fd=fd, fc=fc), log_level=myutil.ERROR_LEVEL)
-                    continue
-
-                production_fc, sde_fc_ID, feature_class_name = fc.split(".")  # first two vars are not used
-
-                #__________________________________
-                # FEATURE CLASS ISOLATION - TESTING
-                # if feature_class_name not in ["PLAN_CountyLandUseLandCover2010_MDP", "PLAN_LandUseLandCover2010_MDP"]:
-                #     continue
-                #__________________________________
-
-                fc_id = myutil.generate_id_from_args(fd, feature_class_name)
-                fc_row_id = myutil.generate_id_from_args(fc_id, myutil.build_today_date_string())
-                number_of_fc_features = DATABASE_FLAG_NUMERIC.value
-
-                # Instantiate object. Set the other, finicky parameters as they become available. Write out at end.
-                fc_obj = FeatureClassObjects_Class.FeatureClassObject(fc_ID=fc_id,
-                                                                      feature_dataset_name=feature_dataset_name,
-                                                                      feature_class_name=feature_class_name,
-                                                                      date_export=myutil.build_today_date_string(),
-                                                                      row_id=fc_row_id)
-
-                # Get the feature count
-                try:
-                    feature_count_result = run_ESRI_GP_tool(arcpy.GetCount_management, fc)
-                except Exception as e:
-                    myutil.print_and_log(message="Error getting FC feature count: {}. {}".format(fc, e),
-                                         log_level=myutil.WARNING_LEVEL)
-                else:
-                    number_of_fc_features = int(feature_count_result.getOutput(0))
-                    fc_obj.total_record_count = number_of_fc_features
-
-                # Get the arcpy.Describe object for each FC. Many elements are dependent on the Describe object
-                try:
-                    fc_desc = run_ESRI_GP_tool(arcpy.Describe, fc)
-                except Exception as e:
-
-                    # If the describe object is unavailable, write the defaults and move on as nothing more can be done
-                    if TURN_ON_WRITE_OUTPUT_TO_CSV.value:
-                        fc_object_features_list = fc_obj.create_object_feature_list()
-                        fhand_featureclass_file_handler.write(
-                            "{}\n".format(fc_obj.create_CSV_feature_class_properties_string(
-                                object_features_list_str=fc_object_features_list)))
-                    if TURN_ON_UPSERT_OUTPUT_TO_SOCRATA.value:
-                        fc_object_features_list = fc_obj.create_object_feature_list()
-                        fc_object_features_list_str = fc_obj.create_object_feature_list_str(
-                            object_features_list=fc_object_features_list)
-                        try:
-                            myutil.upsert_to_socrata(client=socrata_featureclass_client,
-                                                     dataset_identifier=featureclasslevel_app_id,
-                                                     zipper=myutil.make_dict_zipper(
-                                                         first_list=FeatureClassObjects_Class.FeatureClassObject.FC_HEADERS_LIST.value,
-                                                         second_list=fc_object_features_list_str))
-                            myutil.print_and_log("Upserted Generic: {}".format(fc_obj.fc_name), myutil.INFO_LEVEL)
-                        except Exception as e:
-                            myutil.print_and_log(
-                                message="Error upserting to Socrata: {}. {}".format(fc_obj.fc_name, e),
-                                log_level=myutil.WARNING_LEVEL)
-                    myutil.print_and_log(
-                        message="{}. {}".format(
-                            "Error generating Describe Object. Basic FC object record written. Fields object skipped.",
-                            e),
-                        log_level=myutil.ERROR_LEVEL)
-                    continue
-                else:
-
-                    # If successful Describe object returned, proceed with next stage of analysis
-                    fc_field_objects_list = fc_desc.fields
-                    fc_field_names_list = [field_obj.baseName for field_obj in fc_field_objects_list]
-                    fc_obj.data_type = fc_desc.dataType
-                    fc_obj.shape_type = fc_desc.shapeType
-                    fc_obj.spatial_ref_name = fc_desc.spatialReference.name
-
-                    #NOTE: Due to a SQL error, needed to create prevent_SQL_error() function
-                    #ERROR: "Attribute column not found [42S22:[Microsoft][ODBC Driver 13 for SQL Server][SQL Server]Invalid column name 'AREA'.]"
-                    fc_field_names_list, fc_field_objects_list = myutil.prevent_SQL_error(fc_field_names_list, fc_field_objects_list)
-                    fc_field_name_to_obj_dict = myutil.make_dict_zipper(first_list=fc_field_names_list,
-                                                                        second_list=fc_field_objects_list)
-                    total_field_count = len(fc_field_objects_list)
-                    fc_obj.total_field_count = total_field_count
-                    total_value_count = myutil.calculate_total_number_of_values_in_dataset(
-                        total_records_processed=number_of_fc_features,
-                        number_of_fields_in_dataset=total_field_count,
-                        database_flag=DATABASE_FLAG_NUMERIC.value)
-                    fc_obj.total_value_count = total_value_count
-
-                    # Initialize to -9999. Change to zero when field is encountered in null count process. Avoid false zero
-                    fc_fields_null_value_tracker_dict = {field_obj.name: DATABASE_FLAG_NUMERIC.value
-                                                         for field_obj in fc_field_objects_list}
-                    string_fields_character_tracker_dict = {field_obj.name: DATABASE_FLAG_NUMERIC.value
-                                                            for field_obj in fc_field_objects_list
-                                                            if field_obj.type.lower() == "string"}
-
-                    # Access data values and analyze
-                    try:
-                        with arcpy.da.SearchCursor(fc, fc_field_names_list) as feature_class_cursor:
-                            for row in feature_class_cursor:
-                                row_dictionary = myutil.make_dict_zipper(first_list=fc_field_names_list,
-                                                                         second_list=row)
-
-                                # Evaluate data and inventory the null/empty data values
-                                myutil.inspect_record_for_null_values(field_null_count_dict=fc_fields_null_value_tracker_dict,
-                                                                      record_dictionary=row_dictionary,
-                                                                      database_flag=DATABASE_FLAG_NUMERIC.value)
-                                myutil.inspect_string_fields_for_char_usage(field_char_count_dict=string_fields_character_tracker_dict,
-                                                                            record_dictionary=row_dictionary,
-                                                                            field_name_to_field_object_dictionary=fc_field_name_to_obj_dict)
-                    except Exception as e:
-                        myutil.print_and_log(message="Error in cursor for FC: {}.\n\t{}".format(fc, e),
-                                             log_level=myutil.WARNING_LEVEL)
-
-                    # Calculate stats
-                    fc_total_null_value_count = myutil.calculate_total_number_of_null_values_per_dataset(
-                        null_counts_list=fc_fields_null_value_tracker_dict.values())
-                    fc_obj.total_null_value_count = fc_total_null_value_count
-                    fc_percent_null = myutil.calculate_percent(numerator=fc_total_null_value_count,
-                                                               denominator=total_value_count)
-                    fc_obj.percent_null = fc_percent_null
-
-                    # Before launching into field level analysis, write the feature class data to file.
-                    fc_object_features_list = fc_obj.create_object_feature_list()
-                    fc_object_features_list_str = fc_obj.create_object_feature_list_str(
-                        object_features_list=fc_object_features_list)
-                    if TURN_ON_WRITE_OUTPUT_TO_CSV.value:
-                        try:
-                            fhand_featureclass_file_handler.write("{}\n".format(fc_obj.create_CSV_feature_class_properties_string(
-                                object_features_list_str=fc_object_features_list_str)))
-                        except Exception as e:
-                            myutil.print_and_log(message="Did not write FC properties to file: {}. {}".format(fc, e),
-                                                 log_level=myutil.WARNING_LEVEL)
-                    if TURN_ON_UPSERT_OUTPUT_TO_SOCRATA.value:
-                        try:
-                            myutil.upsert_to_socrata(client=socrata_featureclass_client,
-                                                     dataset_identifier=featureclasslevel_app_id,
-                                                     zipper=myutil.make_dict_zipper(
-                                                         first_list=FeatureClassObjects_Class.FeatureClassObject.FC_HEADERS_LIST.value,
-                                                         second_list=fc_object_features_list_str))
-                            myutil.print_and_log("\tUpserted FC: {}".format(fc_obj.fc_name), myutil.INFO_LEVEL)
-                        except Exception as e:
-                            myutil.print_and_log(
-                                message="Error upserting to Socrata: {}. {}".format(fc_obj.fc_name, e),
-                                log_level=myutil.WARNING_LEVEL)
-
-                    # FC's Fields Metadata Inspection
-                    myutil.print_and_log("\t\tProcessing Fields - FC: {}".format(fc_obj.fc_name), myutil.INFO_LEVEL)
-                    for field_object in fc_field_objects_list:
-                        field_id = myutil.generate_id_from_args(fc_id, field_object.name)
-                        field_row_id = myutil.generate_id_from_args(field_id, myutil.build_today_date_string())
-                        field_total_null_value_count = fc_fields_null_value_tracker_dict[field_object.name]
-                        field_percent_null = myutil.calculate_percent(field_total_null_value_count, number_of_fc_features)
-
-                        # Instantiate the FC field details object
-                        fc_field_details_obj = FeatureClassObjects_Class.FeatureClassFieldDetails(field_id=field_id,
-                                                                                                  fc_id=fc_id,
-                                                                                                  field_object=field_object,
-                                                                                                  total_record_count=number_of_fc_features,
-                                                                                                  total_null_value_count=field_total_null_value_count,
-                                                                                                  percent_null=field_percent_null,
-                                                                                                  date_export=myutil.build_today_date_string(),
-                                                                                                  row_id=field_row_id)
-                        if field_object.name in string_fields_character_tracker_dict.keys():
-                            fc_field_details_obj.field_max_chars_used = string_fields_character_tracker_dict[fc_field_details_obj.field_name]
-
-                        # Write the field details object to file
-                        field_object_feature_list = fc_field_details_obj.create_object_field_feature_list()
-                        field_object_feature_list_str = fc_field_details_obj.create_object_field_feature_list_str(
-                            object_field_feature_list=field_object_feature_list)
-                        if TURN_ON_WRITE_OUTPUT_TO_CSV.value:
-                            try:
-                                fhand_fields_file_handler.write("{}\n".format(
-                                    fc_field_details_obj.create_CSV_feature_class_field_properties_string(
-                                        object_field_features_list_str=field_object_feature_list_str)))
-                            except Exception as e:
-
-                                # For fc field details that don't process this records their presence so not undocumented.
-                                myutil.print_and_log(message="Did not write FC field details to file: {}{}".format(
-                                    fc_field_details_obj.row_id, e),
-                                    log_level=myutil.WARNING_LEVEL)
-                        if TURN_ON_UPSERT_OUTPUT_TO_SOCRATA.value:
-                            try:
-                                myutil.upsert_to_socrata(client=socrata_featureclass_fields_client,
-                                                         dataset_identifier=fieldlevel_app_id,
-                                                         zipper=myutil.make_dict_zipper(
-                                                             first_list=FeatureClassObjects_Class.FeatureClassFieldDetails.FIELD_HEADERS_LIST.value,
-                                                             second_list=field_object_feature_list_str))
-                            except Exception as e:
-                                myutil.print_and_log(
-                                    message="Error upserting to Socrata: {}. {}. {}".format(fd, fc, e),
-                                    log_level=myutil.WARNING_LEVEL)
-        except Exception as e:
-            myutil.print_and_log(
-                message="Problem iterating through FC's within FD: {}. {}".format(fd, e), log_level=myutil.WARNING_LEVEL)
-        finally:
-            if TURN_ON_WRITE_OUTPUT_TO_CSV.value:
-                fhand_featureclass_file_handler.close()
-                fhand_fields_file_handler.close()
-            if TURN_ON_UPSERT_OUTPUT_TO_SOCRATA.value:
-                socrata_featureclass_client.close()
-                socrata_featureclass_fields_client.close()
+        #__________________________________
+        # FEATURE CLASS ISOLATION - TESTING
+        # feature_classes_list = [fc for fc in feature_classes_list if fc.split(".")[2] in ["PLAN_CountyLandUseLandCover2010_MDP", "PLAN_LandUseLandCover2010_MDP"]]
+        #__________________________________
+
+        # A resumed run skips the feature classes completed before the interruption.
+        feature_class_tasks_by_dataset[fd] = [FeatureClassInspection_Class.FeatureClassTask(
+            feature_dataset=fd, feature_class=fc,
+            metadata=(None if metadata_catalog is None
+                      else metadata_catalog.get_metadata(feature_dataset=fd, feature_class=fc)))
+            for fc in feature_classes_list
+            if not checkpoint_journal.is_completed(
+                InventoryCheckpoint_Class.InventoryCheckpointJournal.FEATURE_CLASS_ITEM.value, fc)]
+
+    # The feature classes of all feature datasets are inspected in one pass, in feature dataset order or, with
+    #   scheduling, most costly first. A feature dataset is checkpointed once all of its feature classes are done and
+    #   none failed, so that a resumed run retries the feature classes that failed.
+    feature_class_tasks = [task for fd in feature_datasets_list for task in feature_class_tasks_by_dataset.get(fd, [])]
+    scheduler = None
+    if TURN_ON_LARGEST_FIRST_SCHEDULING.value:
+        scheduler = InventoryScheduler_Class.InventoryScheduler(database_path=SCHEDULE_DATABASE_FILE.value,
+                                                                worker_count=INSPECTION_WORKER_COUNT.value)
+        feature_class_tasks = scheduler.order_tasks(tasks=feature_class_tasks)
+        myutil.print_and_log(message="Scheduled {} FC's most costly first. Estimated makespan {:.1f} seconds".format(
+            len(feature_class_tasks), scheduler.create_summary()["estimated_makespan_seconds"]),
+            log_level=myutil.INFO_LEVEL)
+        scheduler.start_scan()
+    failed_feature_datasets = set()
+    remaining_task_counts = {fd: len(tasks) for fd, tasks in feature_class_tasks_by_dataset.items()}
+    completed_fc_items = [(InventoryCheckpoint_Class.InventoryCheckpointJournal.FEATURE_DATASET_ITEM.value, fd)
+                          for fd, remaining_task_count in remaining_task_counts.items() if remaining_task_count == 0]
+    for task, inspection_result, inspection_error in feature_class_inspection.inspect_each(tasks=feature_class_tasks,
+                                                                                           pool=inspection_pool):
+        fd = task.feature_dataset
+        if inspection_error is not None:
+            myutil.print_and_log(message="Problem inspecting FC within FD: {} {}. {}".format(
+                fd, task.feature_class, inspection_error), log_level=myutil.WARNING_LEVEL)
+            failed_feature_datasets.add(fd)
+            if diff_engine is not None:
+                diff_engine.mark_incomplete(record_id_prefix=myutil.generate_id_from_args(fd, ""))
+        elif inspection_result is not None:
+            if scheduler is not None:
+                scheduler.record_actual(task=task, inspection_result=inspection_result, run_date=run_date_string)
+            write_inspection_result(inspection_result=inspection_result)
+            completed_fc_items.append((InventoryCheckpoint_Class.InventoryCheckpointJournal.FEATURE_CLASS_ITEM.value,
+                                       inspection_result.feature_class))
+
+        # Checkpoint every few feature classes, and at the end of each feature dataset, so that an interrupted run
+        #   loses little work.
+        remaining_task_counts[fd] -= 1
+        if remaining_task_counts[fd] == 0 and fd not in failed_feature_datasets:
+            completed_fc_items.append((InventoryCheckpoint_Class.InventoryCheckpointJournal.FEATURE_DATASET_ITEM.value,
+                                       fd))
+        if remaining_task_counts[fd] == 0 or len(completed_fc_items) >= CHECKPOINT_FEATURE_CLASS_INTERVAL.value:
+            save_checkpoint(completed_items=completed_fc_items)
+            completed_fc_items = []
+    save_checkpoint(completed_items=completed_fc_items)
+    if scheduler is not None:
+        scheduler.save_timings()
+        run_metrics.add_summary_section(section_name="Scheduling", values=scheduler.create_summary())
+        scheduler.close()
+
+    if inspection_pool is not None:
+        inspection_pool.close()
+        inspection_pool.join()
+    if state_store is not None:
+        state_store.close()
+
+    # Rows of the previous run not seen in this run are removed, except those of feature datasets not inventoried.
+    if diff_engine is not None:
+        for table_name, record_id in diff_engine.find_removed_rows():
+            if table_name == OutputSink_Class.OutputSink.FEATURE_CLASSES_TABLE.value:
+                myutil.print_and_log(message="FC removed since the previous run: {}".format(record_id),
+                                     log_level=myutil.WARNING_LEVEL)
+            write_change_log_row(table_name=table_name, record_id=record_id,
+                                 change_type=InventoryDiff_Class.InventoryDiffEngine.REMOVED.value)
+        diff_engine.complete_run()
+        diff_engine.close()
+        run_metrics.add_summary_section(section_name="Run to run diff", values=diff_engine.get_change_counts())
+    for output_sink in output_sinks:
+        output_sink.close()
+
+    # Drain the Socrata publishers, waiting for the upserts in flight, and report the failed records.
+    for socrata_batcher in socrata_batchers:
+        socrata_batcher.close()
+    checkpoint_journal.complete_run()
+    checkpoint_journal.close()
+    if socrata_client_pool is not None:
+        socrata_connection_statistics = socrata_client_pool.get_connection_statistics()
+        socrata_connection_statistics["upsert_calls"] = sum(socrata_batcher.upsert_call_count
+                                                            for socrata_batcher in socrata_batchers)
+        run_metrics.add_summary_section(section_name="Socrata connections", values=socrata_connection_statistics)
+        socrata_client_pool.close()
+
+    for summary_line in run_metrics.summarize(slowest_count=METRICS_SLOWEST_FEATURE_CLASS_COUNT.value):
+        myutil.print_and_log(message=summary_line, log_level=myutil.INFO_LEVEL)
+    run_metrics.close()
 
     myutil.print_and_log(
         message=" {} Script Completed".format(myutil.get_date_time_for_logging_and_printing()),
@@ -0,0 +1,214 @@
+from collections import namedtuple
+import heapq
+import RunMetrics_Class
+import sqlite3
+import time
+
+CostEstimate = namedtuple("CostEstimate", "seconds source record_count field_count")
+
+
+class InventoryScheduler:
+    """
+    Estimate the cost of inspecting each feature class, order the inspection tasks longest first, and compare the
+    estimates with the inspection times measured, keeping the times in a local SQLite database for the next run.
+
+    Longest first ordering starts the largest feature classes first, so that the smaller ones fill the workers at the
+    end of the run rather than one large feature class scanning alone after the rest are done. The cost of a feature
+    class scanned by a previous run is the time the scan took, scaled by the change in its record count. Otherwise it
+    is its record count times its field count, from the prefetched metadata of the task, times the seconds per value
+    of the cost model. The seconds per value are fitted to the stored times, as the total seconds over the total
+    values, or are the default when there are none. A feature class with neither a stored time nor a record count is
+    estimated at the mean of the others. Only scans are timed for the model; the time of a feature class whose stored
+    profile was reused is compared with its estimate but not stored, as the next run may have to scan it.
+    The estimated makespan is that of the tasks handed, in order, to whichever worker is free first.
+    """
+    Variable = namedtuple("Variable", "value")
+    CREATE_TABLE_STATEMENTS = Variable(value=(
+        """CREATE TABLE IF NOT EXISTS feature_class_timing (
+            feature_dataset TEXT NOT NULL,
+            feature_class TEXT NOT NULL,
+            run_date TEXT NOT NULL,
+            record_count INTEGER,
+            field_count INTEGER,
+            seconds REAL NOT NULL,
+            PRIMARY KEY (feature_dataset, feature_class))""",
+    ))
+    DEFAULT_SECONDS_PER_VALUE = Variable(value=1e-6)
+    SOURCE_HISTORY = Variable(value="history")
+    SOURCE_MEAN = Variable(value="mean")
+    SOURCE_METADATA = Variable(value="metadata")
+
+    def __init__(self, database_path, worker_count, default_seconds_per_value=DEFAULT_SECONDS_PER_VALUE.value):
+        self.actual_seconds_by_task = {}
+        self.connection = sqlite3.connect(database_path)
+        self.database_path = database_path
+        self.estimates_by_task = {}
+        self.reused_tasks = set()
+        self.scan_started = None
+        self.timings_to_save = []
+        self.worker_count = max(1, worker_count)
+        for statement in InventoryScheduler.CREATE_TABLE_STATEMENTS.value:
+            self.connection.execute(statement)
+        self.connection.commit()
+        self.timings_by_task = {(feature_dataset, feature_class): (record_count, field_count, seconds)
+                                for feature_dataset, feature_class, record_count, field_count, seconds
+                                in self.connection.execute("SELECT feature_dataset, feature_class, record_count, "
+                                                           "field_count, seconds FROM feature_class_timing")}
+        timed_values = [(record_count * field_count, seconds)
+                        for record_count, field_count, seconds in self.timings_by_task.values()
+                        if record_count and field_count and record_count > 0 and field_count > 0]
+        total_values = sum(value_count for value_count, seconds in timed_values)
+        self.seconds_per_value = (sum(seconds for value_count, seconds in timed_values) / total_values
+                                  if total_values else default_seconds_per_value)
+
+    def close(self):
+        """
+        Close the database connection but return nothing.
+
+        :return: None
+        """
+        self.connection.close()
+        return
+
+    def create_summary(self):
+        """
+        Create the summary of the estimated and actual costs of the tasks timed and return dictionary.
+
+        The percent error is the mean absolute error of the estimates of the feature classes scanned, relative to
+        their actual seconds.
+        :return: dictionary of summary value name to value
+        """
+        timed_tasks = [task_key for task_key in self.actual_seconds_by_task if task_key in self.estimates_by_task]
+        scanned_errors = [abs(self.estimates_by_task[task_key].seconds - self.actual_seconds_by_task[task_key])
+                          / self.actual_seconds_by_task[task_key]
+                          for task_key in timed_tasks
+                          if task_key not in self.reused_tasks and self.actual_seconds_by_task[task_key] > 0]
+        source_counts = {}
+        for estimate in self.estimates_by_task.values():
+            source_counts[estimate.source] = source_counts.get(estimate.source, 0) + 1
+        summary = {"feature_classes_scheduled": len(self.estimates_by_task),
+                   "feature_classes_timed": len(timed_tasks),
+                   "seconds_per_value": float("{:.3g}".format(self.seconds_per_value)),
+                   "estimated_seconds": round(sum(self.estimates_by_task[task_key].seconds
+                                                  for task_key in timed_tasks), 3),
+                   "actual_seconds": round(sum(self.actual_seconds_by_task[task_key] for task_key in timed_tasks), 3),
+                   "estimated_makespan_seconds": round(self.estimate_makespan(
+                       costs=[estimate.seconds for estimate in self.estimates_by_task.values()]), 3),
+                   "mean_absolute_percent_error": (round(100.0 * sum(scanned_errors) / len(scanned_errors), 1)
+                                                   if scanned_errors else None)}
+        if self.scan_started is not None:
+            summary["actual_scan_seconds"] = round(time.perf_counter() - self.scan_started, 3)
+        summary.update({"estimates_from_{}".format(source): count for source, count in sorted(source_counts.items())})
+        return summary
+
+    def estimate_cost(self, task):
+        """
+        Estimate the seconds to inspect the feature class of a task and return CostEstimate.
+
+        The mean estimate is left to order_tasks, and an estimate without a stored time or a record count is returned
+        with no seconds.
+        :param task: FeatureClassTask, with prefetched metadata or not
+        :return: CostEstimate
+        """
+        record_count = None
+        field_count = None
+        metadata = task.metadata
+        if metadata is not None:
+            record_count = metadata.record_count
+            if metadata.description is not None:
+                field_count = len(metadata.description.fields)
+        timing = self.timings_by_task.get((task.feature_dataset, task.feature_class))
+        if timing is not None:
+            timed_record_count, timed_field_count, seconds = timing
+            if record_count is not None and record_count >= 0 and timed_record_count and timed_record_count > 0:
+                seconds = seconds * record_count / timed_record_count
+            return CostEstimate(seconds=seconds, source=InventoryScheduler.SOURCE_HISTORY.value,
+                                record_count=record_count, field_count=field_count)
+        if record_count is not None and record_count >= 0:
+            return CostEstimate(seconds=record_count * (field_count or 1) * self.seconds_per_value,
+                                source=InventoryScheduler.SOURCE_METADATA.value,
+                                record_count=record_count, field_count=field_count)
+        return CostEstimate(seconds=None, source=InventoryScheduler.SOURCE_MEAN.value,
+                            record_count=record_count, field_count=field_count)
+
+    def estimate_makespan(self, costs):
+        """
+        Estimate the seconds for the workers to complete tasks of the costs provided, handed out in order to the
+        first free worker, and return float.
+
+        :param costs: iterable of task seconds, in the order the tasks are handed out
+        :return: seconds until the last worker is done
+        """
+        worker_finish_times = [0.0] * self.worker_count
+        for cost in costs:
+            heapq.heapreplace(worker_finish_times, worker_finish_times[0] + cost)
+        return max(worker_finish_times)
+
+    def order_tasks(self, tasks):
+        """
+        Estimate the cost of each task and return list of the tasks, most costly first.
+
+        Tasks of equal cost keep the order of feature dataset and feature class name.
+        :param tasks: iterable of FeatureClassTask
+        :return: list of FeatureClassTask
+        """
+        tasks = sorted(tasks, key=lambda task: (task.feature_dataset, task.feature_class))
+        estimates = {(task.feature_dataset, task.feature_class): self.estimate_cost(task=task) for task in tasks}
+        known_seconds = [estimate.seconds for estimate in estimates.values() if estimate.seconds is not None]
+        mean_seconds = sum(known_seconds) / len(known_seconds) if known_seconds else 0.0
+        for task_key, estimate in estimates.items():
+            if estimate.seconds is None:
+                estimates[task_key] = estimate._replace(seconds=mean_seconds)
+        self.estimates_by_task.update(estimates)
+        return sorted(tasks, key=lambda task: -estimates[(task.feature_dataset, task.feature_class)].seconds)
+
+    def record_actual(self, task, inspection_result, run_date):
+        """
+        Record the inspection time of a task, annotating the feature class span of the result with the estimate,
+        but return nothing.
+
+        :param task: FeatureClassTask
+        :param inspection_result: FeatureClassInspectionResult of the task
+        :param run_date: date string of the run
+        :return: None
+        """
+        task_key = (task.feature_dataset, task.feature_class)
+        estimate = self.estimates_by_task.get(task_key)
+        for span in inspection_result.timing_spans:
+            if span.get("stage") != RunMetrics_Class.RunMetricsRecorder.FEATURE_CLASS_STAGE.value:
+                continue
+            seconds = span["duration_seconds"]
+            self.actual_seconds_by_task[task_key] = seconds
+            if estimate is not None:
+                span["estimated_seconds"] = estimate.seconds
+                span["estimate_source"] = estimate.source
+            if inspection_result.used_cached_profile:
+                self.reused_tasks.add(task_key)
+                continue
+            fc_object = inspection_result.fc_object
+            self.timings_to_save.append((task.feature_dataset, task.feature_class, run_date,
+                                         fc_object.total_record_count, fc_object.total_field_count, seconds))
+        return
+
+    def save_timings(self):
+        """
+        Store the times of the feature classes scanned, replacing those of earlier runs, but return nothing.
+
+        :return: None
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO feature_class_timing (feature_dataset, feature_class, run_date, "
+                "record_count, field_count, seconds) VALUES (?, ?, ?, ?, ?, ?)",
+                self.timings_to_save)
+        self.timings_to_save = []
+        return
+
+    def start_scan(self):
+        """
+        Mark the start of the scan, for the actual scan seconds of the summary, but return nothing.
+
+        :return: None
+        """
+        self.scan_started = time.perf_counter()
+        return
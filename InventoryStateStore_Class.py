@@ -0,0 +1,128 @@
+from collections import namedtuple
+import json
+import sqlite3
+
+CachedProfile = namedtuple("CachedProfile", "fingerprint run_date null_counts max_char_lengths field_statistics "
+                                             "out_of_domain_counts domain_signature geometry_profile")
+
+
+class InventoryStateStore:
+    """
+    Persist inventory state between runs in a local SQLite database.
+
+    Feature class state is keyed on the fc_id built by generate_id_from_args. For each feature class the store keeps
+    the change fingerprint and the null counts and max character lengths computed at the last scan, so that a later
+    run can re-emit the stats for an unchanged feature class without opening a cursor. Dictionaries are stored as json.
+    Field statistics, when computed, are kept in a table of their own, so that a profile stored without them can be
+    told apart from one with them, and databases created before field statistics need no migration. Out of domain
+    counts are kept the same way, with the signature of the domain rules they were counted against, as a domain can
+    change when the data does not. The geometry profile, when computed, is kept in a table of its own as well.
+    """
+    Variable = namedtuple("Variable", "value")
+    CREATE_TABLE_STATEMENTS = Variable(value=(
+        """CREATE TABLE IF NOT EXISTS feature_class_state (
+            fc_id TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            run_date TEXT NOT NULL,
+            null_counts TEXT NOT NULL,
+            max_char_lengths TEXT NOT NULL)""",
+        """CREATE TABLE IF NOT EXISTS field_statistics_state (
+            fc_id TEXT PRIMARY KEY,
+            field_statistics TEXT NOT NULL)""",
+        """CREATE TABLE IF NOT EXISTS domain_validation_state (
+            fc_id TEXT PRIMARY KEY,
+            domain_signature TEXT NOT NULL,
+            out_of_domain_counts TEXT NOT NULL)""",
+        """CREATE TABLE IF NOT EXISTS geometry_profile_state (
+            fc_id TEXT PRIMARY KEY,
+            geometry_profile TEXT NOT NULL)""",
+    ))
+
+    def __init__(self, database_path):
+        self.database_path = database_path
+        self.connection = sqlite3.connect(database_path)
+        for statement in InventoryStateStore.CREATE_TABLE_STATEMENTS.value:
+            self.connection.execute(statement)
+        self.connection.commit()
+
+    def close(self):
+        """
+        Close the database connection but return nothing.
+
+        :return: None
+        """
+        self.connection.close()
+        return
+
+    def get_feature_class_profile(self, fc_id):
+        """
+        Get the stored profile for a feature class and return CachedProfile, or None if the feature class is unknown.
+
+        The field statistics, out of domain counts, domain signature and geometry profile of the profile are None if
+        none were stored with it.
+        :param fc_id: feature class id
+        :return: CachedProfile or None
+        """
+        row = self.connection.execute(
+            "SELECT fingerprint, run_date, null_counts, max_char_lengths, field_statistics, out_of_domain_counts, "
+            "domain_signature, geometry_profile FROM feature_class_state "
+            "LEFT JOIN field_statistics_state USING (fc_id) LEFT JOIN domain_validation_state USING (fc_id) "
+            "LEFT JOIN geometry_profile_state USING (fc_id) WHERE fc_id = ?",
+            (fc_id,)).fetchone()
+        if row is None:
+            return None
+        (fingerprint, run_date, null_counts, max_char_lengths, field_statistics, out_of_domain_counts,
+         domain_signature, geometry_profile) = row
+        return CachedProfile(fingerprint=fingerprint,
+                             run_date=run_date,
+                             null_counts=json.loads(null_counts),
+                             max_char_lengths=json.loads(max_char_lengths),
+                             field_statistics=None if field_statistics is None else json.loads(field_statistics),
+                             out_of_domain_counts=(None if out_of_domain_counts is None
+                                                   else json.loads(out_of_domain_counts)),
+                             domain_signature=domain_signature,
+                             geometry_profile=None if geometry_profile is None else json.loads(geometry_profile))
+
+    def save_feature_class_profile(self, fc_id, fingerprint, run_date, null_counts, max_char_lengths,
+                                   field_statistics=None, out_of_domain_counts=None, domain_signature=None,
+                                   geometry_profile=None):
+        """
+        Insert or replace the stored profile for a feature class, with its field statistics, out of domain counts and
+        geometry profile, but return nothing.
+
+        :param fc_id: feature class id
+        :param fingerprint: change fingerprint of the feature class
+        :param run_date: date string of the run
+        :param null_counts: dictionary of field name to null/empty value count
+        :param max_char_lengths: dictionary of string field name to max character length found
+        :param field_statistics: dictionary of field name to field statistics list, or None if not computed
+        :param out_of_domain_counts: dictionary of field name to out of domain value count, or None if not validated
+        :param domain_signature: signature of the domain rules the counts were validated against
+        :param geometry_profile: list in FC_GEOMETRY_HEADERS_LIST order, or None if not computed
+        :return: None
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO feature_class_state (fc_id, fingerprint, run_date, null_counts, "
+                "max_char_lengths) VALUES (?, ?, ?, ?, ?)",
+                (fc_id, fingerprint, run_date, json.dumps(null_counts), json.dumps(max_char_lengths)))
+            if field_statistics is None:
+                self.connection.execute("DELETE FROM field_statistics_state WHERE fc_id = ?", (fc_id,))
+            else:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO field_statistics_state (fc_id, field_statistics) VALUES (?, ?)",
+                    (fc_id, json.dumps(field_statistics)))
+            if out_of_domain_counts is None:
+                self.connection.execute("DELETE FROM domain_validation_state WHERE fc_id = ?", (fc_id,))
+            else:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO domain_validation_state (fc_id, domain_signature, out_of_domain_counts) "
+                    "VALUES (?, ?, ?)",
+                    (fc_id, domain_signature, json.dumps(out_of_domain_counts)))
+            if geometry_profile is None:
+                self.connection.execute("DELETE FROM geometry_profile_state WHERE fc_id = ?", (fc_id,))
+            else:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO geometry_profile_state (fc_id, geometry_profile) VALUES (?, ?)",
+                    (fc_id, json.dumps(geometry_profile)))
+        return
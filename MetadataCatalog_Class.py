@@ -0,0 +1,273 @@
+from collections import namedtuple
+from concurrent.futures import as_completed, ThreadPoolExecutor
+from UtilityClass import UtilityClassFunctionality as myutil
+import json
+import sqlite3
+import Workspace_Class
+
+FeatureClassMetadata = namedtuple("FeatureClassMetadata", "exists record_count description")
+
+
+class MetadataCatalog:
+    """
+    Hold the feature classes of each feature dataset, and the existence, record count and describe of each feature
+    class, gathered before the scan so that the inspection makes no metadata round trip to the workspace.
+
+    The catalog is prefetched with a bounded pool of threads, as the calls spend their time waiting on the server.
+    The feature classes of every feature dataset are listed concurrently, and the metadata of the feature classes of a
+    feature dataset is requested as soon as its list returns, overlapping with the listing of the others. Describe
+    results are copied to the lightweight description namedtuples of Workspace_Class, which are picklable, for worker
+    processes, and serializable, for the catalog store. A call that fails leaves its value out of the catalog, so that
+    the inventory makes the call again, live, and handles the error as it would without the catalog. The pool has one
+    thread for a workspace that does not declare concurrent metadata calls safe, so that its calls are made one at a
+    time.
+    """
+    Variable = namedtuple("Variable", "value")
+    DEFAULT_THREAD_COUNT = Variable(value=8)
+
+    def __init__(self, feature_classes_by_dataset, metadata_by_feature_class):
+        self.feature_classes_by_dataset = feature_classes_by_dataset
+        self.metadata_by_feature_class = metadata_by_feature_class
+
+    def get_feature_classes(self, feature_dataset):
+        """
+        Get the feature classes listed in a feature dataset and return list, or None if not in the catalog.
+
+        :param feature_dataset: feature dataset name
+        :return: list of feature class names or None
+        """
+        feature_classes = self.feature_classes_by_dataset.get(feature_dataset)
+        return None if feature_classes is None else list(feature_classes)
+
+    def get_metadata(self, feature_dataset, feature_class):
+        """
+        Get the metadata of a feature class and return FeatureClassMetadata, or None if not in the catalog.
+
+        :param feature_dataset: feature dataset name
+        :param feature_class: feature class name
+        :return: FeatureClassMetadata or None
+        """
+        return self.metadata_by_feature_class.get((feature_dataset, feature_class))
+
+    @staticmethod
+    def copy_description(description):
+        """
+        Copy the attributes of a describe object used by the inventory to a description namedtuple and return it.
+
+        :param description: describe object, such as the result of arcpy.Describe
+        :return: Workspace_Class.FeatureClassDescription
+        """
+        fields = [Workspace_Class.FieldDescription(**{attribute_name: getattr(field_object, attribute_name)
+                                                      for attribute_name in Workspace_Class.FieldDescription._fields})
+                  for field_object in description.fields]
+        return Workspace_Class.FeatureClassDescription(
+            dataType=description.dataType,
+            shapeType=description.shapeType,
+            spatialReference=Workspace_Class.SpatialReferenceDescription(name=description.spatialReference.name),
+            fields=fields,
+            OIDFieldName=getattr(description, "OIDFieldName", None))
+
+    @staticmethod
+    def fetch_metadata(workspace, feature_dataset, feature_class):
+        """
+        Request the existence, record count and describe of a feature class and return FeatureClassMetadata, or None
+        if the existence check fails.
+
+        The record count and description are None when their call fails, and are not requested for a feature class
+        that does not exist.
+        :param workspace: WorkspaceInterface implementation
+        :param feature_dataset: feature dataset name
+        :param feature_class: feature class name
+        :return: FeatureClassMetadata or None
+        """
+        try:
+            exists = workspace.exists(feature_dataset, feature_class)
+        except Exception as e:
+            myutil.print_and_log(message="Metadata prefetch existence check failed, checked during the scan: "
+                                         "{}. {}".format(feature_class, e), log_level=myutil.WARNING_LEVEL)
+            return None
+        record_count = None
+        description = None
+        if exists:
+            try:
+                record_count = workspace.get_count(feature_dataset, feature_class)
+            except Exception:
+                pass
+            try:
+                description = MetadataCatalog.copy_description(
+                    description=workspace.describe(feature_dataset, feature_class))
+            except Exception:
+                pass
+        return FeatureClassMetadata(exists=exists, record_count=record_count, description=description)
+
+    @staticmethod
+    def prefetch(workspace, feature_datasets, thread_count=DEFAULT_THREAD_COUNT.value):
+        """
+        Gather the feature classes of the feature datasets, and their metadata, with a pool of threads and return
+        MetadataCatalog.
+
+        :param workspace: WorkspaceInterface implementation
+        :param feature_datasets: list of feature dataset names
+        :param thread_count: maximum number of concurrent calls to the workspace, if it declares them safe
+        :return: MetadataCatalog
+        """
+        if not workspace.concurrent_metadata_calls:
+            thread_count = 1
+        feature_classes_by_dataset = {}
+        metadata_futures = {}
+        with ThreadPoolExecutor(max_workers=max(1, thread_count)) as executor:
+            feature_datasets_by_future = {
+                executor.submit(workspace.list_feature_classes, feature_dataset): feature_dataset
+                for feature_dataset in feature_datasets}
+            for list_future in as_completed(feature_datasets_by_future):
+                feature_dataset = feature_datasets_by_future[list_future]
+                try:
+                    feature_classes = list_future.result()
+                except Exception as e:
+                    myutil.print_and_log(message="Metadata prefetch listing failed, listed during the scan: "
+                                                 "{}. {}".format(feature_dataset, e), log_level=myutil.WARNING_LEVEL)
+                    continue
+                if feature_classes is None:
+                    continue
+                feature_classes_by_dataset[feature_dataset] = list(feature_classes)
+                for feature_class in feature_classes:
+                    metadata_futures[(feature_dataset, feature_class)] = executor.submit(
+                        MetadataCatalog.fetch_metadata, workspace, feature_dataset, feature_class)
+            metadata_by_feature_class = {key: metadata_future.result()
+                                         for key, metadata_future in metadata_futures.items()}
+        return MetadataCatalog(feature_classes_by_dataset=feature_classes_by_dataset,
+                               metadata_by_feature_class={key: metadata
+                                                          for key, metadata in metadata_by_feature_class.items()
+                                                          if metadata is not None})
+
+
+class MetadataCatalogStore:
+    """
+    Persist the metadata catalog of a workspace in a local SQLite database, so that a rerun on the same day can load
+    the catalog rather than prefetch it again.
+
+    One catalog is kept per workspace environment name, replaced whenever a catalog is saved, and loaded only for the
+    date it was gathered on. Descriptions are stored as json, with the field attributes in FieldDescription order.
+    """
+    Variable = namedtuple("Variable", "value")
+    CREATE_TABLE_STATEMENTS = Variable(value=(
+        """CREATE TABLE IF NOT EXISTS catalog_state (
+            environment_name TEXT PRIMARY KEY,
+            catalog_date TEXT NOT NULL)""",
+        """CREATE TABLE IF NOT EXISTS feature_dataset_catalog (
+            environment_name TEXT NOT NULL,
+            feature_dataset TEXT NOT NULL,
+            feature_classes TEXT NOT NULL,
+            PRIMARY KEY (environment_name, feature_dataset))""",
+        """CREATE TABLE IF NOT EXISTS feature_class_catalog (
+            environment_name TEXT NOT NULL,
+            feature_dataset TEXT NOT NULL,
+            feature_class TEXT NOT NULL,
+            exists_flag INTEGER NOT NULL,
+            record_count INTEGER,
+            description TEXT,
+            PRIMARY KEY (environment_name, feature_dataset, feature_class))""",
+    ))
+
+    def __init__(self, database_path):
+        self.database_path = database_path
+        self.connection = sqlite3.connect(database_path)
+        for statement in MetadataCatalogStore.CREATE_TABLE_STATEMENTS.value:
+            self.connection.execute(statement)
+        self.connection.commit()
+
+    def close(self):
+        """
+        Close the database connection but return nothing.
+
+        :return: None
+        """
+        self.connection.close()
+        return
+
+    def load_catalog(self, environment_name, catalog_date):
+        """
+        Load the catalog of a workspace gathered on a date and return MetadataCatalog, or None if there is none.
+
+        :param environment_name: environment name of the workspace
+        :param catalog_date: date string of the run
+        :return: MetadataCatalog or None
+        """
+        row = self.connection.execute("SELECT catalog_date FROM catalog_state WHERE environment_name = ?",
+                                      (environment_name,)).fetchone()
+        if row is None or row[0] != catalog_date:
+            return None
+        feature_classes_by_dataset = {
+            feature_dataset: json.loads(feature_classes)
+            for feature_dataset, feature_classes in self.connection.execute(
+                "SELECT feature_dataset, feature_classes FROM feature_dataset_catalog WHERE environment_name = ?",
+                (environment_name,))}
+        metadata_by_feature_class = {}
+        for feature_dataset, feature_class, exists_flag, record_count, description in self.connection.execute(
+                "SELECT feature_dataset, feature_class, exists_flag, record_count, description "
+                "FROM feature_class_catalog WHERE environment_name = ?", (environment_name,)):
+            metadata_by_feature_class[(feature_dataset, feature_class)] = FeatureClassMetadata(
+                exists=bool(exists_flag),
+                record_count=record_count,
+                description=None if description is None else MetadataCatalogStore.load_description(description))
+        return MetadataCatalog(feature_classes_by_dataset=feature_classes_by_dataset,
+                               metadata_by_feature_class=metadata_by_feature_class)
+
+    def save_catalog(self, environment_name, catalog_date, metadata_catalog):
+        """
+        Replace the stored catalog of a workspace with the catalog provided but return nothing.
+
+        :param environment_name: environment name of the workspace
+        :param catalog_date: date string of the run
+        :param metadata_catalog: MetadataCatalog
+        :return: None
+        """
+        with self.connection:
+            for table_name in ("catalog_state", "feature_dataset_catalog", "feature_class_catalog"):
+                self.connection.execute("DELETE FROM {} WHERE environment_name = ?".format(table_name),
+                                        (environment_name,))
+            self.connection.execute("INSERT INTO catalog_state (environment_name, catalog_date) VALUES (?, ?)",
+                                    (environment_name, catalog_date))
+            self.connection.executemany(
+                "INSERT INTO feature_dataset_catalog (environment_name, feature_dataset, feature_classes) "
+                "VALUES (?, ?, ?)",
+                [(environment_name, feature_dataset, json.dumps(feature_classes))
+                 for feature_dataset, feature_classes in metadata_catalog.feature_classes_by_dataset.items()])
+            self.connection.executemany(
+                "INSERT INTO feature_class_catalog (environment_name, feature_dataset, feature_class, exists_flag, "
+                "record_count, description) VALUES (?, ?, ?, ?, ?, ?)",
+                [(environment_name, feature_dataset, feature_class, int(bool(metadata.exists)), metadata.record_count,
+                  None if metadata.description is None else MetadataCatalogStore.dump_description(metadata.description))
+                 for (feature_dataset, feature_class), metadata
+                 in metadata_catalog.metadata_by_feature_class.items()])
+        return
+
+    @staticmethod
+    def dump_description(description):
+        """
+        Serialize a description namedtuple to json and return string.
+
+        :param description: Workspace_Class.FeatureClassDescription
+        :return: json string
+        """
+        return json.dumps({"dataType": description.dataType,
+                           "shapeType": description.shapeType,
+                           "spatialReference": description.spatialReference.name,
+                           "fields": [list(field_description) for field_description in description.fields],
+                           "OIDFieldName": description.OIDFieldName}, default=str)
+
+    @staticmethod
+    def load_description(description_json):
+        """
+        Deserialize a description namedtuple from json and return it.
+
+        :param description_json: json string from dump_description
+        :return: Workspace_Class.FeatureClassDescription
+        """
+        description = json.loads(description_json)
+        return Workspace_Class.FeatureClassDescription(
+            dataType=description["dataType"],
+            shapeType=description["shapeType"],
+            spatialReference=Workspace_Class.SpatialReferenceDescription(name=description["spatialReference"]),
+            fields=[Workspace_Class.FieldDescription(*field_values) for field_values in description["fields"]],
+            OIDFieldName=description["OIDFieldName"])
@@ -0,0 +1,467 @@
+from collections import namedtuple
+import csv
+import glob
+import os
+
+
+class OutputSink:
+    """
+    Define the output sinks of the inventory results tables.
+
+    The three results tables are the domains, the feature classes and the feature class fields, with the change log of
+    the run to run diff as an optional fourth. A sink accepts rows
+    of values, in header order and not formatted to string, for a named table, and counts the bytes it has written.
+    At a checkpoint a sink makes the rows written so far durable and returns the size of each file that a resumed run
+    must truncate to before appending.
+    """
+    Variable = namedtuple("Variable", "value")
+    CHANGE_LOG_TABLE = Variable(value="changelog")
+    DOMAINS_TABLE = Variable(value="domains")
+    FEATURE_CLASSES_TABLE = Variable(value="featureclasses")
+    FIELDS_TABLE = Variable(value="fields")
+
+    def checkpoint(self):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def flush(self):
+        raise NotImplementedError
+
+    def get_bytes_written(self):
+        raise NotImplementedError
+
+    def write_row(self, table_name, values_list):
+        raise NotImplementedError
+
+
+class CSVTableWriter:
+    """
+    Write the rows of one inventory results table to a csv file through a single, buffered file handle.
+
+    Values are converted with str, as the original output did, so None is written as None, and the result objects also
+    list None as the string None so that every sink shows it the same. Rows are written with minimal quoting: values
+    containing a comma, quote, carriage return or line feed are quoted, with quotes doubled, rather than having commas
+    replaced, and rows end with CRLF, as RFC 4180 specifies. A row of printable characters with no such value, which is
+    nearly every row of the results, is joined with commas and written directly, as csv.writer would write it but at
+    about twice the speed, and only the other rows are written by csv.writer. The file is opened with newline
+    translation off, as the csv module requires, so line breaks within values are written as they are. The file buffer
+    is written to disk when it fills, so buffer_size is the byte threshold, and the buffer is also flushed every
+    flush_row_count rows so that a failed run leaves recent rows on disk. Bytes written are counted as characters
+    written, which matches the file size for the ascii content of the results. When appending, the file may first be
+    truncated to a size recorded at a checkpoint, and the headers are written only if the file is new or empty.
+    """
+    Variable = namedtuple("Variable", "value")
+    DEFAULT_BUFFER_SIZE = Variable(value=1048576)
+    DEFAULT_FLUSH_ROW_COUNT = Variable(value=10000)
+
+    def __init__(self, file_path, headers, append=False, buffer_size=DEFAULT_BUFFER_SIZE.value,
+                 flush_row_count=DEFAULT_FLUSH_ROW_COUNT.value, truncate_size=None):
+        self.bytes_written = 0
+        self.file_path = file_path
+        self.flush_row_count = flush_row_count
+        self.rows_since_flush = 0
+        self.rows_written = 0
+        if append and truncate_size is not None and os.path.exists(file_path):
+            os.truncate(file_path, truncate_size)
+        write_headers = not append or not os.path.exists(file_path) or os.path.getsize(file_path) == 0
+        self.file_handler = open(file_path, "a" if append else "w", buffering=buffer_size, newline="")
+        self.csv_writer = csv.writer(self.file_handler)
+        if write_headers:
+            self.write_row(values_list=headers)
+            self.rows_written = 0
+
+    def close(self):
+        """
+        Flush and close the file but return nothing.
+
+        :return: None
+        """
+        self.file_handler.close()
+        return
+
+    def flush(self):
+        """
+        Write the buffered rows to disk but return nothing.
+
+        :return: None
+        """
+        self.file_handler.flush()
+        self.rows_since_flush = 0
+        return
+
+    def get_file_size(self):
+        """
+        Write the buffered rows to disk and return the integer size of the file in bytes.
+
+        :return: integer
+        """
+        self.flush()
+        return os.fstat(self.file_handler.fileno()).st_size
+
+    def write_row(self, values_list):
+        """
+        Write one row of values but return nothing.
+
+        :param values_list: list of values in header order, not formatted to string
+        :return: None
+        """
+        # A row of only printable characters, no quotes and no commas but the separators has no value to quote
+        line = ",".join(map(str, values_list))
+        if (len(values_list) > 1 and line.count(",") == len(values_list) - 1 and '"' not in line
+                and line.isprintable()):
+            self.bytes_written += self.file_handler.write(line + "\r\n")
+        else:
+            self.bytes_written += self.csv_writer.writerow(map(str, values_list))
+        self.rows_written += 1
+        self.rows_since_flush += 1
+        if self.rows_since_flush >= self.flush_row_count:
+            self.flush()
+        return
+
+
+class CSVOutputSink(OutputSink):
+    """
+    Hold one open CSVTableWriter per inventory results table for the length of a run.
+
+    Each file is opened once, when the sink is created, and closed when the sink is closed. A resumed run appends,
+    truncating each file to the size recorded at the last checkpoint of the interrupted run.
+    """
+
+    def __init__(self, file_paths_by_table, headers_by_table, append=False,
+                 buffer_size=CSVTableWriter.DEFAULT_BUFFER_SIZE.value,
+                 flush_row_count=CSVTableWriter.DEFAULT_FLUSH_ROW_COUNT.value, resume_file_sizes=None):
+        resume_file_sizes = resume_file_sizes or {}
+        self.table_writers = {}
+        for table_name, file_path in file_paths_by_table.items():
+            self.table_writers[table_name] = CSVTableWriter(file_path=file_path,
+                                                            headers=headers_by_table[table_name],
+                                                            append=append,
+                                                            buffer_size=buffer_size,
+                                                            flush_row_count=flush_row_count,
+                                                            truncate_size=resume_file_sizes.get(file_path))
+
+    def checkpoint(self):
+        """
+        Write the buffered rows of all tables to disk and return dictionary of file path to file size.
+
+        :return: dictionary
+        """
+        return {table_writer.file_path: table_writer.get_file_size() for table_writer in self.table_writers.values()}
+
+    def close(self):
+        """
+        Close all table files but return nothing.
+
+        :return: None
+        """
+        for table_writer in self.table_writers.values():
+            table_writer.close()
+        return
+
+    def flush(self):
+        """
+        Write the buffered rows of all tables to disk but return nothing.
+
+        :return: None
+        """
+        for table_writer in self.table_writers.values():
+            table_writer.flush()
+        return
+
+    def get_bytes_written(self):
+        """
+        Total the bytes written to all table files and return integer.
+
+        :return: integer
+        """
+        return sum(table_writer.bytes_written for table_writer in self.table_writers.values())
+
+    def write_row(self, table_name, values_list):
+        """
+        Write one row of values to the named table but return nothing.
+
+        :param table_name: one of the table name constants
+        :param values_list: list of values in header order, not formatted to string
+        :return: None
+        """
+        self.table_writers[table_name].write_row(values_list=values_list)
+        return
+
+
+class ParquetOutputSink(OutputSink):
+    """
+    Write the inventory results tables as typed parquet datasets partitioned by run date.
+
+    Each table is a directory of DATE=YYYY-MM-DD partitions, readable with pandas.read_parquet or pyarrow.dataset, so
+    consumers of the run history can read only the columns and dates needed. Count and percent columns are stored as
+    numbers and flag columns as booleans, rather than strings; any other column is stored as a string. Rows are buffered
+    per table and written as a parquet row group every row_group_size rows. A rerun on the same date replaces that
+    date's partition files. A checkpoint closes the open files, as a parquet file is readable only once closed, and
+    later rows go to a new part file of the partition. A resumed run appends, keeping the part files closed at
+    checkpoints and removing the unreadable part file of the interrupted run, whose rows are written again. When the
+    sink is closed at the end of the run, the part files of each partition written are compacted into one file, row
+    group by row group in part order, so that a run leaves one file per table and date however often it checkpointed.
+    Bytes written are counted as the uncompressed arrow size of the row groups written, as the compressed size is known
+    only once a file is closed. Requires pyarrow, which is imported on creation of the sink.
+    """
+    Variable = namedtuple("Variable", "value")
+    BOOLEAN_COLUMNS = Variable(value=("Is Nullable", "Required", "Stats Sampled", "Max Character Length Estimated"))
+    DATE_COLUMN = Variable(value="DATE")
+    DEFAULT_ROW_GROUP_SIZE = Variable(value=100000)
+    FLOAT_COLUMNS = Variable(value=("Total Value Count", "Percent Null", "Percent Null Lower Bound",
+                                    "Percent Null Upper Bound", "Mean", "Standard Deviation",
+                                    "Percent Out Of Domain", "Extent X Min", "Extent Y Min", "Extent X Max",
+                                    "Extent Y Max", "Mean Vertex Count"))
+    INTEGER_COLUMNS = Variable(value=("Total Column Count", "Total Record Count", "Total Null Value Count", "Length",
+                                      "Max Character Length Found", "Precision", "Scale", "Sampled Record Count",
+                                      "Null Count Lower Bound", "Null Count Upper Bound", "Distinct Count Estimate",
+                                      "Out Of Domain Value Count", "Null Geometry Count", "Empty Geometry Count",
+                                      "Invalid Geometry Count", "Total Vertex Count", "Min Vertex Count",
+                                      "Max Vertex Count"))
+
+    def __init__(self, root_path, headers_by_table, row_group_size=DEFAULT_ROW_GROUP_SIZE.value, append=False):
+        import pyarrow
+        import pyarrow.parquet
+        self.append = append
+        self.bytes_written = 0
+        self.headers_by_table = {table_name: tuple(headers) for table_name, headers in headers_by_table.items()}
+        self.pending_rows_by_table = {table_name: [] for table_name in headers_by_table}
+        self.pyarrow = pyarrow
+        self.pyarrow_parquet = pyarrow.parquet
+        self.root_path = root_path
+        self.row_group_size = row_group_size
+        self.schemas_by_table = {table_name: self.build_schema(headers=headers)
+                                 for table_name, headers in self.headers_by_table.items()}
+        self.prepared_partitions = set()
+        self.writers_by_partition = {}
+
+    def build_schema(self, headers):
+        """
+        Build the arrow schema for a table from the headers, excluding the date partition column, and return schema.
+
+        :param headers: tuple of table headers
+        :return: pyarrow.Schema
+        """
+        arrow_fields = []
+        for header in headers:
+            if header == ParquetOutputSink.DATE_COLUMN.value:
+                continue
+            elif header in ParquetOutputSink.INTEGER_COLUMNS.value:
+                arrow_fields.append(self.pyarrow.field(header, self.pyarrow.int64()))
+            elif header in ParquetOutputSink.FLOAT_COLUMNS.value:
+                arrow_fields.append(self.pyarrow.field(header, self.pyarrow.float64()))
+            elif header in ParquetOutputSink.BOOLEAN_COLUMNS.value:
+                arrow_fields.append(self.pyarrow.field(header, self.pyarrow.bool_()))
+            else:
+                arrow_fields.append(self.pyarrow.field(header, self.pyarrow.string()))
+        return self.pyarrow.schema(arrow_fields)
+
+    def checkpoint(self):
+        """
+        Write all buffered rows and close the parquet files, so that they are readable, and return empty dictionary.
+
+        Closed parquet files are not truncated on resume so no file sizes are returned.
+        :return: dictionary
+        """
+        self.close_writers()
+        return {}
+
+    def close(self):
+        """
+        Write all buffered rows, close the parquet files and compact the part files of each partition written but
+        return nothing.
+
+        :return: None
+        """
+        self.close_writers()
+        for table_name, date_string in sorted(self.prepared_partitions):
+            self.compact_partition(table_name=table_name, date_string=date_string)
+        return
+
+    def close_writers(self):
+        """
+        Write all buffered rows and close the parquet files but return nothing.
+
+        :return: None
+        """
+        self.flush()
+        for writer in self.writers_by_partition.values():
+            writer.close()
+        self.writers_by_partition = {}
+        return
+
+    def compact_partition(self, table_name, date_string):
+        """
+        Rewrite the part files of a partition as one file, in part order, but return nothing.
+
+        The row groups are copied one at a time to a temporary file, which then replaces the first part file, and the
+        other part files are removed. A partition of one part file is left as is.
+        :param table_name: one of the table name constants
+        :param date_string: run date string
+        :return: None
+        """
+        partition_path = self.get_partition_path(table_name=table_name, date_string=date_string)
+        file_path = os.path.join(partition_path, "{}_{}.parquet".format(date_string, table_name))
+        part_file_paths = [file_path] if os.path.exists(file_path) else []
+        part_number = 1
+        while os.path.exists(os.path.join(partition_path, "{}_{}_{}.parquet".format(date_string, table_name,
+                                                                                  part_number))):
+            part_file_paths.append(os.path.join(partition_path, "{}_{}_{}.parquet".format(date_string, table_name,
+                                                                                          part_number)))
+            part_number += 1
+        if len(part_file_paths) < 2:
+            return
+        compacted_file_path = "{}.compacting".format(file_path)
+        writer = self.pyarrow_parquet.ParquetWriter(compacted_file_path, self.schemas_by_table[table_name])
+        try:
+            for part_file_path in part_file_paths:
+                part_file = self.pyarrow_parquet.ParquetFile(part_file_path)
+                for row_group_index in range(part_file.num_row_groups):
+                    writer.write_table(part_file.read_row_group(row_group_index))
+        finally:
+            writer.close()
+        os.replace(compacted_file_path, file_path)
+        for part_file_path in part_file_paths[1:]:
+            os.remove(part_file_path)
+        return
+
+    def flush(self):
+        """
+        Write the buffered rows of all tables as row groups but return nothing.
+
+        :return: None
+        """
+        for table_name in self.pending_rows_by_table:
+            self.flush_table(table_name=table_name)
+        return
+
+    def flush_table(self, table_name):
+        """
+        Write the buffered rows of one table, a row group per run date, but return nothing.
+
+        :param table_name: one of the table name constants
+        :return: None
+        """
+        pending_rows = self.pending_rows_by_table[table_name]
+        if len(pending_rows) == 0:
+            return
+        self.pending_rows_by_table[table_name] = []
+        headers = self.headers_by_table[table_name]
+        schema = self.schemas_by_table[table_name]
+        date_index = headers.index(ParquetOutputSink.DATE_COLUMN.value)
+        rows_by_date = {}
+        for row in pending_rows:
+            rows_by_date.setdefault(str(row[date_index]), []).append(row)
+        column_types = [(index, schema.field(header).type) for index, header in enumerate(headers)
+                        if index != date_index]
+        for date_string, rows in rows_by_date.items():
+            columns = list(zip(*rows))
+            arrays = [self.pyarrow.array([ParquetOutputSink.convert_value(value=value, arrow_type=arrow_type,
+                                                                          pyarrow_module=self.pyarrow)
+                                          for value in columns[index]], type=arrow_type)
+                      for index, arrow_type in column_types]
+            table = self.pyarrow.Table.from_arrays(arrays, schema=schema)
+            self.bytes_written += table.nbytes
+            self.get_partition_writer(table_name=table_name, date_string=date_string).write_table(table)
+        return
+
+    def get_partition_writer(self, table_name, date_string):
+        """
+        Get the open parquet writer for a table and run date, creating it if necessary, and return it.
+
+        :param table_name: one of the table name constants
+        :param date_string: run date string
+        :return: pyarrow.parquet.ParquetWriter
+        """
+        partition_key = (table_name, date_string)
+        if partition_key not in self.writers_by_partition:
+            partition_path = self.get_partition_path(table_name=table_name, date_string=date_string)
+            os.makedirs(partition_path, exist_ok=True)
+            if partition_key not in self.prepared_partitions:
+                self.prepare_partition(partition_path=partition_path, table_name=table_name, date_string=date_string)
+                self.prepared_partitions.add(partition_key)
+            file_path = os.path.join(partition_path, "{}_{}.parquet".format(date_string, table_name))
+            part_number = 0
+            while os.path.exists(file_path):
+                part_number += 1
+                file_path = os.path.join(partition_path, "{}_{}_{}.parquet".format(date_string, table_name,
+                                                                                    part_number))
+            self.writers_by_partition[partition_key] = self.pyarrow_parquet.ParquetWriter(
+                file_path, self.schemas_by_table[table_name])
+        return self.writers_by_partition[partition_key]
+
+    def get_partition_path(self, table_name, date_string):
+        """
+        Build the path of the date partition directory of a table and return string.
+
+        :param table_name: one of the table name constants
+        :param date_string: run date string
+        :return: string
+        """
+        return os.path.join(self.root_path, table_name, "{}={}".format(ParquetOutputSink.DATE_COLUMN.value,
+                                                                       date_string))
+
+    def prepare_partition(self, partition_path, table_name, date_string):
+        """
+        Remove the part files of a partition replaced by this run, before its first file is opened, but return nothing.
+
+        A new run replaces all part files of the date. An appending run keeps the readable part files and removes any
+        that cannot be read, being the part file left open when the interrupted run stopped.
+        :param partition_path: directory of the date partition of the table
+        :param table_name: one of the table name constants
+        :param date_string: run date string
+        :return: None
+        """
+        for file_path in glob.glob(os.path.join(partition_path, "{}_{}*.parquet".format(date_string, table_name))):
+            if self.append:
+                try:
+                    self.pyarrow_parquet.ParquetFile(file_path)
+                    continue
+                except Exception:
+                    pass
+            os.remove(file_path)
+        return
+
+    def get_bytes_written(self):
+        """
+        Return the uncompressed arrow bytes of the row groups written, as integer.
+
+        :return: integer
+        """
+        return self.bytes_written
+
+    def write_row(self, table_name, values_list):
+        """
+        Buffer one row of values for the named table, writing a row group when the buffer is full, but return nothing.
+
+        :param table_name: one of the table name constants
+        :param values_list: list of values in header order, not formatted to string
+        :return: None
+        """
+        pending_rows = self.pending_rows_by_table[table_name]
+        pending_rows.append(values_list)
+        if len(pending_rows) >= self.row_group_size:
+            self.flush_table(table_name=table_name)
+        return
+
+    @staticmethod
+    def convert_value(value, arrow_type, pyarrow_module):
+        """
+        Convert a value to the python type of the arrow column and return it, or None for a missing value.
+
+        :param value: value from the results row
+        :param arrow_type: arrow data type of the column
+        :param pyarrow_module: the imported pyarrow module
+        :return: int, float, bool, string or None
+        """
+        if value is None:
+            return None
+        if pyarrow_module.types.is_integer(arrow_type):
+            return int(value)
+        if pyarrow_module.types.is_floating(arrow_type):
+            return float(value)
+        if pyarrow_module.types.is_boolean(arrow_type):
+            return bool(value)
+        return str(value)
@@ -0,0 +1,270 @@
+from collections import namedtuple
+from functools import partial
+from itertools import compress
+from operator import is_not
+import datetime
+import FieldStatistics_Class
+import GeodatabaseDomain_Class
+import json
+
+FieldProfileRecord = namedtuple("FieldProfileRecord", "field_name record_count null_count max_char_length "
+                                                      "out_of_domain_count field_statistics")
+
+
+class FieldProfileAccumulator:
+    """
+    Accumulate the profile of one field from batches of its values: the null and blank value count, the max character
+    length of a string field, and, when configured, the count of values out of a domain and the field statistics.
+
+    The accumulator holds only totals, starting from zero, and the record count tells whether any value was
+    evaluated, so no count is seeded with a flag value. The database flag is applied by to_record, for values never
+    evaluated, when the profile is output. Accumulators of the same field that profiled disjoint records, such as
+    partitions of a table, worker processes or runs, are merged into the profile of all the records. Counts are
+    summed and lengths maxed, so the merge equals a single pass; the field statistics are merged by their
+    accumulator, exactly but for floating point rounding of the mean and standard deviation and, beyond the summary
+    capacity, the top value counts. Only string values can be blank, empty or whitespace, so other values are
+    evaluated for None only, and blank values are left out of the domain validation and statistics.
+    Serialization: the state is serialized to json, with date and datetime values tagged, and deserialized to an
+    accumulator that can be updated and merged further. The domain rule is not serialized; provide it again to
+    validate more values.
+    """
+    Variable = namedtuple("Variable", "value")
+    DATE_TAG = Variable(value="__date__")
+    DATETIME_TAG = Variable(value="__datetime__")
+
+    def __init__(self, field_name, is_string, statistics_field_type=None, domain_rule=None):
+        self.domain_rule = domain_rule
+        self.field_name = field_name
+        self.is_string = is_string
+        self.max_char_length = None
+        self.null_count = 0
+        self.out_of_domain_count = None if domain_rule is None else 0
+        self.record_count = 0
+        self.statistics = None
+        if (statistics_field_type is not None and statistics_field_type.lower()
+                in FieldStatistics_Class.FieldStatisticsAccumulator.STATISTICS_FIELD_TYPES.value):
+            self.statistics = FieldStatistics_Class.FieldStatisticsAccumulator(field_type=statistics_field_type)
+
+    def add_counts(self, record_count, null_count, max_char_length=None):
+        """
+        Accumulate counts computed elsewhere, as by an aggregate query in the database, but return nothing.
+
+        :param record_count: number of records counted
+        :param null_count: number of null and blank values among them
+        :param max_char_length: max character length among them, or None
+        :return: None
+        """
+        self.record_count += record_count
+        self.null_count += null_count
+        self.update_max_char_length(max_char_length=max_char_length)
+        return
+
+    def get_max_char_length(self, database_flag):
+        """
+        Get the max character length of a string field for output and return integer, the database flag value if the
+        field held no value, or None for a field that is not a string.
+
+        :param database_flag: value output for values never evaluated
+        :return: integer or None
+        """
+        if not self.is_string:
+            return None
+        return database_flag if self.max_char_length is None else self.max_char_length
+
+    def get_null_count(self, database_flag):
+        """
+        Get the null and blank value count for output and return integer, the database flag value if no value was
+        evaluated.
+
+        :param database_flag: value output for values never evaluated
+        :return: integer
+        """
+        return self.null_count if self.record_count > 0 else database_flag
+
+    def get_out_of_domain_count(self, database_flag):
+        """
+        Get the out of domain value count for output and return integer, the database flag value if no value was
+        evaluated, or None for a field without domain validation.
+
+        :param database_flag: value output for values never evaluated
+        :return: integer or None
+        """
+        if self.out_of_domain_count is None:
+            return None
+        return self.out_of_domain_count if self.record_count > 0 else database_flag
+
+    def merge(self, other):
+        """
+        Merge the profile of the same field, accumulated from other records, into this profile but return nothing.
+
+        :param other: FieldProfileAccumulator of the same field, string type, statistics and domain validation
+        :return: None
+        """
+        if ((other.field_name, other.is_string, other.statistics is None, other.out_of_domain_count is None)
+                != (self.field_name, self.is_string, self.statistics is None, self.out_of_domain_count is None)):
+            raise ValueError("Profile of field {} is not mergeable into the profile of field {}".format(
+                other.field_name, self.field_name))
+        self.record_count += other.record_count
+        self.null_count += other.null_count
+        self.update_max_char_length(max_char_length=other.max_char_length)
+        if self.out_of_domain_count is not None:
+            self.out_of_domain_count += other.out_of_domain_count
+        if self.statistics is not None:
+            self.statistics.merge(other=other.statistics)
+        return
+
+    def serialize(self):
+        """
+        Serialize the state of the accumulator to json and return string.
+
+        :return: json string
+        """
+        return json.dumps(self.to_dict(), default=FieldProfileAccumulator.encode_json_value)
+
+    def to_dict(self):
+        """
+        Copy the state of the accumulator to a dictionary and return dictionary.
+
+        :return: dictionary of attribute name to value
+        """
+        return {"field_name": self.field_name,
+                "is_string": self.is_string,
+                "max_char_length": self.max_char_length,
+                "null_count": self.null_count,
+                "out_of_domain_count": self.out_of_domain_count,
+                "record_count": self.record_count,
+                "statistics": None if self.statistics is None else self.statistics.to_dict()}
+
+    def to_record(self, database_flag):
+        """
+        Create the profile of the field for output and return FieldProfileRecord.
+
+        Counts of a field whose values were never evaluated are the database flag value, as is the max character
+        length of a string field without a value. Values not profiled for the field are None.
+        :param database_flag: value output for values never evaluated
+        :return: FieldProfileRecord
+        """
+        return FieldProfileRecord(field_name=self.field_name,
+                                  record_count=self.record_count,
+                                  null_count=self.get_null_count(database_flag=database_flag),
+                                  max_char_length=self.get_max_char_length(database_flag=database_flag),
+                                  out_of_domain_count=self.get_out_of_domain_count(database_flag=database_flag),
+                                  field_statistics=(None if self.statistics is None
+                                                    else self.statistics.create_statistics_list(
+                                                        database_flag=database_flag)))
+
+    def update(self, batch):
+        """
+        Evaluate a batch of values of the field and accumulate the profile but return nothing.
+
+        :param batch: sequence of the values of the field, as a column of a chunk of records
+        :return: None
+        """
+        if len(batch) == 0:
+            return
+        self.record_count += len(batch)
+        if not self.is_string:
+            self.null_count += batch.count(None)
+            if self.statistics is None and self.domain_rule is None:
+                return
+            present_values = list(filter(partial(is_not, None), batch))
+            self.update_validated_values(values=present_values)
+            return
+        present_values = list(filter(partial(is_not, None), batch))
+        stripped_values = list(map(str.strip, present_values))
+        self.null_count += (len(batch) - len(present_values)) + stripped_values.count("")
+        self.update_max_char_length(max_char_length=max(map(len, present_values), default=None))
+        if self.statistics is None and self.domain_rule is None:
+            return
+        self.update_validated_values(values=list(compress(present_values, stripped_values)))
+        return
+
+    def update_max_char_length(self, max_char_length):
+        """
+        Widen the max character length with that of other values but return nothing.
+
+        :param max_char_length: max character length of the other values, or None
+        :return: None
+        """
+        if max_char_length is not None and (self.max_char_length is None or max_char_length > self.max_char_length):
+            self.max_char_length = max_char_length
+        return
+
+    def update_validated_values(self, values):
+        """
+        Accumulate the statistics and out of domain count of values, without nulls and blanks, but return nothing.
+
+        :param values: list of the non null, non blank values of the field
+        :return: None
+        """
+        if self.statistics is not None:
+            self.statistics.update(values=values)
+        if self.domain_rule is not None:
+            self.out_of_domain_count += GeodatabaseDomain_Class.GeodatabaseDomainIndex.count_out_of_domain(
+                rule=self.domain_rule, values=values)
+        return
+
+    @staticmethod
+    def decode_json_object(json_object):
+        """
+        Decode a json object, converting tagged dates and datetimes back to values, and return it.
+
+        :param json_object: dictionary decoded from a json object
+        :return: date, datetime or the dictionary
+        """
+        if FieldProfileAccumulator.DATETIME_TAG.value in json_object:
+            return datetime.datetime(*json_object[FieldProfileAccumulator.DATETIME_TAG.value])
+        if FieldProfileAccumulator.DATE_TAG.value in json_object:
+            return datetime.date(*json_object[FieldProfileAccumulator.DATE_TAG.value])
+        return json_object
+
+    @staticmethod
+    def deserialize(serialized, domain_rule=None):
+        """
+        Deserialize an accumulator from json and return FieldProfileAccumulator.
+
+        :param serialized: json string from serialize
+        :param domain_rule: DomainRule of the field, to validate further values, or None
+        :return: FieldProfileAccumulator
+        """
+        return FieldProfileAccumulator.from_dict(
+            dictionary=json.loads(serialized, object_hook=FieldProfileAccumulator.decode_json_object),
+            domain_rule=domain_rule)
+
+    @staticmethod
+    def encode_json_value(value):
+        """
+        Encode a date or datetime value, which json cannot, as a tagged list of its parts and return dictionary.
+
+        :param value: value json could not encode
+        :return: dictionary of the tag to the list of parts
+        """
+        if isinstance(value, datetime.datetime):
+            return {FieldProfileAccumulator.DATETIME_TAG.value: [value.year, value.month, value.day, value.hour,
+                                                                 value.minute, value.second, value.microsecond]}
+        if isinstance(value, datetime.date):
+            return {FieldProfileAccumulator.DATE_TAG.value: [value.year, value.month, value.day]}
+        raise TypeError("Value of type {} is not serializable".format(type(value).__name__))
+
+    @staticmethod
+    def from_dict(dictionary, domain_rule=None):
+        """
+        Create an accumulator from the state copied by to_dict and return FieldProfileAccumulator.
+
+        :param dictionary: dictionary from to_dict
+        :param domain_rule: DomainRule of the field, to validate further values, or None. Ignored for a profile
+            that was not validated.
+        :return: FieldProfileAccumulator
+        """
+        accumulator = FieldProfileAccumulator(field_name=dictionary["field_name"],
+                                              is_string=dictionary["is_string"],
+                                              domain_rule=(None if dictionary["out_of_domain_count"] is None
+                                                           else domain_rule))
+        accumulator.max_char_length = dictionary["max_char_length"]
+        accumulator.null_count = dictionary["null_count"]
+        accumulator.out_of_domain_count = dictionary["out_of_domain_count"]
+        accumulator.record_count = dictionary["record_count"]
+        if dictionary["statistics"] is not None:
+            accumulator.statistics = FieldStatistics_Class.FieldStatisticsAccumulator.from_dict(
+                dictionary=dictionary["statistics"])
+        return accumulator
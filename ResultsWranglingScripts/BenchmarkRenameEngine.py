@@ -0,0 +1,124 @@
+"""
+Benchmark the rename step of GODIresultscleaning.py on a synthetic GODI dataset level history.
+
+The reference is the original rename, a per cell Series.apply of a function looping over the replacement dictionary.
+It is compared with the RenameEngine, one compiled alternation regular expression applied with vectorized pandas
+string methods. The synthetic history repeats a set of feature class names across monthly runs, with a share of the
+names being SportVenues names needing revision, and the outputs of both approaches are checked to be identical.
+Run from the ResultsWranglingScripts folder: python BenchmarkRenameEngine.py --rows 3000000
+"""
+
+
+def main():
+
+    # IMPORTS
+    from collections import namedtuple
+    import argparse
+    import os
+    import pandas as pd
+    import random
+    import RenameEngine_Class
+    import time
+
+    # VARIABLES
+    parser = argparse.ArgumentParser(description="Benchmark the GODI results rename step.")
+    parser.add_argument("--rows", type=int, default=3000000, help="number of synthetic history rows")
+    args = parser.parse_args()
+
+    # CONSTANTS
+    CONSTANT = namedtuple("CONSTANT", "value")
+    COLUMNS_TO_CHANGE = CONSTANT(value=["Name", "FC_ID", "ROW_ID"])
+    FEATURE_CLASS_NAME_COUNT = CONSTANT(value=5000)
+    MAPPING_FILE = CONSTANT(value=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                               "RenameMappings_SportVenues.json"))
+    SPORTVENUES_SHARE = CONSTANT(value=0.05)
+
+    # FUNCTIONS
+    def build_synthetic_history(row_count: int, replace_dict: dict) -> pd.DataFrame:
+        """
+        Build a dataset level history of monthly runs over a fixed set of feature class names
+        :param row_count: number of rows
+        :param replace_dict: dictionary of old to new name fragments, the keys used to build SportVenues names
+        :return: dataframe with Name, FC_ID, DATE and ROW_ID columns
+        """
+        randomizer = random.Random(0)
+        sport_venue_keys = list(replace_dict.keys())
+        names = []
+        for index in range(FEATURE_CLASS_NAME_COUNT.value):
+            if randomizer.random() < SPORTVENUES_SHARE.value:
+                names.append("Production.SDE.{}".format(randomizer.choice(sport_venue_keys)))
+            else:
+                names.append("Production.SDE.THEME_Dataset{}_DOIT".format(index))
+        name_series = pd.Series(names * (row_count // len(names) + 1)).iloc[:row_count].reset_index(drop=True)
+        date_series = pd.Series(["{}-{:02d}-01".format(2015 + month // 12, month % 12 + 1)
+                                 for month in range(row_count // len(names) + 1)]).repeat(len(names))
+        date_series = date_series.iloc[:row_count].reset_index(drop=True)
+        fc_id_series = "sde_" + name_series
+        return pd.DataFrame({"Name": name_series,
+                             "FC_ID": fc_id_series,
+                             "DATE": date_series,
+                             "ROW_ID": fc_id_series + "_" + date_series})
+
+    def rename_reference(dataframe: pd.DataFrame, replace_dict: dict) -> pd.DataFrame:
+        """
+        Rename per the original GODIresultscleaning.py approach, a per cell apply with a loop over the dictionary
+        :param dataframe: dataframe of results
+        :param replace_dict: dictionary of old to new name fragments
+        :return: dataframe with cleaned values
+        """
+        def revise_names(godi_value: str) -> str:
+            if "sportvenues" in godi_value.lower():
+                pass
+            else:
+                return godi_value
+            for key, value in replace_dict.items():
+                if key in godi_value:
+                    return godi_value.replace(key, value)
+            return godi_value
+
+        for column in COLUMNS_TO_CHANGE.value:
+            dataframe[column] = dataframe[column].apply(func=revise_names)
+        return dataframe
+
+    def rename_engine(dataframe: pd.DataFrame, engine: RenameEngine_Class.RenameEngine) -> pd.DataFrame:
+        """
+        Rename using the RenameEngine
+        :param dataframe: dataframe of results
+        :param engine: RenameEngine
+        :return: dataframe with cleaned values
+        """
+        for column in COLUMNS_TO_CHANGE.value:
+            dataframe[column] = engine.rename_series(series=dataframe[column])
+        return dataframe
+
+    def time_function(function, **kwargs):
+        """
+        Time a single call of a function
+        :param function: function to call
+        :param kwargs: keyword arguments for the function
+        :return: tuple of (result, seconds elapsed)
+        """
+        start = time.perf_counter()
+        result = function(**kwargs)
+        return result, time.perf_counter() - start
+
+    # FUNCTIONALITY
+    engine = RenameEngine_Class.RenameEngine.from_mapping_files(file_paths=(MAPPING_FILE.value,))
+    history_df = build_synthetic_history(row_count=args.rows, replace_dict=engine.mappings)
+    print("Synthetic history: {:,} rows, {:,} rows needing revision".format(
+        len(history_df), int(history_df["Name"].str.contains("SportVenues", regex=False).sum())))
+
+    reference_df, reference_seconds = time_function(rename_reference, dataframe=history_df.copy(),
+                                                    replace_dict=engine.mappings)
+    engine_df, engine_seconds = time_function(rename_engine, dataframe=history_df.copy(), engine=engine)
+
+    print("Reference apply rename: {:.2f} s ({:,.0f} rows/sec)".format(reference_seconds,
+                                                                       len(history_df) / reference_seconds))
+    print("RenameEngine rename:    {:.2f} s ({:,.0f} rows/sec)".format(engine_seconds,
+                                                                       len(history_df) / engine_seconds))
+    print("Speedup: {:.1f}x".format(reference_seconds / engine_seconds))
+    print("Identical output: {}".format(reference_df.equals(engine_df)))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,18 @@ my_feature_class may have been updated to my_feature_class_DOIT. This will resul
 non-overlapping date ranges when really this is the same dataset and the results should be visualized together, not as
 two separate datasets.
 
-NOTE: When dataset is pulled from Socrata, the numbers come with thousands separator commas. These will cause issues
-unless removed before processing. In Excel, change the column type to Numbers with no thousand separators or replace
-them programmatically.
+The results can be read from csv files or from the parquet datasets written by the inventory when its parquet output is
+turned on. The parquet datasets are partitioned by run date and store counts and percents as numbers, so only the
+columns and run dates needed are read and no separator cleanup is necessary. Set READ_RESULTS_FROM_PARQUET to use them.
+
+Streaming mode: for history files too large to hold in memory, the csv files are read, renamed and appended to the
+output in chunks of STREAMING_CHUNK_SIZE rows, optionally both files at the same time in threads. In streaming mode all
+values are read and written as text, so values other than the renamed ones pass through unchanged. The rows processed,
+rows per second and the peak resident memory of the process are reported.
+
+NOTE: When dataset is pulled from Socrata as csv, the numbers come with thousands separator commas. These will cause
+issues unless removed before processing. In Excel, change the column type to Numbers with no thousand separators or
+replace them programmatically. This does not apply to the parquet datasets.
 
 """
 
@@ -19,7 +28,13 @@ them programmatically.
 def main():
 
     # IMPORTS
+    from collections import namedtuple
+    from concurrent.futures import ThreadPoolExecutor
+    import os
     import pandas as pd
+    import RenameEngine_Class
+    import sys
+    import time
 
     # VARIABLES
     cols_to_change_datasetlevel = ["Name", "FC_ID", "ROW_ID"]
@@ -28,128 +43,124 @@ def main():
     godi_field_output_csv = r"GODI_fields_cleaned_output.csv"
     godi_results_dataset_level_csv = r"GODI_datasets_results_cleaned.csv"
     godi_results_field_level_csv = r"GODI_fields_results_cleaned.csv"
-    replace_dict = {'SOCI_SportVenues_Archery': 'SOCI_Archery_MDSports',
-                    'SOCI_SportVenues_AutoRacing': 'SOCI_AutoRacing_MDSports',
-                    'SOCI_SportVenues_BMX': 'SOCI_BMX_MDSports',
-                    'SOCI_SportVenues_Badminton': 'SOCI_Badminton_MDSports',
-                    'SOCI_SportVenues_Baseball': 'SOCI_Baseball_MDSports',
-                    'SOCI_SportVenues_Basketball': 'SOCI_Basketball_MDSports',
-                    'SOCI_SportVenues_BeachVolleyball': 'SOCI_BeachVolleyball_MDSports',
-                    'SOCI_SportVenues_Boating': 'SOCI_Boating_MDSports',
-                    'SOCI_SportVenues_Bowling': 'SOCI_Bowling_MDSports',
-                    'SOCI_SportVenues_Boxing': 'SOCI_Boxing_MDSports',
-                    'SOCI_SportVenues_Broomball': 'SOCI_Broomball_MDSports',
-                    'SOCI_SportVenues_CheerDance': 'SOCI_CheerDance_MDSports',
-                    'SOCI_SportVenues_Cricket': 'SOCI_Cricket_MDSports',
-                    'SOCI_SportVenues_CrossCountry': 'SOCI_CrossCountry_MDSports',
-                    'SOCI_SportVenues_CrossCountrySkiing': 'SOCI_CrossCountrySkiing_MDSports',
-                    'SOCI_SportVenues_Curling': 'SOCI_Curling_MDSports',
-                    'SOCI_SportVenues_Cycling': 'SOCI_Cycling_MDSports',
-                    'SOCI_SportVenues_DiscGolf': 'SOCI_DiscGolf_MDSports',
-                    'SOCI_SportVenues_Diving': 'SOCI_Diving_MDSports',
-                    'SOCI_SportVenues_DodgeBall': 'SOCI_DodgeBall_MDSports',
-                    'SOCI_SportVenues_Equestrian': 'SOCI_Equestrian_MDSports',
-                    'SOCI_SportVenues_ExtremeSports': 'SOCI_ExtremeSports_MDSports',
-                    'SOCI_SportVenues_Fencing': 'SOCI_Fencing_MDSports',
-                    'SOCI_SportVenues_FieldHockey': 'SOCI_FieldHockey_MDSports',
-                    'SOCI_SportVenues_Fishing': 'SOCI_Fishing_MDSports',
-                    'SOCI_SportVenues_FlagFootball': 'SOCI_FlagFootball_MDSports',
-                    'SOCI_SportVenues_Football': 'SOCI_Football_MDSports',
-                    'SOCI_SportVenues_Futsal': 'SOCI_Futsal_MDSports',
-                    'SOCI_SportVenues_Golf': 'SOCI_Golf_MDSports',
-                    'SOCI_SportVenues_Gymnastics': 'SOCI_Gymnastics_MDSports',
-                    'SOCI_SportVenues_HorseRacing': 'SOCI_HorseRacing_MDSports',
-                    'SOCI_SportVenues_Hunting': 'SOCI_Hunting_MDSports',
-                    'SOCI_SportVenues_IceHockey': 'SOCI_IceHockey_MDSports',
-                    'SOCI_SportVenues_IceSkating': 'SOCI_IceSkating_MDSports',
-                    'SOCI_SportVenues_IndoorSports': 'SOCI_IndoorSports_MDSports',
-                    'SOCI_SportVenues_IndoorTrack': 'SOCI_IndoorTrack_MDSports',
-                    'SOCI_SportVenues_Judo': 'SOCI_Judo_MDSports',
-                    'SOCI_SportVenues_Karate': 'SOCI_Karate_MDSports',
-                    'SOCI_SportVenues_Kayaking': 'SOCI_Kayaking_MDSports',
-                    'SOCI_SportVenues_Kickball': 'SOCI_Kickball_MDSports',
-                    'SOCI_SportVenues_Lacrosse': 'SOCI_Lacrosse_MDSports',
-                    'SOCI_SportVenues_MartialArts': 'SOCI_MartialArts_MDSports',
-                    'SOCI_SportVenues_Motorsports': 'SOCI_Motorsports_MDSports',
-                    'SOCI_SportVenues_MountainBiking': 'SOCI_MountainBiking_MDSports',
-                    'SOCI_SportVenues_Orienteering': 'SOCI_Orienteering_MDSports',
-                    'SOCI_SportVenues_Other': 'SOCI_Other_MDSports',
-                    'SOCI_SportVenues_Paintball': 'SOCI_Paintball_MDSports',
-                    'SOCI_SportVenues_Polo': 'SOCI_Polo_MDSports',
-                    'SOCI_SportVenues_Racquetball': 'SOCI_Racquetball_MDSports',
-                    'SOCI_SportVenues_Rafting': 'SOCI_Rafting_MDSports',
-                    'SOCI_SportVenues_RockClimbing': 'SOCI_RockClimbing_MDSports',
-                    'SOCI_SportVenues_Rodeo': 'SOCI_Rodeo_MDSports',
-                    'SOCI_SportVenues_RollerSports': 'SOCI_RollerSports_MDSports',
-                    'SOCI_SportVenues_RowingCrew': 'SOCI_RowingCrew_MDSports',
-                    'SOCI_SportVenues_Rugby': 'SOCI_Rugby_MDSports',
-                    'SOCI_SportVenues_RunningSports': 'SOCI_RunningSports_MDSports',
-                    'SOCI_SportVenues_Sailing': 'SOCI_Sailing_MDSports',
-                    'SOCI_SportVenues_Shooting': 'SOCI_Shooting_MDSports',
-                    'SOCI_SportVenues_Skateboarding': 'SOCI_Skateboarding_MDSports',
-                    'SOCI_SportVenues_Skiing': 'SOCI_Skiing_MDSports',
-                    'SOCI_SportVenues_Snowboarding': 'SOCI_Snowboarding_MDSports',
-                    'SOCI_SportVenues_Soccer': 'SOCI_Soccer_MDSports',
-                    'SOCI_SportVenues_Softball': 'SOCI_Softball_MDSports',
-                    'SOCI_SportVenues_SpeedSkating': 'SOCI_SpeedSkating_MDSports',
-                    'SOCI_SportVenues_Squash': 'SOCI_Squash_MDSports',
-                    'SOCI_SportVenues_Swimming': 'SOCI_Swimming_MDSports',
-                    'SOCI_SportVenues_SynchronizedSwimming': 'SOCI_SynchronizedSwimming_MDSports',
-                    'SOCI_SportVenues_TableSports': 'SOCI_TableSports_MDSports',
-                    'SOCI_SportVenues_TaeKwonDoe': 'SOCI_TaeKwonDoe_MDSports',
-                    'SOCI_SportVenues_TeamHandball': 'SOCI_TeamHandball_MDSports',
-                    'SOCI_SportVenues_Tennis': 'SOCI_Tennis_MDSports',
-                    'SOCI_SportVenues_TrackField': 'SOCI_TrackField_MDSports',
-                    'SOCI_SportVenues_Triathlon': 'SOCI_Triathlon_MDSports',
-                    'SOCI_SportVenues_UltimateFrisbee': 'SOCI_UltimateFrisbee_MDSports',
-                    'SOCI_SportVenues_Volleyball': 'SOCI_Volleyball_MDSports',
-                    'SOCI_SportVenues_WaterPolo': 'SOCI_WaterPolo_MDSports',
-                    'SOCI_SportVenues_WaterSports': 'SOCI_WaterSports_MDSports',
-                    'SOCI_SportVenues_Weightlifting': 'SOCI_Weightlifting_MDSports',
-                    'SOCI_SportVenues_Wrestling': 'SOCI_Wrestling_MDSports'}
+
+    # CONSTANTS
+    CONSTANT = namedtuple("CONSTANT", "value")
+    PARQUET_COLUMNS_DATASET_LEVEL = CONSTANT(value=None)    # OPTION: None for all, or list including columns changed
+    PARQUET_COLUMNS_FIELD_LEVEL = CONSTANT(value=None)      # OPTION: None for all, or list including columns changed
+    PARQUET_DATE_RANGE = CONSTANT(value=(None, None))       # OPTION: inclusive "YYYY-MM-DD" start and end, or None
+    PARQUET_RESULTS_ROOT_PATH = CONSTANT(value=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                            "OUTPUT_PARQUET"))
+    PROCESS_FILES_CONCURRENTLY = CONSTANT(value=True)       # OPTION: streaming mode only
+    READ_RESULTS_FROM_PARQUET = CONSTANT(value=False)       # OPTION
+    RENAME_MAPPING_FILES = CONSTANT(value=(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                        "RenameMappings_SportVenues.json"),))   # OPTION
+    STREAMING_CHUNK_SIZE = CONSTANT(value=250000)           # OPTION
+    TURN_ON_STREAMING_MODE = CONSTANT(value=False)          # OPTION: csv input only
 
     # FUNCTIONS
+    def clean_results_csv_streaming(input_csv: str, output_csv: str, column_list: list) -> tuple:
+        """
+        Rename values in a results csv file chunk by chunk, appending each chunk to the output, with bounded memory
+        :param input_csv: path to csv file of results from GODI runs
+        :param output_csv: path to the cleaned output csv file
+        :param column_list: list of column names in the results dataset that need the renames applied
+        :return: tuple of (rows processed, seconds elapsed)
+        """
+        start = time.perf_counter()
+        row_count = 0
+        with open(output_csv, "w", newline="") as output_handler:
+            for chunk_number, chunk_df in enumerate(pd.read_csv(filepath_or_buffer=input_csv,
+                                                                chunksize=STREAMING_CHUNK_SIZE.value,
+                                                                dtype=str,
+                                                                keep_default_na=False)):
+                chunk_df = replace_values(dataframe=chunk_df, column_list=column_list)
+                chunk_df.to_csv(path_or_buf=output_handler, header=(chunk_number == 0), index=False)
+                row_count += len(chunk_df)
+        return row_count, time.perf_counter() - start
+
+    def get_peak_rss_megabytes() -> float:
+        """
+        Get the peak resident set size of this process, in megabytes, or None if it cannot be determined
+        :return: float megabytes or None
+        """
+        try:
+            import resource
+        except ImportError:
+            try:
+                import psutil
+                return psutil.Process().memory_info().peak_wset / 1048576.0
+            except (ImportError, AttributeError):
+                return None
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak_rss / 1048576.0 if sys.platform == "darwin" else peak_rss / 1024.0
+
+    def read_parquet_results(table_name: str, columns: list) -> pd.DataFrame:
+        """
+        Read the run date partitions of a results table from the inventory parquet output, limited to columns and dates
+        :param table_name: name of the results table directory, featureclasses or fields
+        :param columns: list of column names to read, or None for all columns
+        :return: dataframe of results with the DATE column
+        """
+        start_date, end_date = PARQUET_DATE_RANGE.value
+        filters = []
+        if start_date is not None:
+            filters.append(("DATE", ">=", start_date))
+        if end_date is not None:
+            filters.append(("DATE", "<=", end_date))
+        if columns is not None and "DATE" not in columns:
+            columns = list(columns) + ["DATE"]
+        dataframe = pd.read_parquet(path=os.path.join(PARQUET_RESULTS_ROOT_PATH.value, table_name),
+                                    engine="pyarrow",
+                                    columns=columns,
+                                    filters=filters or None)
+        dataframe["DATE"] = dataframe["DATE"].astype(str)
+        return dataframe
+
     def replace_values(dataframe: pd.DataFrame, column_list: list) -> pd.DataFrame:
         """
-        Apply custom function to column series
+        Apply the rename engine to column series
         :param dataframe: dataframe from csv file of results from GODI runs
-        :param column_list: list of column names in the results dataset that need the function applied
+        :param column_list: list of column names in the results dataset that need the renames applied
         :return: dataframe with cleaned values
         """
         for column in column_list:
-            dataframe[column] = dataframe[column].apply(func=revise_names)
+            dataframe[column] = rename_engine.rename_series(series=dataframe[column])
         return dataframe
 
-    def revise_names(godi_value: str) -> str:
-        """
-        Replace sought value with sustitute, focusing on sportvenues at time of design.
-        :param godi_value: str data value from columns series
-        :return: string
-        """
-        if "sportvenues" in godi_value.lower():
-            pass
-        else:
-            return godi_value
-
-        for key, value in replace_dict.items():
-            if key in godi_value:
-                result = godi_value.replace(key, value)
-                # print(f"\tREVISED: {result}")
-                return result
-            else:
-                continue
+    # FUNCTIONALITY
+    rename_engine = RenameEngine_Class.RenameEngine.from_mapping_files(file_paths=RENAME_MAPPING_FILES.value)
 
-        return godi_value
+    if TURN_ON_STREAMING_MODE.value and not READ_RESULTS_FROM_PARQUET.value:
+        streaming_jobs = [(godi_results_dataset_level_csv, godi_dataset_output_csv, cols_to_change_datasetlevel),
+                          (godi_results_field_level_csv, godi_field_output_csv, cols_to_change_fieldlevel)]
+        worker_count = len(streaming_jobs) if PROCESS_FILES_CONCURRENTLY.value else 1
+        with ThreadPoolExecutor(max_workers=worker_count) as executor:
+            futures = [executor.submit(clean_results_csv_streaming, *job) for job in streaming_jobs]
+            for (input_csv, output_csv, column_list), future in zip(streaming_jobs, futures):
+                row_count, seconds = future.result()
+                print("{}: {:,} rows in {:.1f} seconds ({:,.0f} rows/sec)".format(
+                    input_csv, row_count, seconds, row_count / seconds if seconds > 0 else 0.0))
+        peak_rss_megabytes = get_peak_rss_megabytes()
+        print("Peak RSS: {}".format("unavailable" if peak_rss_megabytes is None else
+                                    "{:,.1f} MB".format(peak_rss_megabytes)))
+        return
 
-    # FUNCTIONALITY
     # GODI Dataset Level
-    df_datasets_level = pd.read_csv(filepath_or_buffer=godi_results_dataset_level_csv)
+    if READ_RESULTS_FROM_PARQUET.value:
+        df_datasets_level = read_parquet_results(table_name="featureclasses",
+                                                 columns=PARQUET_COLUMNS_DATASET_LEVEL.value)
+    else:
+        df_datasets_level = pd.read_csv(filepath_or_buffer=godi_results_dataset_level_csv)
     # print(df_datasets_level.info())
     df_datasets_level = replace_values(dataframe=df_datasets_level, column_list=cols_to_change_datasetlevel)
     df_datasets_level.to_csv(path_or_buf=godi_dataset_output_csv, index=False)
 
     # GODI Field Level
-    df_field_level = pd.read_csv(filepath_or_buffer=godi_results_field_level_csv)
+    if READ_RESULTS_FROM_PARQUET.value:
+        df_field_level = read_parquet_results(table_name="fields", columns=PARQUET_COLUMNS_FIELD_LEVEL.value)
+    else:
+        df_field_level = pd.read_csv(filepath_or_buffer=godi_results_field_level_csv)
     # print(df_field_level.info())
     df_field_level = replace_values(dataframe=df_field_level, column_list=cols_to_change_fieldlevel)
     df_field_level.to_csv(path_or_buf=godi_field_output_csv, index=False)
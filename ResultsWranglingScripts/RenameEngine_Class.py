@@ -0,0 +1,71 @@
+from collections import namedtuple
+import json
+import re
+
+
+class RenameEngine:
+    """
+    Rename values in GODI results columns per a mapping of old name fragments to new name fragments.
+
+    All mapping keys are compiled into one alternation regular expression so that each value is searched once, rather
+    than once per key. Rows are first filtered with a vectorized contains, which is the cost paid by the many rows
+    needing no change, and only the distinct values of the matching rows are rewritten, since names repeat across runs.
+    A value is renamed as by the original loop over the replacement dictionary: the first key in mapping order found in
+    the value is replaced, every occurrence of it, and no other key is, so list a longer key before a key it contains
+    if the longer key should win. Mappings are json objects of old to new values, one file per rename campaign.
+    """
+    Variable = namedtuple("Variable", "value")
+    MAPPING_FILE_ENCODING = Variable(value="utf-8")
+
+    def __init__(self, mappings):
+        self.mappings = dict(mappings)
+        self.pattern_string = "|".join(map(re.escape, self.mappings))
+        self.pattern = re.compile(self.pattern_string) if self.mappings else None
+
+    def rename_series(self, series):
+        """
+        Rename the values of a pandas series of strings and return a new series. Missing values are left as is.
+
+        :param series: pandas Series of string values
+        :return: pandas Series with renamed values
+        """
+        if self.pattern is None or len(series) == 0:
+            return series
+        mask = series.str.contains(self.pattern_string, regex=True, na=False)
+        if not mask.any():
+            return series
+        matched_series = series[mask]
+        renamed_values = {value: self.rename_value(value=value) for value in matched_series.unique()}
+        renamed_series = series.copy()
+        renamed_series[mask] = matched_series.map(renamed_values)
+        return renamed_series
+
+    def rename_value(self, value):
+        """
+        Rename a single string value and return string.
+
+        :param value: string value
+        :return: string value with the first mapping key found replaced
+        """
+        if self.pattern is None or self.pattern.search(value) is None:
+            return value
+        for key, replacement in self.mappings.items():
+            if key in value:
+                return value.replace(key, replacement)
+        return value
+
+    @staticmethod
+    def from_mapping_files(file_paths):
+        """
+        Create a RenameEngine from one or more json mapping files, in order, and return the engine.
+
+        A key repeated in a later file takes the replacement from the later file but keeps its original position.
+
+        :param file_paths: iterable of paths to json files of old value to new value
+        :return: RenameEngine
+        """
+        mappings = {}
+        for file_path in file_paths:
+            with open(file_path, "r", encoding=RenameEngine.MAPPING_FILE_ENCODING.value) as handler:
+                mappings.update(json.load(handler))
+        return RenameEngine(mappings=mappings)
@@ -0,0 +1,174 @@
+from collections import namedtuple
+from contextlib import contextmanager
+import json
+import threading
+import time
+
+
+class StageTimer:
+    """
+    Time the stages of the inventory process as spans and hold the spans in memory.
+
+    A span records the stage name, the start time, the duration in seconds and any attributes provided, such as rows
+    scanned or bytes written, plus the context of the timer, such as the feature dataset and feature class names. The
+    span context manager yields the attributes dictionary so that counts known only at the end of the stage can be
+    added. Spans are plain dictionaries so that timers filled in worker processes can be returned to the main process.
+    Spans may be added from several threads, such as the Socrata publishing threads, so adding is done under a lock.
+    """
+
+    def __init__(self, **context):
+        self.context = context
+        self.span_lock = threading.Lock()
+        self.spans = []
+
+    def add_span(self, span):
+        """
+        Keep a completed span but return nothing.
+
+        :param span: dictionary of span values
+        :return: None
+        """
+        with self.span_lock:
+            self.spans.append(span)
+        return
+
+    @contextmanager
+    def span(self, stage, **attributes):
+        """
+        Time the enclosed block as a span of the named stage, yielding the dictionary of span attributes.
+
+        The span is kept even if the block raises an exception, with the error recorded.
+        :param stage: stage name
+        :param attributes: attributes of the span
+        :return: generator yielding the attributes dictionary
+        """
+        started = time.time()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield attributes
+        except Exception as e:
+            error = "{}".format(e)
+            raise
+        finally:
+            span = dict(self.context)
+            span.update(attributes)
+            span.update({"stage": stage, "started": started, "duration_seconds": time.perf_counter() - start})
+            if error is not None:
+                span["error"] = error
+            self.add_span(span=span)
+
+
+class RunMetricsRecorder(StageTimer):
+    """
+    Write the timing spans of a run to a json lines metrics file and summarize the run at the end.
+
+    Each span is written as one json line when it completes, tagged with the run id, so the file may hold many runs.
+    Spans timed elsewhere, for example by the StageTimer of a feature class inspection in a worker process, are added
+    with add_spans. Durations are totaled per stage, summed across worker processes, and the feature classes are ranked
+    by inspection duration for the summary. Values measured outside of spans, such as connection counts, are added
+    to the summary as named sections.
+    """
+    Variable = namedtuple("Variable", "value")
+    FEATURE_CLASS_STAGE = Variable(value="inspect_feature_class")
+    SUMMARY_STAGE = Variable(value="run_summary")
+
+    def __init__(self, metrics_file_path, run_id):
+        super().__init__(run_id=run_id)
+        self.feature_class_durations = {}
+        self.metrics_file_handler = open(metrics_file_path, "a")
+        self.run_start = time.perf_counter()
+        self.stage_totals = {}
+        self.summary_sections = {}
+
+    def add_span(self, span):
+        """
+        Write a completed span to the metrics file and total it but return nothing.
+
+        :param span: dictionary of span values
+        :return: None
+        """
+        span.setdefault("run_id", self.context["run_id"])
+        with self.span_lock:
+            self.metrics_file_handler.write(json.dumps(span, default=str) + "\n")
+            stage_total = self.stage_totals.setdefault(span["stage"], {"count": 0, "duration_seconds": 0.0,
+                                                                       "rows_scanned": 0, "bytes_written": 0})
+            stage_total["count"] += 1
+            stage_total["duration_seconds"] += span["duration_seconds"]
+            stage_total["rows_scanned"] += span.get("rows_scanned") or 0
+            stage_total["bytes_written"] += span.get("bytes_written") or 0
+            if span["stage"] == RunMetricsRecorder.FEATURE_CLASS_STAGE.value:
+                self.feature_class_durations[span.get("feature_class")] = span["duration_seconds"]
+        return
+
+    def add_summary_section(self, section_name, values):
+        """
+        Add a named section of values to the run summary but return nothing.
+
+        :param section_name: name of the section
+        :param values: dictionary of value name to value
+        :return: None
+        """
+        self.summary_sections[section_name] = dict(values)
+        return
+
+    def add_spans(self, spans):
+        """
+        Write and total spans timed elsewhere but return nothing.
+
+        :param spans: iterable of span dictionaries
+        :return: None
+        """
+        for span in spans:
+            self.add_span(span=dict(span))
+        return
+
+    def close(self):
+        """
+        Close the metrics file but return nothing.
+
+        :return: None
+        """
+        self.metrics_file_handler.close()
+        return
+
+    def summarize(self, slowest_count=10):
+        """
+        Write the run summary span and return the list of summary lines for logging.
+
+        :param slowest_count: number of slowest feature classes to list
+        :return: list of strings
+        """
+        run_seconds = time.perf_counter() - self.run_start
+        slowest_feature_classes = sorted(self.feature_class_durations.items(), key=lambda item: item[1],
+                                         reverse=True)[:slowest_count]
+        summary_span = {"run_id": self.context["run_id"],
+                        "stage": RunMetricsRecorder.SUMMARY_STAGE.value,
+                        "started": time.time() - run_seconds,
+                        "duration_seconds": run_seconds,
+                        "stage_totals": self.stage_totals,
+                        "slowest_feature_classes": slowest_feature_classes,
+                        "sections": self.summary_sections}
+        self.metrics_file_handler.write(json.dumps(summary_span, default=str) + "\n")
+        self.metrics_file_handler.flush()
+
+        summary_lines = ["Run time: {:.1f} seconds".format(run_seconds), "Time per stage (summed across workers and threads):"]
+        for stage, stage_total in sorted(self.stage_totals.items(), key=lambda item: item[1]["duration_seconds"],
+                                         reverse=True):
+            line = "\t{}: {:.1f} seconds, {} spans, {:.3f} seconds mean".format(
+                stage, stage_total["duration_seconds"], stage_total["count"],
+                stage_total["duration_seconds"] / stage_total["count"])
+            if stage_total["rows_scanned"] > 0:
+                line += ", {:,} rows scanned ({:,.0f} rows/sec)".format(
+                    stage_total["rows_scanned"],
+                    stage_total["rows_scanned"] / max(stage_total["duration_seconds"], 1e-9))
+            if stage_total["bytes_written"] > 0:
+                line += ", {:,} bytes written".format(stage_total["bytes_written"])
+            summary_lines.append(line)
+        summary_lines.append("Slowest feature classes:")
+        for feature_class, duration_seconds in slowest_feature_classes:
+            summary_lines.append("\t{}: {:.1f} seconds".format(feature_class, duration_seconds))
+        for section_name, values in self.summary_sections.items():
+            summary_lines.append("{}: {}".format(section_name, ", ".join(
+                "{} {}".format(value_name, value) for value_name, value in values.items())))
+        return summary_lines
@@ -0,0 +1,127 @@
+from collections import namedtuple
+from contextlib import closing
+import ProfileAccumulator_Class
+
+SQLDialect = namedtuple("SQLDialect", "blank_test character_length identifier_quote")
+
+
+class SQLPushdownProfilingEngine:
+    """
+    Profile a feature class table in the database, with one aggregate SQL query, for null/empty value counts and max
+    character length.
+
+    The cursor path moves every record over the wire to be evaluated in python. This engine instead sends one SELECT
+    of aggregates per table through a DB-API connection: a count of records, a count of null values for every column,
+    plus a count of empty or whitespace values and the max character length for string columns. Only the one result
+    row returns. The counts are added to a FieldProfileAccumulator per field, so the attributes after profiling match
+    those of ColumnarProfilingEngine, including the database flag value for counts that were never evaluated, and
+    the results are interchangeable.
+    Dialects cover the SQL that differs between databases. SQL Server LEN ignores trailing spaces, so spaces are
+    replaced before the length is taken. Oracle stores empty strings as null, so a blank value trims to null. SQLite
+    trims the ascii whitespace characters that python str.strip removes; the other dialects trim spaces only, so a
+    value of only tabs or line breaks is counted as a value rather than as blank, unlike the cursor path.
+    """
+    Variable = namedtuple("Variable", "value")
+    DIALECTS = Variable(value={
+        "oracle": SQLDialect(blank_test="TRIM({column}) IS NULL",
+                             character_length="LENGTH({column})",
+                             identifier_quote='"{}"'),
+        "postgresql": SQLDialect(blank_test="TRIM({column}) = ''",
+                                 character_length="CHAR_LENGTH({column})",
+                                 identifier_quote='"{}"'),
+        "sqlite": SQLDialect(blank_test="TRIM({column}, ' ' || CHAR(9, 10, 11, 12, 13)) = ''",
+                             character_length="LENGTH({column})",
+                             identifier_quote='"{}"'),
+        "sqlserver": SQLDialect(blank_test="LTRIM(RTRIM({column})) = ''",
+                                character_length="LEN(REPLACE({column}, ' ', '.'))",
+                                identifier_quote="[{}]"),
+    })
+
+    def __init__(self, dialect_name, field_names, string_field_names, database_flag, column_names=None):
+        string_field_names = set(string_field_names)
+        self.column_names = tuple(column_names or field_names)
+        self.database_flag = database_flag
+        self.dialect = SQLPushdownProfilingEngine.DIALECTS.value[dialect_name]
+        self.dialect_name = dialect_name
+        self.field_accumulators = tuple(
+            ProfileAccumulator_Class.FieldProfileAccumulator(field_name=name, is_string=name in string_field_names)
+            for name in field_names)
+        self.field_names = tuple(field_names)
+        self.records_processed = 0
+        self.string_column_flags = tuple(name in string_field_names for name in self.field_names)
+
+    @property
+    def max_char_lengths(self):
+        """Dictionary of string field name to max character length, or the database flag value"""
+        return {accumulator.field_name: accumulator.get_max_char_length(database_flag=self.database_flag)
+                for accumulator in self.field_accumulators if accumulator.is_string}
+
+    @property
+    def null_counts(self):
+        """Dictionary of field name to null/empty value count, or the database flag value"""
+        return {accumulator.field_name: accumulator.get_null_count(database_flag=self.database_flag)
+                for accumulator in self.field_accumulators}
+
+    def build_statement(self, table_name_parts):
+        """
+        Build the aggregate SELECT statement profiling every column of a table and return string.
+
+        The select list is the record count, then per column the null count and, for string columns, the max
+        character length.
+        :param table_name_parts: parts of the qualified table name, for example (database, owner, table), unquoted
+        :return: SQL statement string
+        """
+        select_list = ["COUNT(*)"]
+        for column_name, is_string_column in zip(self.column_names, self.string_column_flags):
+            column = self.quote_identifier(name=column_name)
+            null_test = "{} IS NULL".format(column)
+            if is_string_column:
+                null_test += " OR {}".format(self.dialect.blank_test.format(column=column))
+            select_list.append("SUM(CASE WHEN {} THEN 1 ELSE 0 END)".format(null_test))
+            if is_string_column:
+                select_list.append("MAX({})".format(self.dialect.character_length.format(column=column)))
+        table_reference = ".".join(self.quote_identifier(name=part) for part in table_name_parts)
+        return "SELECT {} FROM {}".format(", ".join(select_list), table_reference)
+
+    def get_field_profile_records(self):
+        """
+        Get the profile of each field for output and return dictionary of field name to FieldProfileRecord.
+
+        :return: dictionary of field name to FieldProfileRecord, in field order
+        """
+        return {accumulator.field_name: accumulator.to_record(database_flag=self.database_flag)
+                for accumulator in self.field_accumulators}
+
+    def profile_table(self, connection, table_name_parts):
+        """
+        Run the aggregate statement for a table and accumulate null counts and max character lengths but return
+        nothing.
+
+        :param connection: DB-API connection to the database holding the table
+        :param table_name_parts: parts of the qualified table name, unquoted
+        :return: None
+        """
+        with closing(connection.cursor()) as cursor:
+            cursor.execute(self.build_statement(table_name_parts=table_name_parts))
+            result_row = cursor.fetchone()
+        record_count = int(result_row[0])
+        if record_count == 0:
+            return
+        self.records_processed = record_count
+        result_values = iter(result_row[1:])
+        for accumulator in self.field_accumulators:
+            null_count = int(next(result_values))
+            max_length = next(result_values) if accumulator.is_string else None
+            accumulator.add_counts(record_count=record_count, null_count=null_count,
+                                   max_char_length=None if max_length is None else int(max_length))
+        return
+
+    def quote_identifier(self, name):
+        """
+        Quote a table or column name in the quoting of the dialect and return string.
+
+        :param name: table or column name
+        :return: quoted name
+        """
+        closing_quote = self.dialect.identifier_quote[-1]
+        return self.dialect.identifier_quote.format(name.replace(closing_quote, closing_quote * 2))
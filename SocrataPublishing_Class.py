@@ -0,0 +1,411 @@
+from collections import namedtuple
+from UtilityClass import UtilityClassFunctionality as myutil
+import json
+import queue
+import threading
+import time
+
+
+class SocrataUpsertBatcher:
+    """
+    Collect record dictionaries destined for a single Socrata dataset and upsert them in batches.
+
+    Upserting one record per http call was the dominant cost of a run against a large geodatabase. Records are held
+    until the count limit or the approximate json payload size limit is reached, and then sent in one call. If a batch
+    upsert fails, or Socrata reports errors for rows in the batch, each record in the batch is retried individually so
+    that one bad record does not sink the entire batch. Upserts are keyed on ROW_ID so re-sending a record is harmless.
+    Records that fail individually are retained, with the exception, for reporting at the end of the run.
+    The client is anything with a sodapy style upsert(dataset_identifier, payload, content_type) method.
+    If a stage timer is provided each flush is timed as a socrata_upsert span, the duration being the upsert latency.
+    If a published callback is provided it is called with the dataset identifier and the list of records published
+    after each successful upsert, for example to journal the published rows.
+    Counts and failed records are updated under a lock so that batches may be upserted from other threads.
+    """
+    Variable = namedtuple("Variable", "value")
+    DEFAULT_MAX_BYTES = Variable(value=5000000)
+    DEFAULT_MAX_RECORDS = Variable(value=1000)
+    FAILED_RECORD_REPORT_LIMIT = Variable(value=100)
+    ROW_ID_KEY = Variable(value="ROW_ID")
+    UPSERT_STAGE = Variable(value="socrata_upsert")
+    FailedRecord = namedtuple("FailedRecord", "dataset_identifier record exception")
+
+    def __init__(self, client, dataset_identifier, max_records=DEFAULT_MAX_RECORDS.value,
+                 max_bytes=DEFAULT_MAX_BYTES.value, stage_timer=None, published_callback=None):
+        self.batch_count = 0
+        self.client = client
+        self.counter_lock = threading.Lock()
+        self.dataset_identifier = dataset_identifier
+        self.failed_records = []
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self.pending_bytes = 0
+        self.pending_records = []
+        self.published_callback = published_callback
+        self.stage_timer = stage_timer
+        self.upsert_call_count = 0
+        self.upserted_record_count = 0
+
+    def add(self, record):
+        """
+        Add a record dictionary to the pending batch and flush the batch when a limit is reached but return nothing.
+
+        :param record: dictionary of zipped results (headers and data values)
+        :return: None
+        """
+        self.pending_records.append(record)
+        self.pending_bytes += len(json.dumps(record))
+        if len(self.pending_records) >= self.max_records or self.pending_bytes >= self.max_bytes:
+            self.flush()
+        return
+
+    def close(self):
+        """
+        Flush any pending records and report the failed records but return nothing.
+
+        :return: None
+        """
+        self.flush()
+        self.report_failed_records()
+        return
+
+    def flush(self):
+        """
+        Upsert all pending records as one batch, timed if a stage timer was provided, but return nothing.
+
+        :return: None
+        """
+        if len(self.pending_records) == 0:
+            return
+        batch = self.pending_records
+        batch_bytes = self.pending_bytes
+        self.pending_records = []
+        self.pending_bytes = 0
+        self.batch_count += 1
+        self.upsert_timed_batch(batch=batch, batch_bytes=batch_bytes, client=self.client)
+        return
+
+    def report_failed_records(self):
+        """
+        Log the count of failed records and list them, by row id, up to the report limit but return nothing.
+
+        :return: None
+        """
+        if len(self.failed_records) == 0:
+            return
+        myutil.print_and_log(message="Socrata upsert failures for {}: {} records".format(
+            self.dataset_identifier, len(self.failed_records)), log_level=myutil.WARNING_LEVEL)
+        for failed_record in self.failed_records[:SocrataUpsertBatcher.FAILED_RECORD_REPORT_LIMIT.value]:
+            myutil.print_and_log(message="\tFailed record {}: {}".format(
+                failed_record.record.get(SocrataUpsertBatcher.ROW_ID_KEY.value), failed_record.exception),
+                log_level=myutil.WARNING_LEVEL)
+        if len(self.failed_records) > SocrataUpsertBatcher.FAILED_RECORD_REPORT_LIMIT.value:
+            myutil.print_and_log(message="\t... and {} more failed records".format(
+                len(self.failed_records) - SocrataUpsertBatcher.FAILED_RECORD_REPORT_LIMIT.value),
+                log_level=myutil.WARNING_LEVEL)
+        return
+
+    def upsert_batch(self, batch, client):
+        """
+        Upsert a batch of records in one call, retrying records individually if the batch fails, but return nothing.
+
+        :param batch: list of record dictionaries
+        :param client: Socrata connection client
+        :return: None
+        """
+        with self.counter_lock:
+            self.upsert_call_count += 1
+        try:
+            response = myutil.upsert_to_socrata(client=client,
+                                                dataset_identifier=self.dataset_identifier,
+                                                zipper=batch)
+            if SocrataUpsertBatcher.count_response_errors(response=response) > 0:
+                raise ValueError("Socrata reported row errors in batch: {}".format(response))
+        except Exception as e:
+            myutil.print_and_log(message="Batch upsert to Socrata failed, retrying {} records individually: {}. {}".format(
+                len(batch), self.dataset_identifier, e), log_level=myutil.WARNING_LEVEL)
+            for record in batch:
+                self.retry_record(record=record, client=client)
+        else:
+            with self.counter_lock:
+                self.upserted_record_count += len(batch)
+            if self.published_callback is not None:
+                self.published_callback(self.dataset_identifier, batch)
+            myutil.print_and_log(message="Upserted batch of {} records: {}".format(len(batch), self.dataset_identifier),
+                                 log_level=myutil.INFO_LEVEL)
+        return
+
+    def retry_record(self, record, client):
+        """
+        Upsert a single record and retain it as a failed record if the upsert fails but return nothing.
+
+        :param record: dictionary of zipped results (headers and data values)
+        :param client: Socrata connection client
+        :return: None
+        """
+        with self.counter_lock:
+            self.upsert_call_count += 1
+        try:
+            response = myutil.upsert_to_socrata(client=client,
+                                                dataset_identifier=self.dataset_identifier,
+                                                zipper=[record])
+            if SocrataUpsertBatcher.count_response_errors(response=response) > 0:
+                raise ValueError("Socrata reported row error: {}".format(response))
+        except Exception as e:
+            self.retain_failed_records(records=[record], exception=e)
+        else:
+            with self.counter_lock:
+                self.upserted_record_count += 1
+            if self.published_callback is not None:
+                self.published_callback(self.dataset_identifier, [record])
+        return
+
+    def retain_failed_records(self, records, exception):
+        """
+        Retain records that could not be upserted, with the exception, for reporting but return nothing.
+
+        :param records: list of record dictionaries
+        :param exception: exception raised for the records
+        :return: None
+        """
+        with self.counter_lock:
+            self.failed_records.extend(SocrataUpsertBatcher.FailedRecord(dataset_identifier=self.dataset_identifier,
+                                                                         record=record,
+                                                                         exception=exception)
+                                       for record in records)
+        return
+
+    def upsert_timed_batch(self, batch, batch_bytes, client):
+        """
+        Upsert a batch of records, timed as a span if a stage timer was provided, but return nothing.
+
+        :param batch: list of record dictionaries
+        :param batch_bytes: approximate json payload size of the batch
+        :param client: Socrata connection client
+        :return: None
+        """
+        if self.stage_timer is None:
+            self.upsert_batch(batch=batch, client=client)
+        else:
+            with self.stage_timer.span(stage=SocrataUpsertBatcher.UPSERT_STAGE.value,
+                                       dataset_identifier=self.dataset_identifier,
+                                       records=len(batch),
+                                       payload_bytes=batch_bytes):
+                self.upsert_batch(batch=batch, client=client)
+        return
+
+    @staticmethod
+    def count_response_errors(response):
+        """
+        Inspect the Socrata upsert response for the reported row error count and return integer.
+
+        sodapy returns the parsed json response, which for an upsert contains an 'Errors' count. Any other response
+        type is treated as error free.
+        :param response: value returned by the client upsert
+        :return: integer count of row errors reported
+        """
+        if isinstance(response, dict):
+            try:
+                return int(response.get("Errors", 0))
+            except (TypeError, ValueError):
+                return 0
+        return 0
+
+
+class BackgroundSocrataUpsertBatcher(SocrataUpsertBatcher):
+    """
+    Collect records into batches as SocrataUpsertBatcher does but upsert the batches in background threads.
+
+    Each upsert otherwise blocks the process that scans the geodatabase, so network latency adds directly to the run
+    time. Full batches are put on a bounded queue and upserted by concurrency worker threads while the scan continues.
+    When the queue is full, adding a batch waits for a worker to take one, so memory stays bounded when Socrata is
+    slower than the scan; the time spent waiting is totaled. Each worker gets its own client from client_factory, as a
+    client session is not shared between threads; clients are closed by their creator, such as a SocrataClientPool,
+    which may share connections between them. With more than one worker, batches
+    may be upserted out of order, which is harmless as upserts are keyed on ROW_ID. Closing the batcher drains the
+    queue, waits for the workers and reports the failed records.
+    """
+    Variable = namedtuple("Variable", "value")
+    DEFAULT_CONCURRENCY = Variable(value=1)
+    DEFAULT_QUEUE_SIZE = Variable(value=8)
+
+    def __init__(self, client_factory, dataset_identifier, concurrency=DEFAULT_CONCURRENCY.value,
+                 queue_size=DEFAULT_QUEUE_SIZE.value, max_records=SocrataUpsertBatcher.DEFAULT_MAX_RECORDS.value,
+                 max_bytes=SocrataUpsertBatcher.DEFAULT_MAX_BYTES.value, stage_timer=None, published_callback=None):
+        super().__init__(client=None, dataset_identifier=dataset_identifier, max_records=max_records,
+                         max_bytes=max_bytes, stage_timer=stage_timer, published_callback=published_callback)
+        self.batch_queue = queue.Queue(maxsize=queue_size)
+        self.client_factory = client_factory
+        self.queue_wait_seconds = 0.0
+        self.workers = [threading.Thread(target=self.run_worker,
+                                         name="SocrataUpsert-{}-{}".format(dataset_identifier, number),
+                                         daemon=True)
+                        for number in range(max(1, concurrency))]
+        for worker in self.workers:
+            worker.start()
+
+    def close(self):
+        """
+        Queue any pending records, drain the queue, stop the workers and report the failed records but return nothing.
+
+        :return: None
+        """
+        self.flush()
+        for worker in self.workers:
+            self.batch_queue.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+        if self.queue_wait_seconds > 0:
+            myutil.print_and_log(message="Socrata publishing of {} waited {:.1f} seconds for a full queue".format(
+                self.dataset_identifier, self.queue_wait_seconds), log_level=myutil.INFO_LEVEL)
+        self.report_failed_records()
+        return
+
+    def flush(self):
+        """
+        Put all pending records on the queue as one batch, waiting while the queue is full, but return nothing.
+
+        :return: None
+        """
+        if len(self.pending_records) == 0:
+            return
+        batch = self.pending_records
+        batch_bytes = self.pending_bytes
+        self.pending_records = []
+        self.pending_bytes = 0
+        self.batch_count += 1
+        start = time.perf_counter()
+        self.batch_queue.put((batch, batch_bytes))
+        self.queue_wait_seconds += time.perf_counter() - start
+        return
+
+    def run_worker(self):
+        """
+        Upsert batches from the queue until the stop marker is taken, with a client of this thread, but return nothing.
+
+        If the client cannot be created the batches taken by this worker are retained as failed records, so that the
+        queue is still drained.
+        :return: None
+        """
+        client = None
+        client_exception = None
+        try:
+            client = self.client_factory()
+        except Exception as e:
+            client_exception = e
+            myutil.print_and_log(message="Problem creating Socrata client for {}. {}".format(
+                self.dataset_identifier, e), log_level=myutil.ERROR_LEVEL)
+        while True:
+            queue_item = self.batch_queue.get()
+            try:
+                if queue_item is None:
+                    return
+                batch, batch_bytes = queue_item
+                if client is None:
+                    self.retain_failed_records(records=batch, exception=client_exception)
+                else:
+                    self.upsert_timed_batch(batch=batch, batch_bytes=batch_bytes, client=client)
+            finally:
+                self.batch_queue.task_done()
+
+
+class SocrataClientPool:
+    """
+    Create the Socrata clients of a run so that they share one pool of keep-alive connections and retry with backoff.
+
+    A sodapy client opens its own requests session, and with it new TCP and TLS connections. The pool mounts a single
+    requests HTTPAdapter on the session of every client it creates, so connections to the Socrata domain are kept
+    alive and reused by all clients for the length of the run, whatever the app token of the client. pool_size is the
+    number of connections kept open and should be at least the number of threads upserting at once. The adapter
+    retries connection errors, read timeouts and the throttling and server error statuses, waiting backoff_seconds
+    doubled on each retry, rather than relying on one long timeout; upserts are keyed on ROW_ID so a retried upsert is
+    harmless. Clients are closed by closing the pool, as closing a client session would close the shared adapter.
+    Connection counts are read from the urllib3 connection pools of the adapter for the run summary.
+    """
+    Variable = namedtuple("Variable", "value")
+    DEFAULT_BACKOFF_SECONDS = Variable(value=2.0)
+    DEFAULT_POOL_SIZE = Variable(value=8)
+    DEFAULT_RETRY_COUNT = Variable(value=3)
+    DEFAULT_TIMEOUT_SECONDS = Variable(value=10)
+    RETRY_STATUS_CODES = Variable(value=(429, 500, 502, 503, 504))
+
+    def __init__(self, maryland_domain, username, password, pool_size=DEFAULT_POOL_SIZE.value,
+                 retry_count=DEFAULT_RETRY_COUNT.value, backoff_seconds=DEFAULT_BACKOFF_SECONDS.value,
+                 timeout=DEFAULT_TIMEOUT_SECONDS.value, uri_prefix="https://"):
+        from requests.adapters import HTTPAdapter
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                                   max_retries=SocrataClientPool.build_retry(retry_count=retry_count,
+                                                                             backoff_seconds=backoff_seconds))
+        self.clients = []
+        self.clients_lock = threading.Lock()
+        self.maryland_domain = maryland_domain
+        self.password = password
+        self.timeout = timeout
+        self.uri_prefix = uri_prefix
+        self.username = username
+
+    def close(self):
+        """
+        Close the sessions of all clients created and the shared connections but return nothing.
+
+        :return: None
+        """
+        with self.clients_lock:
+            for client in self.clients:
+                client.close()
+            self.clients = []
+        self.adapter.close()
+        return
+
+    def create_client(self, app_token):
+        """
+        Create a sodapy Socrata client that uses the shared connections of the pool and return it.
+
+        :param app_token: token created in socrata for api access
+        :return: Socrata connection client
+        """
+        from sodapy import Socrata
+        client = Socrata(domain=self.maryland_domain, app_token=app_token, username=self.username,
+                         password=self.password, timeout=self.timeout,
+                         session_adapter={"prefix": self.uri_prefix, "adapter": self.adapter})
+        with self.clients_lock:
+            self.clients.append(client)
+        return client
+
+    def get_connection_statistics(self):
+        """
+        Count the clients created, connections opened and http requests sent through the pool and return dictionary.
+
+        Requests include retries. The reuse percent is the share of requests sent on an already open connection.
+        :return: dictionary of statistic name to value
+        """
+        connection_pools = self.adapter.poolmanager.pools
+        connection_pools_list = [connection_pools[key] for key in connection_pools.keys()]
+        connections_opened = sum(connection_pool.num_connections for connection_pool in connection_pools_list)
+        requests_sent = sum(connection_pool.num_requests for connection_pool in connection_pools_list)
+        requests_reusing_connection = max(requests_sent - connections_opened, 0)
+        return {"clients_created": len(self.clients),
+                "connections_opened": connections_opened,
+                "requests_sent": requests_sent,
+                "connection_reuse_percent": myutil.calculate_percent(numerator=requests_reusing_connection,
+                                                                     denominator=requests_sent)}
+
+    @staticmethod
+    def build_retry(retry_count, backoff_seconds):
+        """
+        Build the urllib3 retry policy for upserts and return it.
+
+        POST is not retried by default, so it is allowed explicitly. The keyword was renamed in urllib3 1.26.
+        :param retry_count: number of retries of a request
+        :param backoff_seconds: wait before the first retry, doubled on each further retry
+        :return: urllib3 Retry
+        """
+        from urllib3.util.retry import Retry
+        retry_arguments = {"total": retry_count,
+                           "backoff_factor": backoff_seconds,
+                           "status_forcelist": SocrataClientPool.RETRY_STATUS_CODES.value,
+                           "raise_on_status": False}
+        try:
+            return Retry(allowed_methods=frozenset(("POST",)), **retry_arguments)
+        except TypeError:
+            return Retry(method_whitelist=frozenset(("POST",)), **retry_arguments)
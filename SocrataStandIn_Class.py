@@ -0,0 +1,141 @@
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+import json
+import random
+import re
+import threading
+import time
+
+
+class SocrataStandInServer:
+    """
+    Stand in for the Socrata upsert endpoint on a local http server, injecting latency and errors, for testing.
+
+    The server accepts the POST /resource/<dataset identifier>.json requests that the sodapy upsert sends, waits the
+    latency plus a random jitter, and then either fails the request with an http 500, reports a row error in the
+    upsert response, as Socrata does for a bad record, or accepts the records. The outcome is drawn from the seed and
+    the first ROW_ID of the payload, so the same payload meets the same outcome whatever the order or concurrency of
+    the requests, which keeps runs comparable. Server errors are transient, failing only the first attempt of a
+    payload, while row errors are permanent. The ROW_ID values of accepted records are kept per dataset so that a
+    test can check every record arrived. Requests are handled on their own threads so that concurrent uploads overlap
+    as they would against Socrata. Nothing is sent beyond the local machine.
+    """
+    Variable = namedtuple("Variable", "value")
+    HOST = Variable(value="127.0.0.1")
+    RESOURCE_PATH_PATTERN = Variable(value=re.compile(r"^/resource/(?P<dataset_identifier>[^/]+)\.json$"))
+    ROW_ID_KEY = Variable(value="ROW_ID")
+
+    def __init__(self, latency_seconds=0.1, latency_jitter_seconds=0.0, error_rate=0.0, row_error_rate=0.0, seed=0):
+        self.attempted_payloads = set()
+        self.error_rate = error_rate
+        self.failed_request_count = 0
+        self.http_server = None
+        self.latency_jitter_seconds = latency_jitter_seconds
+        self.latency_seconds = latency_seconds
+        self.lock = threading.Lock()
+        self.randomizer = random.Random(seed)
+        self.request_count = 0
+        self.row_error_rate = row_error_rate
+        self.row_ids_by_dataset = {}
+        self.seed = seed
+        self.server_thread = None
+
+    @property
+    def domain(self):
+        """
+        Host and port of the running server, in the form of a Socrata domain.
+
+        :return: string
+        """
+        return "{}:{}".format(SocrataStandInServer.HOST.value, self.http_server.server_address[1])
+
+    def handle_upsert(self, dataset_identifier, records):
+        """
+        Wait the injected latency and decide the outcome of an upsert request and return tuple.
+
+        :param dataset_identifier: Socrata dataset identifier from the request path
+        :param records: list of record dictionaries from the request body
+        :return: tuple of (http status code, response dictionary)
+        """
+        with self.lock:
+            self.request_count += 1
+            jitter = self.randomizer.uniform(0.0, self.latency_jitter_seconds)
+        first_row_id = records[0].get(SocrataStandInServer.ROW_ID_KEY.value) if records else None
+        draw = random.Random("{}|{}".format(self.seed, first_row_id)).random()
+        payload_key = (dataset_identifier, first_row_id, len(records))
+        with self.lock:
+            first_attempt = payload_key not in self.attempted_payloads
+            self.attempted_payloads.add(payload_key)
+        time.sleep(self.latency_seconds + jitter)
+        if draw < self.error_rate and first_attempt:
+            with self.lock:
+                self.failed_request_count += 1
+            return 500, {"error": True, "message": "Injected server error"}
+        if draw < self.error_rate + self.row_error_rate:
+            return 200, {"Rows Created": 0, "Rows Updated": len(records) - 1, "Rows Deleted": 0, "Errors": 1}
+        with self.lock:
+            self.row_ids_by_dataset.setdefault(dataset_identifier, set()).update(
+                record.get(SocrataStandInServer.ROW_ID_KEY.value) for record in records)
+        return 200, {"Rows Created": len(records), "Rows Updated": 0, "Rows Deleted": 0, "Errors": 0}
+
+    def reset(self):
+        """
+        Clear the counts and received row ids but return nothing.
+
+        :return: None
+        """
+        with self.lock:
+            self.attempted_payloads = set()
+            self.failed_request_count = 0
+            self.request_count = 0
+            self.row_ids_by_dataset = {}
+        return
+
+    def start(self):
+        """
+        Start the server on a free local port in a background thread and return the server.
+
+        :return: SocrataStandInServer
+        """
+        stand_in = self
+
+        class UpsertRequestHandler(BaseHTTPRequestHandler):
+
+            def do_POST(self):
+                match = SocrataStandInServer.RESOURCE_PATH_PATTERN.value.match(self.path)
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if match is None:
+                    status, response = 404, {"error": True, "message": "Not found"}
+                else:
+                    status, response = stand_in.handle_upsert(dataset_identifier=match.group("dataset_identifier"),
+                                                              records=json.loads(body.decode("utf-8")))
+                response_body = json.dumps(response).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response_body)))
+                self.end_headers()
+                self.wfile.write(response_body)
+
+            def log_message(self, format, *args):
+                return
+
+        class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+            daemon_threads = True
+
+        self.http_server = ThreadingHTTPServer((SocrataStandInServer.HOST.value, 0), UpsertRequestHandler)
+        self.server_thread = threading.Thread(target=self.http_server.serve_forever, name="SocrataStandIn",
+                                              daemon=True)
+        self.server_thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop the server and wait for its thread but return nothing.
+
+        :return: None
+        """
+        self.http_server.shutdown()
+        self.http_server.server_close()
+        self.server_thread.join()
+        return
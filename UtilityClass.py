@@ -51,6 +51,35 @@ class UtilityClassFunctionality(object):
             percent_full_float = float(numerator / denominator) * 100.0
             return round(percent_full_float, 2)
 
+    @staticmethod
+    def calculate_population_count_confidence_interval(sample_count, sample_size, population_size, z_score=1.96):
+        """
+        Calculate a confidence interval for a population count estimated from a simple random sample and return tuple
+
+        Uses the Wilson score interval for the sample proportion, narrowed by the finite population correction, and
+         scaled to the population. The bounds are clamped so that values observed in the sample are always counted.
+        :param sample_count: number of sampled records having the characteristic, for example a null value
+        :param sample_size: number of records sampled
+        :param population_size: total number of records
+        :param z_score: standard normal score for the confidence level. 1.96 for 95 percent
+        :return: tuple of integer lower bound and integer upper bound of the population count
+        """
+        import math
+        if sample_size <= 0 or population_size <= 0:
+            return (0, population_size)
+        if sample_size >= population_size:
+            return (sample_count, sample_count)
+        proportion = sample_count / sample_size
+        corrected_z = z_score * math.sqrt((population_size - sample_size) / (population_size - 1))
+        denominator = 1.0 + corrected_z ** 2 / sample_size
+        center = (proportion + corrected_z ** 2 / (2.0 * sample_size)) / denominator
+        half_width = (corrected_z * math.sqrt(proportion * (1.0 - proportion) / sample_size
+                                              + corrected_z ** 2 / (4.0 * sample_size ** 2))) / denominator
+        lower_count = max(sample_count, int(math.floor(max(0.0, center - half_width) * population_size)))
+        upper_count = min(population_size - (sample_size - sample_count),
+                          int(math.ceil(min(1.0, center + half_width) * population_size)))
+        return (lower_count, upper_count)
+
     @staticmethod
     def calculate_total_number_of_null_values_per_dataset(null_counts_list):
         """
@@ -84,7 +113,10 @@ class UtilityClassFunctionality(object):
         :param func: The ESRI geoprocessing function object
         :return: The resulting value from the tool on successful run, or exit on fail.
         """
-        from arcpy import ExecuteError, GetMessages
+        try:
+            from arcpy import ExecuteError, GetMessages
+        except ImportError:
+            ExecuteError, GetMessages = (), None  # Workspace backends without arcpy. An empty tuple catches nothing.
         def f(*args, **kwargs):
 
             try:
@@ -145,6 +177,8 @@ class UtilityClassFunctionality(object):
          put in C:\Program Files\ArcGIS\Pro\bin\Python\envs\arcgispro-py3\Lib\site-packages
         NOTE: Due to occasional timeout errors, randomly encountered during visualcron runs of the process, the
          timeout value was upped from a default of 10 seconds to a new value of 30 seconds (20180719, CJuice)
+        NOTE: The main inventory script now creates its clients with SocrataPublishing_Class.SocrataClientPool, which
+         shares keep-alive connections between clients and retries timeouts with backoff.
         :param username: socrata account username for dataset access
         :param password: socrata account password for dataset access
         :param app_token: token created in socrata for api access
@@ -301,14 +335,13 @@ class UtilityClassFunctionality(object):
     @staticmethod
     def upsert_to_socrata(client, dataset_identifier, zipper):
         """
-        Upsert data to Socrata dataset but return nothing
+        Upsert data to Socrata dataset and return the Socrata response
 
-        Python dictionary is seen as json.
+        Python dictionary is seen as json. A list of dictionaries is upserted as a batch of records.
         :param client: Socrata connection client
         :param dataset_identifier: Unique Socrata dataset identifier. Not the data page identifier but the primary page id.
-        :param zipper: dictionary of zipped results (headers and data values).
-        :return: None
+        :param zipper: dictionary of zipped results (headers and data values), or list of such dictionaries.
+        :return: response from the client upsert
         """
-        client.upsert(dataset_identifier=dataset_identifier, payload=zipper, content_type='json')
-        return
+        return client.upsert(dataset_identifier=dataset_identifier, payload=zipper, content_type='json')
 
@@ -0,0 +1,626 @@
+from collections import namedtuple
+from contextlib import closing
+import os
+import random
+import struct
+
+# Lightweight stand ins for the arcpy objects consumed by the inventory. Attribute names match arcpy.
+DomainDescription = namedtuple("DomainDescription", "name description domainType type codedValues owner range")
+FeatureClassDescription = namedtuple("FeatureClassDescription", "dataType shapeType spatialReference fields OIDFieldName")
+FieldDescription = namedtuple("FieldDescription", "name baseName aliasName type defaultValue domain isNullable length "
+                                                  "precision scale required")
+SpatialReferenceDescription = namedtuple("SpatialReferenceDescription", "name")
+
+
+class WorkspaceInterface:
+    """
+    Define the data access used by the inventory process so that the process is not bound to arcpy.
+
+    Feature datasets and feature classes are identified by their full names, as listed by the workspace, for example
+    Production.SDE.Transportation_MD_MileMarkers. The describe method returns an object with the dataType, shapeType,
+    spatialReference.name and fields attributes used from arcpy.Describe. The search_cursor method returns a context
+    manager that iterates over record tuples with values in the order of the field names provided, optionally limited
+    to the half open range of object ids (low, high) of the oid field. The get_max_value method returns the largest non
+    null value in a field, or None.
+    Geometry: the search_geometry_cursor method returns a context manager that iterates over one value tuples of the
+    geometry of each record as well known binary (WKB), or None for a null geometry, optionally limited to a range of
+    object ids as the search cursor is. It is only called for feature classes, and reads no attribute column.
+    SQL pushdown: a workspace backed by a database that can run SQL sets sql_dialect to a SQLPushdownProfilingEngine
+    dialect name, returns a DB-API connection from connect_sql, and returns the parts of the qualified table name of
+    a feature class from get_sql_table_name_parts. Other workspaces leave sql_dialect None.
+    Concurrent cursors: a workspace whose cursors may be opened and read from several threads of one process at once
+    sets concurrent_cursors True. The partitions of a partitioned scan are read concurrently only on such workspaces;
+    on others they are read one at a time.
+    Concurrent metadata calls: a workspace whose listing, existence, count and describe calls may be made from several
+    threads of one process at once sets concurrent_metadata_calls True. The metadata prefetch uses its pool of threads
+    only on such workspaces; others are prefetched with one thread.
+    Implementations must be picklable because they are sent to worker processes.
+    """
+
+    def __init__(self, environment_name, sql_dialect=None, concurrent_cursors=False, concurrent_metadata_calls=False):
+        self.concurrent_cursors = concurrent_cursors
+        self.concurrent_metadata_calls = concurrent_metadata_calls
+        self.environment_name = environment_name
+        self.sql_dialect = sql_dialect
+
+    def connect_sql(self):
+        raise NotImplementedError
+
+    def describe(self, feature_dataset, feature_class):
+        raise NotImplementedError
+
+    def exists(self, feature_dataset, feature_class):
+        raise NotImplementedError
+
+    def get_count(self, feature_dataset, feature_class):
+        raise NotImplementedError
+
+    def get_max_value(self, feature_dataset, feature_class, field_name):
+        raise NotImplementedError
+
+    def get_sql_table_name_parts(self, feature_dataset, feature_class):
+        raise NotImplementedError
+
+    def list_domains(self):
+        raise NotImplementedError
+
+    def list_feature_classes(self, feature_dataset):
+        raise NotImplementedError
+
+    def list_feature_datasets(self):
+        raise NotImplementedError
+
+    def search_cursor(self, feature_dataset, feature_class, field_names, oid_field_name=None, oid_range=None):
+        raise NotImplementedError
+
+    def search_geometry_cursor(self, feature_dataset, feature_class, oid_field_name=None, oid_range=None):
+        raise NotImplementedError
+
+    @staticmethod
+    def build_oid_range_where_clause(oid_field_name, oid_range):
+        """
+        Build a sql where clause limiting records to a half open range of object ids and return string, or None.
+
+        :param oid_field_name: name of the object id field
+        :param oid_range: tuple of (low, high) object ids, or None for all records
+        :return: where clause string or None
+        """
+        if oid_range is None:
+            return None
+        low, high = oid_range
+        return "{field} >= {low} AND {field} < {high}".format(field=oid_field_name, low=int(low), high=int(high))
+
+
+class ArcpyWorkspace(WorkspaceInterface):
+    """
+    Access an ESRI SDE geodatabase through arcpy, per the SDE connection file provided.
+
+    arcpy is imported on first use so that the object can be created, and pickled to worker processes, cheaply.
+    Feature classes are accessed by full path so that the results do not depend on arcpy.env.workspace, which is
+    process wide. For the same reason the feature classes of a feature dataset are listed by arcpy.da.Walk from the
+    feature dataset path, rather than by ListFeatureClasses, which lists within arcpy.env.workspace.
+    SQL pushdown is available when an ODBC connection string to the geodatabase database is provided, through pyodbc,
+    which is imported on first use. The feature class name, for example Production.SDE.Transportation_MD_MileMarkers,
+    is the qualified name of its business table. Queries read the business table, so the edits of a versioned feature
+    class that are not yet compressed to the base table are not seen. Concurrent arcpy cursors in one process are not
+    known to be safe, nor are concurrent arcpy describe and geoprocessing calls, so concurrent_cursors and
+    concurrent_metadata_calls are left False.
+    """
+    Variable = namedtuple("Variable", "value")
+    DEFAULT_SQL_DIALECT = Variable(value="sqlserver")
+    GEOMETRY_WKB_TOKEN = Variable(value="SHAPE@WKB")
+
+    def __init__(self, sde_file_path, sql_connection_string=None, sql_dialect=DEFAULT_SQL_DIALECT.value):
+        super().__init__(environment_name=os.path.basename(sde_file_path),
+                         sql_dialect=sql_dialect if sql_connection_string else None)
+        self.sde_file_path = sde_file_path
+        self.sql_connection_string = sql_connection_string
+
+    def build_feature_class_path(self, feature_dataset, feature_class):
+        """
+        Build the full path to a feature class within a feature dataset and return string.
+
+        :param feature_dataset: feature dataset name
+        :param feature_class: feature class name
+        :return: string path
+        """
+        return os.path.join(self.sde_file_path, feature_dataset, feature_class)
+
+    def connect_sql(self):
+        if not self.sql_connection_string:
+            raise NotImplementedError("No SQL connection string provided for the geodatabase")
+        import pyodbc
+        return pyodbc.connect(self.sql_connection_string)
+
+    def describe(self, feature_dataset, feature_class):
+        import arcpy
+        return arcpy.Describe(self.build_feature_class_path(feature_dataset, feature_class))
+
+    def exists(self, feature_dataset, feature_class):
+        import arcpy
+        return arcpy.Exists(self.build_feature_class_path(feature_dataset, feature_class))
+
+    def get_count(self, feature_dataset, feature_class):
+        import arcpy
+        feature_count_result = arcpy.GetCount_management(self.build_feature_class_path(feature_dataset, feature_class))
+        return int(feature_count_result.getOutput(0))
+
+    def get_max_value(self, feature_dataset, feature_class, field_name):
+        import arcpy
+        with arcpy.da.SearchCursor(self.build_feature_class_path(feature_dataset, feature_class),
+                                   [field_name],
+                                   where_clause="{} IS NOT NULL".format(field_name),
+                                   sql_clause=(None, "ORDER BY {} DESC".format(field_name))) as cursor:
+            for row in cursor:
+                return row[0]
+        return None
+
+    def get_sql_table_name_parts(self, feature_dataset, feature_class):
+        return tuple(feature_class.split("."))
+
+    def list_domains(self):
+        import arcpy
+        return arcpy.da.ListDomains(self.sde_file_path)
+
+    def list_feature_classes(self, feature_dataset):
+        import arcpy
+        for dirpath, dirnames, filenames in arcpy.da.Walk(os.path.join(self.sde_file_path, feature_dataset),
+                                                          datatype="FeatureClass"):
+            return list(filenames)
+        return []
+
+    def list_feature_datasets(self):
+        import arcpy
+        arcpy.env.workspace = self.sde_file_path
+        return arcpy.ListDatasets(feature_type="Feature")
+
+    def search_cursor(self, feature_dataset, feature_class, field_names, oid_field_name=None, oid_range=None):
+        import arcpy
+        return arcpy.da.SearchCursor(self.build_feature_class_path(feature_dataset, feature_class),
+                                     field_names,
+                                     where_clause=self.build_oid_range_where_clause(oid_field_name, oid_range))
+
+    def search_geometry_cursor(self, feature_dataset, feature_class, oid_field_name=None, oid_range=None):
+        import arcpy
+        return arcpy.da.SearchCursor(self.build_feature_class_path(feature_dataset, feature_class),
+                                     [ArcpyWorkspace.GEOMETRY_WKB_TOKEN.value],
+                                     where_clause=self.build_oid_range_where_clause(oid_field_name, oid_range))
+
+
+class InMemoryWorkspace(WorkspaceInterface):
+    """
+    Serve domains, feature datasets and feature classes from python objects. Intended for testing without arcpy.
+
+    feature_datasets is a dictionary of feature dataset name to a dictionary of feature class name to a tuple of
+    (FeatureClassDescription, list of record tuples). Record values are in the order of the description fields.
+    Geometries are the WKB values of the field of type Geometry. Cursors read python lists, so concurrent cursors are
+    safe, as are concurrent metadata calls.
+    """
+
+    def __init__(self, environment_name, domains, feature_datasets):
+        super().__init__(environment_name=environment_name, concurrent_cursors=True, concurrent_metadata_calls=True)
+        self.domains = list(domains)
+        self.feature_datasets = feature_datasets
+
+    def describe(self, feature_dataset, feature_class):
+        description, rows = self.feature_datasets[feature_dataset][feature_class]
+        return description._replace(fields=list(description.fields))
+
+    def exists(self, feature_dataset, feature_class):
+        return feature_class in self.feature_datasets.get(feature_dataset, {})
+
+    def get_count(self, feature_dataset, feature_class):
+        description, rows = self.feature_datasets[feature_dataset][feature_class]
+        return len(rows)
+
+    def get_max_value(self, feature_dataset, feature_class, field_name):
+        with self.search_cursor(feature_dataset, feature_class, [field_name]) as cursor:
+            return max((row[0] for row in cursor if row[0] is not None), default=None)
+
+    def list_domains(self):
+        return list(self.domains)
+
+    def list_feature_classes(self, feature_dataset):
+        return list(self.feature_datasets[feature_dataset].keys())
+
+    def list_feature_datasets(self):
+        return list(self.feature_datasets.keys())
+
+    def search_cursor(self, feature_dataset, feature_class, field_names, oid_field_name=None, oid_range=None):
+        description, rows = self.feature_datasets[feature_dataset][feature_class]
+        base_names = [field.baseName for field in description.fields]
+        indexes = [base_names.index(name) for name in field_names]
+        if oid_range is not None:
+            oid_index = base_names.index(oid_field_name)
+            low, high = oid_range
+            rows = [row for row in rows if low <= row[oid_index] < high]
+        return closing(tuple(row[index] for index in indexes) for row in rows)
+
+    def search_geometry_cursor(self, feature_dataset, feature_class, oid_field_name=None, oid_range=None):
+        description, rows = self.feature_datasets[feature_dataset][feature_class]
+        geometry_field_names = [field.baseName for field in description.fields if field.type == "Geometry"]
+        return self.search_cursor(feature_dataset, feature_class, geometry_field_names[:1],
+                                  oid_field_name=oid_field_name, oid_range=oid_range)
+
+
+class GeoPackageWorkspace(WorkspaceInterface):
+    """
+    Access a GeoPackage, or any SQLite database, through the sqlite3 standard library module.
+
+    A GeoPackage has no feature datasets so the database is presented as one feature dataset named for the file. Names
+    follow the three part naming of SDE, <file name>.GPKG.<table name>, since the inventory splits names on the dots.
+    Feature classes are the features tables of gpkg_contents, with geometry type and spatial reference from
+    gpkg_geometry_columns and gpkg_spatial_ref_sys. In a SQLite database that is not a GeoPackage every table is listed,
+    as a table. Field types are mapped from the declared column types to the arcpy field type names. GeoPackages have
+    no geodatabase domains so none are listed. A connection is opened per call, and per cursor, so that the object
+    stays picklable, and so that cursors may be read, and metadata calls made, from several threads at once. Geometries
+    are read from the geometry column with the GeoPackage binary header skipped, leaving the standard WKB.
+    """
+    Variable = namedtuple("Variable", "value")
+    ENVELOPE_SIZES = Variable(value=(0, 32, 48, 48, 64))
+    GEOPACKAGE_BINARY_HEADER_SIZE = Variable(value=8)
+    GEOPACKAGE_BINARY_MAGIC = Variable(value=b"GP")
+    NAME_QUALIFIER = Variable(value="GPKG")
+    SHAPE_TYPES = Variable(value={"POINT": "Point", "MULTIPOINT": "Multipoint", "LINESTRING": "Polyline",
+                                  "MULTILINESTRING": "Polyline", "POLYGON": "Polygon", "MULTIPOLYGON": "Polygon"})
+
+    def __init__(self, database_path):
+        super().__init__(environment_name=os.path.basename(database_path), sql_dialect="sqlite",
+                         concurrent_cursors=True, concurrent_metadata_calls=True)
+        self.database_path = database_path
+        self.dataset_prefix = os.path.splitext(os.path.basename(database_path))[0].replace(".", "_")
+
+    def build_full_name(self, name):
+        """
+        Build the three part name of a table, or of the single feature dataset, and return string.
+
+        :param name: table name, or the dataset prefix
+        :return: string name
+        """
+        return "{}.{}.{}".format(self.dataset_prefix, GeoPackageWorkspace.NAME_QUALIFIER.value, name)
+
+    def connect(self):
+        """
+        Open a connection to the database and return it.
+
+        :return: sqlite3.Connection
+        """
+        import sqlite3
+        return sqlite3.connect(self.database_path)
+
+    def connect_sql(self):
+        return self.connect()
+
+    def describe(self, feature_dataset, feature_class):
+        table_name = GeoPackageWorkspace.get_table_name(feature_class)
+        with closing(self.connect()) as connection:
+            geometry_row = None
+            if GeoPackageWorkspace.is_geopackage(connection):
+                geometry_row = connection.execute(
+                    "SELECT g.column_name, g.geometry_type_name, s.srs_name FROM gpkg_geometry_columns g "
+                    "LEFT JOIN gpkg_spatial_ref_sys s ON g.srs_id = s.srs_id WHERE g.table_name = ?",
+                    (table_name,)).fetchone()
+            columns = connection.execute("PRAGMA table_info({})".format(
+                GeoPackageWorkspace.quote_identifier(table_name))).fetchall()
+        geometry_column_name = geometry_row[0] if geometry_row else None
+        fields = []
+        oid_field_name = None
+        for column_id, name, declared_type, not_null, default_value, primary_key in columns:
+            field_type = GeoPackageWorkspace.map_field_type(declared_type=declared_type,
+                                                            is_primary_key=bool(primary_key),
+                                                            is_geometry=(name == geometry_column_name))
+            if field_type == "OID":
+                oid_field_name = name
+            fields.append(FieldDescription(name=name, baseName=name, aliasName=name, type=field_type,
+                                           defaultValue=default_value, domain="", isNullable=not not_null,
+                                           length=GeoPackageWorkspace.parse_field_length(declared_type),
+                                           precision=0, scale=0, required=bool(primary_key)))
+        if geometry_row:
+            shape_type = GeoPackageWorkspace.SHAPE_TYPES.value.get(str(geometry_row[1]).upper(), geometry_row[1])
+            spatial_reference = SpatialReferenceDescription(name=geometry_row[2] or "Unknown")
+            return FeatureClassDescription(dataType="FeatureClass", shapeType=shape_type,
+                                           spatialReference=spatial_reference, fields=fields,
+                                           OIDFieldName=oid_field_name)
+        return FeatureClassDescription(dataType="Table", shapeType="Unknown",
+                                       spatialReference=SpatialReferenceDescription(name="Unknown"),
+                                       fields=fields, OIDFieldName=oid_field_name)
+
+    def exists(self, feature_dataset, feature_class):
+        return feature_class in self.list_feature_classes(feature_dataset)
+
+    def get_count(self, feature_dataset, feature_class):
+        with closing(self.connect()) as connection:
+            return connection.execute("SELECT COUNT(*) FROM {}".format(
+                GeoPackageWorkspace.quote_identifier(GeoPackageWorkspace.get_table_name(feature_class)))).fetchone()[0]
+
+    def get_max_value(self, feature_dataset, feature_class, field_name):
+        with closing(self.connect()) as connection:
+            return connection.execute("SELECT MAX({}) FROM {}".format(
+                GeoPackageWorkspace.quote_identifier(field_name),
+                GeoPackageWorkspace.quote_identifier(GeoPackageWorkspace.get_table_name(feature_class)))).fetchone()[0]
+
+    def get_sql_table_name_parts(self, feature_dataset, feature_class):
+        return (GeoPackageWorkspace.get_table_name(feature_class),)
+
+    def list_domains(self):
+        return []
+
+    def list_feature_classes(self, feature_dataset):
+        with closing(self.connect()) as connection:
+            if GeoPackageWorkspace.is_geopackage(connection):
+                sql = "SELECT table_name FROM gpkg_contents WHERE data_type = 'features' ORDER BY table_name"
+            else:
+                sql = "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            return [self.build_full_name(row[0]) for row in connection.execute(sql)]
+
+    def list_feature_datasets(self):
+        return [self.build_full_name(self.dataset_prefix)]
+
+    def search_cursor(self, feature_dataset, feature_class, field_names, oid_field_name=None, oid_range=None):
+        sql = "SELECT {} FROM {}".format(
+            ", ".join(GeoPackageWorkspace.quote_identifier(name) for name in field_names),
+            GeoPackageWorkspace.quote_identifier(GeoPackageWorkspace.get_table_name(feature_class)))
+        if oid_range is not None:
+            sql += " WHERE {}".format(self.build_oid_range_where_clause(
+                GeoPackageWorkspace.quote_identifier(oid_field_name), oid_range))
+
+        def generate_rows():
+            with closing(self.connect()) as connection:
+                for row in connection.execute(sql):
+                    yield row
+        return closing(generate_rows())
+
+    def search_geometry_cursor(self, feature_dataset, feature_class, oid_field_name=None, oid_range=None):
+        with closing(self.connect()) as connection:
+            geometry_column_name = connection.execute(
+                "SELECT column_name FROM gpkg_geometry_columns WHERE table_name = ?",
+                (GeoPackageWorkspace.get_table_name(feature_class),)).fetchone()[0]
+        strip_header = GeoPackageWorkspace.strip_geopackage_binary_header
+
+        def generate_rows():
+            with self.search_cursor(feature_dataset, feature_class, [geometry_column_name],
+                                    oid_field_name=oid_field_name, oid_range=oid_range) as cursor:
+                for row in cursor:
+                    yield (strip_header(row[0]),)
+        return closing(generate_rows())
+
+    @staticmethod
+    def get_table_name(feature_class):
+        """
+        Get the table name from the three part name of a feature class and return string.
+
+        :param feature_class: three part feature class name
+        :return: string table name
+        """
+        return feature_class.split(".", 2)[2]
+
+    @staticmethod
+    def is_geopackage(connection):
+        """
+        Determine if the database has the gpkg_contents table of a GeoPackage and return boolean.
+
+        :param connection: sqlite3 connection
+        :return: boolean
+        """
+        return connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'gpkg_contents'").fetchone() is not None
+
+    @staticmethod
+    def map_field_type(declared_type, is_primary_key, is_geometry):
+        """
+        Map a declared SQLite column type to an arcpy field type name and return string.
+
+        Follows the SQLite rules for type affinity, with integer primary keys as object ids.
+        :param declared_type: declared column type, for example TEXT(50)
+        :param is_primary_key: whether the column is the primary key
+        :param is_geometry: whether the column is the GeoPackage geometry column
+        :return: string field type
+        """
+        declared_type = (declared_type or "").upper()
+        if is_geometry:
+            return "Geometry"
+        if "INT" in declared_type:
+            if is_primary_key:
+                return "OID"
+            return "SmallInteger" if declared_type.startswith(("SMALLINT", "TINYINT")) else "Integer"
+        if "DATE" in declared_type or "TIME" in declared_type:
+            return "Date"
+        if "CHAR" in declared_type or "CLOB" in declared_type or "TEXT" in declared_type:
+            return "String"
+        if declared_type == "" or "BLOB" in declared_type:
+            return "Blob"
+        return "Double"
+
+    @staticmethod
+    def parse_field_length(declared_type):
+        """
+        Parse the length of a declared column type, for example TEXT(50), and return integer, or 0 if there is none.
+
+        :param declared_type: declared column type
+        :return: integer length
+        """
+        declared_type = declared_type or ""
+        if "(" in declared_type and declared_type.endswith(")"):
+            try:
+                return int(declared_type[declared_type.index("(") + 1:-1].split(",")[0])
+            except ValueError:
+                return 0
+        return 0
+
+    @staticmethod
+    def quote_identifier(name):
+        """
+        Quote a table or column name for use in SQL and return string.
+
+        :param name: table or column name
+        :return: quoted name
+        """
+        return '"{}"'.format(name.replace('"', '""'))
+
+    @staticmethod
+    def strip_geopackage_binary_header(geometry):
+        """
+        Skip the GeoPackage binary header, and envelope, of a geometry value and return the WKB as memoryview.
+
+        Values without the header are returned as they are, as are null values.
+        :param geometry: GeoPackage binary geometry, WKB, or None
+        :return: memoryview of the WKB, or None
+        """
+        if geometry is None or geometry[:2] != GeoPackageWorkspace.GEOPACKAGE_BINARY_MAGIC.value:
+            return geometry
+        envelope_code = (geometry[3] >> 1) & 7
+        envelope_size = (GeoPackageWorkspace.ENVELOPE_SIZES.value[envelope_code]
+                         if envelope_code < len(GeoPackageWorkspace.ENVELOPE_SIZES.value) else 0)
+        return memoryview(geometry)[GeoPackageWorkspace.GEOPACKAGE_BINARY_HEADER_SIZE.value + envelope_size:]
+
+
+class SyntheticWorkspace(WorkspaceInterface):
+    """
+    Generate feature datasets of feature classes with configurable record counts, field counts and null rates.
+
+    Intended for reproducible performance testing of the profiling without arcpy or a database. Every feature class has
+    an OBJECTID field, string fields and numeric fields. Values are seeded by the feature class name so that each run
+    generates the same data. Records are served from a block of pregenerated records, repeated to the record count, so
+    that the time measured is that of the profiling and not of the generation. About null_rate of the values of each
+    non object id field are null, with a quarter of the string nulls being empty or blank strings.
+    Geometries are points within the extent, as WKB, served from a block the same way, with about null_rate of them
+    null. Each cursor builds its own blocks, so concurrent cursors are safe, as are concurrent metadata calls.
+    """
+    Variable = namedtuple("Variable", "value")
+    BLOCK_RECORD_COUNT = Variable(value=1009)
+    EXTENT = Variable(value=(185000.0, 25000.0, 570000.0, 230000.0))
+    OID_FIELD_NAME = Variable(value="OBJECTID")
+    SPATIAL_REFERENCE_NAME = Variable(value="NAD_1983_StatePlane_Maryland_FIPS_1900_Meters")
+
+    def __init__(self, environment_name="Synthetic", feature_dataset_count=1, feature_class_count=4,
+                 record_count=100000, string_field_count=10, numeric_field_count=10, null_rate=0.1,
+                 max_string_length=50, domain_count=2, seed=0):
+        super().__init__(environment_name=environment_name, concurrent_cursors=True, concurrent_metadata_calls=True)
+        self.domain_count = domain_count
+        self.feature_class_count = feature_class_count
+        self.feature_dataset_count = feature_dataset_count
+        self.max_string_length = max_string_length
+        self.null_rate = null_rate
+        self.numeric_field_count = numeric_field_count
+        self.record_count = record_count
+        self.seed = seed
+        self.string_field_count = string_field_count
+
+    def build_fields(self):
+        """
+        Build the field descriptions shared by the synthetic feature classes and return list.
+
+        :return: list of FieldDescription
+        """
+        fields = [FieldDescription(name=SyntheticWorkspace.OID_FIELD_NAME.value,
+                                   baseName=SyntheticWorkspace.OID_FIELD_NAME.value,
+                                   aliasName=SyntheticWorkspace.OID_FIELD_NAME.value, type="OID", defaultValue=None,
+                                   domain="", isNullable=False, length=4, precision=0, scale=0, required=True)]
+        for index in range(1, self.string_field_count + 1):
+            name = "TEXT_FIELD_{}".format(index)
+            fields.append(FieldDescription(name=name, baseName=name, aliasName="Text Field {}".format(index),
+                                           type="String", defaultValue=None, domain="", isNullable=True,
+                                           length=self.max_string_length, precision=0, scale=0, required=False))
+        for index in range(1, self.numeric_field_count + 1):
+            name = "NUMBER_FIELD_{}".format(index)
+            fields.append(FieldDescription(name=name, baseName=name, aliasName="Number Field {}".format(index),
+                                           type="Double", defaultValue=None, domain="", isNullable=True,
+                                           length=8, precision=0, scale=0, required=False))
+        return fields
+
+    def build_geometry_block(self, feature_class):
+        """
+        Generate the block of point geometries, as WKB or None, repeated to serve a feature class and return list.
+
+        :param feature_class: feature class name, used to seed the values
+        :return: list of WKB bytes or None
+        """
+        randomizer = random.Random("{}:{}:geometry".format(self.seed, feature_class))
+        x_min, y_min, x_max, y_max = SyntheticWorkspace.EXTENT.value
+        return [None if randomizer.random() < self.null_rate
+                else struct.pack("<BIdd", 1, 1, randomizer.uniform(x_min, x_max), randomizer.uniform(y_min, y_max))
+                for _ in range(SyntheticWorkspace.BLOCK_RECORD_COUNT.value)]
+
+    def build_record_block(self, feature_class):
+        """
+        Generate the block of records, without object ids, repeated to serve a feature class and return list.
+
+        :param feature_class: feature class name, used to seed the values
+        :return: list of record tuples in field order, after the object id
+        """
+        randomizer = random.Random("{}:{}".format(self.seed, feature_class))
+        blank_values = ("", " ")
+        records = []
+        for _ in range(SyntheticWorkspace.BLOCK_RECORD_COUNT.value):
+            record = []
+            for _ in range(self.string_field_count):
+                if randomizer.random() >= self.null_rate:
+                    record.append("x" * randomizer.randint(1, self.max_string_length))
+                elif randomizer.random() < 0.25:
+                    record.append(randomizer.choice(blank_values))
+                else:
+                    record.append(None)
+            for _ in range(self.numeric_field_count):
+                record.append(None if randomizer.random() < self.null_rate else randomizer.uniform(-1000.0, 1000.0))
+            records.append(tuple(record))
+        return records
+
+    def describe(self, feature_dataset, feature_class):
+        return FeatureClassDescription(dataType="FeatureClass", shapeType="Point",
+                                       spatialReference=SpatialReferenceDescription(
+                                           name=SyntheticWorkspace.SPATIAL_REFERENCE_NAME.value),
+                                       fields=self.build_fields(),
+                                       OIDFieldName=SyntheticWorkspace.OID_FIELD_NAME.value)
+
+    def exists(self, feature_dataset, feature_class):
+        return feature_class in self.list_feature_classes(feature_dataset)
+
+    def get_count(self, feature_dataset, feature_class):
+        return self.record_count
+
+    def get_max_value(self, feature_dataset, feature_class, field_name):
+        if field_name == SyntheticWorkspace.OID_FIELD_NAME.value:
+            return self.record_count if self.record_count > 0 else None
+        with self.search_cursor(feature_dataset, feature_class, [field_name]) as cursor:
+            return max((row[0] for row in cursor if row[0] is not None), default=None)
+
+    def list_domains(self):
+        return [DomainDescription(name="SyntheticDomain{}".format(index),
+                                  description="Synthetic coded value domain {}".format(index),
+                                  domainType="CodedValue", type="Short",
+                                  codedValues={code: "Value {}".format(code) for code in range(1, 6)},
+                                  owner="SDE", range=[])
+                for index in range(1, self.domain_count + 1)]
+
+    def list_feature_classes(self, feature_dataset):
+        dataset_index = feature_dataset.rsplit("_", 1)[-1]
+        return ["{}.SDE.SYNTHETIC_FC_{}_{}".format(self.environment_name, dataset_index, index)
+                for index in range(1, self.feature_class_count + 1)]
+
+    def list_feature_datasets(self):
+        return ["{}.SDE.SYNTHETIC_FD_{}".format(self.environment_name, index)
+                for index in range(1, self.feature_dataset_count + 1)]
+
+    def search_cursor(self, feature_dataset, feature_class, field_names, oid_field_name=None, oid_range=None):
+        all_field_names = [field.baseName for field in self.build_fields()]
+        indexes = [all_field_names.index(name) for name in field_names]
+        select_all = indexes == list(range(len(all_field_names)))
+        record_block = self.build_record_block(feature_class)
+        block_record_count = len(record_block)
+        low, high = 1, self.record_count + 1
+        if oid_range is not None:
+            low, high = max(low, int(oid_range[0])), min(high, int(oid_range[1]))
+
+        def generate_rows():
+            for oid in range(low, high):
+                record = (oid,) + record_block[oid % block_record_count]
+                yield record if select_all else tuple(record[index] for index in indexes)
+        return closing(generate_rows())
+
+    def search_geometry_cursor(self, feature_dataset, feature_class, oid_field_name=None, oid_range=None):
+        geometry_block = self.build_geometry_block(feature_class)
+        block_record_count = len(geometry_block)
+        low, high = 1, self.record_count + 1
+        if oid_range is not None:
+            low, high = max(low, int(oid_range[0])), min(high, int(oid_range[1]))
+        return closing((geometry_block[oid % block_record_count],) for oid in range(low, high))
@@ -0,0 +1,225 @@
+"""
+Tests of the feature class inspection, through an in memory workspace so that neither arcpy nor a database is needed.
+Run: python -m pytest tests
+"""
+from contextlib import closing
+from itertools import islice
+import datetime
+import FeatureClassInspection_Class
+import math
+import os
+import tempfile
+import threading
+import unittest
+import Workspace_Class
+
+DATABASE_FLAG_NUMERIC = -9999
+
+
+def build_field(name, field_type, length=50):
+    """Build a field description and return Workspace_Class.FieldDescription"""
+    return Workspace_Class.FieldDescription(name=name, baseName=name, aliasName=name, type=field_type,
+                                            defaultValue=None, domain="", isNullable=True, length=length,
+                                            precision=0, scale=0, required=False)
+
+
+def build_workspace(fields, rows, feature_dataset="FD", feature_class="FC",
+                    workspace_class=Workspace_Class.InMemoryWorkspace):
+    """Build an in memory workspace holding one feature class of the fields and rows provided and return it"""
+    description = Workspace_Class.FeatureClassDescription(
+        dataType="FeatureClass", shapeType="Point",
+        spatialReference=Workspace_Class.SpatialReferenceDescription(name="Unknown"), fields=fields,
+        OIDFieldName="OBJECTID")
+    return workspace_class(environment_name="Test", domains=[],
+                           feature_datasets={feature_dataset: {feature_class: (description, rows)}})
+
+
+class ChangeFingerprintTest(unittest.TestCase):
+
+    def build_fingerprint(self, fields, rows):
+        inspection = FeatureClassInspection_Class.FeatureClassInspection(
+            workspace=build_workspace(fields=fields, rows=rows), date_string="2018-05-17",
+            database_flag=DATABASE_FLAG_NUMERIC, chunk_size=100)
+        return inspection.build_fingerprint(feature_dataset="FD", feature_class="FC", record_count=len(rows),
+                                            field_objects_list=fields)
+
+    def test_no_fingerprint_without_an_edit_date_field(self):
+        fields = [build_field(name="OBJECTID", field_type="OID"), build_field(name="NAME", field_type="String")]
+        self.assertIsNone(self.build_fingerprint(fields=fields, rows=[(1, "a"), (2, "b")]))
+
+    def test_fingerprint_changes_with_the_edit_date(self):
+        fields = [build_field(name="OBJECTID", field_type="OID"), build_field(name="NAME", field_type="String"),
+                  build_field(name="last_edited_date", field_type="Date")]
+        edit_date = datetime.datetime(2018, 5, 17)
+        rows = [(1, "a", edit_date), (2, "b", edit_date)]
+        fingerprint = self.build_fingerprint(fields=fields, rows=rows)
+        self.assertIsNotNone(fingerprint)
+        self.assertEqual(self.build_fingerprint(fields=fields, rows=list(rows)), fingerprint)
+        rows[1] = (2, "c", edit_date + datetime.timedelta(days=1))
+        self.assertNotEqual(self.build_fingerprint(fields=fields, rows=rows), fingerprint)
+
+
+class EmptySampleWorkspace(Workspace_Class.InMemoryWorkspace):
+    """InMemoryWorkspace whose cursors over object id ranges read no records, as when the sampled ids were deleted"""
+
+    def search_cursor(self, feature_dataset, feature_class, field_names, oid_field_name=None, oid_range=None):
+        if oid_range is not None:
+            return closing(row for row in ())
+        return super().search_cursor(feature_dataset, feature_class, field_names, oid_field_name=oid_field_name,
+                                     oid_range=oid_range)
+
+
+class SamplingTest(unittest.TestCase):
+
+    def test_stats_of_an_empty_sample_are_not_stored_for_reuse(self):
+        fields = [build_field(name="OBJECTID", field_type="OID"), build_field(name="NAME", field_type="String"),
+                  build_field(name="last_edited_date", field_type="Date")]
+        edit_date = datetime.datetime(2018, 5, 17)
+        rows = [(oid, "name {}".format(oid), edit_date) for oid in range(1, 101)]
+        workspace = build_workspace(fields=fields, rows=rows, feature_dataset="SDE.OWNER.FD",
+                                    feature_class="SDE.OWNER.FC", workspace_class=EmptySampleWorkspace)
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            inspection = FeatureClassInspection_Class.FeatureClassInspection(
+                workspace=workspace, date_string="2018-05-17", database_flag=DATABASE_FLAG_NUMERIC, chunk_size=100,
+                state_store_path=os.path.join(temporary_directory, "state.sqlite"), sampling_threshold=10,
+                sample_size=5, sample_block_count=2)
+            result = inspection.inspect(task=FeatureClassInspection_Class.FeatureClassTask(
+                feature_dataset="SDE.OWNER.FD", feature_class="SDE.OWNER.FC", metadata=None))
+            self.assertIsNotNone(inspection.build_fingerprint(feature_dataset="SDE.OWNER.FD",
+                                                              feature_class="SDE.OWNER.FC", record_count=len(rows),
+                                                              field_objects_list=fields))
+        self.assertIsNone(result.fingerprint)
+
+
+class FailingCursorWorkspace(Workspace_Class.SyntheticWorkspace):
+    """SyntheticWorkspace whose first cursor of each object id range, and kind, fails after half its records"""
+
+    def __init__(self, **synthetic_arguments):
+        super().__init__(**synthetic_arguments)
+        self.failed_cursor_keys = set()
+        self.lock = threading.Lock()
+
+    def fail_first_cursor(self, cursor_key, cursor):
+        """Return the cursor, or for the first cursor of the key a cursor raising after half its records"""
+        with self.lock:
+            if cursor_key in self.failed_cursor_keys or cursor_key[1] is None:
+                return cursor
+            self.failed_cursor_keys.add(cursor_key)
+        low, high = cursor_key[1]
+
+        def generate_failing_rows():
+            with cursor as rows:
+                for row in islice(rows, (high - low) // 2):
+                    yield row
+            raise IOError("Server timeout in range {}".format(cursor_key[1]))
+        return closing(generate_failing_rows())
+
+    def search_cursor(self, feature_dataset, feature_class, field_names, oid_field_name=None, oid_range=None):
+        return self.fail_first_cursor(cursor_key=("records", oid_range), cursor=super().search_cursor(
+            feature_dataset, feature_class, field_names, oid_field_name=oid_field_name, oid_range=oid_range))
+
+    def search_geometry_cursor(self, feature_dataset, feature_class, oid_field_name=None, oid_range=None):
+        return self.fail_first_cursor(cursor_key=("geometries", oid_range), cursor=super().search_geometry_cursor(
+            feature_dataset, feature_class, oid_field_name=oid_field_name, oid_range=oid_range))
+
+
+class SingleCursorWorkspace(Workspace_Class.SyntheticWorkspace):
+    """
+    SyntheticWorkspace that does not declare concurrent cursors safe and records the object id range and thread of
+    each records cursor opened
+    """
+
+    def __init__(self, **synthetic_arguments):
+        super().__init__(**synthetic_arguments)
+        self.concurrent_cursors = False
+        self.cursor_thread_ids = set()
+        self.oid_ranges_read = []
+
+    def search_cursor(self, feature_dataset, feature_class, field_names, oid_field_name=None, oid_range=None):
+        self.cursor_thread_ids.add(threading.get_ident())
+        self.oid_ranges_read.append(oid_range)
+        return super().search_cursor(feature_dataset, feature_class, field_names, oid_field_name=oid_field_name,
+                                     oid_range=oid_range)
+
+
+class SingleCursorFailingWorkspace(SingleCursorWorkspace, FailingCursorWorkspace):
+    """SingleCursorWorkspace whose first cursor of each object id range, and kind, fails after half its records"""
+
+
+class PartitionedScanTest(unittest.TestCase):
+    PARTITION_COUNT = 8
+    RECORD_COUNT = 4000
+
+    def inspect(self, workspace, partition_threshold):
+        """Inspect the first synthetic feature class, with statistics and geometry, and return the result"""
+        feature_dataset = workspace.list_feature_datasets()[0]
+        inspection = FeatureClassInspection_Class.FeatureClassInspection(
+            workspace=workspace, date_string="2018-05-17", database_flag=DATABASE_FLAG_NUMERIC, chunk_size=500,
+            compute_field_statistics=True, compute_geometry_profile=True, partition_threshold=partition_threshold,
+            partition_record_count=PartitionedScanTest.RECORD_COUNT // PartitionedScanTest.PARTITION_COUNT,
+            partition_thread_count=4, partition_backoff_seconds=0.0)
+        return inspection.inspect(task=FeatureClassInspection_Class.FeatureClassTask(
+            feature_dataset=feature_dataset, feature_class=workspace.list_feature_classes(feature_dataset)[0]))
+
+    def assertInspectionsEqual(self, result, expected_result):
+        self.assertEqual(result.null_counts, expected_result.null_counts)
+        self.assertEqual(result.max_char_lengths, expected_result.max_char_lengths)
+        self.assertEqual(result.geometry_profile, expected_result.geometry_profile)
+        self.assertEqual(result.field_statistics.keys(), expected_result.field_statistics.keys())
+        for field_name, expected_statistics in expected_result.field_statistics.items():
+            statistics = result.field_statistics[field_name]
+            self.assertEqual(statistics[:3], expected_statistics[:3], field_name)
+            for value, expected_value in zip(statistics[3:5], expected_statistics[3:5]):
+                self.assertTrue(math.isclose(value, expected_value, rel_tol=1e-9, abs_tol=1e-9), field_name)
+
+    def get_partition_attributes(self, result):
+        """Get the partition counts of the spans of an inspection and return list of tuples"""
+        return [(span["partitions"], span["partition_retries"], span["partitions_failed"])
+                for span in result.timing_spans if "partitions" in span]
+
+    def test_partitioned_scan_matches_single_cursor(self):
+        workspace = Workspace_Class.SyntheticWorkspace(record_count=PartitionedScanTest.RECORD_COUNT)
+        single_result = self.inspect(workspace=workspace, partition_threshold=None)
+        partitioned_result = self.inspect(workspace=workspace, partition_threshold=1)
+        self.assertEqual(self.get_partition_attributes(result=partitioned_result),
+                         [(PartitionedScanTest.PARTITION_COUNT, 0, 0)] * 2)
+        self.assertInspectionsEqual(result=partitioned_result, expected_result=single_result)
+
+    def test_partitions_failing_part_way_are_retried_into_new_engines(self):
+        single_result = self.inspect(
+            workspace=Workspace_Class.SyntheticWorkspace(record_count=PartitionedScanTest.RECORD_COUNT),
+            partition_threshold=None)
+        partitioned_result = self.inspect(
+            workspace=FailingCursorWorkspace(record_count=PartitionedScanTest.RECORD_COUNT), partition_threshold=1)
+        self.assertEqual(self.get_partition_attributes(result=partitioned_result),
+                         [(PartitionedScanTest.PARTITION_COUNT, PartitionedScanTest.PARTITION_COUNT, 0)] * 2)
+        self.assertInspectionsEqual(result=partitioned_result, expected_result=single_result)
+
+    def test_workspace_without_concurrent_cursors_reads_partitions_one_at_a_time(self):
+        single_result = self.inspect(
+            workspace=Workspace_Class.SyntheticWorkspace(record_count=PartitionedScanTest.RECORD_COUNT),
+            partition_threshold=None)
+        workspace = SingleCursorWorkspace(record_count=PartitionedScanTest.RECORD_COUNT)
+        partitioned_result = self.inspect(workspace=workspace, partition_threshold=1)
+        self.assertEqual(self.get_partition_attributes(result=partitioned_result),
+                         [(PartitionedScanTest.PARTITION_COUNT, 0, 0)] * 2)
+        self.assertEqual(len(workspace.oid_ranges_read), PartitionedScanTest.PARTITION_COUNT)
+        self.assertEqual(workspace.oid_ranges_read, sorted(workspace.oid_ranges_read))
+        self.assertEqual(workspace.cursor_thread_ids, {threading.get_ident()})
+        self.assertInspectionsEqual(result=partitioned_result, expected_result=single_result)
+        self.assertFalse(Workspace_Class.ArcpyWorkspace(sde_file_path="Production.sde").concurrent_cursors)
+
+    def test_partitions_read_one_at_a_time_are_retried(self):
+        single_result = self.inspect(
+            workspace=Workspace_Class.SyntheticWorkspace(record_count=PartitionedScanTest.RECORD_COUNT),
+            partition_threshold=None)
+        workspace = SingleCursorFailingWorkspace(record_count=PartitionedScanTest.RECORD_COUNT)
+        partitioned_result = self.inspect(workspace=workspace, partition_threshold=1)
+        self.assertEqual(self.get_partition_attributes(result=partitioned_result),
+                         [(PartitionedScanTest.PARTITION_COUNT, PartitionedScanTest.PARTITION_COUNT, 0)] * 2)
+        self.assertEqual(workspace.cursor_thread_ids, {threading.get_ident()})
+        self.assertInspectionsEqual(result=partitioned_result, expected_result=single_result)
+
+
+if __name__ == "__main__":
+    unittest.main()
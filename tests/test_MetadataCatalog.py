@@ -0,0 +1,77 @@
+"""
+Tests of the metadata prefetch, through an in memory workspace, that the pool of threads is used only on workspaces
+declaring concurrent metadata calls safe.
+Run: python -m pytest tests
+"""
+import MetadataCatalog_Class
+import threading
+import time
+import unittest
+import Workspace_Class
+
+
+class ConcurrencyRecordingWorkspace(Workspace_Class.InMemoryWorkspace):
+    """InMemoryWorkspace that records the largest number of its calls made at once"""
+
+    def __init__(self, concurrent_metadata_calls, **workspace_arguments):
+        super().__init__(**workspace_arguments)
+        self.active_call_count = 0
+        self.concurrent_metadata_calls = concurrent_metadata_calls
+        self.lock = threading.Lock()
+        self.max_active_call_count = 0
+
+    def record_call(self, call):
+        """Make the call, holding it open briefly so that overlapping calls are seen, and return its result"""
+        with self.lock:
+            self.active_call_count += 1
+            self.max_active_call_count = max(self.max_active_call_count, self.active_call_count)
+        try:
+            time.sleep(0.005)
+            return call()
+        finally:
+            with self.lock:
+                self.active_call_count -= 1
+
+    def describe(self, feature_dataset, feature_class):
+        return self.record_call(lambda: super(ConcurrencyRecordingWorkspace, self).describe(feature_dataset,
+                                                                                            feature_class))
+
+    def list_feature_classes(self, feature_dataset):
+        return self.record_call(lambda: super(ConcurrencyRecordingWorkspace, self).list_feature_classes(
+            feature_dataset))
+
+
+class MetadataPrefetchTest(unittest.TestCase):
+
+    def build_workspace(self, concurrent_metadata_calls):
+        description = Workspace_Class.FeatureClassDescription(
+            dataType="FeatureClass", shapeType="Point",
+            spatialReference=Workspace_Class.SpatialReferenceDescription(name="Unknown"), fields=[],
+            OIDFieldName=None)
+        feature_datasets = {"SDE.OWNER.FD{}".format(fd_index): {"SDE.OWNER.FC{}_{}".format(fd_index, fc_index):
+                                                                (description, [])
+                                                                for fc_index in range(4)}
+                            for fd_index in range(4)}
+        return ConcurrencyRecordingWorkspace(concurrent_metadata_calls=concurrent_metadata_calls,
+                                             environment_name="Test", domains=[], feature_datasets=feature_datasets)
+
+    def prefetch(self, workspace):
+        return MetadataCatalog_Class.MetadataCatalog.prefetch(workspace=workspace,
+                                                              feature_datasets=workspace.list_feature_datasets(),
+                                                              thread_count=8)
+
+    def test_calls_are_made_one_at_a_time_without_concurrent_metadata_calls(self):
+        workspace = self.build_workspace(concurrent_metadata_calls=False)
+        metadata_catalog = self.prefetch(workspace=workspace)
+        self.assertEqual(workspace.max_active_call_count, 1)
+        self.assertEqual(len(metadata_catalog.metadata_by_feature_class), 16)
+
+    def test_calls_overlap_with_concurrent_metadata_calls(self):
+        workspace = self.build_workspace(concurrent_metadata_calls=True)
+        metadata_catalog = self.prefetch(workspace=workspace)
+        self.assertGreater(workspace.max_active_call_count, 1)
+        self.assertEqual(len(metadata_catalog.metadata_by_feature_class), 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
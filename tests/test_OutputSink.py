@@ -0,0 +1,120 @@
+"""
+Tests of the csv output of the inventory results tables.
+Run: python -m pytest tests
+"""
+import csv
+import FeatureClassObjects_Class
+import os
+import OutputSink_Class
+import tempfile
+import unittest
+import Workspace_Class
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class CSVTableWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temporary_directory.name, "fields.csv")
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def read_rows(self):
+        with open(self.file_path, newline="") as file_handler:
+            return list(csv.reader(file_handler))
+
+    def test_values_round_trip_through_csv_reader(self):
+        rows = [["comma, inside", 'embedded "quotes"', "line\nfeed", "carriage\rreturn", "crlf\r\nend"],
+                ["  leading spaces", "trailing spaces  ", "", True, 1.5]]
+        writer = OutputSink_Class.CSVTableWriter(file_path=self.file_path, headers=["A", "B", "C", "D", "E"])
+        for row in rows:
+            writer.write_row(values_list=row)
+        writer.close()
+        self.assertEqual(self.read_rows(), [["A", "B", "C", "D", "E"]] + [[str(value) for value in row]
+                                                                          for row in rows])
+        self.assertEqual(writer.rows_written, 2)
+
+    def test_quoting_is_minimal_and_rows_end_with_crlf(self):
+        writer = OutputSink_Class.CSVTableWriter(file_path=self.file_path, headers=["A", "B", "C"])
+        writer.write_row(values_list=["plain", 'say "hi"', "a,b"])
+        writer.close()
+        with open(self.file_path, "rb") as file_handler:
+            self.assertEqual(file_handler.read(), b'A,B,C\r\nplain,"say ""hi""","a,b"\r\n')
+
+    def test_bytes_written_match_file_size(self):
+        writer = OutputSink_Class.CSVTableWriter(file_path=self.file_path, headers=["A", "B"])
+        writer.write_row(values_list=["x\ny", 'z"'])
+        self.assertEqual(writer.bytes_written, writer.get_file_size())
+        writer.close()
+
+    def test_append_truncates_to_checkpoint_without_repeating_headers(self):
+        writer = OutputSink_Class.CSVTableWriter(file_path=self.file_path, headers=["A", "B"])
+        writer.write_row(values_list=["1", "kept"])
+        checkpoint_size = writer.get_file_size()
+        writer.write_row(values_list=["2", "lost"])
+        writer.close()
+        writer = OutputSink_Class.CSVTableWriter(file_path=self.file_path, headers=["A", "B"], append=True,
+                                                 truncate_size=checkpoint_size)
+        writer.write_row(values_list=["2", "again"])
+        writer.close()
+        self.assertEqual(self.read_rows(), [["A", "B"], ["1", "kept"], ["2", "again"]])
+
+    def test_field_without_default_value_is_written_as_none(self):
+        field_object = Workspace_Class.FieldDescription(name="NAME", baseName="NAME", aliasName="NAME", type="String",
+                                                        defaultValue=None, domain="", isNullable=True, length=50,
+                                                        precision=0, scale=0, required=False)
+        field_details = FeatureClassObjects_Class.FeatureClassFieldDetails(
+            field_id="FLD", fc_id="FC", field_object=field_object, total_record_count=10, total_null_value_count=2,
+            percent_null=20.0, date_export="2018-05-17", row_id="ROW")
+        values_list = field_details.create_object_field_feature_list()
+        writer = OutputSink_Class.CSVTableWriter(
+            file_path=self.file_path,
+            headers=FeatureClassObjects_Class.FeatureClassFieldDetails.FIELD_HEADERS_LIST.value)
+        writer.write_row(values_list=values_list)
+        writer.close()
+        self.assertEqual(self.read_rows()[1], [str(value) for value in values_list])
+        self.assertEqual(self.read_rows()[1][6], "None")
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class ParquetOutputSinkTest(unittest.TestCase):
+    HEADERS = ("Name", "Total Record Count", "DATE")
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.table_name = OutputSink_Class.OutputSink.FIELDS_TABLE.value
+        self.partition_path = os.path.join(self.temporary_directory.name, self.table_name, "DATE=2018-05-17")
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def create_sink(self, append=False):
+        return OutputSink_Class.ParquetOutputSink(root_path=self.temporary_directory.name,
+                                                  headers_by_table={self.table_name: self.HEADERS},
+                                                  row_group_size=2, append=append)
+
+    def test_part_files_of_checkpoints_are_compacted_on_close(self):
+        output_sink = self.create_sink()
+        for index in range(7):
+            output_sink.write_row(table_name=self.table_name, values_list=["name {}".format(index), index,
+                                                                           "2018-05-17"])
+            if index % 2 == 1:
+                output_sink.checkpoint()
+        self.assertEqual(len(os.listdir(self.partition_path)), 3)
+        output_sink.close()
+        output_sink = self.create_sink(append=True)
+        output_sink.write_row(table_name=self.table_name, values_list=["name 7", 7, "2018-05-17"])
+        output_sink.close()
+        self.assertEqual(os.listdir(self.partition_path), ["2018-05-17_{}.parquet".format(self.table_name)])
+        table = pyarrow.parquet.read_table(os.path.join(self.partition_path, os.listdir(self.partition_path)[0]))
+        self.assertEqual(table.column("Total Record Count").to_pylist(), list(range(8)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+"""
+Property tests of the per field profile accumulators: for random batches of string, numeric and date values, the
+merge of the accumulators of two batches, directly and after serialization, equals the accumulator of both batches
+scanned together.
+Run: python -m pytest tests
+"""
+import ColumnarProfiler_Class
+import datetime
+import GeodatabaseDomain_Class
+import math
+import ProfileAccumulator_Class
+import random
+import unittest
+import Workspace_Class
+
+DATABASE_FLAG_NUMERIC = -9999
+NULL_RATE = 0.3
+TRIAL_COUNT = 200
+
+
+def build_domain_index():
+    """Build a domain index of a coded value domain and a range domain and return it"""
+    return GeodatabaseDomain_Class.GeodatabaseDomainIndex(domain_objects=[
+        Workspace_Class.DomainDescription(name="PLACES", description="", domainType="CodedValue", type="Text",
+                                          codedValues={"Baltimore": "", "Anne Arundel County": ""}, owner="SDE",
+                                          range=None),
+        Workspace_Class.DomainDescription(name="RANGE", description="", domainType="Range", type="Double",
+                                          codedValues=None, owner="SDE", range=(0.0, 900.0))])
+
+
+def build_random_batch(field_type, value_count, randomizer):
+    """Build a batch of string, double or date values, with nulls, blanks and repeated values, and return list"""
+    if field_type == "String":
+        choices = [None, "", " ", "\t", "Baltimore", "Anne Arundel County", "x" * 255] + [
+            "Place {}".format(index) for index in range(randomizer.choice((5, 5000)))]
+        return [randomizer.choice(choices) for _ in range(value_count)]
+    if field_type == "Double":
+        pool = [randomizer.uniform(-1000.0, 1000.0) for _ in range(randomizer.choice((20, 10000)))]
+        return [None if randomizer.random() < NULL_RATE else randomizer.choice(pool) for _ in range(value_count)]
+    start = datetime.datetime(2018, 5, 17)
+    return [None if randomizer.random() < NULL_RATE
+            else start + datetime.timedelta(days=randomizer.randrange(30), microseconds=randomizer.randrange(3))
+            for _ in range(value_count)]
+
+
+class FieldProfileAccumulatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.domain_index = build_domain_index()
+        self.randomizer = random.Random(0)
+
+    def assertProfilesEqual(self, accumulator, expected_accumulator, message):
+        record = accumulator.to_record(database_flag=DATABASE_FLAG_NUMERIC)
+        expected_record = expected_accumulator.to_record(database_flag=DATABASE_FLAG_NUMERIC)
+        self.assertEqual(record[:-1], expected_record[:-1], message)
+        if expected_record.field_statistics is None:
+            self.assertIsNone(record.field_statistics, message)
+            return
+        self.assertEqual(record.field_statistics[:3], expected_record.field_statistics[:3], message)
+        for value, expected_value in zip(record.field_statistics[3:5], expected_record.field_statistics[3:5]):
+            self.assertTrue(math.isclose(value, expected_value, rel_tol=1e-9, abs_tol=1e-9), message)
+        expected_statistics = expected_accumulator.statistics
+        if expected_statistics.distinct_count_sketch.estimate() <= expected_statistics.frequent_values_summary.capacity:
+            self.assertEqual(accumulator.statistics.frequent_values_summary.counts,
+                             expected_statistics.frequent_values_summary.counts, message)
+
+    def create_random_accumulator_factory(self, trial_index):
+        """Choose a random field configuration and return a callable creating accumulators of it, and the type"""
+        field_type = self.randomizer.choice(("String", "Double", "Date"))
+        domain_rule = None
+        if field_type != "Date" and self.randomizer.random() < 0.5:
+            domain_rule = self.domain_index.get_rule(domain_name="PLACES" if field_type == "String" else "RANGE")
+        statistics_field_type = field_type if self.randomizer.random() < 0.75 else None
+
+        def create_accumulator():
+            return ProfileAccumulator_Class.FieldProfileAccumulator(
+                field_name="FIELD_{}".format(trial_index), is_string=field_type == "String",
+                statistics_field_type=statistics_field_type, domain_rule=domain_rule)
+        return create_accumulator, field_type
+
+    def test_merge_of_two_batches_equals_one_scan(self):
+        for trial_index in range(TRIAL_COUNT):
+            create_accumulator, field_type = self.create_random_accumulator_factory(trial_index=trial_index)
+            batches = [build_random_batch(field_type=field_type, value_count=self.randomizer.choice((0, 1, 100, 3000)),
+                                          randomizer=self.randomizer) for _ in range(2)]
+            whole_accumulator = create_accumulator()
+            whole_accumulator.update(batch=tuple(batches[0] + batches[1]))
+            part_accumulators = []
+            for batch in batches:
+                part_accumulator = create_accumulator()
+                part_accumulator.update(batch=tuple(batch))
+                part_accumulators.append(part_accumulator)
+            merged_accumulator = create_accumulator()
+            for part_accumulator in part_accumulators:
+                merged_accumulator.merge(other=part_accumulator)
+            self.assertProfilesEqual(accumulator=merged_accumulator, expected_accumulator=whole_accumulator,
+                                     message="trial {}".format(trial_index))
+
+    def test_serialized_accumulators_merge_and_update_as_the_originals(self):
+        for trial_index in range(TRIAL_COUNT):
+            create_accumulator, field_type = self.create_random_accumulator_factory(trial_index=trial_index)
+            batches = [build_random_batch(field_type=field_type, value_count=self.randomizer.choice((0, 1, 100, 3000)),
+                                          randomizer=self.randomizer) for _ in range(3)]
+            whole_accumulator = create_accumulator()
+            whole_accumulator.update(batch=tuple(batches[0] + batches[1] + batches[2]))
+            first_accumulator = create_accumulator()
+            first_accumulator.update(batch=tuple(batches[0]))
+            second_accumulator = create_accumulator()
+            second_accumulator.update(batch=tuple(batches[1]))
+            round_trip_accumulator = ProfileAccumulator_Class.FieldProfileAccumulator.deserialize(
+                serialized=first_accumulator.serialize(), domain_rule=first_accumulator.domain_rule)
+            self.assertProfilesEqual(accumulator=round_trip_accumulator, expected_accumulator=first_accumulator,
+                                     message="trial {} round trip".format(trial_index))
+            round_trip_accumulator.merge(other=ProfileAccumulator_Class.FieldProfileAccumulator.deserialize(
+                serialized=second_accumulator.serialize()))
+            round_trip_accumulator.update(batch=tuple(batches[2]))
+            self.assertProfilesEqual(accumulator=round_trip_accumulator, expected_accumulator=whole_accumulator,
+                                     message="trial {}".format(trial_index))
+
+    def test_unevaluated_profile_is_output_as_the_database_flag(self):
+        accumulator = ProfileAccumulator_Class.FieldProfileAccumulator(
+            field_name="NAME", is_string=True, domain_rule=self.domain_index.get_rule(domain_name="PLACES"))
+        accumulator.merge(other=ProfileAccumulator_Class.FieldProfileAccumulator.deserialize(
+            serialized=accumulator.serialize()))
+        self.assertEqual(accumulator.to_record(database_flag=DATABASE_FLAG_NUMERIC),
+                         ProfileAccumulator_Class.FieldProfileRecord(
+                             field_name="NAME", record_count=0, null_count=DATABASE_FLAG_NUMERIC,
+                             max_char_length=DATABASE_FLAG_NUMERIC, out_of_domain_count=DATABASE_FLAG_NUMERIC,
+                             field_statistics=None))
+
+    def test_profiles_of_other_configurations_are_not_merged(self):
+        accumulator = ProfileAccumulator_Class.FieldProfileAccumulator(field_name="NAME", is_string=True)
+        for other in (ProfileAccumulator_Class.FieldProfileAccumulator(field_name="OTHER", is_string=True),
+                      ProfileAccumulator_Class.FieldProfileAccumulator(field_name="NAME", is_string=False),
+                      ProfileAccumulator_Class.FieldProfileAccumulator(field_name="NAME", is_string=True,
+                                                                       statistics_field_type="String")):
+            with self.assertRaises(ValueError):
+                accumulator.merge(other=other)
+
+
+class ColumnarProfilingEngineMergeTest(unittest.TestCase):
+
+    def test_merged_engines_of_parts_equal_one_engine(self):
+        randomizer = random.Random(1)
+        field_types = ["String", "Double", "Date", "String"]
+        field_names = ["FIELD_{}".format(index) for index in range(len(field_types))]
+        columns = [build_random_batch(field_type=field_type, value_count=2000, randomizer=randomizer)
+                   for field_type in field_types]
+        rows = list(zip(*columns))
+        domain_index = build_domain_index()
+
+        def create_engine():
+            return ColumnarProfiler_Class.ColumnarProfilingEngine(
+                field_names=field_names, string_field_names=["FIELD_0", "FIELD_3"],
+                database_flag=DATABASE_FLAG_NUMERIC, field_types=field_types,
+                field_domain_rules={"FIELD_0": domain_index.get_rule(domain_name="PLACES"),
+                                    "FIELD_1": domain_index.get_rule(domain_name="RANGE")})
+        whole_engine = create_engine()
+        whole_engine.profile_cursor(cursor=rows, chunk_size=300)
+        merged_engine = create_engine()
+        for part_start in range(0, len(rows), 700):
+            part_engine = create_engine()
+            part_engine.profile_cursor(cursor=rows[part_start:part_start + 700], chunk_size=300)
+            merged_engine.merge(other=part_engine)
+        self.assertEqual(merged_engine.records_processed, len(rows))
+        self.assertEqual(merged_engine.null_counts, whole_engine.null_counts)
+        self.assertEqual(merged_engine.max_char_lengths, whole_engine.max_char_lengths)
+        self.assertEqual(merged_engine.out_of_domain_counts, whole_engine.out_of_domain_counts)
+        self.assertEqual(set(merged_engine.max_char_lengths), {"FIELD_0", "FIELD_3"})
+        self.assertEqual(set(merged_engine.out_of_domain_counts), {"FIELD_0", "FIELD_1"})
+        for field_name, statistics in merged_engine.get_field_statistics().items():
+            expected_statistics = whole_engine.get_field_statistics()[field_name]
+            self.assertEqual(statistics[:3], expected_statistics[:3], field_name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Equivalence tests of the RenameEngine of the GODI results cleaning against the original revise_names function, on the
+SportVenues mapping, for values holding no key, one key, a key contained in another, and several keys.
+Run: python -m pytest tests
+"""
+import os
+import random
+import sys
+import unittest
+
+RESULTS_WRANGLING_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                      "ResultsWranglingScripts")
+sys.path.append(RESULTS_WRANGLING_PATH)
+import RenameEngine_Class  # noqa: E402
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+
+def revise_names(godi_value, replace_dict):
+    """The original rename of GODIresultscleaning.py, with the replacement dictionary as a parameter"""
+    if "sportvenues" in godi_value.lower():
+        pass
+    else:
+        return godi_value
+
+    for key, value in replace_dict.items():
+        if key in godi_value:
+            result = godi_value.replace(key, value)
+            return result
+        else:
+            continue
+
+    return godi_value
+
+
+class RenameEngineEquivalenceTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = RenameEngine_Class.RenameEngine.from_mapping_files(
+            file_paths=[os.path.join(RESULTS_WRANGLING_PATH, "RenameMappings_SportVenues.json")])
+        keys = list(cls.engine.mappings)
+        randomizer = random.Random(0)
+        cls.values = ["Production.SDE.THEME_Dataset_DOIT", "sde_Production.SDE.SOCI_SportVenues_Unlisted", "",
+                      "Production.SDE.SOCI_SportVenues_Archery|SOCI_SportVenues_BMX",
+                      "Production.SDE.SOCI_SportVenues_BMX|SOCI_SportVenues_Archery",
+                      "Production.SDE.SOCI_SportVenues_CrossCountrySkiing",
+                      "sde_Production.SDE.SOCI_SportVenues_Boxing_2018-05-17_SOCI_SportVenues_Boxing"]
+        for index in range(500):
+            fragments = [randomizer.choice(keys) for _ in range(randomizer.randint(1, 3))]
+            cls.values.append("Production.SDE.{}_{}".format("_".join(fragments), index))
+
+    def test_values_renamed_as_original(self):
+        for value in self.values:
+            self.assertEqual(self.engine.rename_value(value=value),
+                             revise_names(godi_value=value, replace_dict=self.engine.mappings), value)
+
+    def test_only_the_first_listed_key_found_is_replaced(self):
+        self.assertEqual(self.engine.rename_value(value="SOCI_SportVenues_Archery|SOCI_SportVenues_BMX"),
+                         "SOCI_Archery_MDSports|SOCI_SportVenues_BMX")
+
+    @unittest.skipIf(pandas is None, "pandas is not installed")
+    def test_series_renamed_as_original(self):
+        series = pandas.Series(self.values * 3)
+        self.assertEqual(self.engine.rename_series(series=series).tolist(),
+                         [revise_names(godi_value=value, replace_dict=self.engine.mappings) for value in series])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+Tests of the batched Socrata upserts, with fake clients in place of sodapy, so nothing is sent over the network.
+Run: python -m pytest tests
+"""
+import SocrataPublishing_Class
+import threading
+import time
+import unittest
+
+
+class FakeSocrataClient:
+    """
+    Fake sodapy client that fails every batch upsert and fails single record upserts of the row ids provided, either by
+    raising or by reporting a row error in the response, as Socrata does for a bad record.
+    """
+
+    def __init__(self, raising_row_ids=(), row_error_row_ids=(), batch_response=None):
+        self.batch_response = batch_response
+        self.payloads = []
+        self.raising_row_ids = set(raising_row_ids)
+        self.row_error_row_ids = set(row_error_row_ids)
+
+    def upsert(self, dataset_identifier, payload, content_type):
+        self.payloads.append(payload)
+        if len(payload) > 1:
+            if self.batch_response is None:
+                raise ConnectionError("Batch upsert failed")
+            return self.batch_response
+        row_id = payload[0]["ROW_ID"]
+        if row_id in self.raising_row_ids:
+            raise ConnectionError("Upsert of {} failed".format(row_id))
+        if row_id in self.row_error_row_ids:
+            return {"Rows Created": 0, "Rows Updated": 0, "Rows Deleted": 0, "Errors": 1}
+        return {"Rows Created": 1, "Rows Updated": 0, "Rows Deleted": 0, "Errors": 0}
+
+
+class SlowSocrataClient(FakeSocrataClient):
+    """Fake sodapy client that waits before each upsert, so that the background queue fills"""
+
+    def __init__(self, delay_seconds, **kwargs):
+        super().__init__(**kwargs)
+        self.delay_seconds = delay_seconds
+
+    def upsert(self, dataset_identifier, payload, content_type):
+        time.sleep(self.delay_seconds)
+        return super().upsert(dataset_identifier=dataset_identifier, payload=payload, content_type=content_type)
+
+
+def build_records(count):
+    """Build record dictionaries with distinct row ids and return list"""
+    return [{"ROW_ID": "ROW_{}".format(number), "VALUE": number} for number in range(count)]
+
+
+class SocrataUpsertBatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.published_calls = []
+
+    def create_batcher(self, client, max_records=5):
+        return SocrataPublishing_Class.SocrataUpsertBatcher(
+            client=client, dataset_identifier="abcd-1234", max_records=max_records,
+            published_callback=lambda dataset_identifier, records: self.published_calls.append(
+                (dataset_identifier, [record["ROW_ID"] for record in records])))
+
+    def test_failed_batch_is_retried_per_record_and_failures_retained(self):
+        client = FakeSocrataClient(raising_row_ids={"ROW_1"}, row_error_row_ids={"ROW_3"})
+        batcher = self.create_batcher(client=client)
+        for record in build_records(count=5):
+            batcher.add(record=record)
+        batcher.close()
+        self.assertEqual(batcher.upserted_record_count, 3)
+        self.assertEqual(batcher.upsert_call_count, 6)
+        self.assertEqual([failed_record.record["ROW_ID"] for failed_record in batcher.failed_records],
+                         ["ROW_1", "ROW_3"])
+        self.assertTrue(all(failed_record.dataset_identifier == "abcd-1234"
+                            for failed_record in batcher.failed_records))
+        self.assertIsInstance(batcher.failed_records[0].exception, ConnectionError)
+        self.assertIsInstance(batcher.failed_records[1].exception, ValueError)
+        self.assertEqual(self.published_calls, [("abcd-1234", ["ROW_0"]), ("abcd-1234", ["ROW_2"]),
+                                                ("abcd-1234", ["ROW_4"])])
+
+    def test_batch_reporting_row_errors_is_retried_per_record(self):
+        client = FakeSocrataClient(batch_response={"Errors": 1})
+        batcher = self.create_batcher(client=client)
+        for record in build_records(count=3):
+            batcher.add(record=record)
+        batcher.close()
+        self.assertEqual(batcher.upserted_record_count, 3)
+        self.assertEqual(batcher.failed_records, [])
+        self.assertEqual(len(self.published_calls), 3)
+
+    def test_successful_batches_publish_whole_batches(self):
+        client = FakeSocrataClient(batch_response={"Errors": 0})
+        batcher = self.create_batcher(client=client, max_records=2)
+        for record in build_records(count=5):
+            batcher.add(record=record)
+        batcher.close()
+        self.assertEqual(batcher.batch_count, 3)
+        self.assertEqual(batcher.upserted_record_count, 5)
+        self.assertEqual(batcher.failed_records, [])
+        self.assertEqual(self.published_calls, [("abcd-1234", ["ROW_0", "ROW_1"]), ("abcd-1234", ["ROW_2", "ROW_3"]),
+                                                ("abcd-1234", ["ROW_4"])])
+
+
+class BackgroundSocrataUpsertBatcherTest(unittest.TestCase):
+    CLOSE_TIMEOUT_SECONDS = 10.0
+
+    def close_with_timeout(self, batcher):
+        """Close the batcher on another thread and fail the test if closing does not return in time"""
+        closer = threading.Thread(target=batcher.close, daemon=True)
+        closer.start()
+        closer.join(timeout=BackgroundSocrataUpsertBatcherTest.CLOSE_TIMEOUT_SECONDS)
+        self.assertFalse(closer.is_alive(), "close did not return")
+
+    def test_batches_are_retained_as_failed_when_the_client_factory_raises(self):
+        def raise_on_create():
+            raise ConnectionError("No client")
+
+        batcher = SocrataPublishing_Class.BackgroundSocrataUpsertBatcher(
+            client_factory=raise_on_create, dataset_identifier="abcd-1234", concurrency=2, queue_size=1,
+            max_records=2)
+        for record in build_records(count=7):
+            batcher.add(record=record)
+        self.close_with_timeout(batcher=batcher)
+        self.assertEqual(batcher.upserted_record_count, 0)
+        self.assertEqual(sorted(failed_record.record["ROW_ID"] for failed_record in batcher.failed_records),
+                         sorted("ROW_{}".format(number) for number in range(7)))
+        self.assertTrue(all(isinstance(failed_record.exception, ConnectionError)
+                            for failed_record in batcher.failed_records))
+        self.assertTrue(batcher.batch_queue.empty())
+
+    def test_close_with_a_full_queue_upserts_or_fails_every_record(self):
+        published_row_ids = []
+        client = SlowSocrataClient(delay_seconds=0.02, raising_row_ids={"ROW_30"}, batch_response={"Errors": 0})
+        batcher = SocrataPublishing_Class.BackgroundSocrataUpsertBatcher(
+            client_factory=lambda: client, dataset_identifier="abcd-1234", queue_size=1, max_records=3,
+            published_callback=lambda dataset_identifier, records: published_row_ids.extend(
+                record["ROW_ID"] for record in records))
+        for record in build_records(count=31):
+            batcher.add(record=record)
+        self.assertTrue(batcher.batch_queue.full())
+        self.close_with_timeout(batcher=batcher)
+        failed_row_ids = [failed_record.record["ROW_ID"] for failed_record in batcher.failed_records]
+        self.assertEqual(failed_row_ids, ["ROW_30"])
+        self.assertEqual(batcher.upserted_record_count, 30)
+        self.assertEqual(sorted(published_row_ids + failed_row_ids),
+                         sorted("ROW_{}".format(number) for number in range(31)))
+        self.assertGreater(batcher.queue_wait_seconds, 0.0)
+        self.assertEqual(batcher.workers, [])
+
+
+if __name__ == "__main__":
+    unittest.main()